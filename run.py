@@ -100,4 +100,7 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # Bắt buộc cho process pool (tính lại báo cáo) khi chạy từ file thực thi Windows
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Capacity Solver - Khả năng sản xuất của toàn bộ công thức từ tồn kho hiện tại
+
+Với mỗi preset cám và preset mix được liên kết, tính số mẻ tối đa có thể sản xuất và các
+nguyên liệu giới hạn bằng ma trận (preset × nguyên liệu) của FeedUsageEngine. Hỗ trợ giả định
+"what-if": thay đổi tồn kho (ví dụ nhận thêm 10 tấn Bắp) và đổi công thức của một khu, khi đó
+kế hoạch sản xuất hàng ngày (lấy từ các báo cáo gần đây) được tính lại số ngày đủ nguyên liệu.
+
+Số mẻ trong module này là mẻ thực tế (giá trị hiển thị 0.5 = 1 mẻ).
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from src.core.feed_usage_engine import (get_feed_usage_engine, BATCH_MULTIPLIER,
+                                            MIX_PRESET_BATCHES, COMBINED_INGREDIENT, NO_MIX)
+    from src.core.inventory_ledger import load_warehouse_inventory
+    from src.utils.persistent_paths import persistent_path_manager
+    from src.utils.json_document_cache import load_json_document
+except ImportError:
+    from core.feed_usage_engine import (get_feed_usage_engine, BATCH_MULTIPLIER,
+                                        MIX_PRESET_BATCHES, COMBINED_INGREDIENT, NO_MIX)
+    from core.inventory_ledger import load_warehouse_inventory
+    from utils.persistent_paths import persistent_path_manager
+    from utils.json_document_cache import load_json_document
+
+# Sai số tương đối khi xác định các nguyên liệu cùng giới hạn
+LIMIT_TOLERANCE = 1e-9
+
+# Số ngày báo cáo gần nhất dùng để lập kế hoạch sản xuất hàng ngày
+DEFAULT_PLAN_DAYS = 7
+
+# Kiểu dữ liệu thay đổi tồn kho: {'feed': {tên: lượng kg}, 'mix': {...}}
+StockChanges = Dict[str, Dict[str, float]]
+
+
+class CapacitySolver:
+    """Số mẻ tối đa và nguyên liệu giới hạn cho mọi preset cám + mix liên kết"""
+
+    def __init__(self, formula_manager=None, feed_usage_engine=None, reports_dir: Path = None):
+        """Khởi tạo (engine dùng chung được dùng nếu không truyền vào)"""
+        self._engine = feed_usage_engine
+        self._formula_manager = formula_manager
+        self.reports_dir = Path(reports_dir) if reports_dir else persistent_path_manager.reports_path
+
+    @property
+    def engine(self):
+        """FeedUsageEngine cung cấp ma trận preset"""
+        if self._engine is None:
+            self._engine = get_feed_usage_engine(self._formula_manager)
+        return self._engine
+
+    # === Ma trận nhu cầu ===
+
+    def _requirements(self) -> Dict[str, Any]:
+        """Lượng nguyên liệu cho 1 mẻ thực tế của từng preset và chỉ số preset mix liên kết"""
+        feed_matrix, mix_matrix = self.engine.get_preset_matrices()
+        preset_links = (getattr(self.engine.formula_manager, 'formula_links', None) or {}).get('preset_links', {})
+
+        links = np.array([mix_matrix.index.get(preset_links.get(name), NO_MIX) for name in feed_matrix.names],
+                         dtype=np.intp)
+
+        # "Nguyên liệu tổ hợp" được cấp từ kho mix khi ô có dùng mix
+        feed_need = feed_matrix.matrix
+        feed_need_with_mix = feed_need.copy()
+        combined = feed_matrix.ingredients.index(COMBINED_INGREDIENT) \
+            if COMBINED_INGREDIENT in feed_matrix.ingredients else None
+        if combined is not None:
+            feed_need_with_mix[:, combined] = 0.0
+
+        return {
+            'feed_matrix': feed_matrix,
+            'mix_matrix': mix_matrix,
+            'links': links,
+            'feed_need': feed_need,
+            'feed_need_with_mix': feed_need_with_mix,
+            'mix_need': mix_matrix.matrix / MIX_PRESET_BATCHES
+        }
+
+    @staticmethod
+    def _stock_vector(ingredients: List[str], inventory: Dict[str, float],
+                      changes: Optional[Dict[str, float]]) -> np.ndarray:
+        """Tồn kho (sau thay đổi giả định) theo thứ tự cột nguyên liệu, không âm"""
+        stock = np.array([float(inventory.get(name, 0) or 0) for name in ingredients], dtype=np.float64)
+        if changes:
+            column_of = {name: column for column, name in enumerate(ingredients)}
+            for name, delta in changes.items():
+                if name in column_of:
+                    stock[column_of[name]] += float(delta)
+        return np.maximum(stock, 0.0)
+
+    def load_stock(self, stock_changes: StockChanges = None) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """Tồn kho hiện tại của kho cám và kho mix, cộng thêm thay đổi giả định"""
+        stock = {}
+        for warehouse_type in ('feed', 'mix'):
+            inventory = dict(load_warehouse_inventory(warehouse_type))
+            for name, delta in ((stock_changes or {}).get(warehouse_type) or {}).items():
+                inventory[name] = max(float(inventory.get(name, 0) or 0) + float(delta), 0.0)
+            stock[warehouse_type] = inventory
+        return stock['feed'], stock['mix']
+
+    @staticmethod
+    def _batch_ratios(need: np.ndarray, stock: np.ndarray) -> np.ndarray:
+        """Số mẻ mỗi nguyên liệu đủ cho (hàng × nguyên liệu), inf với nguyên liệu không dùng"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(need > 0, stock[None, :] / need, np.inf)
+
+    # === Khả năng sản xuất toàn bộ công thức ===
+
+    def solve(self, stock_changes: StockChanges = None,
+              feed_inventory: Dict[str, float] = None, mix_inventory: Dict[str, float] = None) -> Dict[str, Any]:
+        """
+        Số mẻ tối đa của mọi preset cám (cùng preset mix liên kết) từ tồn kho
+
+        Args:
+            stock_changes: Thay đổi tồn kho giả định {'feed': {tên: kg}, 'mix': {tên: kg}}
+            feed_inventory, mix_inventory: Tồn kho dùng thay cho tồn kho hiện tại
+
+        Returns:
+            'presets': tên preset -> {'max_batches', 'linked_mix', 'limiting_ingredients'},
+            'bottlenecks': nguyên liệu giới hạn ít nhất một preset, nhiều preset trước
+        """
+        if feed_inventory is None or mix_inventory is None:
+            feed_inventory, mix_inventory = self.load_stock()
+        req = self._requirements()
+        feed_matrix, mix_matrix, links = req['feed_matrix'], req['mix_matrix'], req['links']
+
+        feed_stock = self._stock_vector(feed_matrix.ingredients, feed_inventory, (stock_changes or {}).get('feed'))
+        mix_stock = self._stock_vector(mix_matrix.ingredients, mix_inventory, (stock_changes or {}).get('mix'))
+
+        has_mix = links != NO_MIX
+        feed_need = np.where(has_mix[:, None], req['feed_need_with_mix'], req['feed_need'])
+        feed_ratios = self._batch_ratios(feed_need, feed_stock)
+        mix_ratios = self._batch_ratios(req['mix_need'], mix_stock)
+
+        # Giới hạn của preset mix liên kết (inf nếu không liên kết)
+        linked_mix_ratios = np.full((len(links), len(mix_matrix.ingredients)), np.inf)
+        if has_mix.any():
+            linked_mix_ratios[has_mix] = mix_ratios[links[has_mix]]
+
+        feed_limit = feed_ratios.min(axis=1, initial=np.inf)
+        mix_limit = linked_mix_ratios.min(axis=1, initial=np.inf)
+        max_batches = np.minimum(feed_limit, mix_limit)
+
+        threshold = (max_batches * (1 + LIMIT_TOLERANCE))[:, None]
+        feed_limiting = np.isfinite(feed_ratios) & (feed_ratios <= threshold)
+        mix_limiting = np.isfinite(linked_mix_ratios) & (linked_mix_ratios <= threshold)
+
+        presets = {}
+        bottlenecks = {}
+        for row, name in enumerate(feed_matrix.names):
+            limiting = []
+            for warehouse_type, matrix, stock, need, flags in (
+                    ('feed', feed_matrix, feed_stock, feed_need[row], feed_limiting[row]),
+                    ('mix', mix_matrix, mix_stock, req['mix_need'][links[row]] if has_mix[row] else None,
+                     mix_limiting[row])):
+                for column in np.flatnonzero(flags):
+                    ingredient = matrix.ingredients[column]
+                    limiting.append({
+                        'ingredient': ingredient,
+                        'warehouse': warehouse_type,
+                        'stock': float(stock[column]),
+                        'per_batch': float(need[column])
+                    })
+                    entry = bottlenecks.setdefault((warehouse_type, ingredient), {
+                        'ingredient': ingredient, 'warehouse': warehouse_type,
+                        'stock': float(stock[column]), 'presets': []
+                    })
+                    entry['presets'].append(name)
+
+            batches = max_batches[row]
+            presets[name] = {
+                'max_batches': int(np.floor(batches)) if np.isfinite(batches) else None,
+                'linked_mix': mix_matrix.names[links[row]] if has_mix[row] else None,
+                'limiting_ingredients': limiting
+            }
+
+        return {
+            'presets': presets,
+            'bottlenecks': sorted(bottlenecks.values(), key=lambda x: (-len(x['presets']), x['ingredient'])),
+            'stock_changes': stock_changes or {},
+            'calculated_at': datetime.now().isoformat(timespec='seconds')
+        }
+
+    # === Kế hoạch sản xuất hàng ngày ===
+
+    def get_baseline_plan(self, days: int = DEFAULT_PLAN_DAYS) -> List[Dict[str, Any]]:
+        """
+        Kế hoạch sản xuất hàng ngày trung bình từ các báo cáo trong `days` ngày gần nhất
+
+        Returns:
+            Danh sách {'khu', 'feed_formula', 'mix_formula', 'batches_per_day'} (mẻ thực tế/ngày)
+        """
+        totals: Dict[Tuple[str, str, Optional[str]], float] = {}
+        report_days = 0
+        today = datetime.now()
+        for offset in range(days):
+            date_str = (today - timedelta(days=offset)).strftime("%Y%m%d")
+            report_data = load_json_document(self.reports_dir / f"report_{date_str}.json", None, copy=False)
+            if not isinstance(report_data, dict):
+                continue
+            report_days += 1
+            for cell in self.engine.cells_from_report(report_data):
+                key = (cell['khu'], cell['feed_formula'], cell['mix_formula'])
+                totals[key] = totals.get(key, 0.0) + float(cell['batch_value']) * BATCH_MULTIPLIER
+
+        return [
+            {'khu': area, 'feed_formula': feed_formula, 'mix_formula': mix_formula,
+             'batches_per_day': total / report_days}
+            for (area, feed_formula, mix_formula), total in totals.items()
+        ]
+
+    def apply_area_formulas(self, plan: List[Dict[str, Any]],
+                            area_formulas: Dict[str, Union[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Kế hoạch khi một số khu chạy công thức khác
+
+        Args:
+            area_formulas: khu -> tên preset cám, hoặc dict {'feed_formula', 'mix_formula',
+                'batches_per_day'} (các khóa đều tùy chọn). Mix mặc định là mix liên kết của preset
+                mới, nếu không có thì giữ mix hiện tại của khu.
+
+        Raises:
+            ValueError: Khu không có sản xuất trong kế hoạch (không có báo cáo gần đây) mà thiếu
+                công thức cám hoặc batches_per_day, vì không có số mẻ hiện tại để giữ nguyên
+        """
+        if not area_formulas:
+            return list(plan)
+
+        formula_manager = self.engine.formula_manager
+        scenario = [entry for entry in plan if entry['khu'] not in area_formulas]
+        for area, change in area_formulas.items():
+            if isinstance(change, str):
+                change = {'feed_formula': change}
+            area_entries = [entry for entry in plan if entry['khu'] == area]
+            current_batches = sum(entry['batches_per_day'] for entry in area_entries)
+            current_mix = max(area_entries, key=lambda e: e['batches_per_day'])['mix_formula'] \
+                if area_entries else None
+
+            feed_formula = change.get('feed_formula')
+            if not area_entries and (not feed_formula or not change.get('batches_per_day')):
+                raise ValueError(f"{area} không có sản xuất trong các báo cáo gần đây: "
+                                 f"cần chọn công thức cám và số mẻ/ngày")
+            if not feed_formula:
+                # Chỉ đổi số mẻ/mix: giữ các công thức cám hiện tại của khu
+                for entry in area_entries:
+                    entry = dict(entry)
+                    if change.get('mix_formula'):
+                        entry['mix_formula'] = change['mix_formula']
+                    if change.get('batches_per_day') is not None and current_batches > 0:
+                        entry['batches_per_day'] *= float(change['batches_per_day']) / current_batches
+                    scenario.append(entry)
+                continue
+
+            linked_mix = formula_manager.get_linked_mix_formula_name(feed_formula) \
+                if hasattr(formula_manager, 'get_linked_mix_formula_name') else None
+            batches = change.get('batches_per_day')
+            scenario.append({
+                'khu': area,
+                'feed_formula': feed_formula,
+                'mix_formula': change.get('mix_formula') or linked_mix or current_mix,
+                'batches_per_day': float(batches) if batches is not None else current_batches
+            })
+        return scenario
+
+    def solve_plan(self, plan: List[Dict[str, Any]], stock_changes: StockChanges = None,
+                   feed_inventory: Dict[str, float] = None,
+                   mix_inventory: Dict[str, float] = None) -> Dict[str, Any]:
+        """
+        Số ngày tồn kho đủ cho một kế hoạch sản xuất hàng ngày
+
+        Returns:
+            'days_of_supply' (None nếu kế hoạch không dùng nguyên liệu nào), 'limiting_ingredients',
+            'daily_usage' và 'ingredient_days' ({'feed': {tên: ngày}, 'mix': {...}}, tăng dần)
+        """
+        if feed_inventory is None or mix_inventory is None:
+            feed_inventory, mix_inventory = self.load_stock()
+        req = self._requirements()
+        feed_matrix, mix_matrix = req['feed_matrix'], req['mix_matrix']
+
+        # Số mẻ/ngày theo preset cám (tách ô có mix và không có mix) và theo preset mix
+        with_mix = np.zeros(len(feed_matrix.names))
+        without_mix = np.zeros(len(feed_matrix.names))
+        mix_weights = np.zeros(len(mix_matrix.names))
+        unknown = set()
+        for entry in plan:
+            batches = float(entry.get('batches_per_day') or 0)
+            feed_row = feed_matrix.index.get(entry.get('feed_formula'))
+            if feed_row is None:
+                unknown.add(entry.get('feed_formula'))
+                continue
+            mix_row = mix_matrix.index.get(entry.get('mix_formula'))
+            if mix_row is None:
+                without_mix[feed_row] += batches
+            else:
+                with_mix[feed_row] += batches
+                mix_weights[mix_row] += batches
+
+        feed_daily = with_mix @ req['feed_need_with_mix'] + without_mix @ req['feed_need']
+        mix_daily = mix_weights @ req['mix_need']
+
+        feed_stock = self._stock_vector(feed_matrix.ingredients, feed_inventory, (stock_changes or {}).get('feed'))
+        mix_stock = self._stock_vector(mix_matrix.ingredients, mix_inventory, (stock_changes or {}).get('mix'))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            feed_days = np.where(feed_daily > 0, feed_stock / feed_daily, np.inf)
+            mix_days = np.where(mix_daily > 0, mix_stock / mix_daily, np.inf)
+        days_of_supply = float(min(feed_days.min(initial=np.inf), mix_days.min(initial=np.inf)))
+
+        limiting = []
+        ingredient_days = {}
+        for warehouse_type, matrix, days, daily, stock in (('feed', feed_matrix, feed_days, feed_daily, feed_stock),
+                                                           ('mix', mix_matrix, mix_days, mix_daily, mix_stock)):
+            used = np.flatnonzero(daily > 0)
+            used = used[np.argsort(days[used], kind='stable')]
+            ingredient_days[warehouse_type] = {matrix.ingredients[column]: float(days[column]) for column in used}
+            for column in used:
+                if days[column] <= days_of_supply * (1 + LIMIT_TOLERANCE):
+                    limiting.append({
+                        'ingredient': matrix.ingredients[column],
+                        'warehouse': warehouse_type,
+                        'stock': float(stock[column]),
+                        'daily_usage': float(daily[column])
+                    })
+
+        if unknown:
+            print(f"⚠️ [Capacity Solver] Unknown feed formulas in plan: {', '.join(sorted(map(str, unknown)))}")
+
+        return {
+            'days_of_supply': days_of_supply if np.isfinite(days_of_supply) else None,
+            'limiting_ingredients': limiting,
+            'daily_usage': {
+                'feed': {feed_matrix.ingredients[c]: float(feed_daily[c]) for c in np.flatnonzero(feed_daily > 0)},
+                'mix': {mix_matrix.ingredients[c]: float(mix_daily[c]) for c in np.flatnonzero(mix_daily > 0)}
+            },
+            'ingredient_days': ingredient_days,
+            'batches_per_day': float(with_mix.sum() + without_mix.sum())
+        }
+
+    # === Giả định what-if ===
+
+    def what_if(self, stock_changes: StockChanges = None,
+                area_formulas: Dict[str, Union[str, Dict[str, Any]]] = None,
+                plan_days: int = DEFAULT_PLAN_DAYS) -> Dict[str, Any]:
+        """
+        So sánh khả năng sản xuất hiện tại với một giả định
+
+        Ví dụ: what_if({'feed': {'Bắp': 10000}}) hoặc what_if(area_formulas={'Khu 3': 'Preset X'})
+
+        Returns:
+            {'baseline': {'catalog', 'plan'}, 'scenario': {'catalog', 'plan'}}
+        """
+        feed_inventory, mix_inventory = self.load_stock()
+        baseline_plan = self.get_baseline_plan(plan_days)
+        scenario_plan = self.apply_area_formulas(baseline_plan, area_formulas or {})
+
+        return {
+            'baseline': {
+                'catalog': self.solve(None, feed_inventory, mix_inventory),
+                'plan': self.solve_plan(baseline_plan, None, feed_inventory, mix_inventory)
+            },
+            'scenario': {
+                'catalog': self.solve(stock_changes, feed_inventory, mix_inventory),
+                'plan': self.solve_plan(scenario_plan, stock_changes, feed_inventory, mix_inventory),
+                'stock_changes': stock_changes or {},
+                'area_formulas': area_formulas or {}
+            }
+        }
+
+
+# Global instance
+capacity_solver = CapacitySolver()
+
+# Convenience functions
+def solve_production_capacity(stock_changes: StockChanges = None) -> Dict[str, Any]:
+    """Số mẻ tối đa và nguyên liệu giới hạn của mọi preset cám"""
+    return capacity_solver.solve(stock_changes)
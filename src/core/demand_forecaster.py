@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Demand Forecaster - Dự báo lượng dùng hàng ngày của tất cả nguyên liệu (Holt-Winters)
+
+Mô hình san bằng mũ cộng tính gồm mức (level), xu hướng tắt dần (trend) và mùa vụ theo thứ
+trong tuần, với trạng thái của mọi nguyên liệu lưu trong mảng NumPy và cập nhật cùng lúc.
+
+Trạng thái "gốc" được cập nhật tăng dần từng ngày và lưu ra file; chỉ REPLAY_DAYS ngày gần
+nhất (các báo cáo còn có thể được sửa) được áp dụng lại lên trạng thái gốc khi dữ liệu báo cáo
+thay đổi. Khi một báo cáo cũ hơn trạng thái gốc bị sửa, mô hình được khớp lại từ đầu.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+
+import numpy as np
+
+try:
+    from src.utils.persistent_paths import persistent_path_manager
+    from src.utils.json_document_cache import load_json_document
+    from src.utils.report_files import parse_report_filename
+    from src.utils.data_versions import data_versions, REPORTS
+    from src.core.usage_aggregator import UsageAggregator
+except ImportError:
+    from utils.persistent_paths import persistent_path_manager
+    from utils.json_document_cache import load_json_document
+    from utils.report_files import parse_report_filename
+    from utils.data_versions import data_versions, REPORTS
+    from core.usage_aggregator import UsageAggregator
+
+# Hệ số san bằng: mức, xu hướng, mùa vụ và hệ số tắt dần của xu hướng
+ALPHA = 0.3
+BETA = 0.05
+GAMMA = 0.2
+PHI = 0.9
+
+SEASON_LENGTH = 7
+
+# Số ngày gần nhất được áp dụng lại mỗi khi báo cáo thay đổi (không gộp vào trạng thái gốc)
+REPLAY_DAYS = 14
+
+# Số ngày có báo cáo tối thiểu trước khi dùng dự báo thay cho trung bình
+MIN_OBSERVATIONS = 14
+
+# Số ngày tối đa được mô phỏng khi tính số ngày còn lại
+HORIZON_DAYS = 365
+
+# Phiên bản cấu trúc file trạng thái
+FORECAST_VERSION = 1
+
+
+def _parse_date(date_str: str) -> datetime:
+    """YYYYMMDD -> datetime"""
+    return datetime.strptime(date_str, "%Y%m%d")
+
+
+def _format_date(day: datetime) -> str:
+    """datetime -> YYYYMMDD"""
+    return day.strftime("%Y%m%d")
+
+
+class ForecastState:
+    """Trạng thái Holt-Winters của nhiều nguyên liệu tại một ngày"""
+
+    def __init__(self, date_str: Optional[str] = None, keys: List[str] = None):
+        """Trạng thái rỗng tại ngày date_str (ngày cuối cùng đã áp dụng)"""
+        self.date = date_str
+        self.keys: List[str] = list(keys or [])
+        self.index: Dict[str, int] = {key: row for row, key in enumerate(self.keys)}
+        count = len(self.keys)
+        self.level = np.zeros(count)
+        self.trend = np.zeros(count)
+        self.season = np.zeros((count, SEASON_LENGTH))
+        self.observations = np.zeros(count, dtype=np.int64)
+
+    def copy(self) -> 'ForecastState':
+        """Bản sao độc lập"""
+        state = ForecastState(self.date, self.keys)
+        state.level = self.level.copy()
+        state.trend = self.trend.copy()
+        state.season = self.season.copy()
+        state.observations = self.observations.copy()
+        return state
+
+    def _add_keys(self, keys: List[str]):
+        """Thêm hàng cho các nguyên liệu mới"""
+        new_keys = [key for key in keys if key not in self.index]
+        if not new_keys:
+            return
+        for key in new_keys:
+            self.index[key] = len(self.keys)
+            self.keys.append(key)
+        extra = len(new_keys)
+        self.level = np.concatenate([self.level, np.zeros(extra)])
+        self.trend = np.concatenate([self.trend, np.zeros(extra)])
+        self.season = np.vstack([self.season, np.zeros((extra, SEASON_LENGTH))])
+        self.observations = np.concatenate([self.observations, np.zeros(extra, dtype=np.int64)])
+
+    def step(self, date_str: str, usage: Optional[Dict[str, float]]):
+        """
+        Áp dụng một ngày cho tất cả nguyên liệu
+
+        Args:
+            date_str: Ngày YYYYMMDD ngay sau self.date
+            usage: Lượng dùng theo khóa trong báo cáo của ngày đó, None nếu ngày không có báo cáo
+        """
+        weekday = _parse_date(date_str).weekday()
+        self.date = date_str
+
+        if usage is None:
+            # Không có quan sát: chỉ tiến theo xu hướng
+            self.level = self.level + PHI * self.trend
+            self.trend = PHI * self.trend
+            return
+
+        self._add_keys(list(usage))
+        y = np.zeros(len(self.keys))
+        if usage:
+            y[[self.index[key] for key in usage]] = list(usage.values())
+
+        # Nguyên liệu dùng lần đầu: khởi tạo mức bằng lượng dùng
+        starting = (self.observations == 0) & (y > 0)
+        active = self.observations > 0
+
+        season = self.season[:, weekday]
+        previous_level = self.level
+        level = ALPHA * (y - season) + (1 - ALPHA) * (previous_level + PHI * self.trend)
+        trend = BETA * (level - previous_level) + (1 - BETA) * PHI * self.trend
+
+        self.level = np.where(active, level, np.where(starting, y, self.level))
+        self.trend = np.where(active, trend, self.trend)
+        self.season[:, weekday] = np.where(active, GAMMA * (y - level) + (1 - GAMMA) * season, season)
+        self.observations = self.observations + (active | starting)
+
+    def forecast(self, horizon: int) -> np.ndarray:
+        """Lượng dùng dự báo (nguyên liệu × ngày) cho horizon ngày sau self.date, không âm"""
+        start_weekday = (_parse_date(self.date).weekday() + 1) % SEASON_LENGTH
+        steps = np.arange(1, horizon + 1)
+        damping = np.cumsum(PHI ** steps)
+        weekdays = (start_weekday + steps - 1) % SEASON_LENGTH
+        values = self.level[:, None] + damping[None, :] * self.trend[:, None] + self.season[:, weekdays]
+        return np.maximum(values, 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dữ liệu để lưu file"""
+        return {
+            'date': self.date,
+            'keys': self.keys,
+            'level': self.level.tolist(),
+            'trend': self.trend.tolist(),
+            'season': self.season.tolist(),
+            'observations': self.observations.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ForecastState':
+        """Khôi phục từ dữ liệu đã lưu"""
+        state = cls(data['date'], data['keys'])
+        if state.keys:
+            state.level = np.array(data['level'], dtype=np.float64)
+            state.trend = np.array(data['trend'], dtype=np.float64)
+            state.season = np.array(data['season'], dtype=np.float64).reshape(len(state.keys), SEASON_LENGTH)
+            state.observations = np.array(data['observations'], dtype=np.int64)
+        return state
+
+
+class DemandForecaster:
+    """Dự báo lượng dùng hàng ngày theo khóa 'feed_<tên>' / 'mix_<tên>'"""
+
+    def __init__(self, reports_dir: Path = None, state_file: Path = None):
+        """Khởi tạo (trạng thái được tải ở lần dự báo đầu tiên)"""
+        self.reports_dir = Path(reports_dir) if reports_dir else persistent_path_manager.reports_path
+        self.state_file = Path(state_file) if state_file else \
+            persistent_path_manager.data_path / "cache" / "demand_forecast.json"
+
+        self._lock = threading.RLock()
+        self._base: Optional[ForecastState] = None
+        self._needs_refit = False
+        # (phiên bản báo cáo, ngày hiện tại) -> trạng thái đã áp dụng các ngày gần nhất
+        self._current: Optional[Tuple[Tuple, ForecastState]] = None
+
+    # === Dữ liệu báo cáo ===
+
+    def _load_usage(self, date_str: str) -> Optional[Dict[str, float]]:
+        """Lượng dùng trong báo cáo của một ngày, None nếu không có báo cáo"""
+        report_data = load_json_document(self.reports_dir / f"report_{date_str}.json", None, copy=False)
+        if not isinstance(report_data, dict):
+            return None
+        return UsageAggregator.extract_usage(report_data)
+
+    def _first_report_date(self) -> Optional[str]:
+        """Ngày của báo cáo cũ nhất"""
+        first = None
+        try:
+            with os.scandir(self.reports_dir) as it:
+                for dir_entry in it:
+                    date_str = parse_report_filename(dir_entry.name)
+                    if date_str and (first is None or date_str < first):
+                        first = date_str
+        except OSError:
+            pass
+        return first
+
+    def _advance(self, state: ForecastState, until: str) -> int:
+        """Áp dụng các ngày sau state.date tới hết ngày until, trả về số ngày đã áp dụng"""
+        applied = 0
+        day = _parse_date(state.date) + timedelta(days=1)
+        end = _parse_date(until)
+        while day <= end:
+            date_str = _format_date(day)
+            state.step(date_str, self._load_usage(date_str))
+            applied += 1
+            day += timedelta(days=1)
+        return applied
+
+    # === Trạng thái gốc ===
+
+    def _load_state(self) -> Optional[ForecastState]:
+        """Đọc trạng thái gốc đã lưu"""
+        try:
+            if self.state_file.exists():
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == FORECAST_VERSION and data.get('state'):
+                    return ForecastState.from_dict(data['state'])
+        except Exception as e:
+            print(f"⚠️ [Demand Forecast] Error loading state, refitting: {e}")
+        return None
+
+    def _save_state(self):
+        """Lưu trạng thái gốc (ghi tạm rồi đổi tên)"""
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.state_file.with_suffix('.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': FORECAST_VERSION,
+                    'updated_at': datetime.now().isoformat(),
+                    'state': self._base.to_dict()
+                }, f, ensure_ascii=False)
+            temp_file.replace(self.state_file)
+        except Exception as e:
+            print(f"❌ [Demand Forecast] Error saving state: {e}")
+
+    def _ensure_base(self, cutoff: str):
+        """Tải hoặc khớp trạng thái gốc, rồi cập nhật tăng dần tới ngày cutoff"""
+        if self._base is None and not self._needs_refit:
+            self._base = self._load_state()
+
+        if self._base is None or self._needs_refit:
+            first_date = self._first_report_date()
+            start = _format_date(_parse_date(first_date or cutoff) - timedelta(days=1))
+            self._base = ForecastState(min(start, cutoff))
+            self._needs_refit = False
+            print(f"🔄 [Demand Forecast] Fitting from {first_date or cutoff}")
+
+        if self._base.date < cutoff:
+            applied = self._advance(self._base, cutoff)
+            self._save_state()
+            print(f"📈 [Demand Forecast] Advanced base state by {applied} days to {cutoff}")
+
+    def notify_report_changed(self, date_str: str):
+        """Gọi khi báo cáo một ngày được lưu/sửa/xóa; sửa báo cáo đã gộp vào trạng thái gốc cần khớp lại"""
+        with self._lock:
+            if self._base is None:
+                self._base = self._load_state()
+            if self._base is not None and date_str <= self._base.date:
+                self._needs_refit = True
+            self._current = None
+
+    def refit(self):
+        """Khớp lại toàn bộ lịch sử ở lần dự báo tiếp theo"""
+        with self._lock:
+            self._needs_refit = True
+            self._current = None
+
+    # === Dự báo ===
+
+    def get_current_state(self) -> ForecastState:
+        """Trạng thái sau báo cáo gần nhất (trạng thái gốc + các ngày gần đây)"""
+        today = datetime.now()
+        key = data_versions.get(REPORTS) + (_format_date(today),)
+        with self._lock:
+            if self._current is not None and self._current[0] == key:
+                return self._current[1]
+
+            self._ensure_base(_format_date(today - timedelta(days=REPLAY_DAYS)))
+            state = self._base.copy()
+            # Áp dụng tới ngày có báo cáo gần nhất (không tính các ngày trống ở cuối)
+            last_report = None
+            for offset in range(REPLAY_DAYS):
+                date_str = _format_date(today - timedelta(days=offset))
+                if date_str > state.date and (self.reports_dir / f"report_{date_str}.json").exists():
+                    last_report = date_str
+                    break
+            if last_report:
+                self._advance(state, last_report)
+
+            self._current = (key, state)
+            return state
+
+    def forecast(self, horizon: int = 7) -> Dict[str, List[float]]:
+        """Dự báo lượng dùng từng ngày sau báo cáo gần nhất cho các nguyên liệu đủ dữ liệu"""
+        state = self.get_current_state()
+        values = state.forecast(horizon)
+        return {key: values[row].tolist() for row, key in enumerate(state.keys)
+                if state.observations[row] >= MIN_OBSERVATIONS}
+
+    def estimate_remaining_days(self, stock: Dict[str, float],
+                                horizon: int = HORIZON_DAYS) -> Dict[str, Tuple[float, float]]:
+        """
+        Số ngày còn lại theo dự báo cho các nguyên liệu đủ dữ liệu
+
+        Args:
+            stock: Tồn kho theo khóa 'feed_<tên>' / 'mix_<tên>'
+
+        Returns:
+            khóa -> (lượng dùng trung bình 7 ngày tới, số ngày còn lại)
+        """
+        state = self.get_current_state()
+        rows = [state.index[key] for key in stock
+                if key in state.index and state.observations[state.index[key]] >= MIN_OBSERVATIONS]
+        if not rows:
+            return {}
+
+        rows = np.array(rows, dtype=np.intp)
+        keys = [state.keys[row] for row in rows]
+        amounts = np.maximum(np.array([stock[key] for key in keys], dtype=np.float64), 0.0)
+
+        daily = state.forecast(horizon)[rows]
+        cumulative = np.cumsum(daily, axis=1)
+        reached = cumulative >= amounts[:, None]
+        found = reached.any(axis=1)
+        first = np.argmax(reached, axis=1)
+
+        # Nội suy trong ngày hết hàng: ngày trước đó + phần tồn còn lại / lượng dùng ngày đó
+        previous = np.where(first > 0, cumulative[np.arange(len(rows)), first - 1], 0.0)
+        day_usage = daily[np.arange(len(rows)), first]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            partial = np.where(day_usage > 0, (amounts - previous) / day_usage, 0.0)
+            mean_usage = daily.mean(axis=1)
+            beyond = np.where(mean_usage > 0, amounts / mean_usage, np.inf)
+        remaining = np.where(found, first + partial, beyond)
+        next_week = daily[:, :7].mean(axis=1)
+
+        return {key: (float(next_week[i]), float(remaining[i])) for i, key in enumerate(keys)}
+
+
+# Global instance
+demand_forecaster = DemandForecaster()
+
+# Convenience functions
+def forecast_daily_usage(horizon: int = 7) -> Dict[str, List[float]]:
+    """Dự báo lượng dùng từng ngày của các nguyên liệu"""
+    return demand_forecaster.forecast(horizon)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Feed Usage Engine - Tính lượng nguyên liệu cám/mix từ số mẻ của từng ô, không phụ thuộc giao diện
+
+Các preset cám và mix được biên dịch thành ma trận (preset × nguyên liệu). Đầu vào là ma trận
+số mẻ (ô × preset cám) cùng preset mix của từng ô; tổng nguyên liệu được tính bằng phép nhân
+ma trận. Giao diện chỉ thu thập số liệu và hiển thị kết quả, script và tác vụ tính lại báo cáo
+dùng chung engine này.
+"""
+
+import threading
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Giá trị hiển thị 0.5 = 1 mẻ thực tế
+BATCH_MULTIPLIER = 2
+
+# Preset mix lưu lượng cho 10 mẻ
+MIX_PRESET_BATCHES = 10
+
+# Thành phần cám được thay bằng tổng lượng mix
+COMBINED_INGREDIENT = "Nguyên liệu tổ hợp"
+
+# Chỉ số preset mix cho ô không dùng mix
+NO_MIX = -1
+
+
+class PresetMatrix:
+    """Ma trận lượng nguyên liệu mỗi mẻ của một nhóm preset"""
+
+    def __init__(self, presets: Dict[str, Dict[str, float]]):
+        """Biên dịch các preset (bỏ qua preset rỗng)"""
+        self.names: List[str] = [name for name, formula in presets.items() if formula]
+        self.index: Dict[str, int] = {name: row for row, name in enumerate(self.names)}
+
+        self.ingredients: List[str] = []
+        ingredient_index: Dict[str, int] = {}
+        # Cột nguyên liệu của từng preset theo thứ tự khai báo trong preset
+        self.columns: List[np.ndarray] = []
+        for name in self.names:
+            columns = []
+            for ingredient in presets[name]:
+                column = ingredient_index.get(ingredient)
+                if column is None:
+                    column = ingredient_index[ingredient] = len(self.ingredients)
+                    self.ingredients.append(ingredient)
+                columns.append(column)
+            self.columns.append(np.array(columns, dtype=np.intp))
+
+        self.matrix = np.zeros((len(self.names), len(self.ingredients)), dtype=np.float64)
+        for row, name in enumerate(self.names):
+            self.matrix[row, self.columns[row]] = [float(amount or 0) for amount in presets[name].values()]
+
+    def ingredient_order(self, preset_rows: Sequence[int]) -> np.ndarray:
+        """Cột nguyên liệu theo thứ tự xuất hiện lần đầu khi duyệt các preset theo preset_rows"""
+        if len(preset_rows) == 0:
+            return np.zeros(0, dtype=np.intp)
+        columns = np.concatenate([self.columns[row] for row in preset_rows])
+        _, first_positions = np.unique(columns, return_index=True)
+        return columns[np.sort(first_positions)]
+
+    def to_dict(self, amounts: np.ndarray, columns: np.ndarray) -> Dict[str, float]:
+        """Dict nguyên liệu -> lượng cho các cột đã chọn"""
+        return {self.ingredients[column]: float(amounts[column]) for column in columns}
+
+
+class FeedUsageEngine:
+    """Tính tổng nguyên liệu kho cám và kho mix cho một ngày cho ăn"""
+
+    def __init__(self, formula_manager=None):
+        """Khởi tạo với FormulaManager dùng để lấy preset (tạo mới ở lần dùng đầu nếu không truyền)"""
+        self._formula_manager = formula_manager
+        self._lock = threading.Lock()
+        self._compiled: Optional[Tuple[int, PresetMatrix, PresetMatrix]] = None
+
+    # === Preset ===
+
+    @property
+    def formula_manager(self):
+        """FormulaManager cung cấp preset"""
+        if self._formula_manager is None:
+            try:
+                from src.core.formula_manager import FormulaManager
+            except ImportError:
+                from core.formula_manager import FormulaManager
+            self._formula_manager = FormulaManager()
+        return self._formula_manager
+
+    def get_preset_matrices(self) -> Tuple[PresetMatrix, PresetMatrix]:
+        """Ma trận preset cám và mix, chỉ biên dịch lại khi preset được lưu/xóa"""
+        formula_manager = self.formula_manager
+        version = getattr(formula_manager, 'presets_version', 0)
+        with self._lock:
+            if self._compiled is None or self._compiled[0] != version:
+                self._compiled = (version, PresetMatrix(formula_manager.feed_presets),
+                                  PresetMatrix(formula_manager.mix_presets))
+            return self._compiled[1], self._compiled[2]
+
+    # === Đầu vào ===
+
+    @staticmethod
+    def resolve_mix_formula(cell_key: str, column: int, area: str,
+                            cell_mix_formulas: Dict[str, str] = None,
+                            column_mix_formulas: Dict[str, str] = None,
+                            area_mix_formulas: Dict[str, str] = None) -> Optional[str]:
+        """Công thức mix của một ô: riêng của ô, rồi theo cột, rồi theo khu"""
+        if cell_mix_formulas and cell_key in cell_mix_formulas:
+            mix_formula_name = cell_mix_formulas[cell_key]
+            if mix_formula_name:
+                return mix_formula_name
+        if column_mix_formulas:
+            mix_formula_name = column_mix_formulas.get(str(column))
+            if mix_formula_name:
+                return mix_formula_name
+        if area_mix_formulas and area in area_mix_formulas:
+            return area_mix_formulas[area] or None
+        return None
+
+    def build_inputs(self, cells: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Chuyển danh sách ô thành ma trận đầu vào
+
+        Args:
+            cells: Mỗi ô gồm 'batch_value', 'feed_formula', 'mix_formula' (có thể None) và 'khu'
+
+        Returns:
+            batch_matrix (ô × preset cám), mix_assignment (chỉ số preset mix hoặc NO_MIX),
+            cell_batches (giá trị mẻ của từng ô) và areas (khu của từng ô)
+        """
+        feed_matrix, mix_matrix = self.get_preset_matrices()
+        cell_count = len(cells)
+
+        batch_matrix = np.zeros((cell_count, len(feed_matrix.names)), dtype=np.float64)
+        mix_assignment = np.full(cell_count, NO_MIX, dtype=np.intp)
+        cell_batches = np.zeros(cell_count, dtype=np.float64)
+
+        for row, cell in enumerate(cells):
+            batch_value = float(cell.get('batch_value') or 0)
+            cell_batches[row] = batch_value
+
+            feed_row = feed_matrix.index.get(cell.get('feed_formula'))
+            if feed_row is not None:
+                batch_matrix[row, feed_row] = batch_value
+
+            mix_row = mix_matrix.index.get(cell.get('mix_formula'))
+            if mix_row is not None:
+                mix_assignment[row] = mix_row
+
+        return {
+            'batch_matrix': batch_matrix,
+            'mix_assignment': mix_assignment,
+            'cell_batches': cell_batches,
+            'areas': [cell.get('khu', '') for cell in cells]
+        }
+
+    # === Tính toán ===
+
+    def compute(self, batch_matrix: np.ndarray, mix_assignment: np.ndarray,
+                cell_batches: np.ndarray = None, areas: Sequence[str] = None) -> Dict[str, Any]:
+        """
+        Tính tổng nguyên liệu từ ma trận số mẻ
+
+        Args:
+            batch_matrix: Giá trị mẻ hiển thị, shape (số ô, số preset cám)
+            mix_assignment: Chỉ số preset mix của từng ô (NO_MIX nếu không dùng mix)
+            cell_batches: Giá trị mẻ của từng ô kể cả ô có công thức cám không còn tồn tại
+                (mặc định là tổng theo hàng của batch_matrix)
+            areas: Khu của từng ô, dùng cho tổng số mẻ theo khu
+        """
+        feed_matrix, mix_matrix = self.get_preset_matrices()
+        batch_matrix = np.asarray(batch_matrix, dtype=np.float64)
+        mix_assignment = np.asarray(mix_assignment, dtype=np.intp)
+        if cell_batches is None:
+            cell_batches = batch_matrix.sum(axis=1)
+        else:
+            cell_batches = np.asarray(cell_batches, dtype=np.float64)
+
+        # Kho cám: tổng mẻ mỗi preset × ma trận preset
+        formula_batches = batch_matrix.sum(axis=0)
+        used_feed = np.flatnonzero(formula_batches > 0)
+        # Thứ tự preset theo ô đầu tiên sử dụng, giữ đúng thứ tự hiển thị nguyên liệu
+        if used_feed.size:
+            first_cells = np.argmax(batch_matrix[:, used_feed] > 0, axis=0)
+            used_feed = used_feed[np.argsort(first_cells, kind='stable')]
+        feed_amounts = (formula_batches * BATCH_MULTIPLIER) @ feed_matrix.matrix
+        feed_ingredients = feed_matrix.to_dict(feed_amounts, feed_matrix.ingredient_order(used_feed))
+
+        # Kho mix: tổng mẻ mỗi preset mix (bincount theo chỉ số preset) × ma trận preset / 10
+        has_mix = mix_assignment >= 0
+        mix_batches = np.bincount(mix_assignment[has_mix], weights=cell_batches[has_mix],
+                                  minlength=len(mix_matrix.names))
+        used_mix = mix_assignment[has_mix]
+        if used_mix.size:
+            _, first_positions = np.unique(used_mix, return_index=True)
+            used_mix = used_mix[np.sort(first_positions)]
+        mix_amounts = (mix_batches * BATCH_MULTIPLIER / MIX_PRESET_BATCHES) @ mix_matrix.matrix
+        mix_ingredients = mix_matrix.to_dict(mix_amounts, mix_matrix.ingredient_order(used_mix))
+
+        # "Nguyên liệu tổ hợp" trong cám bằng tổng lượng mix
+        total_mix = float(sum(mix_ingredients.values()))
+        if COMBINED_INGREDIENT in feed_ingredients and total_mix > 0:
+            feed_ingredients[COMBINED_INGREDIENT] = total_mix
+        total_feed = float(sum(feed_ingredients.values()))
+
+        # Số mẻ thực tế theo khu
+        actual_batches = cell_batches * BATCH_MULTIPLIER
+        total_batches_by_area = {}
+        if areas is not None:
+            for area, batches in zip(areas, actual_batches.tolist()):
+                if batches > 0:
+                    total_batches_by_area[area] = total_batches_by_area.get(area, 0) + batches
+
+        return {
+            'feed_ingredients': feed_ingredients,
+            'mix_ingredients': mix_ingredients,
+            'formula_batches': {feed_matrix.names[row]: float(formula_batches[row]) for row in used_feed},
+            'mix_formulas_used': {
+                mix_matrix.names[row]: {
+                    'formula': self.formula_manager.mix_presets.get(mix_matrix.names[row], {}),
+                    'batch_value': float(mix_batches[row])
+                }
+                for row in used_mix
+            },
+            'total_batches': float(actual_batches[actual_batches > 0].sum()),
+            'total_batches_by_area': total_batches_by_area,
+            'total_feed': total_feed,
+            'total_mix': total_mix
+        }
+
+    def calculate(self, cells: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """Tính tổng nguyên liệu từ danh sách ô (xem build_inputs)"""
+        inputs = self.build_inputs(cells)
+        return self.compute(inputs['batch_matrix'], inputs['mix_assignment'],
+                            inputs['cell_batches'], inputs['areas'])
+
+    def calculate_report(self, report_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Tính lại tổng nguyên liệu từ số mẻ và công thức đã lưu trong một báo cáo ngày"""
+        return self.calculate(self.cells_from_report(report_data))
+
+    def cells_from_report(self, report_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Danh sách ô (theo thứ tự cột khu/trại, ca) từ feed_usage và formula_usage của báo cáo"""
+        feed_usage = report_data.get('feed_usage') or {}
+        formula_usage = report_data.get('formula_usage') or {}
+        cell_mix_formulas = report_data.get('cell_mix_formulas') or {}
+        column_mix_formulas = report_data.get('column_mix_formulas') or {}
+        area_mix_formulas = report_data.get('area_mix_formulas') or {}
+
+        cells = []
+        column = 0
+        for khu_name, farms in feed_usage.items():
+            for farm_name, shifts in (farms or {}).items():
+                for shift, batch_value in (shifts or {}).items():
+                    feed_formula = (formula_usage.get(khu_name) or {}).get(farm_name, {}).get(shift, "")
+                    if not batch_value or batch_value <= 0 or not feed_formula:
+                        continue
+                    cell_key = f"{khu_name}_{farm_name}_{shift}"
+                    cells.append({
+                        'khu': khu_name,
+                        'farm': farm_name,
+                        'shift': shift,
+                        'batch_value': batch_value,
+                        'feed_formula': feed_formula,
+                        'mix_formula': self.resolve_mix_formula(
+                            cell_key, column, khu_name,
+                            cell_mix_formulas, column_mix_formulas, area_mix_formulas
+                        )
+                    })
+                column += 1
+        return cells
+
+
+_feed_usage_engine: Optional[FeedUsageEngine] = None
+
+
+def get_feed_usage_engine(formula_manager=None) -> FeedUsageEngine:
+    """Engine dùng chung (FormulaManager chỉ được tạo khi cần)"""
+    global _feed_usage_engine
+    if _feed_usage_engine is None:
+        _feed_usage_engine = FeedUsageEngine(formula_manager)
+    elif formula_manager is not None and _feed_usage_engine._formula_manager is None:
+        _feed_usage_engine._formula_manager = formula_manager
+    return _feed_usage_engine
@@ -5,9 +5,11 @@ from typing import Dict, Any, List, Tuple, Optional
 # Handle imports for both development and executable environments
 try:
     from src.utils.persistent_paths import get_data_file_path, get_config_file_path, persistent_path_manager
+    from src.utils.json_document_cache import load_json_document, save_json_document
 except ImportError:
     try:
         from utils.persistent_paths import get_data_file_path, get_config_file_path, persistent_path_manager
+        from utils.json_document_cache import load_json_document, save_json_document
     except ImportError:
         # Fallback for executable environment
         import sys
@@ -19,6 +21,7 @@ except ImportError:
 
         try:
             from utils.persistent_paths import get_data_file_path, get_config_file_path, persistent_path_manager
+            from utils.json_document_cache import load_json_document, save_json_document
         except ImportError:
             # Ultimate fallback - create minimal path functions
             def get_data_file_path(filename):
@@ -33,6 +36,24 @@ except ImportError:
 
             persistent_path_manager = MockPathManager()
 
+            def load_json_document(file_path, default=None, copy=True):
+                if not os.path.exists(file_path):
+                    return default
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+
+            def save_json_document(file_path, data, indent=4):
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=indent)
+
+try:
+    from src.core.ingredient_classifier import ingredient_classifier
+    from src.utils.data_versions import bump_data_version, FORMULAS
+except ImportError:
+    from core.ingredient_classifier import ingredient_classifier
+    from utils.data_versions import bump_data_version, FORMULAS
+
 class FormulaManager:
     """Class to manage feed and mix formulas"""
 
@@ -73,6 +94,8 @@ class FormulaManager:
         # Load saved formula presets
         self.feed_presets = self.load_presets("feed")
         self.mix_presets = self.load_presets("mix")
+        # Incremented whenever a preset is saved or deleted (compiled preset matrices key on it)
+        self.presets_version = 0
 
         # Load formula links
         self.formula_links = self.load_formula_links()
@@ -101,10 +124,7 @@ class FormulaManager:
     def load_formula(self, filename: str) -> Dict[str, float]:
         """Load a formula from a JSON file"""
         try:
-            if os.path.exists(filename):
-                with open(filename, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
+            return load_json_document(filename, {})
         except Exception as e:
             print(f"Error loading formula from {filename}: {e}")
             return {}
@@ -112,11 +132,9 @@ class FormulaManager:
     def save_formula(self, formula: Dict[str, float], filename: str) -> bool:
         """Save a formula to a JSON file"""
         try:
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(filename), exist_ok=True)
-
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(formula, f, ensure_ascii=False, indent=4)
+            save_json_document(filename, formula)
+            ingredient_classifier.invalidate()
+            bump_data_version(FORMULAS)
             return True
         except Exception as e:
             print(f"Error saving formula to {filename}: {e}")
@@ -125,10 +143,7 @@ class FormulaManager:
     def load_formula_links(self) -> Dict[str, Any]:
         """Load formula links from JSON file"""
         try:
-            if os.path.exists(self.formula_links_file):
-                with open(self.formula_links_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {"current_formula": "", "preset_links": {}}
+            return load_json_document(self.formula_links_file, {"current_formula": "", "preset_links": {}})
         except Exception as e:
             print(f"Error loading formula links from {self.formula_links_file}: {e}")
             return {"current_formula": "", "preset_links": {}}
@@ -136,11 +151,8 @@ class FormulaManager:
     def save_formula_links(self) -> bool:
         """Save formula links to JSON file"""
         try:
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(self.formula_links_file), exist_ok=True)
-
-            with open(self.formula_links_file, 'w', encoding='utf-8') as f:
-                json.dump(self.formula_links, f, ensure_ascii=False, indent=4)
+            save_json_document(self.formula_links_file, self.formula_links)
+            bump_data_version(FORMULAS)
             return True
         except Exception as e:
             print(f"Error saving formula links to {self.formula_links_file}: {e}")
@@ -174,6 +186,8 @@ class FormulaManager:
         success = self.save_formula(formula, preset_path)
 
         if success:
+            self.presets_version += 1
+
             # Update presets in memory
             if formula_type == "feed":
                 self.feed_presets[preset_name] = formula
@@ -207,6 +221,9 @@ class FormulaManager:
         if os.path.exists(preset_path):
             try:
                 os.remove(preset_path)
+                ingredient_classifier.invalidate()
+                self.presets_version += 1
+                bump_data_version(FORMULAS)
 
                 # Remove from memory
                 if formula_type == "feed":
@@ -328,10 +345,7 @@ class FormulaManager:
     def load_default_formula_settings(self) -> Dict[str, str]:
         """Tải cài đặt công thức mặc định từ file"""
         try:
-            if os.path.exists(self.default_formula_file):
-                with open(self.default_formula_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {"default_feed_formula": ""}
+            return load_json_document(self.default_formula_file, {"default_feed_formula": ""})
         except Exception as e:
             print(f"Lỗi khi tải cài đặt công thức mặc định: {e}")
             return {"default_feed_formula": ""}
@@ -339,11 +353,7 @@ class FormulaManager:
     def save_default_formula_settings(self) -> bool:
         """Lưu cài đặt công thức mặc định vào file"""
         try:
-            # Đảm bảo thư mục tồn tại
-            os.makedirs(os.path.dirname(self.default_formula_file), exist_ok=True)
-
-            with open(self.default_formula_file, 'w', encoding='utf-8') as f:
-                json.dump(self.default_formula_settings, f, ensure_ascii=False, indent=4)
+            save_json_document(self.default_formula_file, self.default_formula_settings)
             return True
         except Exception as e:
             print(f"Lỗi khi lưu cài đặt công thức mặc định: {e}")
@@ -361,10 +371,7 @@ class FormulaManager:
     def load_column_mix_formulas(self) -> Dict[str, str]:
         """Tải cài đặt công thức mix theo cột từ file"""
         try:
-            if os.path.exists(self.column_mix_formulas_file):
-                with open(self.column_mix_formulas_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
+            return load_json_document(self.column_mix_formulas_file, {})
         except Exception as e:
             print(f"Lỗi khi tải cài đặt công thức mix theo cột: {e}")
             return {}
@@ -372,15 +379,11 @@ class FormulaManager:
     def save_column_mix_formulas(self, column_mix_formulas: Dict[str, str]) -> bool:
         """Lưu cài đặt công thức mix theo cột vào file"""
         try:
-            # Đảm bảo thư mục tồn tại
-            os.makedirs(os.path.dirname(self.column_mix_formulas_file), exist_ok=True)
-
             # Cập nhật dữ liệu nội bộ
             self.column_mix_formulas = column_mix_formulas
 
             # Lưu vào file
-            with open(self.column_mix_formulas_file, 'w', encoding='utf-8') as f:
-                json.dump(column_mix_formulas, f, ensure_ascii=False, indent=4)
+            save_json_document(self.column_mix_formulas_file, column_mix_formulas)
             return True
         except Exception as e:
             print(f"Lỗi khi lưu cài đặt công thức mix theo cột: {e}")
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Ingredient Classifier - Chỉ mục phân loại nguyên liệu vào kho cám (feed) hoặc kho mix
+
+Chỉ mục được tạo từ công thức hiện tại và các preset, chỉ dựng lại khi các file này
+thay đổi. Tên không có trong công thức nào được phân loại theo mẫu tên và ghi nhớ lại.
+"""
+
+import os
+import time
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Set, Tuple
+
+try:
+    from src.utils.persistent_paths import persistent_path_manager
+    from src.utils.json_document_cache import load_json_document
+except ImportError:
+    from utils.persistent_paths import persistent_path_manager
+    from utils.json_document_cache import load_json_document
+
+# Nguyên liệu có trong cả hai công thức nhưng thuộc kho cám
+FEED_PRIORITY_INGREDIENTS = frozenset(["DCP", "Đá hạt", "Đá bột mịn"])
+
+# Mẫu tên nguyên liệu kho cám
+FEED_NAME_PATTERNS = ('cám', 'bắp', 'nành', 'dầu', 'gạo', 'nguyên liệu')
+
+# Mẫu tên nguyên liệu kho mix (phụ gia, thuốc bổ sung...)
+MIX_NAME_PATTERNS = ('performix', 'premix', 'enzyme', 'lysine', 'methionine', 'choline',
+                     'phytast', 'miamix', 'carophy', 'zym', 'tetracylin', 'tiamulin',
+                     'amox', 'immune', 'lysoforte', 'nutriprotect', 'defitox', 'ecobiol',
+                     'lactic', 'sodium', 'bicarbonate')
+
+# Khoảng thời gian tối thiểu (giây) giữa hai lần stat file nguồn để kiểm tra thay đổi
+VALIDATION_INTERVAL = 1.0
+
+
+class IngredientClassifier:
+    """Chỉ mục nguyên liệu -> kho ('feed' hoặc 'mix') với tra cứu O(1)"""
+
+    def __init__(self, config_dir: Path = None, presets_dir: Path = None):
+        """Khởi tạo (chỉ mục được dựng ở lần tra cứu đầu tiên)"""
+        self.config_dir = Path(config_dir) if config_dir else persistent_path_manager.config_path
+        self.presets_dir = Path(presets_dir) if presets_dir else persistent_path_manager.data_path / "presets"
+        self.validation_interval = VALIDATION_INTERVAL
+
+        self._lock = threading.RLock()
+        self._index: Optional[Dict[str, str]] = None
+        self._pattern_cache: Dict[str, str] = {}
+        self._signature: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self.rebuild_count = 0
+
+    # === Chỉ mục ===
+
+    def _source_signature(self) -> Tuple:
+        """(mtime_ns, kích thước) của file công thức và thư mục preset"""
+        signature = []
+        for path in (self.config_dir / "feed_formula.json", self.config_dir / "mix_formula.json",
+                     self.presets_dir / "feed", self.presets_dir / "mix"):
+            try:
+                stat_result = os.stat(path)
+                signature.append((stat_result.st_mtime_ns, stat_result.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _load_preset_ingredients(self, formula_type: str) -> Set[str]:
+        """Tên nguyên liệu xuất hiện trong các preset của một loại công thức"""
+        ingredients = set()
+        preset_dir = self.presets_dir / formula_type
+        if not preset_dir.exists():
+            return ingredients
+
+        with os.scandir(preset_dir) as it:
+            for dir_entry in it:
+                if dir_entry.name.endswith('.json') and dir_entry.is_file():
+                    preset = load_json_document(dir_entry.path, {}, copy=False)
+                    if isinstance(preset, dict):
+                        ingredients.update(preset.keys())
+        return ingredients
+
+    @staticmethod
+    def _resolve(ingredient_name: str, in_feed: bool, in_mix: bool) -> str:
+        """Kho của nguyên liệu theo nơi nó xuất hiện"""
+        if in_feed and in_mix:
+            # Thường là nguyên liệu kho cám dù được dùng trong mix
+            return "feed" if ingredient_name in FEED_PRIORITY_INGREDIENTS else "mix"
+        return "feed" if in_feed else "mix"
+
+    def _build_index(self) -> Dict[str, str]:
+        """Dựng chỉ mục: preset trước, công thức hiện tại ghi đè"""
+        feed_formula = load_json_document(self.config_dir / "feed_formula.json", {}, copy=False)
+        mix_formula = load_json_document(self.config_dir / "mix_formula.json", {}, copy=False)
+        feed_presets = self._load_preset_ingredients("feed")
+        mix_presets = self._load_preset_ingredients("mix")
+
+        index = {}
+        for ingredient_name in feed_presets | mix_presets:
+            index[ingredient_name] = self._resolve(ingredient_name, ingredient_name in feed_presets,
+                                                   ingredient_name in mix_presets)
+        for ingredient_name in set(feed_formula) | set(mix_formula):
+            index[ingredient_name] = self._resolve(ingredient_name, ingredient_name in feed_formula,
+                                                   ingredient_name in mix_formula)
+        return index
+
+    def _ensure_current(self) -> Dict[str, str]:
+        """Dựng lại chỉ mục nếu công thức/preset đã thay đổi (kiểm tra tối đa mỗi giây một lần)"""
+        now = time.monotonic()
+        with self._lock:
+            if self._index is not None and now - self._checked_at < self.validation_interval:
+                return self._index
+
+            signature = self._source_signature()
+            if self._index is None or signature != self._signature:
+                self._index = self._build_index()
+                self._signature = signature
+                self.rebuild_count += 1
+            self._checked_at = now
+            return self._index
+
+    def invalidate(self):
+        """Buộc dựng lại chỉ mục ở lần tra cứu tiếp theo (gọi sau khi lưu công thức/preset)"""
+        with self._lock:
+            self._index = None
+
+    # === Tra cứu ===
+
+    @staticmethod
+    def classify_by_name(ingredient_name: str) -> str:
+        """Phân loại theo mẫu tên cho nguyên liệu không có trong công thức nào"""
+        ingredient_lower = ingredient_name.lower()
+        if any(pattern in ingredient_lower for pattern in FEED_NAME_PATTERNS):
+            return "feed"
+        if any(pattern in ingredient_lower for pattern in MIX_NAME_PATTERNS):
+            return "mix"
+        # Mặc định là kho mix cho nguyên liệu chưa biết (thường là phụ gia)
+        return "mix"
+
+    def classify(self, ingredient_name: str) -> str:
+        """Kho ('feed' hoặc 'mix') của một nguyên liệu"""
+        warehouse_type = self._ensure_current().get(ingredient_name)
+        if warehouse_type is not None:
+            return warehouse_type
+
+        warehouse_type = self._pattern_cache.get(ingredient_name)
+        if warehouse_type is None:
+            warehouse_type = self.classify_by_name(ingredient_name)
+            self._pattern_cache[ingredient_name] = warehouse_type
+        return warehouse_type
+
+    def snapshot(self) -> Dict[str, str]:
+        """Bản sao chỉ mục hiện tại (tra cứu ngoài luồng giao diện không chạm vào classifier)"""
+        return dict(self._ensure_current())
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Thống kê chỉ mục"""
+        with self._lock:
+            return {
+                'indexed_ingredients': len(self._index) if self._index is not None else 0,
+                'pattern_classified': len(self._pattern_cache),
+                'rebuilds': self.rebuild_count
+            }
+
+
+# Global instance
+ingredient_classifier = IngredientClassifier()
+
+# Convenience functions
+def classify_ingredient(ingredient_name: str) -> str:
+    """Kho ('feed' hoặc 'mix') của một nguyên liệu"""
+    return ingredient_classifier.classify(ingredient_name)
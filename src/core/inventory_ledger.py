@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Inventory Ledger - Sổ ghi biến động tồn kho dạng append-only kèm snapshot định kỳ
+
+Tồn kho hiện tại = snapshot (feed_inventory.json / mix_inventory.json) + các dòng ledger
+ghi sau vị trí snapshot. Mỗi dòng ledger lưu số lượng tuyệt đối sau biến động nên việc
+phát lại (replay) là idempotent, kể cả khi snapshot bị ghi lại giữa chừng.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Iterable, Optional
+
+try:
+    from src.utils.persistent_paths import get_config_file_path
+    from src.utils.json_document_cache import load_json_document, save_json_document
+    from src.utils.data_versions import bump_data_version, INVENTORY
+except ImportError:
+    from utils.persistent_paths import get_config_file_path
+    from utils.json_document_cache import load_json_document, save_json_document
+    from utils.data_versions import bump_data_version, INVENTORY
+
+WAREHOUSE_TYPES = ("feed", "mix")
+
+# Số dòng ledger tối đa trước khi gộp thành snapshot mới
+DEFAULT_SNAPSHOT_INTERVAL = 200
+
+# Phiên bản cấu trúc file meta của snapshot
+SNAPSHOT_VERSION = 1
+
+
+class InventoryLedger:
+    """Ledger biến động tồn kho với snapshot theo từng kho"""
+
+    def __init__(self, ledger_file: Path = None, snapshot_meta_file: Path = None,
+                 snapshot_files: Dict[str, Path] = None,
+                 snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL):
+        """Khởi tạo ledger (không đọc file cho đến khi cần)"""
+        self.ledger_file = Path(ledger_file) if ledger_file else get_config_file_path("inventory_ledger.jsonl")
+        self.snapshot_meta_file = Path(snapshot_meta_file) if snapshot_meta_file else \
+            get_config_file_path("inventory_snapshot.json")
+        self.snapshot_files = snapshot_files or {
+            warehouse_type: get_config_file_path(f"{warehouse_type}_inventory.json")
+            for warehouse_type in WAREHOUSE_TYPES
+        }
+        self.snapshot_interval = snapshot_interval
+
+        self._lock = threading.RLock()
+        # Số dòng ledger chưa được gộp vào snapshot (None = chưa đếm)
+        self._pending_entries: Optional[int] = None
+
+    # === Snapshot meta ===
+
+    def _read_offsets(self) -> Dict[str, int]:
+        """Vị trí byte trong ledger tại thời điểm ghi snapshot của từng kho"""
+        try:
+            if self.snapshot_meta_file.exists():
+                with open(self.snapshot_meta_file, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                if meta.get('version') == SNAPSHOT_VERSION:
+                    return {wt: int(meta.get('offsets', {}).get(wt, 0)) for wt in WAREHOUSE_TYPES}
+        except Exception as e:
+            print(f"⚠️ [Inventory Ledger] Error reading snapshot meta, replaying full ledger: {e}")
+        return {wt: 0 for wt in WAREHOUSE_TYPES}
+
+    def _write_offsets(self, offsets: Dict[str, int]):
+        """Ghi vị trí snapshot (ghi tạm rồi đổi tên)"""
+        self.snapshot_meta_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.snapshot_meta_file.with_suffix('.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': SNAPSHOT_VERSION,
+                'updated_at': datetime.now().isoformat(),
+                'offsets': offsets
+            }, f, ensure_ascii=False)
+        temp_file.replace(self.snapshot_meta_file)
+
+    def _ledger_size(self) -> int:
+        """Kích thước hiện tại của file ledger"""
+        try:
+            return self.ledger_file.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    # === Đọc ledger ===
+
+    def _read_entries(self, offset: int = 0) -> List[Dict[str, Any]]:
+        """Đọc các dòng ledger từ vị trí byte offset"""
+        entries = []
+        if not self.ledger_file.exists():
+            return entries
+
+        with open(self.ledger_file, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    entries.append(json.loads(line.decode('utf-8')))
+                except (ValueError, UnicodeDecodeError):
+                    # Dòng cuối bị cắt dở khi ứng dụng dừng đột ngột
+                    continue
+        return entries
+
+    def _read_snapshot(self, warehouse_type: str) -> Dict[str, float]:
+        """Đọc snapshot tồn kho của một kho"""
+        return load_json_document(self.snapshot_files[warehouse_type], {})
+
+    @staticmethod
+    def _apply_entries(inventory: Dict[str, float], entries: Iterable[Dict[str, Any]],
+                       warehouse_type: str) -> Dict[str, float]:
+        """Phát lại các dòng ledger của một kho lên dữ liệu tồn kho"""
+        for entry in entries:
+            if entry.get('warehouse') != warehouse_type:
+                continue
+            inventory[entry['item']] = entry['quantity']
+        return inventory
+
+    def load_warehouse(self, warehouse_type: str) -> Dict[str, float]:
+        """Tồn kho hiện tại của một kho = snapshot + phần đuôi ledger"""
+        with self._lock:
+            inventory = self._read_snapshot(warehouse_type)
+            offset = self._read_offsets()[warehouse_type]
+            if self._ledger_size() > offset:
+                self._apply_entries(inventory, self._read_entries(offset), warehouse_type)
+            return inventory
+
+    def has_snapshot(self, warehouse_type: str) -> bool:
+        """Kiểm tra kho đã có snapshot hoặc dòng ledger chưa"""
+        return self.snapshot_files[warehouse_type].exists() or self._ledger_size() > 0
+
+    def get_history(self, item: str = None, warehouse_type: str = None,
+                    since: str = None) -> List[Dict[str, Any]]:
+        """
+        Lịch sử biến động tồn kho từ ledger (cũ nhất trước)
+
+        Args:
+            item: Lọc theo tên nguyên liệu
+            warehouse_type: Lọc theo kho ('feed' hoặc 'mix')
+            since: Lọc theo thời điểm ISO (bao gồm)
+        """
+        with self._lock:
+            entries = self._read_entries()
+        return [
+            entry for entry in entries
+            if (item is None or entry.get('item') == item) and
+               (warehouse_type is None or entry.get('warehouse') == warehouse_type) and
+               (since is None or entry.get('ts', '') >= since)
+        ]
+
+    # === Ghi ledger ===
+
+    def _count_pending(self) -> int:
+        """Đếm số dòng ledger sau snapshot cũ nhất"""
+        offset = min(self._read_offsets().values())
+        if self._ledger_size() <= offset:
+            return 0
+        return len(self._read_entries(offset))
+
+    def append(self, movements: Iterable[Dict[str, Any]]) -> bool:
+        """
+        Ghi thêm các biến động vào cuối ledger (chi phí không phụ thuộc số mặt hàng)
+
+        Mỗi biến động gồm: warehouse, item, quantity (số lượng sau biến động), change, op
+
+        Returns:
+            True nếu đã đủ số dòng để gộp snapshot
+        """
+        timestamp = datetime.now().isoformat(timespec='seconds')
+        lines = []
+        for movement in movements:
+            entry = {
+                'ts': timestamp,
+                'warehouse': movement['warehouse'],
+                'item': movement['item'],
+                'quantity': movement['quantity'],
+                'change': movement.get('change', 0),
+                'op': movement.get('op', 'set')
+            }
+            lines.append(json.dumps(entry, ensure_ascii=False) + '\n')
+
+        if not lines:
+            return False
+        entry_count = len(lines)
+
+        with self._lock:
+            if self._pending_entries is None:
+                self._pending_entries = self._count_pending()
+
+            self.ledger_file.parent.mkdir(parents=True, exist_ok=True)
+
+            # Đảm bảo không nối vào dòng cuối bị cắt dở
+            if self._ledger_size() > 0:
+                with open(self.ledger_file, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        lines.insert(0, '\n')
+
+            with open(self.ledger_file, 'a', encoding='utf-8') as f:
+                f.write(''.join(lines))
+            bump_data_version(INVENTORY)
+
+            self._pending_entries += entry_count
+            return self._pending_entries >= self.snapshot_interval
+
+    def write_snapshot(self, inventories: Dict[str, Dict[str, float]]):
+        """
+        Ghi snapshot cho các kho được truyền vào và đánh dấu vị trí ledger tương ứng
+
+        Args:
+            inventories: warehouse_type -> dữ liệu tồn kho đầy đủ của kho đó
+        """
+        with self._lock:
+            # Lấy vị trí trước khi ghi: các dòng ghi sau đó vẫn được phát lại
+            ledger_offset = self._ledger_size()
+            offsets = self._read_offsets()
+
+            for warehouse_type, inventory in inventories.items():
+                save_json_document(self.snapshot_files[warehouse_type], inventory)
+                offsets[warehouse_type] = ledger_offset
+
+            self._write_offsets(offsets)
+            self._pending_entries = None
+            bump_data_version(INVENTORY)
+
+    def compact(self) -> Dict[str, int]:
+        """Gộp phần đuôi ledger vào snapshot của cả hai kho"""
+        with self._lock:
+            inventories = {wt: self.load_warehouse(wt) for wt in WAREHOUSE_TYPES}
+            self.write_snapshot(inventories)
+            print(f"🗜️ [Inventory Ledger] Compacted snapshot: "
+                  f"{len(inventories['feed'])} feed, {len(inventories['mix'])} mix items")
+            return {wt: len(items) for wt, items in inventories.items()}
+
+
+# Global instance
+inventory_ledger = InventoryLedger()
+
+# Convenience functions
+def load_warehouse_inventory(warehouse_type: str) -> Dict[str, float]:
+    """Tồn kho hiện tại của một kho (snapshot + ledger)"""
+    return inventory_ledger.load_warehouse(warehouse_type)
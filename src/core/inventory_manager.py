@@ -4,8 +4,18 @@ from typing import Dict, Any, List, Tuple
 from datetime import datetime, timedelta
 try:
     from src.utils.persistent_paths import get_data_file_path, get_config_file_path
+    from src.utils.database_store import get_database_store
+    from src.core.inventory_ledger import inventory_ledger
+    from src.core.ingredient_classifier import ingredient_classifier
+    from src.utils.json_document_cache import load_json_document, save_json_document
+    from src.utils.data_versions import bump_data_version, INVENTORY
 except ImportError:
     from utils.persistent_paths import get_data_file_path, get_config_file_path
+    from utils.database_store import get_database_store
+    from core.inventory_ledger import inventory_ledger
+    from core.ingredient_classifier import ingredient_classifier
+    from utils.json_document_cache import load_json_document, save_json_document
+    from utils.data_versions import bump_data_version, INVENTORY
 
 class InventoryManager:
     """Class to manage inventory of feed and mix ingredients with separate warehouses"""
@@ -29,6 +39,15 @@ class InventoryManager:
         self.mix_packaging_file = str(get_config_file_path("mix_packaging_info.json"))
         self.legacy_packaging_file = str(get_config_file_path("packaging_info.json"))
 
+        # Database backend (None when using JSON files only, see DB_BACKEND)
+        self.db_store = get_database_store()
+
+        # Append-only movement ledger; warehouse JSON files are its snapshots
+        self.ledger = inventory_ledger
+
+        # Ingredient -> warehouse index built from formulas and presets
+        self.classifier = ingredient_classifier
+
         # Load inventory and packaging data
         self.feed_inventory = self.load_warehouse_inventory("feed")
         self.mix_inventory = self.load_warehouse_inventory("mix")
@@ -42,16 +61,17 @@ class InventoryManager:
     def load_warehouse_inventory(self, warehouse_type: str) -> Dict[str, float]:
         """Load inventory from warehouse-specific JSON file"""
         try:
-            if warehouse_type == "feed":
-                file_path = self.feed_inventory_file
-            elif warehouse_type == "mix":
-                file_path = self.mix_inventory_file
-            else:
+            if warehouse_type not in ("feed", "mix"):
                 raise ValueError(f"Invalid warehouse type: {warehouse_type}")
 
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            if self.db_store:
+                inventory = self._load_from_database(self.db_store.load_inventory, warehouse_type)
+                if inventory:
+                    return inventory
+
+            if self.ledger.has_snapshot(warehouse_type):
+                # Snapshot plus ledger entries written after it
+                return self.ledger.load_warehouse(warehouse_type)
             else:
                 # Try to migrate from legacy file if warehouse files don't exist
                 return self.migrate_from_legacy_inventory(warehouse_type)
@@ -59,6 +79,32 @@ class InventoryManager:
             print(f"Error loading {warehouse_type} inventory: {e}")
             return {}
 
+    def _load_from_database(self, loader, warehouse_type: str) -> Dict:
+        """Load warehouse data from the database, falling back to JSON on error"""
+        try:
+            return loader(warehouse_type)
+        except Exception as e:
+            print(f"Error loading {warehouse_type} data from database, using JSON files: {e}")
+            return {}
+
+    def _save_warehouse_to_database(self, warehouse_type: str) -> bool:
+        """Write one warehouse (quantities and bag sizes) to the database in a single transaction.
+
+        The JSON files are still written first because reports and exports read them directly.
+        """
+        if not self.db_store:
+            return True
+
+        try:
+            if warehouse_type == "feed":
+                self.db_store.save_warehouse("feed", self.feed_inventory, self.feed_packaging_info)
+            else:
+                self.db_store.save_warehouse("mix", self.mix_inventory, self.mix_packaging_info)
+            return True
+        except Exception as e:
+            print(f"Error saving {warehouse_type} inventory to database: {e}")
+            return False
+
     def load_inventory(self) -> Dict[str, float]:
         """Legacy method - load unified inventory for backward compatibility"""
         return self.get_unified_inventory()
@@ -67,20 +113,15 @@ class InventoryManager:
         """Save inventory to warehouse-specific JSON file"""
         try:
             if warehouse_type == "feed":
-                file_path = self.feed_inventory_file
                 inventory_data = self.feed_inventory
             elif warehouse_type == "mix":
-                file_path = self.mix_inventory_file
                 inventory_data = self.mix_inventory
             else:
                 raise ValueError(f"Invalid warehouse type: {warehouse_type}")
 
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(inventory_data, f, ensure_ascii=False, indent=4)
-            return True
+            # Full rewrite becomes the new snapshot for this warehouse
+            self.ledger.write_snapshot({warehouse_type: inventory_data})
+            return self._save_warehouse_to_database(warehouse_type)
         except Exception as e:
             print(f"Error saving {warehouse_type} inventory: {e}")
             return False
@@ -101,9 +142,13 @@ class InventoryManager:
             else:
                 raise ValueError(f"Invalid warehouse type: {warehouse_type}")
 
+            if self.db_store:
+                packaging = self._load_from_database(self.db_store.load_packaging, warehouse_type)
+                if packaging:
+                    return packaging
+
             if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return load_json_document(file_path, {})
             else:
                 # Try to migrate from legacy file if warehouse files don't exist
                 return self.migrate_packaging_from_legacy(warehouse_type)
@@ -159,8 +204,7 @@ class InventoryManager:
             if not os.path.exists(self.legacy_packaging_file):
                 return self.get_default_packaging_info()
 
-            with open(self.legacy_packaging_file, 'r', encoding='utf-8') as f:
-                legacy_packaging = json.load(f)
+            legacy_packaging = load_json_document(self.legacy_packaging_file, {}, copy=False)
 
             # Filter packaging info based on warehouse inventory
             warehouse_inventory = getattr(self, f"{warehouse_type}_inventory", {})
@@ -212,59 +256,8 @@ class InventoryManager:
     def determine_warehouse_type(self, ingredient_name: str) -> str:
         """Determine which warehouse an ingredient belongs to based on formulas and patterns"""
         try:
-            # Load formulas to check ingredient usage
-            feed_formula_file = str(get_config_file_path("feed_formula.json"))
-            mix_formula_file = str(get_config_file_path("mix_formula.json"))
-
-            feed_formula = {}
-            mix_formula = {}
-
-            if os.path.exists(feed_formula_file):
-                with open(feed_formula_file, 'r', encoding='utf-8') as f:
-                    feed_formula = json.load(f)
-
-            if os.path.exists(mix_formula_file):
-                with open(mix_formula_file, 'r', encoding='utf-8') as f:
-                    mix_formula = json.load(f)
-
-            # Check if ingredient is in formulas
-            in_feed_formula = ingredient_name in feed_formula
-            in_mix_formula = ingredient_name in mix_formula
-
-            # If in both, use categorization rules
-            if in_feed_formula and in_mix_formula:
-                # These are typically feed ingredients even if used in mix
-                feed_priority_ingredients = ["DCP", "Đá hạt", "Đá bột mịn"]
-                if ingredient_name in feed_priority_ingredients:
-                    return "feed"
-                else:
-                    return "mix"  # Default to mix for shared additives
-
-            # If only in one formula, use that
-            if in_feed_formula:
-                return "feed"
-            if in_mix_formula:
-                return "mix"
-
-            # If not in any formula, categorize based on name patterns
-            ingredient_lower = ingredient_name.lower()
-
-            # Feed ingredients patterns
-            feed_patterns = ['cám', 'bắp', 'nành', 'dầu', 'gạo', 'nguyên liệu']
-            if any(pattern in ingredient_lower for pattern in feed_patterns):
-                return "feed"
-
-            # Mix ingredients patterns (additives, supplements, etc.)
-            mix_patterns = ['performix', 'premix', 'enzyme', 'lysine', 'methionine', 'choline',
-                           'phytast', 'miamix', 'carophy', 'zym', 'tetracylin', 'tiamulin',
-                           'amox', 'immune', 'lysoforte', 'nutriprotect', 'defitox', 'ecobiol',
-                           'lactic', 'sodium', 'bicarbonate']
-            if any(pattern in ingredient_lower for pattern in mix_patterns):
-                return "mix"
-
-            # Default to mix for unknown ingredients (typically additives)
-            return "mix"
-
+            # Precomputed index over current formulas and presets, rebuilt when they change
+            return self.classifier.classify(ingredient_name)
         except Exception as e:
             print(f"Error determining warehouse type for {ingredient_name}: {e}")
             return "mix"  # Default to mix
@@ -281,12 +274,10 @@ class InventoryManager:
             else:
                 raise ValueError(f"Invalid warehouse type: {warehouse_type}")
 
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(packaging_data, f, ensure_ascii=False, indent=4)
-            return True
+            save_json_document(file_path, packaging_data)
+            # Bag sizes are shown next to the analysis in the inventory tables
+            bump_data_version(INVENTORY)
+            return self._save_warehouse_to_database(warehouse_type)
         except Exception as e:
             print(f"Error saving {warehouse_type} packaging info: {e}")
             return False
@@ -318,37 +309,62 @@ class InventoryManager:
     def update_inventory(self, ingredient: str, amount: float) -> bool:
         """Update the inventory for a specific ingredient in appropriate warehouse"""
         try:
+            return self._apply_quantity_changes({ingredient: amount}, "set")
+        except Exception as e:
+            print(f"Error updating inventory for {ingredient}: {e}")
+            return False
+
+    def update_multiple(self, updates: Dict[str, float]) -> bool:
+        """Update multiple inventory items at once"""
+        return self._apply_quantity_changes(updates, "set")
+
+    def _apply_quantity_changes(self, quantities: Dict[str, float], operation: str) -> bool:
+        """Set new quantities in their warehouses and append the movements to the ledger"""
+        movements = []
+        for ingredient, quantity in quantities.items():
             # Find which warehouse contains this ingredient
             if ingredient in self.feed_inventory:
-                self.feed_inventory[ingredient] = amount
                 warehouse_type = "feed"
             elif ingredient in self.mix_inventory:
-                self.mix_inventory[ingredient] = amount
                 warehouse_type = "mix"
             else:
                 # If ingredient doesn't exist, determine warehouse and add it
                 warehouse_type = self.determine_warehouse_type(ingredient)
-                if warehouse_type == "feed":
-                    self.feed_inventory[ingredient] = amount
-                else:
-                    self.mix_inventory[ingredient] = amount
 
-            # Update unified view
-            self.inventory = self.get_unified_inventory()
+            warehouse = self.feed_inventory if warehouse_type == "feed" else self.mix_inventory
+            previous = warehouse.get(ingredient, 0)
+            warehouse[ingredient] = quantity
+            movements.append({
+                'warehouse': warehouse_type,
+                'item': ingredient,
+                'quantity': quantity,
+                'change': quantity - previous,
+                'op': operation
+            })
+
+        # Update unified view
+        self.inventory = self.get_unified_inventory()
+
+        return self._record_movements(movements)
+
+    def _record_movements(self, movements: List[Dict[str, Any]]) -> bool:
+        """Append movements to the ledger (and database), compacting into a snapshot when due"""
+        if not movements:
+            return True
+
+        try:
+            snapshot_due = self.ledger.append(movements)
 
-            # Save appropriate warehouse
-            return self.save_warehouse_inventory(warehouse_type)
+            if self.db_store:
+                self.db_store.record_quantity_changes(movements, self.packaging_info)
 
+            if snapshot_due:
+                self.ledger.compact()
+            return True
         except Exception as e:
-            print(f"Error updating inventory for {ingredient}: {e}")
+            print(f"Error recording inventory movements: {e}")
             return False
 
-    def update_multiple(self, updates: Dict[str, float]) -> bool:
-        """Update multiple inventory items at once"""
-        for ingredient, amount in updates.items():
-            self.inventory[ingredient] = amount
-        return self.save_inventory()
-
     def add_new_item(self, item_name: str, initial_quantity: float = 0, bag_size: int = 0, warehouse_type: str = None) -> bool:
         """Add a new inventory item - bag_size defaults to 0 (optional)"""
         try:
@@ -582,11 +598,7 @@ class InventoryManager:
                 return False, errors
 
             # Apply all updates
-            for item_name, quantity in successful_updates.items():
-                self.inventory[item_name] = quantity
-
-            # Save inventory
-            success = self.save_inventory()
+            success = self._apply_quantity_changes(successful_updates, "set")
             if not success:
                 errors.append("Không thể lưu file inventory")
                 return False, errors
@@ -796,46 +808,22 @@ class InventoryManager:
 
     def use_ingredients(self, ingredients_used: Dict[str, float]) -> Dict[str, float]:
         """Subtract used ingredients from inventory and return updated inventory"""
+        new_quantities = {}
         for ingredient, amount in ingredients_used.items():
             current = self.inventory.get(ingredient, 0)
-            self.inventory[ingredient] = max(0, current - amount)
+            new_quantities[ingredient] = max(0, current - amount)
 
-        self.save_inventory()
+        self._apply_quantity_changes(new_quantities, "use")
         return self.inventory
 
     def add_ingredients(self, ingredients_added: Dict[str, float]) -> Dict[str, float]:
         """Add ingredients to inventory and return updated inventory"""
-        warehouses_to_save = set()
-
+        new_quantities = {}
         for ingredient, amount in ingredients_added.items():
-            # Find which warehouse contains this ingredient
-            if ingredient in self.feed_inventory:
-                current = self.feed_inventory.get(ingredient, 0)
-                self.feed_inventory[ingredient] = current + amount
-                warehouses_to_save.add("feed")
-            elif ingredient in self.mix_inventory:
-                current = self.mix_inventory.get(ingredient, 0)
-                self.mix_inventory[ingredient] = current + amount
-                warehouses_to_save.add("mix")
-            else:
-                # If ingredient doesn't exist, determine warehouse and add it
-                warehouse_type = self.determine_warehouse_type(ingredient)
-                if warehouse_type == "feed":
-                    current = self.feed_inventory.get(ingredient, 0)
-                    self.feed_inventory[ingredient] = current + amount
-                    warehouses_to_save.add("feed")
-                else:
-                    current = self.mix_inventory.get(ingredient, 0)
-                    self.mix_inventory[ingredient] = current + amount
-                    warehouses_to_save.add("mix")
-
-        # Update unified view
-        self.inventory = self.get_unified_inventory()
-
-        # Save affected warehouses
-        for warehouse_type in warehouses_to_save:
-            self.save_warehouse_inventory(warehouse_type)
+            current = self.inventory.get(ingredient, 0)
+            new_quantities[ingredient] = current + amount
 
+        self._apply_quantity_changes(new_quantities, "add")
         return self.inventory
 
     def get_packaging_info(self) -> Dict[str, int]:
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Purchase Order Planner - Kế hoạch đặt hàng tối thiểu (làm tròn theo bao) cho N ngày tới
+
+Kết hợp tồn kho hiện tại, kích thước bao, ngưỡng cảnh báo (kể cả ngưỡng riêng của từng
+nguyên liệu) và lượng dùng dự báo theo từng ngày. Mọi nguyên liệu được tính trong một lần
+bằng mảng NumPy (nguyên liệu × ngày); kết quả được giữ lại tới khi tồn kho, báo cáo hoặc
+ngưỡng thay đổi nên có thể tính lại sau mỗi lần cập nhật tồn kho.
+"""
+
+import math
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from src.core.inventory_ledger import load_warehouse_inventory
+    from src.core.demand_forecaster import demand_forecaster, MIN_OBSERVATIONS
+    from src.core.usage_aggregator import usage_aggregator
+    from src.utils.persistent_paths import persistent_path_manager
+    from src.utils.json_document_cache import load_json_document
+    from src.utils.data_versions import data_versions, INVENTORY, REPORTS, THRESHOLDS
+except ImportError:
+    from core.inventory_ledger import load_warehouse_inventory
+    from core.demand_forecaster import demand_forecaster, MIN_OBSERVATIONS
+    from core.usage_aggregator import usage_aggregator
+    from utils.persistent_paths import persistent_path_manager
+    from utils.json_document_cache import load_json_document
+    from utils.data_versions import data_versions, INVENTORY, REPORTS, THRESHOLDS
+
+# Số ngày kế hoạch mặc định
+DEFAULT_HORIZON_DAYS = 14
+
+# Số ngày lịch sử cho lượng dùng trung bình khi chưa đủ dữ liệu dự báo
+AVERAGE_WINDOW_DAYS = 7
+
+WAREHOUSE_TYPES = ("feed", "mix")
+
+
+class PurchaseOrderPlanner:
+    """Lập kế hoạch đặt hàng để tồn kho không xuống dưới ngưỡng khẩn cấp trong N ngày tới"""
+
+    def __init__(self, inventory_manager=None, threshold_manager=None, forecaster=None):
+        """
+        Args:
+            inventory_manager: InventoryManager (tồn kho và get_bag_size); None = đọc sổ kho/cấu hình bao
+            threshold_manager: ThresholdManager (ngưỡng chung và ngưỡng riêng); None = tạo khi cần
+            forecaster: DemandForecaster; None = dùng bộ dự báo dùng chung
+        """
+        self.inventory_manager = inventory_manager
+        self._threshold_manager = threshold_manager
+        self.forecaster = forecaster or demand_forecaster
+        self._lock = threading.Lock()
+        self._cached_plan: Optional[Tuple[Tuple, Dict[str, Any]]] = None
+
+    @property
+    def threshold_manager(self):
+        """ThresholdManager cung cấp ngưỡng cảnh báo"""
+        if self._threshold_manager is None:
+            try:
+                from src.core.threshold_manager import ThresholdManager
+            except ImportError:
+                from core.threshold_manager import ThresholdManager
+            self._threshold_manager = ThresholdManager()
+        return self._threshold_manager
+
+    # === Dữ liệu đầu vào ===
+
+    def _load_stock(self) -> Dict[str, float]:
+        """Tồn kho hiện tại theo khóa 'feed_<tên>' / 'mix_<tên>'"""
+        stock = {}
+        for warehouse_type in WAREHOUSE_TYPES:
+            if self.inventory_manager is not None:
+                inventory = self.inventory_manager.get_warehouse_inventory(warehouse_type)
+            else:
+                inventory = load_warehouse_inventory(warehouse_type)
+            for ingredient, amount in inventory.items():
+                stock[f"{warehouse_type}_{ingredient}"] = float(amount or 0)
+        return stock
+
+    def _load_bag_sizes(self) -> Dict[str, float]:
+        """Kích thước bao (kg) theo khóa, riêng từng kho (từ InventoryManager hoặc file cấu hình bao)"""
+        config_path = persistent_path_manager.config_path
+        bag_sizes = {}
+        for warehouse_type in WAREHOUSE_TYPES:
+            if self.inventory_manager is not None:
+                packaging = getattr(self.inventory_manager, f"{warehouse_type}_packaging_info", {})
+            else:
+                packaging = load_json_document(config_path / f"{warehouse_type}_packaging_info.json", {}, copy=False)
+            for ingredient, bag_size in (packaging or {}).items():
+                bag_sizes[f"{warehouse_type}_{ingredient}"] = float(bag_size or 0)
+        return bag_sizes
+
+    def _daily_forecast(self, keys: List[str], horizon: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lượng dùng từng ngày (nguyên liệu × ngày) và cờ "dùng dự báo" của từng nguyên liệu
+
+        Nguyên liệu chưa đủ dữ liệu cho mô hình dự báo dùng lượng dùng trung bình 7 ngày.
+        """
+        daily = np.zeros((len(keys), horizon))
+        forecasted = np.zeros(len(keys), dtype=bool)
+
+        try:
+            state = self.forecaster.get_current_state()
+            rows = np.array([state.index.get(key, -1) for key in keys], dtype=np.intp)
+            usable = rows >= 0
+            usable[usable] = state.observations[rows[usable]] >= MIN_OBSERVATIONS
+            if usable.any():
+                daily[usable] = state.forecast(horizon)[rows[usable]]
+                forecasted = usable
+        except Exception as e:
+            print(f"⚠️ [Purchase Planner] Demand forecast unavailable, using averages: {e}")
+
+        averages = usage_aggregator.get_daily_averages(AVERAGE_WINDOW_DAYS)
+        flat = np.array([averages.get(key, 0.0) for key in keys])
+        daily[~forecasted] = flat[~forecasted, None]
+        return daily, forecasted
+
+    # === Kế hoạch ===
+
+    def plan(self, horizon_days: int = DEFAULT_HORIZON_DAYS) -> Dict[str, Any]:
+        """
+        Kế hoạch đặt hàng tối thiểu cho horizon_days ngày tới
+
+        Với mỗi nguyên liệu: lượng cần = tổng lượng dùng dự báo + tồn kho an toàn - tồn kho hiện tại,
+        làm tròn lên theo bao. Tồn kho an toàn lấy theo ngưỡng khẩn cấp (số ngày và/hoặc số kg)
+        của nguyên liệu; ngày đặt hàng là ngày tồn kho dự kiến xuống dưới mức an toàn.
+
+        Returns:
+            'orders': danh sách đơn đặt (sớm nhất trước), 'horizon_days', 'generated_at' và 'totals'.
+            Kết quả được dùng chung giữa các lần gọi, không sửa trực tiếp.
+        """
+        horizon_days = max(1, int(horizon_days))
+        key = (horizon_days,) + data_versions.get(INVENTORY, REPORTS, THRESHOLDS) + \
+            (datetime.now().strftime("%Y%m%d"),)
+        with self._lock:
+            if self._cached_plan is not None and self._cached_plan[0] == key:
+                return self._cached_plan[1]
+
+        stock_by_key = self._load_stock()
+        keys = list(stock_by_key)
+        daily, forecasted = self._daily_forecast(keys, horizon_days)
+        stock = np.array([stock_by_key[k] for k in keys])
+
+        # Ngưỡng khẩn cấp theo từng nguyên liệu (ngưỡng riêng ưu tiên hơn ngưỡng chung); bảng đã biên
+        # dịch được tải lại khi ngưỡng vừa được lưu ở nơi khác (ví dụ hộp thoại cài đặt)
+        compiled = self.threshold_manager.get_compiled_thresholds()
+        rows = compiled.rows_for([usage_key.split("_", 1)[1] for usage_key in keys])
+        use_days = compiled.use_days[rows]
+        use_stock = compiled.use_stock[rows] | ~use_days
+        critical_days = np.where(use_days, compiled.values["critical_days"][rows], 0.0)
+        critical_stock = np.where(use_stock, compiled.values["critical_stock"][rows], 0.0)
+
+        # Tính đồng thời cho mọi nguyên liệu
+        cumulative = np.cumsum(daily, axis=1)
+        mean_daily = daily.mean(axis=1)
+        safety_stock = np.maximum(critical_days * mean_daily, critical_stock)
+        horizon_usage = cumulative[:, -1]
+        shortfall = np.maximum(horizon_usage + safety_stock - stock, 0.0)
+
+        projected = stock[:, None] - cumulative
+        below = projected < safety_stock[:, None]
+        needs_order = shortfall > 0
+        # Ngày đặt hàng: ngày đầu tiên tồn kho dự kiến dưới mức an toàn (0 = hôm nay)
+        order_day = np.where(below.any(axis=1), np.argmax(below, axis=1), horizon_days)
+        order_day = np.where(stock < safety_stock, 0, order_day)
+
+        bag_sizes = self._load_bag_sizes()
+        today = datetime.now()
+        orders = []
+        for row in np.flatnonzero(needs_order):
+            usage_key = keys[row]
+            warehouse_type, ingredient = usage_key.split("_", 1)
+            bag_size = bag_sizes.get(usage_key, 0.0)
+            if bag_size > 0:
+                bags = int(math.ceil(shortfall[row] / bag_size - 1e-9))
+                quantity = bags * bag_size
+            else:
+                bags = None
+                quantity = float(math.ceil(shortfall[row] - 1e-9))
+
+            days_until_order = int(order_day[row])
+            orders.append({
+                "ingredient": ingredient,
+                "warehouse": warehouse_type,
+                "current_stock": float(stock[row]),
+                "horizon_usage": float(horizon_usage[row]),
+                "daily_usage": float(mean_daily[row]),
+                "safety_stock": float(safety_stock[row]),
+                "shortfall": float(shortfall[row]),
+                "bag_size": bag_size,
+                "bags": bags,
+                "order_quantity": quantity,
+                "order_by": (today + timedelta(days=days_until_order)).strftime("%Y-%m-%d"),
+                "days_until_order": days_until_order,
+                "projected_min_stock": float(projected[row].min()),
+                "usage_source": "forecast" if forecasted[row] else "average",
+                "has_custom_threshold": ingredient in compiled.row_of
+            })
+
+        orders.sort(key=lambda order: (order["days_until_order"], -order["shortfall"]))
+        result = {
+            "orders": orders,
+            "horizon_days": horizon_days,
+            "generated_at": today.strftime("%Y-%m-%d %H:%M:%S"),
+            "totals": {
+                warehouse_type: {
+                    "items": len([o for o in orders if o["warehouse"] == warehouse_type]),
+                    "order_quantity": sum(o["order_quantity"] for o in orders if o["warehouse"] == warehouse_type),
+                    "bags": sum(o["bags"] or 0 for o in orders if o["warehouse"] == warehouse_type)
+                }
+                for warehouse_type in WAREHOUSE_TYPES
+            }
+        }
+
+        with self._lock:
+            self._cached_plan = (key, result)
+        print(f"🛒 [Purchase Planner] {len(orders)} orders over {horizon_days} days "
+              f"({len(keys)} ingredients)")
+        return result
+
+
+# Global instance
+purchase_order_planner = PurchaseOrderPlanner()
+
+# Convenience functions
+def plan_purchase_orders(horizon_days: int = DEFAULT_HORIZON_DAYS) -> Dict[str, Any]:
+    """Kế hoạch đặt hàng tối thiểu cho horizon_days ngày tới"""
+    return purchase_order_planner.plan(horizon_days)
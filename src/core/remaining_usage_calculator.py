@@ -8,10 +8,13 @@ based on current inventory levels and historical usage patterns from production
 
 import json
 import os
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+
 # Handle imports for both development and executable environments
 try:
     from src.utils.persistent_paths import persistent_path_manager, get_config_file_path
@@ -46,11 +49,42 @@ except ImportError:
             def get_config_file_path(filename):
                 return persistent_path_manager.config_path / filename
 
+try:
+    from src.core.inventory_ledger import load_warehouse_inventory
+    from src.utils.json_document_cache import load_json_document
+    from src.core.usage_aggregator import usage_aggregator, UsageAggregator
+    from src.core.demand_forecaster import demand_forecaster, ForecastState, MIN_OBSERVATIONS
+    from src.core.stockout_simulator import StockoutSimulator, STOCKOUT_HORIZONS
+    from src.core.purchase_order_planner import purchase_order_planner
+    from src.utils.data_versions import data_versions, INVENTORY, REPORTS, THRESHOLDS
+except ImportError:
+    from core.inventory_ledger import load_warehouse_inventory
+    from utils.json_document_cache import load_json_document
+    from core.usage_aggregator import usage_aggregator, UsageAggregator
+    from core.demand_forecaster import demand_forecaster, ForecastState, MIN_OBSERVATIONS
+    from core.stockout_simulator import StockoutSimulator, STOCKOUT_HORIZONS
+    from core.purchase_order_planner import purchase_order_planner
+    from utils.data_versions import data_versions, INVENTORY, REPORTS, THRESHOLDS
+
+# Report days sampled by the stock-out simulation
+STOCKOUT_HISTORY_DAYS = 28
+
+# Calendar days the Holt-Winters backtest is fitted on before the scored period
+BACKTEST_WARMUP_DAYS = 56
+
+
 class RemainingUsageCalculator:
     """Calculator for remaining usage days based on inventory and consumption patterns"""
 
     def __init__(self):
         """Initialize calculator with proper data paths"""
+        # Shared analysis snapshot, keyed by the inventory/report/threshold data versions
+        self._snapshot_lock = threading.RLock()
+        self._snapshot_serial = 0
+        self.stockout_simulator = StockoutSimulator()
+        # Planner behind get_recommended_orders (the app injects the one used by the Excel order plan)
+        self.purchase_order_planner = purchase_order_planner
+
         try:
             # Use persistent path manager for correct paths
             self.config_path = persistent_path_manager.config_path
@@ -62,6 +96,11 @@ class RemainingUsageCalculator:
             print(f"   Reports: {self.reports_path}")
             print(f"   Data: {self.data_path}")
 
+            # Rolling per-ingredient usage totals, kept current by ReportIndex on report saves
+            self.usage_aggregator = usage_aggregator
+            # Level/trend/weekday forecasts, used instead of the flat average once enough history exists
+            self.demand_forecaster = demand_forecaster
+
             # Ensure directories exist
             self.config_path.mkdir(parents=True, exist_ok=True)
             self.reports_path.mkdir(parents=True, exist_ok=True)
@@ -72,6 +111,8 @@ class RemainingUsageCalculator:
             self.config_path = Path("data/config")
             self.reports_path = Path("data/reports")
             self.data_path = Path("data")
+            self.usage_aggregator = usage_aggregator
+            self.demand_forecaster = demand_forecaster
 
     def load_current_inventory(self) -> Tuple[Dict[str, float], Dict[str, float]]:
         """Load current inventory from config files using correct paths"""
@@ -84,20 +125,18 @@ class RemainingUsageCalculator:
             print(f"   Feed: {feed_inventory_path}")
             print(f"   Mix: {mix_inventory_path}")
 
-            # Load feed inventory
+            # Load feed inventory (snapshot + ledger)
             feed_inventory = {}
             if feed_inventory_path.exists():
-                with open(feed_inventory_path, 'r', encoding='utf-8') as f:
-                    feed_inventory = json.load(f)
+                feed_inventory = load_warehouse_inventory("feed")
                 print(f"✅ [Usage Calculator] Loaded {len(feed_inventory)} feed items")
             else:
                 print(f"⚠️ [Usage Calculator] Feed inventory file not found: {feed_inventory_path}")
 
-            # Load mix inventory
+            # Load mix inventory (snapshot + ledger)
             mix_inventory = {}
             if mix_inventory_path.exists():
-                with open(mix_inventory_path, 'r', encoding='utf-8') as f:
-                    mix_inventory = json.load(f)
+                mix_inventory = load_warehouse_inventory("mix")
                 print(f"✅ [Usage Calculator] Loaded {len(mix_inventory)} mix items")
             else:
                 print(f"⚠️ [Usage Calculator] Mix inventory file not found: {mix_inventory_path}")
@@ -112,20 +151,10 @@ class RemainingUsageCalculator:
         """Load packaging information from both warehouses"""
         try:
             # Load feed packaging
-            feed_pkg_file = self.config_path / "feed_packaging_info.json"
-            if feed_pkg_file.exists():
-                with open(feed_pkg_file, 'r', encoding='utf-8') as f:
-                    self._feed_packaging = json.load(f)
-            else:
-                self._feed_packaging = {}
+            self._feed_packaging = load_json_document(self.config_path / "feed_packaging_info.json", {})
 
             # Load mix packaging
-            mix_pkg_file = self.config_path / "mix_packaging_info.json"
-            if mix_pkg_file.exists():
-                with open(mix_pkg_file, 'r', encoding='utf-8') as f:
-                    self._mix_packaging = json.load(f)
-            else:
-                self._mix_packaging = {}
+            self._mix_packaging = load_json_document(self.config_path / "mix_packaging_info.json", {})
 
             print(f"📋 [Usage Calculator] Loaded packaging info: {len(self._feed_packaging)} feed, {len(self._mix_packaging)} mix items")
             return self._feed_packaging, self._mix_packaging
@@ -151,8 +180,7 @@ class RemainingUsageCalculator:
 
                 if report_file.exists():
                     try:
-                        with open(report_file, 'r', encoding='utf-8') as f:
-                            report_data = json.load(f)
+                        report_data = load_json_document(report_file, {}, copy=False)
 
                         # Extract consumption data
                         consumption_data = {
@@ -235,24 +263,39 @@ class RemainingUsageCalculator:
             traceback.print_exc()
             return {}
 
+    def _forecast_remaining(self, current_inventory: Dict[str, float],
+                            warehouse_type: str) -> Dict[str, Tuple[float, float]]:
+        """Forecast (next-week daily usage, remaining days) per ingredient with enough report history"""
+        try:
+            stock = {f"{warehouse_type}_{ingredient}": amount
+                     for ingredient, amount in current_inventory.items()}
+            prefix = len(warehouse_type) + 1
+            return {key[prefix:]: value
+                    for key, value in self.demand_forecaster.estimate_remaining_days(stock).items()}
+        except Exception as e:
+            print(f"⚠️ [Usage Calculator] Demand forecast unavailable, using averages: {e}")
+            return {}
+
     def calculate_remaining_days(self, current_inventory: Dict[str, float],
                                daily_usage: Dict[str, float],
                                warehouse_type: str) -> Dict[str, Dict[str, float]]:
         """Calculate remaining days for ingredients in a specific warehouse"""
         try:
             remaining_data = {}
+            forecasts = self._forecast_remaining(current_inventory, warehouse_type)
 
             for ingredient, current_amount in current_inventory.items():
                 # Create the usage key for this warehouse and ingredient
                 usage_key = f"{warehouse_type}_{ingredient}"
 
-                # Get daily usage for this ingredient
-                daily_consumption = daily_usage.get(usage_key, 0.0)
+                # Get daily usage for this ingredient (forecast when available, otherwise the average)
+                forecast = forecasts.get(ingredient)
+                daily_consumption = forecast[0] if forecast else daily_usage.get(usage_key, 0.0)
 
                 # Calculate remaining days
                 if daily_consumption > 0:
                     if current_amount > 0:
-                        remaining_days = current_amount / daily_consumption
+                        remaining_days = forecast[1] if forecast else current_amount / daily_consumption
                     else:
                         # No stock but has usage - critically low (0 days)
                         remaining_days = 0.0
@@ -289,16 +332,16 @@ class RemainingUsageCalculator:
         try:
             print(f"🔄 [Usage Calculator] Starting comprehensive usage analysis...")
 
-            # Initialize threshold manager integration
-            self.integrate_with_threshold_manager()
+            # Initialize threshold manager integration (it reloads itself when thresholds are saved)
+            if not hasattr(self, 'threshold_manager'):
+                self.integrate_with_threshold_manager()
 
             # Load all required data
             feed_inventory, mix_inventory = self.load_current_inventory()
             feed_packaging, mix_packaging = self.load_packaging_info()
-            usage_history = self.load_usage_history(days_history)
 
-            # Calculate daily averages
-            daily_usage = self.calculate_average_daily_usage(usage_history)
+            # Daily averages from the rolling aggregate (no report files are read)
+            daily_usage = self.usage_aggregator.get_daily_averages(days_history)
 
             # Calculate remaining days using enhanced threshold logic
             if hasattr(self, 'threshold_manager'):
@@ -308,6 +351,9 @@ class RemainingUsageCalculator:
                 feed_remaining = self.calculate_remaining_days(feed_inventory, daily_usage, "feed")
                 mix_remaining = self.calculate_remaining_days(mix_inventory, daily_usage, "mix")
 
+            # Monte Carlo stock-out probabilities ("stockout_1d", "stockout_3d", "stockout_7d")
+            self.add_stockout_probabilities({"feed": feed_remaining, "mix": mix_remaining})
+
             # Enhanced summary with more detailed statistics
             analysis_result = {
                 "feed": feed_remaining,
@@ -349,6 +395,62 @@ class RemainingUsageCalculator:
             traceback.print_exc()
             return {"feed": {}, "mix": {}, "summary": {}}
 
+    def get_stockout_probabilities(self, stock: Dict[str, float],
+                                   history_days: int = STOCKOUT_HISTORY_DAYS) -> Dict[str, Dict[int, float]]:
+        """
+        Probability of running out within 1, 3 and 7 days, per "feed_<name>" / "mix_<name>" key.
+
+        Daily usage is resampled from the report days of the last `history_days` days
+        (see StockoutSimulator). Keys without enough report history are omitted.
+        """
+        matrix = self.load_daily_usage_matrix(history_days)
+        return self.stockout_simulator.simulate_dict(matrix["usage"], matrix["keys"], stock)
+
+    def add_stockout_probabilities(self, remaining_by_warehouse: Dict[str, Dict[str, Dict]]):
+        """Add "stockout_<n>d" probabilities (None without history) to remaining-days entries in place"""
+        try:
+            stock = {f"{warehouse_type}_{ingredient}": data["current_amount"]
+                     for warehouse_type, remaining in remaining_by_warehouse.items()
+                     for ingredient, data in remaining.items()}
+            probabilities = self.get_stockout_probabilities(stock)
+        except Exception as e:
+            print(f"⚠️ [Usage Calculator] Stock-out simulation failed: {e}")
+            probabilities = {}
+
+        for warehouse_type, remaining in remaining_by_warehouse.items():
+            for ingredient, data in remaining.items():
+                by_horizon = probabilities.get(f"{warehouse_type}_{ingredient}", {})
+                for horizon in STOCKOUT_HORIZONS:
+                    data[f"stockout_{horizon}d"] = by_horizon.get(horizon)
+
+    @staticmethod
+    def _analysis_key(days_history: int) -> Tuple:
+        """Cache key of an analysis: history length, input data versions and today's date"""
+        return (days_history,) + data_versions.get(INVENTORY, REPORTS, THRESHOLDS) + \
+            (datetime.now().strftime("%Y%m%d"),)
+
+    def get_analysis_snapshot(self, days_history: int = 7) -> Dict:
+        """
+        Get the usage analysis shared by all consumers (inventory tables, status cards, alerts).
+
+        The analysis is computed once and reused until an inventory, report or threshold write
+        changes the data versions. The returned dict is shared: callers must not modify it.
+        Its "version" key identifies the snapshot so views can skip re-rendering unchanged data.
+        """
+        with self._snapshot_lock:
+            cached = getattr(self, '_cached_analysis', None)
+            if cached is not None and cached[0] == self._analysis_key(days_history):
+                return cached[1]
+
+            snapshot = self.get_comprehensive_usage_analysis(days_history)
+            self._snapshot_serial += 1
+            snapshot["version"] = self._snapshot_serial
+
+            # Key taken after the analysis: syncing the usage window may bump the report version
+            if snapshot.get("summary"):
+                self._cached_analysis = (self._analysis_key(days_history), snapshot)
+            return snapshot
+
     def get_ingredient_status_color(self, status: str) -> Tuple[str, str]:
         """Get background and text colors for ingredient status"""
         color_map = {
@@ -370,10 +472,16 @@ class RemainingUsageCalculator:
         else:
             return f"{days*24:.1f} giờ"
 
-    def get_critical_alerts(self, analysis_result: Dict = None) -> Dict[str, List[Dict]]:
-        """Get critical and warning alerts for ingredients running low"""
+    def get_critical_alerts(self, analysis_result: Dict = None,
+                            sort_by: str = "remaining_days") -> Dict[str, List[Dict]]:
+        """
+        Get critical and warning alerts for ingredients running low.
+
+        Alerts are sorted by remaining days (ascending), or by 7-day stock-out
+        probability (descending) with sort_by="stockout_7d".
+        """
         if analysis_result is None:
-            analysis_result = self.get_comprehensive_usage_analysis()
+            analysis_result = self.get_analysis_snapshot()
 
         alerts = {
             "critical": [],
@@ -389,6 +497,7 @@ class RemainingUsageCalculator:
                 "current_amount": data["current_amount"],
                 "daily_usage": data["daily_usage"],
                 "remaining_days": data["remaining_days"],
+                "stockout_7d": data.get("stockout_7d"),
                 "status": data["status"]
             }
 
@@ -407,6 +516,7 @@ class RemainingUsageCalculator:
                 "current_amount": data["current_amount"],
                 "daily_usage": data["daily_usage"],
                 "remaining_days": data["remaining_days"],
+                "stockout_7d": data.get("stockout_7d"),
                 "status": data["status"]
             }
 
@@ -417,9 +527,12 @@ class RemainingUsageCalculator:
             elif data["status"] == "warning":
                 alerts["warning"].append(alert_item)
 
-        # Sort alerts by remaining days (ascending)
+        # Sort alerts by remaining days (ascending) or stock-out probability (descending)
         for alert_type in alerts:
-            alerts[alert_type].sort(key=lambda x: x["remaining_days"])
+            if sort_by == "stockout_7d":
+                alerts[alert_type].sort(key=lambda x: -(x["stockout_7d"] or 0))
+            else:
+                alerts[alert_type].sort(key=lambda x: x["remaining_days"])
 
         return alerts
 
@@ -499,7 +612,10 @@ class RemainingUsageCalculator:
         """Integrate with ThresholdManager for consistent status categorization"""
         if threshold_manager is None:
             try:
-                from src.core.threshold_manager import ThresholdManager
+                try:
+                    from src.core.threshold_manager import ThresholdManager
+                except ImportError:
+                    from core.threshold_manager import ThresholdManager
                 threshold_manager = ThresholdManager()
             except ImportError:
                 print("⚠️ [Usage Calculator] ThresholdManager not available, using default thresholds")
@@ -508,21 +624,28 @@ class RemainingUsageCalculator:
         self.threshold_manager = threshold_manager
         print("🔗 [Usage Calculator] Integrated with ThresholdManager")
 
+    def integrate_with_purchase_order_planner(self, planner):
+        """Use the given PurchaseOrderPlanner for recommended orders (same plan as the order Excel export)"""
+        self.purchase_order_planner = planner
+        print("🔗 [Usage Calculator] Integrated with PurchaseOrderPlanner")
+
     def calculate_remaining_days_with_thresholds(self, current_inventory: Dict[str, float],
                                                daily_usage: Dict[str, float],
                                                warehouse_type: str) -> Dict[str, Dict[str, float]]:
-        """Calculate remaining days using ThresholdManager if available"""
+        """Calculate remaining days using ThresholdManager if available (all ingredients classified at once)"""
         try:
             remaining_data = {}
+            forecasts = self._forecast_remaining(current_inventory, warehouse_type)
 
             for ingredient, current_amount in current_inventory.items():
                 usage_key = f"{warehouse_type}_{ingredient}"
-                daily_consumption = daily_usage.get(usage_key, 0.0)
+                forecast = forecasts.get(ingredient)
+                daily_consumption = forecast[0] if forecast else daily_usage.get(usage_key, 0.0)
 
                 # Calculate remaining days
                 if daily_consumption > 0:
                     if current_amount > 0:
-                        remaining_days = current_amount / daily_consumption
+                        remaining_days = forecast[1] if forecast else current_amount / daily_consumption
                     else:
                         # No stock but has usage - critically low (0 days)
                         remaining_days = 0.0
@@ -530,39 +653,346 @@ class RemainingUsageCalculator:
                     # No usage data - infinite remaining days
                     remaining_days = float('inf')
 
-                # Use ThresholdManager if available
-                if hasattr(self, 'threshold_manager'):
-                    status_text, color_info = self.threshold_manager.get_inventory_status(
-                        remaining_days, current_amount, ingredient
-                    )
-                    # Map color_info to our status system
-                    status_map = {"red": "critical", "yellow": "low", "orange": "warning", "green": "good"}
-                    status = status_map.get(color_info, "good")
-                else:
-                    # Use default logic
-                    if remaining_days <= 1:
-                        status = "critical"
-                    elif remaining_days <= 3:
-                        status = "low"
-                    elif remaining_days <= 7:
-                        status = "warning"
-                    else:
-                        status = "good"
-
                 remaining_data[ingredient] = {
                     "current_amount": current_amount,
                     "daily_usage": daily_consumption,
                     "remaining_days": remaining_days,
-                    "status": status,
                     "warehouse": warehouse_type
                 }
 
+            if hasattr(self, 'threshold_manager'):
+                # One vectorized pass over the compiled threshold table; the threshold text/colour are
+                # kept so the inventory tables, status cards and alerts share the same classification
+                ingredients = list(remaining_data)
+                status_texts, color_infos = self.threshold_manager.classify_inventory(
+                    ingredients,
+                    [remaining_data[name]["remaining_days"] for name in ingredients],
+                    [remaining_data[name]["current_amount"] for name in ingredients]
+                )
+                # Map color_info to our status system
+                status_map = {"red": "critical", "yellow": "low", "orange": "warning", "green": "good"}
+                for ingredient, status_text, color_info in zip(ingredients, status_texts, color_infos):
+                    remaining_data[ingredient].update({
+                        "status": status_map.get(color_info, "good"),
+                        "threshold_status": status_text,
+                        "threshold_color": color_info
+                    })
+            else:
+                for data in remaining_data.values():
+                    # Use default logic
+                    remaining_days = data["remaining_days"]
+                    if remaining_days <= 1:
+                        data["status"] = "critical"
+                    elif remaining_days <= 3:
+                        data["status"] = "low"
+                    elif remaining_days <= 7:
+                        data["status"] = "warning"
+                    else:
+                        data["status"] = "good"
+
             return remaining_data
 
         except Exception as e:
             print(f"❌ [Usage Calculator] Error calculating remaining days for {warehouse_type}: {e}")
             return {}
 
+    # === Usage history matrix, trends, forecast accuracy and reorders ===
+
+    def load_daily_usage_matrix(self, days: int = 30) -> Dict:
+        """
+        Build the per-ingredient daily usage matrix for the last `days` calendar days (oldest first).
+
+        Returns a dict with "dates" (YYYYMMDD), "keys" ("feed_<name>" / "mix_<name>"),
+        "usage" (keys x dates, 0 when unused, NaN on days without a report) and "has_report".
+        The matrix is cached until a report is written or the day changes.
+        """
+        versions = data_versions.get(REPORTS) + (datetime.now().strftime("%Y%m%d"),)
+        with self._snapshot_lock:
+            cache = getattr(self, '_usage_matrix_cache', None)
+            if cache is None or cache[0] != versions:
+                cache = self._usage_matrix_cache = (versions, {})
+            if days in cache[1]:
+                return cache[1][days]
+
+        today = datetime.now()
+        dates = [(today - timedelta(days=offset)).strftime("%Y%m%d") for offset in range(days - 1, -1, -1)]
+
+        key_index = {}
+        rows, columns, values = [], [], []
+        has_report = np.zeros(days, dtype=bool)
+        for column, date_str in enumerate(dates):
+            report_data = load_json_document(self.reports_path / f"report_{date_str}.json", None, copy=False)
+            if not isinstance(report_data, dict):
+                continue
+            has_report[column] = True
+            for key, amount in UsageAggregator.extract_usage(report_data).items():
+                row = key_index.get(key)
+                if row is None:
+                    row = key_index[key] = len(key_index)
+                rows.append(row)
+                columns.append(column)
+                values.append(amount)
+
+        usage = np.zeros((len(key_index), days), dtype=np.float64)
+        usage[:, ~has_report] = np.nan
+        if values:
+            usage[rows, columns] = values
+
+        matrix = {
+            "dates": dates,
+            "weekdays": np.array([(today - timedelta(days=days - 1 - column)).weekday()
+                                  for column in range(days)], dtype=np.intp),
+            "keys": list(key_index),
+            "usage": usage,
+            "has_report": has_report
+        }
+        with self._snapshot_lock:
+            self._usage_matrix_cache[1][days] = matrix
+        return matrix
+
+    @staticmethod
+    def _split_usage_key(key: str) -> Tuple[str, str]:
+        """Split "feed_<name>" / "mix_<name>" into (warehouse, ingredient)"""
+        warehouse_type, ingredient = key.split("_", 1)
+        return warehouse_type, ingredient
+
+    @staticmethod
+    def _window_mean(usage: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """Mean usage per ingredient over the given report-day columns (NaN when there are none)"""
+        if columns.size == 0:
+            return np.full(usage.shape[0], np.nan)
+        return usage[:, columns].mean(axis=1)
+
+    @staticmethod
+    def _weekday_index(usage: np.ndarray, weekdays: np.ndarray) -> np.ndarray:
+        """Weekday seasonality (ingredients x 7): weekday mean / overall mean, 1.0 without data"""
+        one_hot = (weekdays[:, None] == np.arange(7)[None, :]).astype(np.float64)
+        counts = one_hot.sum(axis=0)
+        overall = usage.mean(axis=1, keepdims=True) if usage.shape[1] else np.zeros((usage.shape[0], 1))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weekday_means = (usage @ one_hot) / counts
+            index = weekday_means / overall
+        return np.where(np.isfinite(index), index, 1.0)
+
+    def get_consumption_trends(self, days: int = 30) -> Dict:
+        """
+        Consumption trends per ingredient over the last `days` days.
+
+        For each ingredient: total, average per report day, 7-day moving average and the change
+        against the previous 7 days, linear slope (kg/day), direction and weekday seasonality.
+        """
+        try:
+            matrix = self.load_daily_usage_matrix(days)
+            report_columns = np.flatnonzero(matrix["has_report"])
+            usage = matrix["usage"][:, report_columns]
+            weekdays = matrix["weekdays"][report_columns]
+
+            totals = usage.sum(axis=1)
+            averages = usage.mean(axis=1) if report_columns.size else np.zeros(len(matrix["keys"]))
+            moving_average_7 = self._window_mean(matrix["usage"], report_columns[report_columns >= days - 7])
+            previous_7 = self._window_mean(
+                matrix["usage"], report_columns[(report_columns >= days - 14) & (report_columns < days - 7)]
+            )
+
+            # Least-squares slope against the calendar day of each report
+            if report_columns.size > 1:
+                t = report_columns - report_columns.mean()
+                slopes = (usage - averages[:, None]) @ t / (t @ t)
+            else:
+                slopes = np.zeros(len(matrix["keys"]))
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                change_percent = (moving_average_7 - previous_7) / previous_7 * 100
+            seasonality = self._weekday_index(usage, weekdays)
+
+            trends = {"feed": {}, "mix": {}}
+            for row, key in enumerate(matrix["keys"]):
+                if totals[row] <= 0:
+                    continue
+                change = change_percent[row]
+                if not np.isfinite(change):
+                    direction, change = "stable", None
+                elif change > 10:
+                    direction = "increasing"
+                elif change < -10:
+                    direction = "decreasing"
+                else:
+                    direction = "stable"
+
+                warehouse_type, ingredient = self._split_usage_key(key)
+                trends[warehouse_type][ingredient] = {
+                    "total_usage": float(totals[row]),
+                    "average_daily_usage": float(averages[row]),
+                    "moving_average_7": float(np.nan_to_num(moving_average_7[row])),
+                    "change_percent": None if change is None else float(change),
+                    "slope_per_day": float(slopes[row]),
+                    "direction": direction,
+                    "weekday_index": [round(float(value), 3) for value in seasonality[row]]
+                }
+
+            return {
+                "period_days": days,
+                "from_date": matrix["dates"][0],
+                "to_date": matrix["dates"][-1],
+                "days_with_reports": int(report_columns.size),
+                "feed": trends["feed"],
+                "mix": trends["mix"],
+                "summary": {
+                    direction: sum(1 for warehouse in trends.values() for item in warehouse.values()
+                                   if item["direction"] == direction)
+                    for direction in ("increasing", "stable", "decreasing")
+                }
+            }
+
+        except Exception as e:
+            print(f"❌ [Usage Calculator] Error calculating consumption trends: {e}")
+            return {}
+
+    def get_prediction_accuracy(self, days: int = 30, window_days: int = 7) -> Dict:
+        """
+        Backtest the daily-usage forecast used for remaining days against actual report usage.
+
+        Each day is predicted the way the remaining-days analysis would have predicted it: the
+        Holt-Winters one-step forecast (stepping a ForecastState over the usage matrix) for
+        ingredients with at least MIN_OBSERVATIONS report days, otherwise the average over days
+        with usage in the preceding `window_days` days. Returns MAE, MAPE, bias and accuracy
+        (100 - MAPE) overall and per ingredient for that forecast, plus overall metrics of each
+        method on its own under "methods".
+        """
+        try:
+            warmup_days = max(window_days, BACKTEST_WARMUP_DAYS)
+            matrix = self.load_daily_usage_matrix(days + warmup_days)
+            usage = np.nan_to_num(matrix["usage"])
+            used = usage > 0
+            has_report = matrix["has_report"]
+
+            # Cumulative sums with a leading zero column: window sums are two lookups per day
+            zeros = np.zeros((usage.shape[0], 1))
+            usage_sums = np.hstack([zeros, np.cumsum(usage, axis=1)])
+            used_counts = np.hstack([zeros, np.cumsum(used, axis=1)])
+
+            evaluated = np.arange(warmup_days, days + warmup_days)
+            evaluated = evaluated[has_report[evaluated]]
+            window_sums = usage_sums[:, evaluated] - usage_sums[:, evaluated - window_days]
+            window_counts = used_counts[:, evaluated] - used_counts[:, evaluated - window_days]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                average_forecast = np.where(window_counts > 0, window_sums / window_counts, 0.0)
+
+            # Holt-Winters: forecast one day ahead, then step the state with that day's usage
+            keys = matrix["keys"]
+            hw_forecast = np.zeros((len(keys), evaluated.size))
+            hw_ready = np.zeros((len(keys), evaluated.size), dtype=bool)
+            first_day = datetime.strptime(matrix["dates"][0], "%Y%m%d") - timedelta(days=1)
+            state = ForecastState(first_day.strftime("%Y%m%d"), keys)
+            position = {int(column): slot for slot, column in enumerate(evaluated)}
+            for column, date_str in enumerate(matrix["dates"]):
+                slot = position.get(column)
+                if slot is not None:
+                    hw_forecast[:, slot] = state.forecast(1)[:, 0]
+                    hw_ready[:, slot] = state.observations >= MIN_OBSERVATIONS
+                if has_report[column]:
+                    nonzero = np.flatnonzero(usage[:, column])
+                    state.step(date_str, {keys[row]: usage[row, column] for row in nonzero})
+                else:
+                    state.step(date_str, None)
+
+            actual = usage[:, evaluated]
+            model_forecast = np.where(hw_ready, hw_forecast, average_forecast)
+
+            def score(forecast, mask=None):
+                scored = (forecast > 0) | (actual > 0)
+                if mask is not None:
+                    scored &= mask
+                errors = np.where(scored, forecast - actual, 0.0)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    percent_errors = np.where(scored & (actual > 0), np.abs(errors) / actual * 100, np.nan)
+                return scored, errors, percent_errors
+
+            def metrics(error_values, percent_values, count):
+                if count == 0:
+                    return None
+                mape = float(np.nanmean(percent_values)) if np.any(np.isfinite(percent_values)) else None
+                return {
+                    "mae": float(np.abs(error_values).sum() / count),
+                    "bias": float(error_values.sum() / count),
+                    "mape": mape,
+                    "accuracy": None if mape is None else max(0.0, 100.0 - mape),
+                    "samples": int(count)
+                }
+
+            def overall(scored, errors, percent_errors):
+                return metrics(errors[scored], percent_errors[scored], int(scored.sum())) or {}
+
+            scored, errors, percent_errors = score(model_forecast)
+            scored_counts = scored.sum(axis=1)
+            result = {"feed": {}, "mix": {}}
+            for row, key in enumerate(keys):
+                row_metrics = metrics(errors[row], percent_errors[row], scored_counts[row])
+                if row_metrics:
+                    row_metrics["method"] = "holt_winters" if hw_ready[row, -1:].any() else "moving_average"
+                    warehouse_type, ingredient = self._split_usage_key(key)
+                    result[warehouse_type][ingredient] = row_metrics
+
+            return {
+                "period_days": days,
+                "window_days": window_days,
+                "days_evaluated": int(evaluated.size),
+                "overall": overall(scored, errors, percent_errors),
+                "methods": {
+                    "moving_average": overall(*score(average_forecast)),
+                    "holt_winters": overall(*score(hw_forecast, hw_ready))
+                },
+                "feed": result["feed"],
+                "mix": result["mix"]
+            }
+
+        except Exception as e:
+            print(f"❌ [Usage Calculator] Error calculating prediction accuracy: {e}")
+            return {}
+
+    def get_recommended_orders(self, coverage_days: int = 14) -> List[Dict]:
+        """
+        Order quantities that cover the next `coverage_days` days, taken from PurchaseOrderPlanner.
+
+        Uses the same plan as the purchase order Excel export (forecast demand, safety stock from each
+        ingredient's critical threshold, whole bags) so both always agree. Remaining days come from the
+        shared usage analysis. Sorted by order date, most urgent first.
+        """
+        try:
+            plan = self.purchase_order_planner.plan(coverage_days)
+            snapshot = self.get_analysis_snapshot()
+
+            orders = []
+            for order in plan["orders"]:
+                ingredient_data = snapshot.get(order["warehouse"], {}).get(order["ingredient"], {})
+                if order["days_until_order"] == 0:
+                    priority = "critical"
+                elif order["days_until_order"] <= 7:
+                    priority = "high"
+                else:
+                    priority = "normal"
+
+                orders.append({
+                    "ingredient": order["ingredient"],
+                    "warehouse": order["warehouse"],
+                    "current_stock": order["current_stock"],
+                    "daily_usage": order["daily_usage"],
+                    "remaining_days": ingredient_data.get("remaining_days", float('inf')),
+                    "forecast_demand": order["horizon_usage"],
+                    "safety_stock": order["safety_stock"],
+                    "required_quantity": order["shortfall"],
+                    "bag_size": order["bag_size"] or None,
+                    "bags": order["bags"],
+                    "order_quantity": order["order_quantity"],
+                    "order_by": order["order_by"],
+                    "priority": priority
+                })
+            return orders
+
+        except Exception as e:
+            print(f"❌ [Usage Calculator] Error calculating recommended orders: {e}")
+            return []
+
     def clear_cache(self):
         """Clear all cached data to force fresh calculations"""
         try:
@@ -588,6 +1018,13 @@ class RemainingUsageCalculator:
             if hasattr(self, '_mix_packaging'):
                 delattr(self, '_mix_packaging')
 
+            # Clear the cached daily usage matrices
+            if hasattr(self, '_usage_matrix_cache'):
+                delattr(self, '_usage_matrix_cache')
+
+            # Re-check report files in the usage window on the next analysis
+            self.usage_aggregator.invalidate()
+
             print("✅ [Usage Calculator] Cache cleared successfully")
 
         except Exception as e:
@@ -6,11 +6,68 @@ Cho phép người dùng cài đặt ngưỡng cho các mức cảnh báo khác
 
 import json
 import os
-from typing import Dict, Tuple
+from typing import Dict, Tuple, List, Sequence
+
+import numpy as np
 try:
     from src.utils.persistent_paths import get_data_file_path, get_config_file_path
+    from src.utils.data_versions import data_versions, bump_data_version, THRESHOLDS
 except ImportError:
     from utils.persistent_paths import get_data_file_path, get_config_file_path
+    from utils.data_versions import data_versions, bump_data_version, THRESHOLDS
+
+# Mã trạng thái theo mức độ ưu tiên (khẩn cấp trước): màu và chữ hiển thị tương ứng
+STATUS_COLORS = ("red", "yellow", "blue", "green", "gray")
+STATUS_TEXTS = ("Khẩn cấp", "Sắp hết", "Bình thường", "Đủ hàng", "Không có dữ liệu")
+RED, YELLOW, BLUE, GREEN, GRAY = range(len(STATUS_COLORS))
+
+
+class CompiledThresholds:
+    """Bảng ngưỡng đã biên dịch: hàng 0 là ngưỡng chung, mỗi thành phần có ngưỡng riêng một hàng"""
+
+    FIELDS = ("critical_days", "warning_days", "critical_stock", "warning_stock", "sufficient_stock")
+
+    def __init__(self, thresholds: Dict, individual_thresholds: Dict[str, Dict]):
+        """Gộp ngưỡng chung với ngưỡng riêng của từng thành phần thành các mảng"""
+        self.row_of: Dict[str, int] = {}
+        rows = [thresholds]
+        for ingredient, overrides in individual_thresholds.items():
+            merged = thresholds.copy()
+            merged.update(overrides or {})
+            self.row_of[ingredient] = len(rows)
+            rows.append(merged)
+
+        self.values = {field: np.array([float(row[field]) for row in rows]) for field in self.FIELDS}
+        self.use_days = np.array([bool(row["use_days_based"]) for row in rows])
+        self.use_stock = np.array([bool(row["use_stock_based"]) for row in rows])
+
+    def rows_for(self, ingredients: Sequence[str]) -> np.ndarray:
+        """Hàng ngưỡng của từng thành phần (0 nếu dùng ngưỡng chung)"""
+        return np.array([self.row_of.get(ingredient, 0) for ingredient in ingredients], dtype=np.intp)
+
+    def classify(self, ingredients: Sequence[str], days_remaining: Sequence[float],
+                 stock_amounts: Sequence[float]) -> np.ndarray:
+        """
+        Mã trạng thái (RED/YELLOW/BLUE/GREEN/GRAY) của tất cả thành phần trong một lần,
+        cùng quy tắc với ThresholdManager.get_inventory_status
+        """
+        rows = self.rows_for(ingredients)
+        days = np.asarray(days_remaining, dtype=np.float64)
+        stock = np.asarray(stock_amounts, dtype=np.float64)
+        values = {field: column[rows] for field, column in self.values.items()}
+        has_days = days != np.inf
+
+        # Ưu tiên theo ngày nếu được bật và có dữ liệu, ngược lại theo tồn kho
+        by_days = has_days & (self.use_days[rows] | ~self.use_stock[rows])
+        days_status = np.select(
+            [days < values["critical_days"], days < values["warning_days"]], [RED, YELLOW], GREEN
+        )
+        stock_status = np.select(
+            [stock <= values["critical_stock"], stock <= values["warning_stock"],
+             stock > values["sufficient_stock"]], [RED, YELLOW, GREEN], BLUE
+        )
+        return np.where(by_days, days_status, stock_status).astype(np.intp)
+
 
 class ThresholdManager:
     """Quản lý ngưỡng cảnh báo tồn kho"""
@@ -29,6 +86,11 @@ class ThresholdManager:
             "use_days_based": True,  # Ưu tiên tính theo ngày
             "use_stock_based": False, # Tính theo số lượng tồn kho
 
+            # Xác suất hết hàng trong 7 ngày (mô phỏng Monte Carlo)
+            "stockout_critical_probability": 0.5,  # Khẩn cấp: >= 50%
+            "stockout_warning_probability": 0.2,   # Sắp hết: >= 20%
+            "sort_alerts_by_stockout": False,      # Sắp xếp cảnh báo theo xác suất hết hàng
+
             # Tùy chọn hiển thị
             "display_unit": "both",  # "days", "stock", "both"
             "show_days_in_table": True,
@@ -67,6 +129,10 @@ class ThresholdManager:
         self.thresholds = self.load_thresholds()
         self.individual_thresholds = self.load_individual_thresholds()
 
+        # Bảng ngưỡng đã biên dịch, tạo lại khi ngưỡng thay đổi
+        self._compiled = None
+        self._synced_version = data_versions.get(THRESHOLDS)[0]
+
     def load_thresholds(self) -> Dict:
         """Tải cài đặt ngưỡng từ file"""
         try:
@@ -113,6 +179,8 @@ class ThresholdManager:
 
             with open(self.individual_config_file, 'w', encoding='utf-8') as f:
                 json.dump(self.individual_thresholds, f, indent=2, ensure_ascii=False)
+            self._synced_version = bump_data_version(THRESHOLDS)
+            self._compiled = None
 
             print(f"[SUCCESS] Đã lưu cài đặt ngưỡng riêng biệt cho {len(self.individual_thresholds)} thành phần")
             return True
@@ -129,6 +197,8 @@ class ThresholdManager:
 
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 json.dump(self.thresholds, f, indent=2, ensure_ascii=False)
+            self._synced_version = bump_data_version(THRESHOLDS)
+            self._compiled = None
 
             print(f"[SUCCESS] Đã lưu cài đặt ngưỡng vào {self.config_file}")
             return True
@@ -167,6 +237,7 @@ class ThresholdManager:
 
             # Update thresholds
             self.thresholds.update(new_thresholds)
+            self._compiled = None
 
             # Save to file
             return self.save_thresholds()
@@ -186,6 +257,7 @@ class ThresholdManager:
                 self.individual_thresholds[ingredient] = {}
 
             self.individual_thresholds[ingredient][threshold_type] = value
+            self._compiled = None
 
             # Validate logic for this ingredient
             thresholds = self.get_ingredient_thresholds(ingredient)
@@ -222,6 +294,7 @@ class ThresholdManager:
         try:
             if ingredient in self.individual_thresholds:
                 del self.individual_thresholds[ingredient]
+                self._compiled = None
                 return self.save_individual_thresholds()
             return True
         except Exception as e:
@@ -242,6 +315,21 @@ class ThresholdManager:
         else:
             return "Đủ hàng", "green"
 
+    def get_status_by_stockout(self, probability: float, ingredient: str = None) -> Tuple[str, str]:
+        """
+        Xác định trạng thái dựa trên xác suất hết hàng trong 7 ngày
+        Returns: (status_text, color_info)
+        """
+        thresholds = self.get_ingredient_thresholds(ingredient) if ingredient else self.thresholds
+        if probability is None:
+            return "Không có dữ liệu", "gray"
+        elif probability >= thresholds["stockout_critical_probability"]:
+            return "Khẩn cấp", "red"
+        elif probability >= thresholds["stockout_warning_probability"]:
+            return "Sắp hết", "yellow"
+        else:
+            return "Đủ hàng", "green"
+
     def get_status_by_stock(self, stock_amount: float) -> Tuple[str, str]:
         """
         Xác định trạng thái dựa trên số lượng tồn kho
@@ -306,36 +394,76 @@ class ThresholdManager:
         else:
             return "Bình thường", "blue"
 
-    def get_alert_items(self, days_remaining_dict: Dict[str, float], inventory_dict: Dict[str, float]) -> Tuple[list, list]:
+    def get_compiled_thresholds(self) -> CompiledThresholds:
+        """
+        Bảng ngưỡng đã biên dịch (chung + riêng từng thành phần)
+        Tải lại cài đặt nếu một ThresholdManager khác (ví dụ hộp thoại cài đặt) vừa lưu ngưỡng
+        """
+        current_version = data_versions.get(THRESHOLDS)[0]
+        if current_version != self._synced_version:
+            self.thresholds = self.load_thresholds()
+            self.individual_thresholds = self.load_individual_thresholds()
+            self._synced_version = current_version
+            self._compiled = None
+
+        if self._compiled is None:
+            self._compiled = CompiledThresholds(self.thresholds, self.individual_thresholds)
+        return self._compiled
+
+    def classify_inventory(self, ingredients: Sequence[str], days_remaining: Sequence[float],
+                           stock_amounts: Sequence[float]) -> Tuple[List[str], List[str]]:
+        """
+        Xác định trạng thái của nhiều thành phần trong một lần (cùng kết quả với get_inventory_status)
+        Returns: (status_texts, color_infos) theo thứ tự của ingredients
+        """
+        codes = self.get_compiled_thresholds().classify(ingredients, days_remaining, stock_amounts)
+        return [STATUS_TEXTS[code] for code in codes], [STATUS_COLORS[code] for code in codes]
+
+    def get_alert_items(self, days_remaining_dict: Dict[str, float], inventory_dict: Dict[str, float],
+                        stockout_dict: Dict[str, float] = None) -> Tuple[list, list]:
         """
         Lấy danh sách các mục cần cảnh báo sử dụng ngưỡng riêng biệt
+        stockout_dict: Xác suất hết hàng trong 7 ngày theo thành phần (tùy chọn)
         Returns: (critical_items, warning_items)
         """
+        stockout_dict = stockout_dict or {}
+        ingredients = list(days_remaining_dict.keys())
+        days = [days_remaining_dict.get(ingredient, float('inf')) for ingredient in ingredients]
+        stocks = [inventory_dict.get(ingredient, 0) for ingredient in ingredients]
+        status_texts, color_infos = self.classify_inventory(ingredients, days, stocks)
+        return self._build_alert_items(ingredients, days, stocks, status_texts, color_infos, stockout_dict)
+
+    def _build_alert_items(self, ingredients: Sequence[str], days: Sequence[float], stocks: Sequence[float],
+                           status_texts: Sequence[str], color_infos: Sequence[str],
+                           stockout_dict: Dict[str, float]) -> Tuple[list, list]:
+        """Tạo và sắp xếp danh sách cảnh báo từ trạng thái đã xác định"""
         critical_items = []
         warning_items = []
 
-        for ingredient in days_remaining_dict.keys():
-            days = days_remaining_dict.get(ingredient, float('inf'))
-            stock = inventory_dict.get(ingredient, 0)
-
-            # Sử dụng ngưỡng riêng biệt cho từng thành phần
-            status_text, color_info = self.get_inventory_status(days, stock, ingredient)
+        for ingredient, days_left, stock, status_text, color_info in zip(
+                ingredients, days, stocks, status_texts, color_infos):
+            if color_info not in ("red", "yellow"):
+                continue
 
             item_data = {
                 'name': ingredient,
                 'stock': stock,
-                'days': days,
+                'days': days_left,
                 'status': status_text,
+                'stockout_7d': stockout_dict.get(ingredient),
                 'has_custom_threshold': ingredient in self.individual_thresholds
             }
 
             if color_info == "red":
                 critical_items.append(item_data)
-            elif color_info == "yellow":
+            else:
                 warning_items.append(item_data)
 
         # Sắp xếp theo mức độ ưu tiên
-        if self.thresholds["use_days_based"]:
+        if self.thresholds["sort_alerts_by_stockout"] and stockout_dict:
+            critical_items.sort(key=lambda x: -(x['stockout_7d'] or 0))
+            warning_items.sort(key=lambda x: -(x['stockout_7d'] or 0))
+        elif self.thresholds["use_days_based"]:
             critical_items.sort(key=lambda x: x['days'] if x['days'] != float('inf') else 999)
             warning_items.sort(key=lambda x: x['days'] if x['days'] != float('inf') else 999)
         else:
@@ -344,10 +472,40 @@ class ThresholdManager:
 
         return critical_items, warning_items
 
+    def get_alert_items_from_snapshot(self, snapshot: Dict) -> Tuple[list, list]:
+        """
+        Lấy danh sách cảnh báo từ bản phân tích dùng chung (RemainingUsageCalculator.get_analysis_snapshot)
+        Kết quả được giữ lại cho tới khi bản phân tích hoặc ngưỡng thay đổi
+        Returns: (critical_items, warning_items)
+        """
+        cache_key = (snapshot.get("version"), data_versions.get(THRESHOLDS))
+        cached = getattr(self, '_snapshot_alerts', None)
+        if cache_key[0] is not None and cached is not None and cached[0] == cache_key:
+            return cached[1]
+
+        ingredients, days, stocks, status_texts, color_infos = [], [], [], [], []
+        stockout_dict = {}
+        for warehouse_type in ("feed", "mix"):
+            for ingredient, data in snapshot.get(warehouse_type, {}).items():
+                ingredients.append(ingredient)
+                days.append(data.get("remaining_days", float('inf')))
+                stocks.append(data.get("current_amount", 0))
+                status_texts.append(data.get("threshold_status"))
+                color_infos.append(data.get("threshold_color"))
+                stockout_dict[ingredient] = data.get("stockout_7d")
+
+        # Dùng trạng thái đã phân loại sẵn trong bản phân tích, chỉ phân loại lại khi thiếu
+        if None in color_infos:
+            status_texts, color_infos = self.classify_inventory(ingredients, days, stocks)
+        alert_items = self._build_alert_items(ingredients, days, stocks, status_texts, color_infos, stockout_dict)
+        self._snapshot_alerts = (cache_key, alert_items)
+        return alert_items
+
     def reset_to_defaults(self) -> bool:
         """Đặt lại về cài đặt mặc định"""
         try:
             self.thresholds = self.default_thresholds.copy()
+            self._compiled = None
             return self.save_thresholds()
         except Exception as e:
             print(f"[ERROR] Lỗi khi đặt lại cài đặt mặc định: {e}")
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Usage Aggregator - Tổng hợp lượng sử dụng nguyên liệu theo cửa sổ ngày trượt
+
+Giữ (tổng, số ngày, tổng bình phương) cho từng nguyên liệu trong N ngày gần nhất. Dữ liệu
+được cập nhật khi báo cáo được lưu/sửa (qua ReportIndex), ngày cũ bị loại khi ra khỏi
+cửa sổ, và trạng thái được lưu ra file để lần khởi động sau không phải đọc lại báo cáo.
+"""
+
+import os
+import json
+import math
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+try:
+    from src.utils.persistent_paths import persistent_path_manager
+    from src.utils.json_document_cache import load_json_document
+    from src.utils.data_versions import bump_data_version, REPORTS
+except ImportError:
+    from utils.persistent_paths import persistent_path_manager
+    from utils.json_document_cache import load_json_document
+    from utils.data_versions import bump_data_version, REPORTS
+
+# Số ngày mặc định của cửa sổ (trùng với phân tích số ngày còn lại trên tab Tồn kho)
+DEFAULT_WINDOW_DAYS = 7
+
+# Phiên bản cấu trúc file trạng thái
+AGGREGATE_VERSION = 1
+
+WAREHOUSE_FIELDS = (("feed", "feed_ingredients"), ("mix", "mix_ingredients"))
+
+
+class UsageAggregator:
+    """Tổng hợp sử dụng theo nguyên liệu ('feed_<tên>' / 'mix_<tên>') trong cửa sổ ngày trượt"""
+
+    def __init__(self, reports_dir: Path = None, state_file: Path = None,
+                 window_days: int = DEFAULT_WINDOW_DAYS):
+        """Khởi tạo (trạng thái được tải ở lần truy vấn đầu tiên)"""
+        self.reports_dir = Path(reports_dir) if reports_dir else persistent_path_manager.reports_path
+        self.state_file = Path(state_file) if state_file else \
+            persistent_path_manager.data_path / "cache" / "usage_aggregate.json"
+        self.window_days = window_days
+
+        self._lock = threading.RLock()
+        # Ngày YYYYMMDD -> {'fingerprint': 'mtime_ns:size', 'usage': {khóa: lượng dùng}}
+        self._days: Optional[Dict[str, Dict[str, Any]]] = None
+        # Khóa nguyên liệu -> [tổng, số ngày, tổng bình phương]
+        self._totals: Dict[str, List[float]] = {}
+        self._window_start: Optional[str] = None
+        self._synced = False
+
+    # === Dữ liệu ngày ===
+
+    @staticmethod
+    def extract_usage(report_data: Dict[str, Any]) -> Dict[str, float]:
+        """Lượng dùng dương của từng nguyên liệu trong một báo cáo ngày"""
+        usage = {}
+        for warehouse_type, field in WAREHOUSE_FIELDS:
+            for ingredient, amount in (report_data.get(field) or {}).items():
+                if isinstance(amount, (int, float)) and amount > 0:
+                    usage[f"{warehouse_type}_{ingredient}"] = float(amount)
+        return usage
+
+    @staticmethod
+    def _fingerprint(stat_result: os.stat_result) -> str:
+        """Fingerprint file báo cáo"""
+        return f"{stat_result.st_mtime_ns}:{stat_result.st_size}"
+
+    def _window_bounds(self):
+        """Ngày đầu và cuối (YYYYMMDD) của cửa sổ hiện tại"""
+        today = datetime.now()
+        start = today - timedelta(days=self.window_days - 1)
+        return start.strftime("%Y%m%d"), today.strftime("%Y%m%d")
+
+    def _apply(self, usage: Dict[str, float], sign: int):
+        """Cộng (sign=1) hoặc trừ (sign=-1) lượng dùng của một ngày vào tổng"""
+        for key, amount in usage.items():
+            totals = self._totals.get(key)
+            if totals is None:
+                totals = self._totals[key] = [0.0, 0, 0.0]
+            totals[0] += sign * amount
+            totals[1] += sign
+            totals[2] += sign * amount * amount
+            if totals[1] <= 0:
+                del self._totals[key]
+
+    def _set_day(self, date_str: str, usage: Optional[Dict[str, float]], fingerprint: Optional[str]):
+        """Thay dữ liệu của một ngày (None = xóa ngày)"""
+        previous = self._days.pop(date_str, None)
+        if previous:
+            self._apply(previous['usage'], -1)
+        if usage is not None:
+            self._days[date_str] = {'fingerprint': fingerprint, 'usage': usage}
+            self._apply(usage, 1)
+
+    # === Trạng thái ===
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        """Đọc trạng thái đã lưu"""
+        try:
+            if self.state_file.exists():
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == AGGREGATE_VERSION and isinstance(data.get('days'), dict):
+                    return data['days']
+        except Exception as e:
+            print(f"⚠️ [Usage Aggregator] Error loading state, rebuilding: {e}")
+        return {}
+
+    def _save_state(self):
+        """Lưu trạng thái (ghi tạm rồi đổi tên)"""
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.state_file.with_suffix('.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': AGGREGATE_VERSION,
+                    'updated_at': datetime.now().isoformat(),
+                    'window_days': self.window_days,
+                    'days': self._days
+                }, f, ensure_ascii=False)
+            temp_file.replace(self.state_file)
+        except Exception as e:
+            print(f"❌ [Usage Aggregator] Error saving state: {e}")
+
+    def _ensure_current(self):
+        """Tải trạng thái, loại các ngày đã ra khỏi cửa sổ và đồng bộ một lần mỗi cửa sổ"""
+        start, end = self._window_bounds()
+        changed = False
+
+        if self._days is None:
+            self._days, self._totals = {}, {}
+            for date_str, day in self._load_state().items():
+                if start <= date_str <= end:
+                    self._set_day(date_str, day.get('usage', {}), day.get('fingerprint'))
+
+        if start != self._window_start:
+            for date_str in [d for d in self._days if d < start]:
+                self._set_day(date_str, None, None)
+                changed = True
+            self._window_start = start
+            self._synced = False
+
+        if not self._synced:
+            changed = self._sync(start, end) or changed
+            self._synced = True
+
+        if changed:
+            self._save_state()
+            bump_data_version(REPORTS)
+
+    def _sync(self, start: str, end: str) -> bool:
+        """So fingerprint file báo cáo trong cửa sổ, chỉ đọc lại các ngày đã thay đổi"""
+        changed = 0
+        day = datetime.strptime(start, "%Y%m%d")
+        date_str = start
+        while date_str <= end:
+            report_file = self.reports_dir / f"report_{date_str}.json"
+            try:
+                fingerprint = self._fingerprint(report_file.stat())
+            except OSError:
+                fingerprint = None
+
+            stored = self._days.get(date_str)
+            if fingerprint is None:
+                if stored is not None:
+                    self._set_day(date_str, None, None)
+                    changed += 1
+            elif stored is None or stored.get('fingerprint') != fingerprint:
+                report_data = load_json_document(report_file, {}, copy=False)
+                if isinstance(report_data, dict):
+                    self._set_day(date_str, self.extract_usage(report_data), fingerprint)
+                    changed += 1
+
+            day += timedelta(days=1)
+            date_str = day.strftime("%Y%m%d")
+
+        if changed:
+            print(f"🔄 [Usage Aggregator] Synced {changed} days in window {start}-{end}")
+        return bool(changed)
+
+    # === Cập nhật ===
+
+    def record_report(self, date_str: str, report_data: Dict[str, Any],
+                      stat_result: os.stat_result = None):
+        """Cập nhật ngay sau khi một báo cáo ngày YYYYMMDD được lưu hoặc sửa"""
+        with self._lock:
+            self._ensure_current()
+            start, end = self._window_bounds()
+            if not start <= date_str <= end:
+                return
+
+            if stat_result is None:
+                try:
+                    stat_result = (self.reports_dir / f"report_{date_str}.json").stat()
+                except OSError:
+                    stat_result = None
+            fingerprint = self._fingerprint(stat_result) if stat_result else None
+
+            self._set_day(date_str, self.extract_usage(report_data), fingerprint)
+            self._save_state()
+            bump_data_version(REPORTS)
+
+    def remove_report(self, date_str: str):
+        """Loại một ngày khi báo cáo bị xóa"""
+        with self._lock:
+            self._ensure_current()
+            if date_str in self._days:
+                self._set_day(date_str, None, None)
+                self._save_state()
+                bump_data_version(REPORTS)
+
+    def set_window(self, window_days: int):
+        """Đổi độ dài cửa sổ (ngày mới vào cửa sổ được đọc ở lần truy vấn tiếp theo)"""
+        with self._lock:
+            if window_days != self.window_days and window_days > 0:
+                self.window_days = window_days
+                self._window_start = None
+
+    def invalidate(self):
+        """Kiểm tra lại fingerprint các báo cáo trong cửa sổ ở lần truy vấn tiếp theo"""
+        with self._lock:
+            self._synced = False
+
+    # === Truy vấn ===
+
+    def get_daily_averages(self, window_days: int = None) -> Dict[str, float]:
+        """Lượng dùng trung bình mỗi ngày có sử dụng, theo khóa 'feed_<tên>' / 'mix_<tên>'"""
+        with self._lock:
+            if window_days:
+                self.set_window(window_days)
+            self._ensure_current()
+            return {key: totals[0] / totals[1] for key, totals in self._totals.items() if totals[1] > 0}
+
+    def get_usage_statistics(self, window_days: int = None) -> Dict[str, Dict[str, float]]:
+        """Tổng, số ngày, trung bình và độ lệch chuẩn lượng dùng của từng nguyên liệu"""
+        with self._lock:
+            if window_days:
+                self.set_window(window_days)
+            self._ensure_current()
+
+            statistics = {}
+            for key, (total, count, total_squares) in self._totals.items():
+                mean = total / count
+                variance = max(total_squares / count - mean * mean, 0.0)
+                statistics[key] = {
+                    'sum': total,
+                    'count': count,
+                    'sumsq': total_squares,
+                    'mean': mean,
+                    'std': math.sqrt(variance)
+                }
+            return statistics
+
+    def get_days_in_window(self) -> List[str]:
+        """Các ngày có báo cáo trong cửa sổ hiện tại (cũ nhất trước)"""
+        with self._lock:
+            self._ensure_current()
+            return sorted(self._days)
+
+
+# Global instance
+usage_aggregator = UsageAggregator()
+
+# Convenience functions
+def get_average_daily_usage(window_days: int = DEFAULT_WINDOW_DAYS) -> Dict[str, float]:
+    """Lượng dùng trung bình mỗi ngày theo cửa sổ trượt"""
+    return usage_aggregator.get_daily_averages(window_days)
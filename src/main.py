@@ -12,8 +12,8 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget, QVB
                             QGroupBox, QDialog, QRadioButton, QDateEdit, QScrollArea, QSizePolicy,
                             QMenu, QAction, QAbstractSpinBox, QAbstractItemView, QCalendarWidget,
                             QCheckBox, QListWidget, QListWidgetItem, QTextEdit, QFormLayout,
-                            QDialogButtonBox, QFrame)
-from PyQt5.QtCore import Qt, QDate, QDateTime, QTimer
+                            QDialogButtonBox, QFrame, QTableView, QStyledItemDelegate, QStyle)
+from PyQt5.QtCore import Qt, QDate, QDateTime, QTimer, QRect, QAbstractTableModel, QModelIndex
 from PyQt5.QtGui import QFont, QColor, QCursor, QBrush
 
 # Kiểm tra xem đang chạy từ thư mục gốc hay từ thư mục src
@@ -22,19 +22,39 @@ try:
     from src.core.inventory_manager import InventoryManager
     from src.core.threshold_manager import ThresholdManager
     from src.core.remaining_usage_calculator import RemainingUsageCalculator
+    from src.core.feed_usage_engine import FeedUsageEngine
+    from src.core.purchase_order_planner import PurchaseOrderPlanner
     from src.utils.default_formulas import PACKAGING_INFO
     from src.utils.app_icon import create_app_icon
     from src.ui.threshold_settings_dialog import ThresholdSettingsDialog
+    from src.ui.background_loader import BackgroundLoader
+    from src.ui.lazy_tabs import LazyTabRegistry
+    from src.ui.tab_refresh import TabRefreshScheduler
+    from src.ui.table_models import (RowTableModel, RowFilterProxyModel, ButtonDelegate, TimestampDelegate,
+                                     cached_brush)
     from src.utils.persistent_paths import persistent_path_manager, get_data_file_path, get_report_file_path, get_export_file_path
+    from src.utils.data_versions import INVENTORY, REPORTS, THRESHOLDS, FORMULAS, IMPORTS
+    from src.services.report_index import report_index
+    from src.services.import_store import import_store
 except ImportError:
     # Nếu không import được từ src, thử import trực tiếp
     from core.formula_manager import FormulaManager
     from core.inventory_manager import InventoryManager
     from core.threshold_manager import ThresholdManager
     from core.remaining_usage_calculator import RemainingUsageCalculator
+    from core.feed_usage_engine import FeedUsageEngine
+    from core.purchase_order_planner import PurchaseOrderPlanner
     from utils.default_formulas import PACKAGING_INFO
     from utils.app_icon import create_app_icon
     from ui.threshold_settings_dialog import ThresholdSettingsDialog
+    from ui.background_loader import BackgroundLoader
+    from ui.lazy_tabs import LazyTabRegistry
+    from ui.tab_refresh import TabRefreshScheduler
+    from ui.table_models import (RowTableModel, RowFilterProxyModel, ButtonDelegate, TimestampDelegate,
+                                 cached_brush)
+    from utils.data_versions import INVENTORY, REPORTS, THRESHOLDS, FORMULAS, IMPORTS
+    from services.report_index import report_index
+    from services.import_store import import_store
 
 # Constants
 AREAS = 5  # Number of areas
@@ -109,6 +129,594 @@ class CustomDoubleSpinBox(QDoubleSpinBox):
         text = text.replace(',', '')
         return float(text)
 
+# Trạng thái tồn kho: biểu tượng, chữ hiển thị, thứ tự sắp xếp và nhóm bộ lọc
+INVENTORY_STATUS_ICONS = {"critical": "🔴", "low": "🟡", "warning": "🟠", "good": "🟢"}
+INVENTORY_STATUS_TEXTS = {"critical": "KHẨN CẤP", "low": "SẮP HẾT", "warning": "CẢNH BÁO", "good": "ỔN ĐỊNH"}
+INVENTORY_STATUS_ORDER = {"critical": 0, "low": 1, "warning": 2, "good": 3}
+INVENTORY_STATUS_FILTERS = {
+    "🔴 Khẩn cấp": ("critical",),
+    "🟡 Sắp hết": ("low", "warning"),
+    "🟢 Đủ hàng": ("good",),
+}
+
+
+class FeedUsageHistoryModel(RowTableModel):
+    """Lịch sử sử dụng cám: (ngày YYYYMMDD, tổng cám, tổng mix, số mẻ, file báo cáo)"""
+
+    DATE, TOTAL_FEED, TOTAL_MIX, BATCH_COUNT, REPORT_FILE = range(5)
+    HEADERS = ("Ngày báo cáo", "Tổng lượng cám (kg)", "Tổng lượng mix (kg)", "Tổng số mẻ cám")
+    ALIGNMENTS = {0: Qt.AlignCenter, 1: Qt.AlignRight | Qt.AlignVCenter,
+                  2: Qt.AlignRight | Qt.AlignVCenter, 3: Qt.AlignCenter}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.bold_font = QFont()
+        self.bold_font.setBold(True)
+
+    @staticmethod
+    def display_date(row):
+        date_str = row[0]
+        return f"{date_str[6:8]}/{date_str[4:6]}/{date_str[0:4]}"
+
+    def display(self, row, column):
+        if column == 0:
+            return self.display_date(row)
+        if column in (1, 2):
+            return f"{format_total(row[column])} kg"
+        return format_number(row[self.BATCH_COUNT])
+
+    def sort_key(self, row, column):
+        return row[column] if column else row[self.DATE]
+
+    def foreground(self, row, column):
+        if column == 1 and row[self.TOTAL_FEED] > 5000:
+            return "#2E7D32"  # Màu xanh lá đậm
+        if column == 2 and row[self.TOTAL_MIX] > 100:
+            return "#1565C0"  # Màu xanh dương đậm
+        if column == 3 and row[self.BATCH_COUNT] > 3:
+            return "#C62828"  # Màu đỏ đậm
+        return None
+
+    def font(self, row, column):
+        return self.bold_font if column == 0 else None
+
+    def tooltip(self, row, column):
+        if column == 0:
+            return f"Nhấp đúp để tải báo cáo ngày {self.display_date(row)}"
+        return None
+
+
+class ImportHistoryModel(RowTableModel):
+    """Lịch sử nhập hàng (khóa sắp xếp thời gian + 9 cột hiển thị)"""
+
+    (SORT_TIME, DATETIME, TYPE, INGREDIENT, AMOUNT, BAGS,
+     UNIT_PRICE, TOTAL_COST, SUPPLIER, NOTE) = range(10)
+    HEADERS = ("Thời gian", "Loại", "Thành phần", "Số lượng (kg)",
+               "Số bao", "Đơn giá (VNĐ)", "Thành tiền (VNĐ)", "Nhà cung cấp", "Ghi chú")
+    ALIGNMENTS = {0: Qt.AlignCenter, 1: Qt.AlignCenter, 3: Qt.AlignCenter, 4: Qt.AlignCenter,
+                  5: Qt.AlignRight | Qt.AlignVCenter, 6: Qt.AlignRight | Qt.AlignVCenter}
+    TYPE_COLORS = {"feed": ("#E8F5E9", "#2E7D32"), "mix": ("#FFF3E0", "#F57C00")}
+
+    @classmethod
+    def make_row(cls, import_data, bag_size):
+        """Tạo hàng gọn từ một bản ghi nhập kho (ngày dạng dd/MM/yyyy)"""
+        timestamp = import_data.get("timestamp", "")
+        date_part = import_data.get("date", "")
+
+        # Create full datetime display
+        if timestamp and date_part:
+            if " " in timestamp:
+                # timestamp already contains date and time: convert to dd/MM/yyyy HH:mm
+                try:
+                    datetime_display = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").strftime("%d/%m/%Y %H:%M")
+                except ValueError:
+                    datetime_display = timestamp
+            else:
+                # timestamp only contains time, combine with date
+                datetime_display = f"{date_part} {timestamp}"
+        else:
+            datetime_display = timestamp or date_part
+
+        amount = import_data.get("amount", 0)
+        unit_price = import_data.get("unit_price", 0)
+        return (
+            (timestamp, date_part),
+            datetime_display,
+            import_data.get("type", "").lower(),
+            import_data.get("ingredient", ""),
+            amount,
+            amount / bag_size if bag_size > 0 and amount > 0 else 0,
+            unit_price,
+            import_data.get("total_cost", 0),
+            import_data.get("supplier", ""),
+            import_data.get("note", "")
+        )
+
+    @classmethod
+    def total_cost(cls, row):
+        """Thành tiền, tính từ đơn giá nếu bản ghi không lưu"""
+        if row[cls.TOTAL_COST] <= 0 and row[cls.UNIT_PRICE] > 0:
+            return row[cls.AMOUNT] * row[cls.UNIT_PRICE]
+        return row[cls.TOTAL_COST]
+
+    def display(self, row, column):
+        if column == 1:
+            return {"feed": "Cám", "mix": "Mix"}.get(row[self.TYPE], "Không xác định")
+        if column in (3, 4):
+            return format_number(row[column + 1])
+        if column == 5:
+            return f"{row[self.UNIT_PRICE]:,.0f}" if row[self.UNIT_PRICE] > 0 else ""
+        if column == 6:
+            total_cost = self.total_cost(row)
+            return f"{total_cost:,.0f}" if total_cost > 0 else ""
+        return row[column + 1]
+
+    def sort_key(self, row, column):
+        if column == 0:
+            return f"{row[self.SORT_TIME][0]}|{row[self.SORT_TIME][1]}"
+        if column == 6:
+            return float(self.total_cost(row))
+        if column in (3, 4, 5):
+            return float(row[column + 1])
+        return self.display(row, column)
+
+    def background(self, row, column):
+        return self.TYPE_COLORS.get(row[self.TYPE], (None, None))[0] if column == 1 else None
+
+    def foreground(self, row, column):
+        return self.TYPE_COLORS.get(row[self.TYPE], (None, None))[1] if column == 1 else None
+
+
+class ImportTrackingModel(RowTableModel):
+    """Theo dõi nhập kho: một hàng cho mỗi lần nhập kèm nhân viên tham gia"""
+
+    (DATE, TIMESTAMP, MATERIAL_TYPE, INGREDIENT, AMOUNT,
+     TYPE, PARTICIPANTS, IMPORT_KEY, NOTE) = range(9)
+    HEADERS = ("📅 Ngày", "🏷️ Loại nguyên liệu", "⚖️ Số lượng (kg)",
+               "👥 Nhân viên tham gia", "📝 Ghi chú", "⚙️ Thao tác")
+    ALIGNMENTS = {0: Qt.AlignCenter, 5: Qt.AlignCenter}
+    MATERIAL_COLORS = {
+        "Bắp": "#32FFEB3B",      # Yellow
+        "Nành": "#328BC34A",     # Light Green
+        "Cám gạo": "#32FF9800",  # Orange
+        "Đá hạt": "#329E9E9E",   # Gray
+    }
+    OTHER_MATERIAL_COLOR = "#329C27B0"  # Purple
+
+    @classmethod
+    def record(cls, row):
+        """Bản ghi dạng dict (dùng cho hộp thoại quản lý nhân viên tham gia)"""
+        return {
+            'date': row[cls.DATE],
+            'timestamp': row[cls.TIMESTAMP],
+            'material_type': row[cls.MATERIAL_TYPE],
+            'ingredient': row[cls.INGREDIENT],
+            'amount': row[cls.AMOUNT],
+            'type': row[cls.TYPE],
+            'participants': list(row[cls.PARTICIPANTS]),
+            'import_key': row[cls.IMPORT_KEY],
+            'note': row[cls.NOTE]
+        }
+
+    def display(self, row, column):
+        if column == 0:
+            # Fallback to date if timestamp is not available
+            return row[self.TIMESTAMP] or row[self.DATE]
+        if column == 1:
+            if row[self.INGREDIENT] != row[self.MATERIAL_TYPE]:
+                return f"{row[self.MATERIAL_TYPE]} ({row[self.INGREDIENT]})"
+            return row[self.MATERIAL_TYPE]
+        if column == 2:
+            return f"{row[self.AMOUNT]:,.1f} kg"
+        if column == 3:
+            return ", ".join(row[self.PARTICIPANTS]) if row[self.PARTICIPANTS] else "Chưa ghi nhận"
+        if column == 4:
+            if row[self.TYPE]:
+                return f"[{row[self.TYPE].upper()}] {row[self.NOTE]}".strip()
+            return row[self.NOTE]
+        return "Quản lý NV"
+
+    def sort_key(self, row, column):
+        if column == 2:
+            return float(row[self.AMOUNT])
+        return self.display(row, column)
+
+    def background(self, row, column):
+        if column == 1:
+            return self.MATERIAL_COLORS.get(row[self.MATERIAL_TYPE], self.OTHER_MATERIAL_COLOR)
+        if column == 3:
+            # Light green when participants are recorded, light red otherwise
+            return "#64C8FFC8" if row[self.PARTICIPANTS] else "#64FFC8C8"
+        return None
+
+
+class InventoryTableModel(RowTableModel):
+    """Bảng tồn kho một kho (cám/mix) với phân tích số ngày còn lại và nguy cơ hết hàng"""
+
+    (INGREDIENT, AMOUNT, BAG_SIZE, BAGS, DAILY_USAGE, REMAINING_DAYS, REMAINING_TEXT,
+     STATUS, STATUS_COLORS, STOCKOUT, STOCKOUT_COLOR) = range(11)
+    HEADERS = ("🌾 Thành phần", "📊 Tồn kho (kg)", "📦 Kích thước bao (kg)",
+               "🔢 Số bao", "⏰ Còn lại (ngày)", "🚦 Tình trạng", "🎲 Nguy cơ hết (7 ngày)", "✏️ Sửa", "🗑️ Xóa")
+    ALIGNMENTS = {4: Qt.AlignCenter, 5: Qt.AlignCenter, 6: Qt.AlignCenter, 7: Qt.AlignCenter, 8: Qt.AlignCenter}
+    ERROR = "error"
+
+    def __init__(self, warehouse_type, parent=None):
+        super().__init__(parent)
+        self.warehouse_type = warehouse_type
+        self.warehouse_icon = "🌾" if warehouse_type == "feed" else "🧪"
+        self.HEADERS = (f"{self.warehouse_icon} Thành phần",) + InventoryTableModel.HEADERS[1:]
+        self.name_font = QFont("Arial", 11, QFont.Medium)
+        self.bold_font = QFont("Arial", 11, QFont.Bold)
+
+    @classmethod
+    def error_row(cls, ingredient):
+        """Hàng báo lỗi cho nguyên liệu không xử lý được"""
+        return (ingredient, 0.0, 0.0, 0.0, 0.0, float('inf'), "", cls.ERROR, ("#FFEBEE", None), None, None)
+
+    def display(self, row, column):
+        ingredient, status = row[self.INGREDIENT], row[self.STATUS]
+        if status == self.ERROR:
+            return f"❌ {ingredient}" if column == 0 else "Error"
+        if column == 0:
+            return f"{INVENTORY_STATUS_ICONS.get(status, '⚪')} {self.warehouse_icon} {ingredient}"
+        if column in (1, 2, 3):
+            return format_number(row[column])
+        if column == 4:
+            return row[self.REMAINING_TEXT]
+        if column == 5:
+            return f"{INVENTORY_STATUS_ICONS.get(status, '⚪')} {INVENTORY_STATUS_TEXTS.get(status, 'CHƯA RÕ')}"
+        if column == 6:
+            stockout = row[self.STOCKOUT]
+            return "—" if stockout is None else f"{stockout[2]:.0%}"
+        return "✏️" if column == 7 else "🗑️"
+
+    def sort_key(self, row, column):
+        if column == 0:
+            return row[self.INGREDIENT]
+        if column in (1, 2, 3):
+            return float(row[column])
+        if column == 4:
+            return min(float(row[self.REMAINING_DAYS]), 1e12)
+        if column == 5:
+            return INVENTORY_STATUS_ORDER.get(row[self.STATUS], len(INVENTORY_STATUS_ORDER))
+        if column == 6:
+            return -1.0 if row[self.STOCKOUT] is None else float(row[self.STOCKOUT][2])
+        return ""
+
+    def background(self, row, column):
+        if row[self.STATUS] == self.ERROR:
+            return row[self.STATUS_COLORS][0] if column else None
+        if column == 4 and row[self.REMAINING_DAYS] >= 999:
+            return "#f5f5f5"  # Light gray for infinite
+        if column in (1, 4, 5):
+            return row[self.STATUS_COLORS][0]
+        return None
+
+    def foreground(self, row, column):
+        if row[self.STATUS] == self.ERROR:
+            return None
+        if column == 4 and row[self.REMAINING_DAYS] >= 999:
+            return "#666666"
+        if column in (1, 4, 5):
+            return row[self.STATUS_COLORS][1]
+        if column == 6:
+            return row[self.STOCKOUT_COLOR]
+        return None
+
+    def font(self, row, column):
+        if column == 0:
+            return self.name_font
+        if column in (5, 6):
+            return self.bold_font
+        if column <= 4:
+            return TABLE_CELL_FONT
+        return None
+
+    def tooltip(self, row, column):
+        if row[self.STATUS] == self.ERROR:
+            return None
+        ingredient, status = row[self.INGREDIENT], row[self.STATUS]
+        details = (f"Tồn kho: {row[self.AMOUNT]:.1f} kg\n"
+                   f"Sử dụng/ngày: {row[self.DAILY_USAGE]:.2f} kg\n"
+                   f"Còn lại: {row[self.REMAINING_TEXT]}")
+        if column == 0:
+            prefix = "Nguyên liệu" if self.warehouse_type == "feed" else "Nguyên liệu mix"
+            return f"{prefix}: {ingredient}\n{details}\nTrạng thái: {status.upper()}"
+        if column == 5:
+            return f"{ingredient}: {INVENTORY_STATUS_TEXTS.get(status, 'CHƯA RÕ')}\n{details}"
+        if column == 6:
+            if row[self.STOCKOUT] is None:
+                return "Chưa đủ dữ liệu báo cáo để mô phỏng"
+            lines = [f"Trong {horizon} ngày: {value:.1%}" for horizon, value in zip((1, 3, 7), row[self.STOCKOUT])]
+            return "Xác suất hết hàng (mô phỏng Monte Carlo):\n" + "\n".join(lines)
+        return None
+
+    # Cột tồn kho có thể sửa trực tiếp rồi lưu bằng nút "Cập Nhật Kho"
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() == 1 and self._rows[index.row()][self.STATUS] != self.ERROR:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.EditRole and index.isValid() and index.column() == 1:
+            return f"{self._rows[index.row()][self.AMOUNT]:g}"
+        return super().data(index, role)
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid() or index.column() != 1:
+            return False
+        try:
+            amount = float(str(value).replace(',', ''))
+        except ValueError:
+            return False
+        row = list(self._rows[index.row()])
+        row[self.AMOUNT] = amount
+        self._rows[index.row()] = tuple(row)
+        self.dataChanged.emit(index, index)
+        return True
+
+
+# Màu nền theo khu của bảng điền cám (lặp lại khi có nhiều khu hơn)
+FEED_AREA_COLORS = (
+    "#f0f8ff",  # Khu 1: Alice Blue
+    "#f5f5dc",  # Khu 2: Beige
+    "#f0fff0",  # Khu 3: Honeydew
+    "#fff0f5",  # Khu 4: Lavender Blush
+    "#fffaf0",  # Khu 5: Floral White
+)
+FEED_SELECTED_COLOR = "#b3e5fc"
+FEED_FORMULA_COLOR = "#0277bd"
+
+# Vai trò dữ liệu: tên công thức hiển thị dưới số mẻ (rỗng nếu là công thức mặc định)
+FORMULA_LABEL_ROLE = Qt.UserRole + 2
+
+
+class FeedEntryModel(QAbstractTableModel):
+    """
+    Bảng điền cám: mỗi cột là một trại, 2 hàng đầu là khu/trại, các hàng sau là các ca
+
+    Số mẻ và công thức cám được giữ trong hai mảng (ca × cột) thay vì một spinbox và một
+    combo box cho mỗi ô; số cột lấy từ cấu hình khu/trại nên bảng không giới hạn số trại.
+    """
+
+    HEADER_ROWS = 2
+
+    def __init__(self, farms=FARMS, shifts=SHIFTS, parent=None):
+        super().__init__(parent)
+        self.shifts = list(shifts)
+        # (chỉ số khu, tên khu, tên trại) của từng cột
+        self.columns = [(khu_idx, f"Khu {khu_idx + 1}", farm)
+                        for khu_idx, khu_farms in farms.items() for farm in khu_farms]
+        self.default_formula = ""
+        self.header_font = QFont("Arial", DEFAULT_FONT_SIZE + 1, QFont.Bold)
+        self._values = [[0.0] * len(self.columns) for _ in self.shifts]
+        self._formulas = [[""] * len(self.columns) for _ in self.shifts]
+
+    # === Truy cập dữ liệu ===
+
+    def column_key(self, column):
+        """(tên khu, tên trại) của cột"""
+        _, khu_name, farm = self.columns[column]
+        return khu_name, farm
+
+    def value(self, column, shift_idx):
+        return self._values[shift_idx][column]
+
+    def formula(self, column, shift_idx):
+        return self._formulas[shift_idx][column]
+
+    def shift_index(self, row):
+        """Chỉ số ca của hàng trong bảng (None với hàng khu/trại)"""
+        shift_idx = row - self.HEADER_ROWS
+        return shift_idx if 0 <= shift_idx < len(self.shifts) else None
+
+    def set_formula(self, column, shift_idx, formula):
+        self._formulas[shift_idx][column] = formula or ""
+        index = self.index(shift_idx + self.HEADER_ROWS, column)
+        self.dataChanged.emit(index, index)
+
+    def set_default_formula(self, formula):
+        """Đổi công thức mặc định (chỉ ảnh hưởng tới nhãn công thức hiển thị)"""
+        formula = formula or ""
+        if formula != self.default_formula:
+            self.default_formula = formula
+            self._emit_all_changed()
+
+    def apply_formula_to_filled(self, formula):
+        """Gán công thức cho mọi ô có số mẻ > 0, trả về số ô đã gán"""
+        count = 0
+        for values, formulas in zip(self._values, self._formulas):
+            for column, value in enumerate(values):
+                if value > 0:
+                    formulas[column] = formula
+                    count += 1
+        self._emit_all_changed()
+        return count
+
+    def clear(self):
+        """Xóa toàn bộ số mẻ và công thức"""
+        self.beginResetModel()
+        self._values = [[0.0] * len(self.columns) for _ in self.shifts]
+        self._formulas = [[""] * len(self.columns) for _ in self.shifts]
+        self.endResetModel()
+
+    def load(self, feed_usage, formula_usage=None, default_formula=""):
+        """
+        Nạp số mẻ và công thức từ báo cáo trong một lần cập nhật
+
+        Args:
+            feed_usage: {khu: {trại: {ca: số mẻ}}}
+            formula_usage: {khu: {trại: {ca: công thức}}}
+            default_formula: Công thức cho ô có số mẻ nhưng báo cáo không ghi công thức
+        """
+        formula_usage = formula_usage or {}
+        self.beginResetModel()
+        self._values = [[0.0] * len(self.columns) for _ in self.shifts]
+        self._formulas = [[""] * len(self.columns) for _ in self.shifts]
+        for column, (_, khu_name, farm) in enumerate(self.columns):
+            farm_values = feed_usage.get(khu_name, {}).get(farm, {})
+            farm_formulas = formula_usage.get(khu_name, {}).get(farm, {})
+            for shift_idx, shift in enumerate(self.shifts):
+                value = float(farm_values.get(shift, 0) or 0)
+                self._values[shift_idx][column] = value
+                self._formulas[shift_idx][column] = farm_formulas.get(shift) or (default_formula if value > 0 else "")
+        self.endResetModel()
+
+    def usage(self):
+        """(feed_usage, formula_usage) theo khu/trại/ca như lưu trong báo cáo"""
+        feed_usage, formula_usage = {}, {}
+        for column, (_, khu_name, farm) in enumerate(self.columns):
+            farm_values = feed_usage.setdefault(khu_name, {}).setdefault(farm, {})
+            farm_formulas = formula_usage.setdefault(khu_name, {}).setdefault(farm, {})
+            for shift_idx, shift in enumerate(self.shifts):
+                farm_values[shift] = self._values[shift_idx][column]
+                farm_formulas[shift] = self._formulas[shift_idx][column]
+        return feed_usage, formula_usage
+
+    def area_total(self, khu_idx, shift_idx):
+        """Tổng số mẻ của một khu trong một ca"""
+        values = self._values[shift_idx]
+        return sum(values[column] for column, (idx, _, _) in enumerate(self.columns) if idx == khu_idx)
+
+    def _emit_all_changed(self):
+        if self.columns and self.shifts:
+            self.dataChanged.emit(self.index(self.HEADER_ROWS, 0),
+                                  self.index(self.rowCount() - 1, len(self.columns) - 1))
+
+    # === QAbstractTableModel ===
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.HEADER_ROWS + len(self.shifts)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Vertical:
+            return (["Khu", "Trại"] + self.shifts)[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.row() < self.HEADER_ROWS:
+            return Qt.ItemIsEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        khu_idx, khu_name, farm = self.columns[column]
+
+        if role == Qt.BackgroundRole:
+            return cached_brush(FEED_AREA_COLORS[khu_idx % len(FEED_AREA_COLORS)])
+
+        if row < self.HEADER_ROWS:
+            if role == Qt.DisplayRole:
+                return khu_name if row == 0 else farm
+            if role == Qt.FontRole:
+                return self.header_font
+            if role == Qt.ForegroundRole:
+                return cached_brush("#a0a0a0")
+            if role == Qt.TextAlignmentRole:
+                return int(Qt.AlignCenter)
+            return None
+
+        shift_idx = row - self.HEADER_ROWS
+        value = self._values[shift_idx][column]
+        if role == Qt.DisplayRole:
+            return format_number(value)
+        if role == Qt.EditRole:
+            return value
+        if role == FORMULA_LABEL_ROLE:
+            formula = self._formulas[shift_idx][column]
+            return formula if value > 0 and formula and formula != self.default_formula else ""
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid() or index.row() < self.HEADER_ROWS:
+            return False
+        shift_idx, column = index.row() - self.HEADER_ROWS, index.column()
+        value = float(value or 0)
+        self._values[shift_idx][column] = value
+        # Nhập số mẻ thì tự động áp dụng công thức mặc định; về 0 thì giữ công thức để nhập lại
+        if value > 0 and self.default_formula:
+            self._formulas[shift_idx][column] = self.default_formula
+        self.dataChanged.emit(index, index)
+        return True
+
+
+class FeedEntryDelegate(QStyledItemDelegate):
+    """Vẽ số mẻ và nhãn công thức của ô bảng điền cám; chỉ tạo spinbox khi ô đang được sửa"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.value_font = QFont("Arial", 14, QFont.Bold)
+        self.formula_font = QFont("Arial", 14, 8)
+
+    def createEditor(self, parent, option, index):
+        if index.row() < FeedEntryModel.HEADER_ROWS:
+            return None
+        spin_box = CustomDoubleSpinBox(parent)
+        spin_box.setFont(self.value_font)
+        spin_box.setDecimals(2)  # Cho phép 2 chữ số thập phân để nhập 0.25
+        spin_box.setMinimum(0)
+        spin_box.setMaximum(100)
+        spin_box.setSingleStep(0.25)  # Bước nhảy 0.25 để dễ nhập các giá trị như 0.25, 0.5, 0.75
+        spin_box.setAlignment(Qt.AlignCenter)
+        spin_box.setButtonSymbols(QAbstractSpinBox.NoButtons)  # Ẩn nút tăng/giảm
+        spin_box.setStyleSheet(f"""
+            QDoubleSpinBox {{
+                border: 2px solid {FEED_FORMULA_COLOR};
+                border-radius: 3px;
+                background-color: white;
+            }}
+        """)
+        return spin_box
+
+    def setEditorData(self, editor, index):
+        editor.setValue(float(index.data(Qt.EditRole) or 0))
+        editor.selectAll()
+
+    def setModelData(self, editor, model, index):
+        editor.interpretText()
+        model.setData(index, editor.value(), Qt.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect)
+
+    def paint(self, painter, option, index):
+        if index.row() < FeedEntryModel.HEADER_ROWS:
+            super().paint(painter, option, index)
+            return
+
+        painter.save()
+        selected = option.state & QStyle.State_Selected
+        background = cached_brush(FEED_SELECTED_COLOR) if selected else index.data(Qt.BackgroundRole)
+        if background is not None:
+            painter.fillRect(option.rect, background)
+
+        value_text = index.data(Qt.DisplayRole)
+        formula_text = index.data(FORMULA_LABEL_ROLE)
+        rect = option.rect.adjusted(1, 1, -1, -1)
+        if value_text:
+            # Số mẻ ở phía trên (60%), tên công thức khác mặc định ở phía dưới (40%)
+            value_height = rect.height() * 60 // 100 if formula_text else rect.height()
+            painter.setFont(self.value_font)
+            painter.setPen(option.palette.text().color())
+            painter.drawText(QRect(rect.left(), rect.top(), rect.width(), value_height),
+                             Qt.AlignCenter, value_text)
+            if formula_text:
+                painter.setFont(self.formula_font)
+                painter.setPen(QColor(FEED_FORMULA_COLOR))
+                painter.drawText(QRect(rect.left(), rect.top() + value_height, rect.width(),
+                                       rect.height() - value_height),
+                                 Qt.AlignCenter, formula_text)
+        painter.restore()
+
+
 def setup_professional_environment():
     """Setup environment for professional installation"""
 
@@ -425,6 +1033,39 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         self.inventory_manager = InventoryManager()
         self.threshold_manager = ThresholdManager()
         self.remaining_usage_calculator = RemainingUsageCalculator()
+        self.remaining_usage_calculator.integrate_with_threshold_manager(self.threshold_manager)
+        self.feed_usage_engine = FeedUsageEngine(self.formula_manager)
+        self.purchase_order_planner = PurchaseOrderPlanner(self.inventory_manager, self.threshold_manager)
+        self.remaining_usage_calculator.integrate_with_purchase_order_planner(self.purchase_order_planner)
+        # Analysis snapshot version last rendered in each inventory table
+        self._rendered_analysis_versions = {"feed": None, "mix": None}
+
+        # Table models over compact row tuples; views sort and filter through the proxies
+        self.feed_usage_history_model = FeedUsageHistoryModel(self)
+        self.feed_usage_history_proxy = RowFilterProxyModel(self.feed_usage_history_model, self)
+        self.import_history_model = ImportHistoryModel(self)
+        self.import_history_proxy = RowFilterProxyModel(self.import_history_model, self)
+        self.import_tracking_model = ImportTrackingModel(self)
+        self.import_tracking_proxy = RowFilterProxyModel(self.import_tracking_model, self)
+        self.inventory_models = {warehouse_type: InventoryTableModel(warehouse_type, self)
+                                 for warehouse_type in ("feed", "mix")}
+        self.inventory_proxies = {warehouse_type: RowFilterProxyModel(model, self)
+                                  for warehouse_type, model in self.inventory_models.items()}
+
+        # Background loaders: reports/imports are read and parsed off the GUI thread and
+        # the history tables are filled chunk by chunk as rows arrive
+        self.feed_history_loader = BackgroundLoader("Feed usage history", self)
+        self.feed_history_loader.rows_ready.connect(self.feed_usage_history_model.append_rows)
+        self.feed_history_loader.load_finished.connect(self.on_feed_usage_history_loaded)
+        self.feed_history_loader.load_failed.connect(self.on_feed_usage_history_failed)
+        self.import_history_loader = BackgroundLoader("Import history", self)
+        self.import_history_loader.rows_ready.connect(self.import_history_model.append_rows)
+        self.import_history_loader.load_finished.connect(self.on_import_history_loaded)
+        self.import_history_loader.load_failed.connect(self.on_import_history_failed)
+        self.import_tracking_loader = BackgroundLoader("Import tracking", self)
+        self.import_tracking_loader.rows_ready.connect(self.import_tracking_model.append_rows)
+        self.import_tracking_loader.load_finished.connect(self.on_import_tracking_loaded)
+        self.import_tracking_loader.load_failed.connect(self.on_import_tracking_failed)
 
         # Get formulas and inventory data
         self.feed_formula = self.formula_manager.get_feed_formula()
@@ -515,6 +1156,11 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         self.tabs = QTabWidget()
         self.setCentralWidget(self.tabs)
 
+        # Tabs other than the overview and inventory are built on first activation
+        self.tab_registry = LazyTabRegistry(self.tabs, self)
+        # Tabs are refreshed on activation only when the data they show has changed
+        self.tab_refresh = TabRefreshScheduler(self.tabs, self)
+
         # Connect tab change handler to refresh data when switching tabs
         self.tabs.currentChanged.connect(self.on_tab_changed)
         self.tabs.setStyleSheet("""
@@ -572,18 +1218,35 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         # Create menu bar
         self.create_menu_bar()
 
-        # Setup each tab
+        # Setup the tabs used on startup; the others are built on first activation
         self.setup_feed_usage_tab()
         self.setup_inventory_tab()
-        self.setup_import_tab()  # Thiết lập tab nhập hàng
-        self.setup_formula_tab()
-        self.setup_history_tab()  # Thiết lập tab lịch sử
-        self.setup_team_management_tab()  # Thiết lập tab quản lý tổ cám
+        self.tab_registry.register(self.feed_usage_tab, self.setup_feed_usage_tab, built=True)
+        self.tab_registry.register(self.inventory_tab, self.setup_inventory_tab, built=True)
+        self.tab_registry.register(self.import_tab, self.setup_import_tab)  # Thiết lập tab nhập hàng
+        self.tab_registry.register(self.formula_tab, self.setup_formula_tab)
+        self.tab_registry.register(self.history_tab, self.setup_history_tab)  # Thiết lập tab lịch sử
+        self.tab_registry.register(self.team_management_tab, self.setup_team_management_tab)  # Thiết lập tab quản lý tổ cám
+        self.tab_registry.tab_built.connect(self.on_tab_built)
+
+        # Data shown by each tab; InventoryManager, FormulaManager, report saving and import
+        # saving publish changes through data_versions and mark the matching tabs dirty
+        # Inventory rows come from the formula ingredients, so formula saves refresh it too
+        self.tab_refresh.register(self.inventory_tab, (INVENTORY, REPORTS, THRESHOLDS, FORMULAS),
+                                  self.refresh_all_inventory_displays)
+        self.tab_refresh.register(self.import_tab, (IMPORTS,), self.refresh_import_tab)
+        self.tab_refresh.register(self.formula_tab, (FORMULAS,), self.refresh_formula_tab)
+        self.tab_refresh.register(self.history_tab, (REPORTS,),
+                                  lambda: self.load_history_data(show_warnings=False))
+
+        # Build the remaining tabs one at a time once the window is idle
+        self.tab_registry.prebuild_when_idle()
 
         # Tải công thức mặc định và tải báo cáo mới nhất khi khởi động
         QTimer.singleShot(100, self.refresh_formula_combo)
         QTimer.singleShot(200, self.load_default_formula)
         QTimer.singleShot(800, self.load_latest_report)  # Tăng delay để đảm bảo default formula đã load xong
+        QTimer.singleShot(1500, lambda: self.check_inventory_alerts(on_startup=True))
 
     def create_menu_bar(self):
         """Create the menu bar"""
@@ -640,6 +1303,10 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         export_production_action = export_menu.addAction("🏭 Xuất Báo Cáo Sản Xuất")
         export_production_action.triggered.connect(self.open_comprehensive_report_dialog)
 
+        # Production capacity what-if scenarios
+        what_if_action = file_menu.addAction("🏭 Giả Định Khả Năng Sản Xuất")
+        what_if_action.triggered.connect(self.open_capacity_what_if_dialog)
+
         file_menu.addSeparator()
 
         # Exit action
@@ -759,206 +1426,28 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         default_formula_layout.addStretch()
         layout.addLayout(default_formula_layout)
 
-        # Tạo bảng nhập liệu
-        self.feed_table = QTableWidget()
+        # Tạo bảng nhập liệu: dữ liệu nằm trong FeedEntryModel, spinbox chỉ được tạo khi sửa một ô
+        self.feed_entry_model = FeedEntryModel(FARMS, SHIFTS, self)
+        self.feed_entry_model.set_default_formula(self.formula_manager.get_default_feed_formula())
+        self.feed_table = QTableView()
         self.feed_table.setFont(TABLE_CELL_FONT)
-
-        # Tính tổng số cột dựa trên số trại trong mỗi khu
-        total_columns = sum(len(farms) for farms in FARMS.values())
-
-        self.feed_table.setColumnCount(total_columns)
-        self.feed_table.setRowCount(2 + len(SHIFTS))  # 2 hàng đầu cho khu và trại, các hàng còn lại cho các ca
-
-        # Thiết lập header ngang
-        self.feed_table.setHorizontalHeaderLabels([""] * total_columns)
+        self.feed_table.setModel(self.feed_entry_model)
+        self.feed_table.setItemDelegate(FeedEntryDelegate(self.feed_table))
+        self.feed_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        # Một click mở menu chọn công thức của ô; nhập số mẻ bằng double-click hoặc gõ phím
+        self.feed_table.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed |
+                                        QAbstractItemView.AnyKeyPressed)
+
+        # Ẩn header ngang (tên khu/trại nằm ở 2 hàng đầu)
         self.feed_table.horizontalHeader().setVisible(False)
 
-        # Thiết lập header dọc
-        vertical_headers = ["Khu", "Trại"] + SHIFTS
-        self.feed_table.setVerticalHeaderLabels(vertical_headers)
-
-        # Tạo các ô cho khu và trại
-        col_index = 0
-        for khu_idx, farms in FARMS.items():
-            khu_name = f"Khu {khu_idx + 1}"
-
-            # Tạo các ô cho khu
-            for farm_idx, farm in enumerate(farms):
-                # Tạo font to hơn cho hàng khu và trại
-                larger_font = QFont("Arial", DEFAULT_FONT_SIZE + 1, QFont.Bold)  # Tăng size chữ lên +3
-
-                khu_item = QTableWidgetItem(khu_name)
-                khu_item.setTextAlignment(Qt.AlignCenter)
-                khu_item.setFont(larger_font)
-                khu_item.setForeground(QColor(160, 160, 160))  # Màu chữ xám nhạt hơn
-                self.feed_table.setItem(0, col_index, khu_item)
-
-                farm_item = QTableWidgetItem(farm)
-                farm_item.setTextAlignment(Qt.AlignCenter)
-                farm_item.setFont(larger_font)
-                farm_item.setForeground(QColor(160, 160, 160))  # Màu chữ xám nhạt hơn
-                self.feed_table.setItem(1, col_index, farm_item)
-
-                col_index += 1
-
-        # Thiết lập màu nền cho các khu
-        col_index = 0
-        for khu_idx, farms in FARMS.items():
-            khu_colors = [
-                QColor(240, 248, 255),  # Khu 1: Alice Blue
-                QColor(245, 245, 220),  # Khu 2: Beige
-                QColor(240, 255, 240),  # Khu 3: Honeydew
-                QColor(255, 240, 245),  # Khu 4: Lavender Blush
-                QColor(255, 250, 240),  # Khu 5: Floral White
-            ]
-
-            color = khu_colors[khu_idx % len(khu_colors)]
-
-            for farm_idx in range(len(farms)):
-                for row in range(self.feed_table.rowCount()):
-                    if row < 2:  # Chỉ thiết lập màu nền cho hàng khu và trại
-                        item = self.feed_table.item(row, col_index + farm_idx)
-                        if item:
-                            item.setBackground(color)
-                    else:
-                        # Tạo cell widget cho các ô nhập liệu
-                        container = QWidget()
-                        container.setStyleSheet(f"background-color: {color.name()};")
-
-                        # Tạo spin box cho nhập số mẻ
-                        spin_box = CustomDoubleSpinBox()
-                        spin_box.setFont(QFont("Arial", 14))
-                        spin_box.setDecimals(2)  # Cho phép 2 chữ số thập phân để nhập 0.25
-                        spin_box.setMinimum(0)
-                        spin_box.setMaximum(100)
-                        spin_box.setSingleStep(0.25)  # Bước nhảy 0.25 để dễ nhập các giá trị như 0.25, 0.5, 0.75
-                        spin_box.setAlignment(Qt.AlignTop | Qt.AlignHCenter)  # Canh lề trên và canh giữa ngang
-                        spin_box.setButtonSymbols(QAbstractSpinBox.NoButtons)  # Ẩn nút tăng/giảm
-                        spin_box.setStyleSheet("""
-                            QDoubleSpinBox {
-                                border: none;
-                                border-radius: 3px;
-                                padding-top: 1px;
-                                padding-bottom: 1px;
-                                padding-left: 5px;
-                                padding-right: 5px;
-                                background-color: transparent;
-                                font-weight: bold;
-                            }
-                        """)
-
-                        # Tạo label hiển thị tên công thức
-                        formula_label = QLabel("")
-                        formula_label.setFont(QFont("Arial", 14, 8))
-                        formula_label.setAlignment(Qt.AlignCenter)
-                        formula_label.setStyleSheet("color: #0277bd;")
-                        formula_label.setVisible(False)  # Ban đầu ẩn label
-
-                        # Tạo combo box chọn công thức (ẩn)
-                        formula_combo = QComboBox()
-                        formula_combo.setFont(QFont("Arial", 10))
-                        formula_combo.setVisible(False)  # Ẩn combo box
-
-                        # Thêm các công thức cám vào combo box
-                        feed_presets = self.formula_manager.get_feed_presets()
-                        for preset in feed_presets:
-                            formula_combo.addItem(preset)
-
-                        # Tạo layout cho container
-                        container_layout = QVBoxLayout()
-                        container_layout.setContentsMargins(1, 1, 1, 1)
-                        container_layout.setSpacing(0)  # Giảm khoảng cách giữa các widget
-
-                        container.setLayout(container_layout)
-
-                        container_layout.addWidget(spin_box)
-                        container_layout.addWidget(formula_label)
-                        container_layout.addWidget(formula_combo)  # Combobox ẩn
-
-                        # Thiết lập tỷ lệ không gian
-                        container_layout.setStretch(0, 60)  # 60% cho spin_box (trên)
-                        container_layout.setStretch(1, 40)  # 40% cho formula_label (dưới)
-                        container_layout.setStretch(2, 0)   # 0% cho formula_combo (ẩn)
-
-                        # Lưu reference đến các widget con để truy cập sau này
-                        container.spin_box = spin_box
-                        container.formula_combo = formula_combo
-                        container.formula_label = formula_label
-
-                        # Khi giá trị thay đổi, cập nhật hiển thị để ẩn số 0 và tự động chọn công thức mặc định
-                        def on_value_changed(value, spin=spin_box, combo=formula_combo, label=formula_label):
-                            # Tự động chọn công thức mặc định
-                            self.auto_select_default_formula(value, combo)
-
-                            # Nếu giá trị là 0, hiển thị chuỗi rỗng thay vì số 0
-                            if value == 0:
-                                # Tạm ngắt kết nối sự kiện để tránh đệ quy
-                                spin.valueChanged.disconnect()
-                                # Thiết lập lại prefix để hiển thị trống thay vì "0"
-                                spin.setPrefix(" " if value == 0 else "")
-                                # Kết nối lại sự kiện
-                                spin.valueChanged.connect(lambda v: on_value_changed(v, spin, combo, label))
-
-                                # Ẩn label công thức
-                                label.setVisible(False)
-                                # Giữ số mẻ ở phía trên, để khoảng trống phía dưới
-                                container.layout().setStretch(0, 60)
-                                container.layout().setStretch(1, 40)
-                            else:
-                                # Đảm bảo prefix là trống khi có giá trị
-                                if spin.prefix() != "":
-                                    # Tạm ngắt kết nối sự kiện để tránh đệ quy
-                                    spin.valueChanged.disconnect()
-                                    # Thiết lập lại prefix để hiển thị trống
-                                    spin.setPrefix("")
-                                    # Kết nối lại sự kiện
-                                    spin.valueChanged.connect(lambda v: on_value_changed(v, spin, combo, label))
-
-                                # Cập nhật hiển thị công thức sau khi auto-select
-                                def update_formula_display():
-                                    # Hiển thị tên công thức
-                                    formula_text = combo.currentText()
-                                    default_formula = self.default_formula_combo.currentText()
-
-                                    # Kiểm tra xem có phải công thức mặc định không
-                                    if formula_text and formula_text != default_formula:
-                                        # Nếu không phải công thức mặc định, hiển thị tên
-                                        label.setText(formula_text)
-                                        label.setVisible(True)
-                                        # Giữ tỷ lệ ban đầu với số luôn ở trên
-                                        container.layout().setStretch(0, 60)
-                                        container.layout().setStretch(1, 40)
-                                    else:
-                                        # Nếu là công thức mặc định hoặc không có công thức, ẩn label
-                                        label.setText("")
-                                        label.setVisible(False)
-                                        # Giữ số mẻ ở phía trên, để khoảng trống phía dưới
-                                        container.layout().setStretch(0, 60)
-                                        container.layout().setStretch(1, 40)
-
-                                # Gọi ngay lập tức và sau một khoảng thời gian ngắn để đảm bảo formula được cập nhật
-                                update_formula_display()
-                                QTimer.singleShot(50, update_formula_display)
-
-                        # Thiết lập prefix ban đầu để ẩn số 0 nếu cần
-                        if spin_box.value() == 0:
-                            spin_box.setPrefix(" ")
-
-                        # Kết nối sự kiện
-                        spin_box.valueChanged.connect(lambda value, spin=spin_box, combo=formula_combo, label=formula_label: on_value_changed(value, spin, combo, label))
-
-                        # Thêm container vào cell
-                        self.feed_table.setCellWidget(row, col_index + farm_idx, container)
-
-            col_index += len(farms)
-
         # Stretch columns to fill available space
         self.feed_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
 
         # Tăng chiều cao của các hàng để dễ nhìn hơn
         self.feed_table.setRowHeight(0, 50)  # Tăng chiều cao hàng khu
         self.feed_table.setRowHeight(1, 50)  # Tăng chiều cao hàng trại
-        for row in range(2, self.feed_table.rowCount()):
+        for row in range(2, self.feed_entry_model.rowCount()):
             self.feed_table.setRowHeight(row, 60)  # Tăng chiều cao hàng nhập liệu
 
                 # Xem báo cáo button (sẽ tự động tính toán)
@@ -979,7 +1468,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         view_report_button.clicked.connect(self.show_daily_report)
 
         # Kết nối sự kiện click vào cell
-        self.feed_table.cellClicked.connect(self.on_feed_table_cell_clicked)
+        self.feed_table.clicked.connect(self.on_feed_table_cell_clicked)
 
         # Thêm bảng vào layout
         # Tạo GroupBox cho bảng nhập liệu cám
@@ -1086,15 +1575,15 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         self.history_to_date.dateChanged.connect(self.filter_feed_usage_history)
 
         # Tạo bảng lịch sử cám
-        self.feed_usage_history_table = QTableWidget()
+        # Bảng mô hình/hiển thị: định dạng ô được tính khi vẽ, sắp xếp qua proxy
+        self.feed_usage_history_table = QTableView()
+        self.feed_usage_history_table.setModel(self.feed_usage_history_proxy)
         self.feed_usage_history_table.setFont(TABLE_CELL_FONT)
-        self.feed_usage_history_table.setColumnCount(4)
-        self.feed_usage_history_table.setHorizontalHeaderLabels(["Ngày báo cáo", "Tổng lượng cám (kg)", "Tổng lượng mix (kg)", "Tổng số mẻ cám"])
         self.feed_usage_history_table.horizontalHeader().setFont(TABLE_HEADER_FONT)
         self.feed_usage_history_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.feed_usage_history_table.setStyleSheet("""
-            /* QTableWidget với hiệu ứng hover và selection cả hàng */
-            QTableWidget {
+            /* QTableView với hiệu ứng hover và selection cả hàng */
+            QTableView {
                 gridline-color: #aaa;
                 selection-background-color: #c8e6c9;
                 alternate-background-color: #f0f8f0;
@@ -1115,7 +1604,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             }
 
             /* Styling cho từng cell */
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #eee;
                 border-right: none;
@@ -1125,40 +1614,43 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
 
             /* Selection effect cho cả hàng */
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #c8e6c9;
                 color: #000;
                 font-weight: bold;
             }
 
             /* Focus effect */
-            QTableWidget::item:focus {
+            QTableView::item:focus {
                 border: 1px solid #4CAF50;
                 outline: none;
             }
 
             /* Đảm bảo hover hoạt động trên toàn bộ hàng */
-            QTableWidget QTableWidgetItem:hover {
+            QTableView::item:hover {
                 background-color: #e8f5e9;
             }
 
             /* Selection cho inactive state */
-            QTableWidget::item:selected:!active {
+            QTableView::item:selected:!active {
                 background-color: #d4edda;
                 color: #155724;
             }
 
             /* Tăng cường hiệu ứng hover cho các hàng alternate */
-            QTableWidget::item:alternate:hover {
+            QTableView::item:alternate:hover {
                 background-color: #e8f5e9;
             }
 
-            QTableWidget::item:alternate:selected {
+            QTableView::item:alternate:selected {
                 background-color: #c8e6c9;
             }
         """)
         self.feed_usage_history_table.setAlternatingRowColors(True)
-        self.feed_usage_history_table.setEditTriggers(QTableWidget.NoEditTriggers)  # Chỉ đọc
+        self.feed_usage_history_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.feed_usage_history_table.setSortingEnabled(True)
+        self.feed_usage_history_table.sortByColumn(0, Qt.DescendingOrder)  # Mới nhất lên đầu
+        self.feed_usage_history_table.setEditTriggers(QAbstractItemView.NoEditTriggers)  # Chỉ đọc
 
         # Tăng chiều cao hàng cho bảng lịch sử
         self.feed_usage_history_table.verticalHeader().setDefaultSectionSize(55)
@@ -1241,13 +1733,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
         if reply == QMessageBox.Yes:
             # Xóa dữ liệu trong bảng
-            for col in range(self.feed_table.columnCount()):
-                for row in range(2, self.feed_table.rowCount()):
-                    cell_widget = self.feed_table.cellWidget(row, col)
-                    if cell_widget and hasattr(cell_widget, 'spin_box'):
-                        cell_widget.spin_box.setValue(0)
-                    if cell_widget and hasattr(cell_widget, 'formula_combo'):
-                        cell_widget.formula_combo.setCurrentText("")
+            self.feed_entry_model.clear()
 
             # Xóa dữ liệu công thức mix cho từng ô
             if hasattr(self, 'cell_mix_formulas'):
@@ -1331,18 +1817,17 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         feed_header.setStyleSheet("QLabel { padding: 10px; background-color: #e0f2f1; border-radius: 5px; }")
         feed_layout.addWidget(feed_header)
 
-        self.feed_inventory_table = QTableWidget()
+        self.feed_inventory_table = QTableView()
+        self.feed_inventory_table.setModel(self.inventory_proxies["feed"])
         self.feed_inventory_table.setFont(QFont("Arial", 11))
-        self.feed_inventory_table.setColumnCount(8)  # Added action columns
-        self.feed_inventory_table.setHorizontalHeaderLabels([
-            "🌾 Thành phần", "📊 Tồn kho (kg)", "📦 Kích thước bao (kg)",
-            "🔢 Số bao", "⏰ Còn lại (ngày)", "🚦 Tình trạng", "✏️ Sửa", "🗑️ Xóa"
-        ])
+        self.feed_inventory_table.setMouseTracking(True)
+        self.feed_inventory_table.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
+        self.setup_inventory_action_delegates(self.feed_inventory_table, "feed")
         self.feed_inventory_table.horizontalHeader().setFont(QFont("Arial", 12, QFont.Bold))
 
         # Enhanced table styling
         self.feed_inventory_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #e0e0e0;
                 selection-background-color: #e3f2fd;
                 alternate-background-color: #fafafa;
@@ -1363,11 +1848,11 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
                     stop:0 #66BB6A, stop:1 #4CAF50);
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #f0f0f0;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e3f2fd;
                 color: #1976d2;
             }
@@ -1381,15 +1866,18 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # Number of bags
         header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # Days remaining
         header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # Status
-        header.setSectionResizeMode(6, QHeaderView.Fixed)  # Edit button
-        header.setSectionResizeMode(7, QHeaderView.Fixed)  # Delete button
-        self.feed_inventory_table.setColumnWidth(6, 80)  # Edit button width
-        self.feed_inventory_table.setColumnWidth(7, 80)  # Delete button width
+        header.setSectionResizeMode(6, QHeaderView.ResizeToContents)  # Stock-out probability
+        header.setSectionResizeMode(7, QHeaderView.Fixed)  # Edit button
+        header.setSectionResizeMode(8, QHeaderView.Fixed)  # Delete button
+        self.feed_inventory_table.setColumnWidth(7, 80)  # Edit button width
+        self.feed_inventory_table.setColumnWidth(8, 80)  # Delete button width
 
         self.feed_inventory_table.setSortingEnabled(True)
+        self.feed_inventory_table.sortByColumn(-1, Qt.AscendingOrder)  # Keep the manager's consistent order until a header is clicked
+        self.feed_inventory_table.verticalHeader().setDefaultSectionSize(45)  # Increased for buttons
         self.feed_inventory_table.setAlternatingRowColors(True)
         self.feed_inventory_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #aaa;
                 selection-background-color: #e0e0ff;
                 alternate-background-color: #f9f9f9;
@@ -1400,7 +1888,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
                 padding: 6px;
                 border: 1px solid #ddd;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 4px;
             }
         """)
@@ -1464,18 +1952,17 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         mix_header.setStyleSheet("QLabel { padding: 10px; background-color: #e8f5e9; border-radius: 5px; }")
         mix_layout.addWidget(mix_header)
 
-        self.mix_inventory_table = QTableWidget()
+        self.mix_inventory_table = QTableView()
+        self.mix_inventory_table.setModel(self.inventory_proxies["mix"])
         self.mix_inventory_table.setFont(QFont("Arial", 11))
-        self.mix_inventory_table.setColumnCount(8)  # Added action columns
-        self.mix_inventory_table.setHorizontalHeaderLabels([
-            "🧪 Thành phần", "📊 Tồn kho (kg)", "📦 Kích thước bao (kg)",
-            "🔢 Số bao", "⏰ Còn lại (ngày)", "🚦 Tình trạng", "✏️ Sửa", "🗑️ Xóa"
-        ])
+        self.mix_inventory_table.setMouseTracking(True)
+        self.mix_inventory_table.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
+        self.setup_inventory_action_delegates(self.mix_inventory_table, "mix")
         self.mix_inventory_table.horizontalHeader().setFont(QFont("Arial", 12, QFont.Bold))
 
         # Enhanced table styling
         self.mix_inventory_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #e0e0e0;
                 selection-background-color: #e8f5e9;
                 alternate-background-color: #fafafa;
@@ -1496,11 +1983,11 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
                     stop:0 #9CCC65, stop:1 #8BC34A);
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #f0f0f0;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e8f5e9;
                 color: #388e3c;
             }
@@ -1514,15 +2001,18 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # Number of bags
         header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # Days remaining
         header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # Status
-        header.setSectionResizeMode(6, QHeaderView.Fixed)  # Edit button
-        header.setSectionResizeMode(7, QHeaderView.Fixed)  # Delete button
-        self.mix_inventory_table.setColumnWidth(6, 80)  # Edit button width
-        self.mix_inventory_table.setColumnWidth(7, 80)  # Delete button width
+        header.setSectionResizeMode(6, QHeaderView.ResizeToContents)  # Stock-out probability
+        header.setSectionResizeMode(7, QHeaderView.Fixed)  # Edit button
+        header.setSectionResizeMode(8, QHeaderView.Fixed)  # Delete button
+        self.mix_inventory_table.setColumnWidth(7, 80)  # Edit button width
+        self.mix_inventory_table.setColumnWidth(8, 80)  # Delete button width
 
         self.mix_inventory_table.setSortingEnabled(True)
+        self.mix_inventory_table.sortByColumn(-1, Qt.AscendingOrder)  # Keep the manager's consistent order until a header is clicked
+        self.mix_inventory_table.verticalHeader().setDefaultSectionSize(45)  # Increased for buttons
         self.mix_inventory_table.setAlternatingRowColors(True)
         self.mix_inventory_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #aaa;
                 selection-background-color: #e0e0ff;
                 alternate-background-color: #f9f9f9;
@@ -1533,7 +2023,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
                 padding: 6px;
                 border: 1px solid #ddd;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 4px;
             }
         """)
@@ -1719,6 +2209,19 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
     #     )
         pass  # Method deprecated - now using comprehensive reporting
 
+    def open_capacity_what_if_dialog(self):
+        """Open the production capacity what-if dialog"""
+        try:
+            try:
+                from src.ui.dialogs.capacity_what_if_dialog import CapacityWhatIfDialog
+            except ImportError:
+                from ui.dialogs.capacity_what_if_dialog import CapacityWhatIfDialog
+            area_names = [f"Khu {khu_idx + 1}" for khu_idx in sorted(FARMS)]
+            dialog = CapacityWhatIfDialog(self.formula_manager, area_names, self)
+            dialog.exec_()
+        except Exception as e:
+            QMessageBox.critical(self, "Lỗi", f"Không thể mở giả định khả năng sản xuất: {str(e)}")
+
     def open_comprehensive_report_dialog(self):
         """Mở dialog báo cáo toàn diện"""
         try:
@@ -2096,20 +2599,17 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         history_layout.addWidget(date_range_group)
 
         # Import history table - Enhanced with merged datetime column
-        self.import_history_table = QTableWidget()
+        self.import_history_table = QTableView()
+        self.import_history_table.setModel(self.import_history_proxy)
         self.import_history_table.setFont(TABLE_CELL_FONT)
-        self.import_history_table.setColumnCount(9)
-        self.import_history_table.setHorizontalHeaderLabels([
-            "Thời gian", "Loại", "Thành phần", "Số lượng (kg)",
-            "Số bao", "Đơn giá (VNĐ)", "Thành tiền (VNĐ)", "Nhà cung cấp", "Ghi chú"
-        ])
+        self.import_history_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.import_history_table.horizontalHeader().setFont(TABLE_HEADER_FONT)
         self.import_history_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.import_history_table.setAlternatingRowColors(True)
 
         # Enhanced styling to match warehouse-specific tables
         self.import_history_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #E0E0E0;
                 selection-background-color: #E3F2FD;
                 alternate-background-color: #F9F9F9;
@@ -2125,15 +2625,15 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
                 font-weight: bold;
                 text-align: center;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 6px;
                 border-bottom: 1px solid #F0F0F0;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #E3F2FD;
                 color: #1976D2;
             }
-            QTableWidget::item:hover {
+            QTableView::item:hover {
                 background-color: #F5F5F5;
             }
         """)
@@ -2149,8 +2649,9 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         self.import_history_table.setColumnWidth(7, 120)  # Nhà cung cấp
         self.import_history_table.setColumnWidth(8, 150)  # Ghi chú
 
-        # Enable sorting
+        # Enable sorting (through the proxy model), newest first by default
         self.import_history_table.setSortingEnabled(True)
+        self.import_history_table.sortByColumn(0, Qt.DescendingOrder)
         history_layout.addWidget(self.import_history_table)
 
         import_history_tab.setLayout(history_layout)
@@ -2339,24 +2840,6 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
                 day, month, year = date.split("/")
                 date = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
 
-            # Create filename based on date
-            filename = str(persistent_path_manager.data_path / "imports" / f"import_{date}.json")
-
-            # Ensure directory exists
-            Path(filename).parent.mkdir(parents=True, exist_ok=True)
-
-            # Load existing data if file exists
-            imports = []
-            if os.path.exists(filename):
-                try:
-                    with open(filename, "r", encoding="utf-8") as f:
-                        imports = json.load(f)
-                        if not isinstance(imports, list):
-                            imports = []
-                except (json.JSONDecodeError, UnicodeDecodeError) as e:
-                    print(f"⚠️ [Import History] Could not read existing import file {filename}: {e}")
-                    imports = []
-
             # Add new import record with enhanced data
             import_data = {
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -2372,13 +2855,11 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
                 "warehouse_type": import_type.lower()  # Explicit warehouse type for clarity
             }
 
-            imports.append(import_data)
-
             # Save updated data
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(imports, f, ensure_ascii=False, indent=2)
+            if not import_store.save_import(date, import_data):
+                raise RuntimeError(f"could not store import record for {date}")
 
-            print(f"✅ [Import History] Saved {import_type} import: {amount} kg {ingredient} to {filename}")
+            print(f"✅ [Import History] Saved {import_type} import: {amount} kg {ingredient} to {import_store.get_month_file(date)}")
 
             # Immediately refresh the appropriate import history table
             try:
@@ -2424,214 +2905,72 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         print(f"🔍 [Import Search] Searching imports from {from_date.toString('dd/MM/yyyy')} to {to_date.toString('dd/MM/yyyy')}")
         print(f"📋 [Import Search] Filter type: {filter_type}")
 
-        # Xóa dữ liệu cũ trong bảng
-        self.import_history_table.setRowCount(0)
-
-        # Danh sách lưu tất cả bản ghi nhập kho trong khoảng thời gian
-        all_imports = []
-        files_found = 0
-
-        # Tạo danh sách tất cả các ngày từ from_date đến to_date
-        current_date = from_date
-        while current_date <= to_date:
-            # Sử dụng định dạng yyyy-MM-dd cho tên file (đúng với cách lưu file)
-            date_str_filename = current_date.toString("yyyy-MM-dd")
-            date_str_display = current_date.toString("dd/MM/yyyy")
-            filename = str(persistent_path_manager.data_path / "imports" / f"import_{date_str_filename}.json")
-
-            # Nếu có file dữ liệu cho ngày này
-            if os.path.exists(filename):
-                files_found += 1
-                try:
-                    with open(filename, "r", encoding="utf-8") as f:
-                        imports = json.load(f)
-
-                        if isinstance(imports, list):
-                            daily_imports = []
-                            for import_data in imports:
-                                # Thêm thông tin ngày vào mỗi bản ghi
-                                import_data_copy = import_data.copy()
-                                import_data_copy["date"] = date_str_display
-
-                                # Đảm bảo có trường type, nếu không thì xác định từ ingredient
-                                if "type" not in import_data_copy or not import_data_copy["type"]:
-                                    ingredient = import_data_copy.get("ingredient", "")
-                                    if ingredient:
-                                        warehouse_type = self.inventory_manager.determine_warehouse_type(ingredient)
-                                        import_data_copy["type"] = warehouse_type
-                                        print(f"🔍 [Import Search] Auto-determined type for '{ingredient}': {warehouse_type}")
-
-                                daily_imports.append(import_data_copy)
-
-                            all_imports.extend(daily_imports)
-                            print(f"📄 [Import Search] Found {len(daily_imports)} imports in {date_str_filename}")
-
-                except (json.JSONDecodeError, UnicodeDecodeError) as e:
-                    print(f"⚠️ [Import Search] Error reading file {filename}: {e}")
-
-            # Chuyển sang ngày tiếp theo
-            current_date = current_date.addDays(1)
-
-        print(f"📊 [Import Search] Total files found: {files_found}, Total imports: {len(all_imports)}")
-
-        # Lọc theo loại nếu cần
-        filtered_imports = all_imports
-        if filter_type == "Cám":
-            filtered_imports = [imp for imp in all_imports if imp.get("type", "").lower() == "feed"]
-            print(f"🌾 [Import Search] Filtered to {len(filtered_imports)} feed imports")
-        elif filter_type == "Mix":
-            filtered_imports = [imp for imp in all_imports if imp.get("type", "").lower() == "mix"]
-            print(f"🧪 [Import Search] Filtered to {len(filtered_imports)} mix imports")
-        else:
-            print(f"📋 [Import Search] No filter applied, showing all {len(filtered_imports)} imports")
-
-        # Sắp xếp theo thời gian, mới nhất lên đầu
-        filtered_imports.sort(key=lambda x: (x.get("timestamp", ""), x.get("date", "")), reverse=True)
-
-        # Hiển thị kết quả - Enhanced with merged datetime column
-        self.import_history_table.setRowCount(len(filtered_imports))
-
-        for row, import_data in enumerate(filtered_imports):
-            try:
-                # Thời gian (Column 0) - Merged datetime column
-                timestamp = import_data.get("timestamp", "")
-                date_part = import_data.get("date", "")
-
-                # Create full datetime display
-                if timestamp and date_part:
-                    # If we have both timestamp and date, combine them properly
-                    if " " in timestamp:
-                        # timestamp already contains date and time
-                        datetime_display = timestamp
-                        # Convert to dd/MM/yyyy HH:mm format if needed
-                        try:
-                            # Parse the timestamp to reformat it
-                            from datetime import datetime as dt
-                            parsed_dt = dt.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
-                            datetime_display = parsed_dt.strftime("%d/%m/%Y %H:%M")
-                        except:
-                            # If parsing fails, use original timestamp
-                            datetime_display = timestamp
-                    else:
-                        # timestamp only contains time, combine with date
-                        datetime_display = f"{date_part} {timestamp}"
-                elif timestamp:
-                    # Only timestamp available
-                    datetime_display = timestamp
-                elif date_part:
-                    # Only date available
-                    datetime_display = date_part
-                else:
-                    datetime_display = ""
-
-                datetime_item = QTableWidgetItem(datetime_display)
-                datetime_item.setTextAlignment(Qt.AlignCenter)
-                self.import_history_table.setItem(row, 0, datetime_item)
-
-                # Loại (Column 1) - Shifted from column 2
-                import_type = import_data.get("type", "").lower()
-                type_text = "Cám" if import_type == "feed" else "Mix" if import_type == "mix" else "Không xác định"
-                type_item = QTableWidgetItem(type_text)
-                type_item.setTextAlignment(Qt.AlignCenter)
-
-                # Color coding for warehouse types
-                if import_type == "feed":
-                    type_item.setBackground(QColor("#E8F5E9"))  # Light green for feed
-                    type_item.setForeground(QColor("#2E7D32"))  # Dark green text
-                elif import_type == "mix":
-                    type_item.setBackground(QColor("#FFF3E0"))  # Light orange for mix
-                    type_item.setForeground(QColor("#F57C00"))  # Dark orange text
-
-                self.import_history_table.setItem(row, 1, type_item)
-
-                # Thành phần (Column 2) - Shifted from column 3
-                ingredient = import_data.get("ingredient", "")
-                ingredient_item = QTableWidgetItem(ingredient)
-                self.import_history_table.setItem(row, 2, ingredient_item)
+        # Xóa dữ liệu cũ trong bảng; loại nhập kho được lọc qua proxy
+        self.import_history_model.clear()
+        self._import_history_filter = filter_type
+        filter_warehouse = {"Cám": "feed", "Mix": "mix"}.get(filter_type)
+        self.import_history_proxy.set_row_filter(
+            (lambda row: row[ImportHistoryModel.TYPE] == filter_warehouse) if filter_warehouse else None
+        )
 
-                # Số lượng (Column 3) - Shifted from column 4
-                amount = import_data.get("amount", 0)
-                amount_item = QTableWidgetItem(format_number(amount))
-                amount_item.setTextAlignment(Qt.AlignCenter)
-                self.import_history_table.setItem(row, 3, amount_item)
+        from_str = from_date.toString("yyyy-MM-dd")
+        to_str = to_date.toString("yyyy-MM-dd")
 
-                # Số bao (Column 4) - Shifted from column 5
-                bag_size = self.inventory_manager.get_bag_size(ingredient)
-                if bag_size > 0 and amount > 0:
-                    bags = amount / bag_size
-                    bags_item = QTableWidgetItem(format_number(bags))
-                else:
-                    bags_item = QTableWidgetItem("")
-                bags_item.setTextAlignment(Qt.AlignCenter)
-                self.import_history_table.setItem(row, 4, bags_item)
+        # Chụp dữ liệu kho/bao trên luồng giao diện; luồng nền chỉ đọc bản sao này
+        classifier = self.inventory_manager.classifier
+        warehouse_index = classifier.snapshot()
+        bag_sizes = dict(self.inventory_manager.packaging_info)
 
-                # Đơn giá (Column 5) - Shifted from column 6
-                unit_price = import_data.get("unit_price", 0)
-                price_item = QTableWidgetItem(f"{unit_price:,.0f}" if unit_price > 0 else "")
-                price_item.setTextAlignment(Qt.AlignRight)
-                self.import_history_table.setItem(row, 5, price_item)
-
-                # Thành tiền (Column 6) - Shifted from column 7
-                total_cost = import_data.get("total_cost", 0)
-                if total_cost <= 0 and unit_price > 0:
-                    total_cost = amount * unit_price
-                total_item = QTableWidgetItem(f"{total_cost:,.0f}" if total_cost > 0 else "")
-                total_item.setTextAlignment(Qt.AlignRight)
-                self.import_history_table.setItem(row, 6, total_item)
+        def load_rows(is_cancelled):
+            # Gửi từng bản ghi ngay khi đọc; proxy sắp xếp theo thời gian (mới nhất lên đầu)
+            for import_data_copy in import_store.load_range(from_str, to_str):
+                if is_cancelled():
+                    return
 
-                # Nhà cung cấp (Column 7) - Shifted from column 8
-                supplier = import_data.get("supplier", "")
-                supplier_item = QTableWidgetItem(supplier)
-                self.import_history_table.setItem(row, 7, supplier_item)
+                # Hiển thị ngày theo định dạng dd/MM/yyyy
+                import_data_copy["date"] = QDate.fromString(import_data_copy["date"], "yyyy-MM-dd").toString("dd/MM/yyyy")
 
-                # Ghi chú (Column 8) - Shifted from column 9
-                note = import_data.get("note", "")
-                note_item = QTableWidgetItem(note)
-                self.import_history_table.setItem(row, 8, note_item)
+                # Đảm bảo có trường type, nếu không thì xác định từ ingredient
+                ingredient = import_data_copy.get("ingredient", "")
+                if ("type" not in import_data_copy or not import_data_copy["type"]) and ingredient:
+                    warehouse_type = warehouse_index.get(ingredient) or classifier.classify_by_name(ingredient)
+                    import_data_copy["type"] = warehouse_type
+                    print(f"🔍 [Import Search] Auto-determined type for '{ingredient}': {warehouse_type}")
 
-            except Exception as e:
-                print(f"⚠️ [Import Search] Error processing row {row}: {e}")
-                continue
+                yield ImportHistoryModel.make_row(import_data_copy, bag_sizes.get(ingredient, 0))
 
-        print(f"✅ [Import Search] Displayed {len(filtered_imports)} imports in search results")
+        # Lần tìm kiếm mới hủy lần tìm kiếm trước
+        self.import_history_loader.start(load_rows)
 
-        # Enable sorting after data is populated
-        self.import_history_table.setSortingEnabled(True)
+    def on_import_history_loaded(self, total):
+        """Hoàn tất tìm kiếm lịch sử nhập hàng: hiển thị thống kê các bản ghi sau khi lọc"""
+        filter_type = self._import_history_filter
+        filtered_imports = self.import_history_proxy.visible_rows()
 
-        # Sort by date and time (newest first) by default
-        self.import_history_table.sortItems(0, Qt.DescendingOrder)
+        print(f"✅ [Import Search] Displayed {len(filtered_imports)} of {total} imports in search results")
 
-        # Calculate and display summary statistics
+        # Hiển thị thông báo kết quả với thống kê
         if len(filtered_imports) > 0:
-            total_amount = sum(imp.get("amount", 0) for imp in filtered_imports)
-            total_cost = sum(imp.get("total_cost", 0) for imp in filtered_imports)
-            feed_count = len([imp for imp in filtered_imports if imp.get("type", "").lower() == "feed"])
-            mix_count = len([imp for imp in filtered_imports if imp.get("type", "").lower() == "mix"])
+            total_amount = sum(row[ImportHistoryModel.AMOUNT] for row in filtered_imports)
+            total_cost = sum(row[ImportHistoryModel.TOTAL_COST] for row in filtered_imports)
+            feed_count = len([row for row in filtered_imports if row[ImportHistoryModel.TYPE] == "feed"])
+            mix_count = len([row for row in filtered_imports if row[ImportHistoryModel.TYPE] == "mix"])
 
             print(f"📊 [Import Search] Summary - Total: {len(filtered_imports)} imports, "
                   f"Feed: {feed_count}, Mix: {mix_count}, "
                   f"Amount: {total_amount:.1f} kg, Cost: {total_cost:,.0f} VNĐ")
 
-        # Hiển thị thông báo kết quả với thống kê
-        if len(filtered_imports) > 0:
             filter_msg = f" (lọc: {filter_type})" if filter_type in ["Cám", "Mix"] else ""
 
             # Create detailed result message
             result_msg = f"Tìm thấy {len(filtered_imports)} bản ghi nhập kho{filter_msg}."
-
-            if len(filtered_imports) > 0:
-                total_amount = sum(imp.get("amount", 0) for imp in filtered_imports)
-                total_cost = sum(imp.get("total_cost", 0) for imp in filtered_imports)
-                feed_count = len([imp for imp in filtered_imports if imp.get("type", "").lower() == "feed"])
-                mix_count = len([imp for imp in filtered_imports if imp.get("type", "").lower() == "mix"])
-
-                result_msg += f"\n\nThống kê:"
-                if filter_type == "Tất cả":
-                    result_msg += f"\n• Cám: {feed_count} bản ghi"
-                    result_msg += f"\n• Mix: {mix_count} bản ghi"
-                result_msg += f"\n• Tổng số lượng: {total_amount:,.1f} kg"
-                if total_cost > 0:
-                    result_msg += f"\n• Tổng giá trị: {total_cost:,.0f} VNĐ"
+            result_msg += f"\n\nThống kê:"
+            if filter_type == "Tất cả":
+                result_msg += f"\n• Cám: {feed_count} bản ghi"
+                result_msg += f"\n• Mix: {mix_count} bản ghi"
+            result_msg += f"\n• Tổng số lượng: {total_amount:,.1f} kg"
+            if total_cost > 0:
+                result_msg += f"\n• Tổng giá trị: {total_cost:,.0f} VNĐ"
 
             QMessageBox.information(self, "Kết quả tìm kiếm", result_msg)
         else:
@@ -2639,8 +2978,16 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             QMessageBox.information(self, "Kết quả tìm kiếm",
                                   f"Không tìm thấy dữ liệu nhập kho nào trong khoảng thời gian đã chọn{filter_msg}!")
 
+    def on_import_history_failed(self, message):
+        """Lỗi khi tìm kiếm lịch sử nhập hàng"""
+        QMessageBox.warning(self, "Lỗi", f"Không thể tải lịch sử nhập hàng: {message}")
+
     def update_feed_import_history(self):
         """Cập nhật bảng lịch sử Nhập kho cám - Enhanced for warehouse separation"""
+        # Tab nhập hàng chưa được dựng: bảng sẽ được điền khi tab được mở lần đầu
+        if not self.tab_registry.is_built(self.import_tab):
+            return
+
         try:
             # Xóa dữ liệu hiện tại
             self.feed_import_history_table.setRowCount(0)
@@ -2652,41 +2999,20 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             print(f"🔍 [Feed History] Searching for feed imports from {current_date.addDays(-30).toString('yyyy-MM-dd')} to {current_date.toString('yyyy-MM-dd')}")
 
             # Tìm kiếm trong 30 ngày gần nhất để đảm bảo có dữ liệu
-            for i in range(30):
-                check_date = current_date.addDays(-i)
-                date_str = check_date.toString("yyyy-MM-dd")
-                filename = str(persistent_path_manager.data_path / "imports" / f"import_{date_str}.json")
+            for import_data in import_store.load_recent(30):
+                import_type = import_data.get("type", "").lower()
+                ingredient = import_data.get("ingredient", "")
 
-                if os.path.exists(filename):
-                    try:
-                        with open(filename, "r", encoding="utf-8") as f:
-                            imports = json.load(f)
-
-                        if isinstance(imports, list):
-                            # Lọc chỉ lấy dữ liệu cám (feed warehouse)
-                            daily_feed_imports = []
-                            for import_data in imports:
-                                import_type = import_data.get("type", "").lower()
-                                ingredient = import_data.get("ingredient", "")
-
-                                # Check if this is a feed import
-                                if import_type == "feed":
-                                    daily_feed_imports.append(import_data)
-                                elif import_type == "" and ingredient:
-                                    # For legacy imports without type, determine warehouse based on ingredient
-                                    warehouse_type = self.inventory_manager.determine_warehouse_type(ingredient)
-                                    if warehouse_type == "feed":
-                                        # Add type field for consistency
-                                        import_data["type"] = "feed"
-                                        daily_feed_imports.append(import_data)
-
-                            feed_imports.extend(daily_feed_imports)
-                            if daily_feed_imports:
-                                print(f"📦 [Feed History] Found {len(daily_feed_imports)} feed imports in {date_str}")
-
-                    except (json.JSONDecodeError, UnicodeDecodeError) as e:
-                        print(f"⚠️ [Feed History] Could not read import file {filename}: {e}")
-                        continue
+                # Check if this is a feed import
+                if import_type == "feed":
+                    feed_imports.append(import_data)
+                elif import_type == "" and ingredient:
+                    # For legacy imports without type, determine warehouse based on ingredient
+                    warehouse_type = self.inventory_manager.determine_warehouse_type(ingredient)
+                    if warehouse_type == "feed":
+                        # Add type field for consistency
+                        import_data["type"] = "feed"
+                        feed_imports.append(import_data)
 
             print(f"📊 [Feed History] Total feed imports found: {len(feed_imports)}")
 
@@ -2755,6 +3081,10 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
     def update_mix_import_history(self):
         """Cập nhật bảng lịch sử Nhập kho mix - Enhanced for warehouse separation"""
+        # Tab nhập hàng chưa được dựng: bảng sẽ được điền khi tab được mở lần đầu
+        if not self.tab_registry.is_built(self.import_tab):
+            return
+
         try:
             # Xóa dữ liệu hiện tại
             self.mix_import_history_table.setRowCount(0)
@@ -2766,41 +3096,20 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             print(f"🔍 [Mix History] Searching for mix imports from {current_date.addDays(-30).toString('yyyy-MM-dd')} to {current_date.toString('yyyy-MM-dd')}")
 
             # Tìm kiếm trong 30 ngày gần nhất để đảm bảo có dữ liệu
-            for i in range(30):
-                check_date = current_date.addDays(-i)
-                date_str = check_date.toString("yyyy-MM-dd")
-                filename = str(persistent_path_manager.data_path / "imports" / f"import_{date_str}.json")
+            for import_data in import_store.load_recent(30):
+                import_type = import_data.get("type", "").lower()
+                ingredient = import_data.get("ingredient", "")
 
-                if os.path.exists(filename):
-                    try:
-                        with open(filename, "r", encoding="utf-8") as f:
-                            imports = json.load(f)
-
-                        if isinstance(imports, list):
-                            # Lọc chỉ lấy dữ liệu mix (mix warehouse)
-                            daily_mix_imports = []
-                            for import_data in imports:
-                                import_type = import_data.get("type", "").lower()
-                                ingredient = import_data.get("ingredient", "")
-
-                                # Check if this is a mix import
-                                if import_type == "mix":
-                                    daily_mix_imports.append(import_data)
-                                elif import_type == "" and ingredient:
-                                    # For legacy imports without type, determine warehouse based on ingredient
-                                    warehouse_type = self.inventory_manager.determine_warehouse_type(ingredient)
-                                    if warehouse_type == "mix":
-                                        # Add type field for consistency
-                                        import_data["type"] = "mix"
-                                        daily_mix_imports.append(import_data)
-
-                            mix_imports.extend(daily_mix_imports)
-                            if daily_mix_imports:
-                                print(f"🧪 [Mix History] Found {len(daily_mix_imports)} mix imports in {date_str}")
-
-                    except (json.JSONDecodeError, UnicodeDecodeError) as e:
-                        print(f"⚠️ [Mix History] Could not read import file {filename}: {e}")
-                        continue
+                # Check if this is a mix import
+                if import_type == "mix":
+                    mix_imports.append(import_data)
+                elif import_type == "" and ingredient:
+                    # For legacy imports without type, determine warehouse based on ingredient
+                    warehouse_type = self.inventory_manager.determine_warehouse_type(ingredient)
+                    if warehouse_type == "mix":
+                        # Add type field for consistency
+                        import_data["type"] = "mix"
+                        mix_imports.append(import_data)
 
             print(f"📊 [Mix History] Total mix imports found: {len(mix_imports)}")
 
@@ -3893,6 +4202,10 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
     def update_history_dates(self, combo_box=None):
         """Update the list of available report dates"""
+        # Tab lịch sử chưa được dựng: danh sách ngày sẽ được tải khi tab được mở lần đầu
+        if combo_box is None and not self.tab_registry.is_built(self.history_tab):
+            return
+
         # Xác định combo box cần cập nhật
         combo_boxes = []
         if combo_box is None:
@@ -4425,523 +4738,159 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
     def update_feed_inventory_table(self):
         """Update the feed inventory table with enhanced remaining usage analysis"""
-        try:
-            print("🔄 [Feed Inventory] Starting enhanced inventory table update...")
-
-            # Get comprehensive usage analysis from the new calculator
-            usage_analysis = self.remaining_usage_calculator.get_comprehensive_usage_analysis(7)
-            feed_analysis = usage_analysis.get("feed", {})
-
-            # Get feed warehouse inventory specifically
-            feed_warehouse_inventory = self.inventory_manager.get_warehouse_inventory("feed")
-            feed_formula_ingredients = set(self.feed_formula.keys())
-
-            # Get consistently sorted feed ingredients
-            # This ensures the same order every time the app is loaded
-            feed_ingredients = self.inventory_manager.get_sorted_warehouse_ingredients(
-                "feed", feed_formula_ingredients
-            )
-
-            print(f"📋 [Feed Inventory] Using consistent sort order for {len(feed_ingredients)} ingredients")
-
-            self.feed_inventory_table.setRowCount(len(feed_ingredients))
-
-            # Update inventory from manager
-            self.inventory = self.inventory_manager.get_inventory()
-
-            print(f"📦 [Feed Inventory] Processing {len(feed_ingredients)} feed ingredients")
-
-        except Exception as e:
-            print(f"❌ [Feed Inventory] Error in initialization: {e}")
-            # Fallback to basic inventory display with consistent sorting
-            try:
-                feed_formula_ingredients = set(self.feed_formula.keys()) if hasattr(self, 'feed_formula') else set()
-                feed_ingredients = self.inventory_manager.get_sorted_warehouse_ingredients(
-                    "feed", feed_formula_ingredients
-                )
-            except:
-                # Ultimate fallback
-                feed_warehouse_inventory = self.inventory_manager.get_warehouse_inventory("feed")
-                feed_ingredients = sorted(feed_warehouse_inventory.keys())
-
-            self.feed_inventory_table.setRowCount(len(feed_ingredients))
-            self.inventory = self.inventory_manager.get_inventory()
-            feed_analysis = {}
-
-        for i, ingredient in enumerate(feed_ingredients):
-            try:
-                # Get analysis data for this ingredient
-                ingredient_data = feed_analysis.get(ingredient, {})
-                current_amount = ingredient_data.get("current_amount", self.inventory.get(ingredient, 0))
-                daily_usage = ingredient_data.get("daily_usage", 0.0)
-                remaining_days = ingredient_data.get("remaining_days", 999.0)
-                status = ingredient_data.get("status", "good")
-
-                # Ingredient name with icon and status indicator
-                status_icon = {
-                    "critical": "🔴",
-                    "low": "🟡",
-                    "warning": "🟠",
-                    "good": "🟢"
-                }.get(status, "⚪")
-
-                ingredient_item = QTableWidgetItem(f"{status_icon} 🌾 {ingredient}")
-                ingredient_item.setFont(QFont("Arial", 11, QFont.Medium))
-
-                # Enhanced tooltip with usage information
-                tooltip = f"Nguyên liệu: {ingredient}\n"
-                tooltip += f"Tồn kho: {current_amount:.1f} kg\n"
-                tooltip += f"Sử dụng hàng ngày: {daily_usage:.2f} kg\n"
-                tooltip += f"Còn lại: {self.remaining_usage_calculator.format_remaining_days(remaining_days)}\n"
-                tooltip += f"Trạng thái: {status.upper()}"
-                ingredient_item.setToolTip(tooltip)
-
-                self.feed_inventory_table.setItem(i, 0, ingredient_item)
-
-                # Current inventory with color coding based on status
-                inventory_item = QTableWidgetItem(format_number(current_amount))
-                inventory_item.setFont(TABLE_CELL_FONT)
-
-                # Apply status color to inventory amount
-                bg_color, text_color = self.remaining_usage_calculator.get_ingredient_status_color(status)
-                inventory_item.setBackground(QColor(bg_color))
-                inventory_item.setForeground(QColor(text_color))
-
-                self.feed_inventory_table.setItem(i, 1, inventory_item)
-
-                # Bag size
-                bag_size = self.inventory_manager.get_bag_size(ingredient)
-                bag_size_item = QTableWidgetItem(format_number(bag_size))
-                bag_size_item.setFont(TABLE_CELL_FONT)
-                self.feed_inventory_table.setItem(i, 2, bag_size_item)
-
-                # Number of bags
-                bags = self.inventory_manager.calculate_bags(ingredient, current_amount)
-                bags_item = QTableWidgetItem(format_number(bags))
-                bags_item.setFont(TABLE_CELL_FONT)
-                self.feed_inventory_table.setItem(i, 3, bags_item)
-
-                # Days until empty (column 4) - Enhanced with new calculator data
-                if remaining_days == float('inf') or remaining_days >= 999:
-                    days_text = "∞"
-                    days_item = QTableWidgetItem(days_text)
-                    days_item.setBackground(QColor("#f5f5f5"))  # Light gray for infinite
-                    days_item.setForeground(QColor("#666666"))
-                else:
-                    days_text = self.remaining_usage_calculator.format_remaining_days(remaining_days)
-                    days_item = QTableWidgetItem(days_text)
-
-                    # Enhanced color coding based on status
-                    if status == "critical":
-                        days_item.setBackground(QColor("#FFEBEE"))  # Light red
-                        days_item.setForeground(QColor("#C62828"))  # Dark red
-                    elif status == "low":
-                        days_item.setBackground(QColor("#FFF3E0"))  # Light orange
-                        days_item.setForeground(QColor("#F57C00"))  # Dark orange
-                    elif status == "warning":
-                        days_item.setBackground(QColor("#FFFDE7"))  # Light yellow
-                        days_item.setForeground(QColor("#F9A825"))  # Dark yellow
-                    else:  # good
-                        days_item.setBackground(QColor("#E8F5E9"))  # Light green
-                        days_item.setForeground(QColor("#2E7D32"))  # Dark green
-
-                days_item.setFont(TABLE_CELL_FONT)
-                days_item.setTextAlignment(Qt.AlignCenter)
-                self.feed_inventory_table.setItem(i, 4, days_item)
-
-                # Status column (column 5) with enhanced formatting using new status system
-                status_text_map = {
-                    "critical": "KHẨN CẤP",
-                    "low": "SẮP HẾT",
-                    "warning": "CẢNH BÁO",
-                    "good": "ỔN ĐỊNH"
-                }
-
-                status_emoji_map = {
-                    "critical": "🔴",
-                    "low": "🟡",
-                    "warning": "🟠",
-                    "good": "🟢"
-                }
-
-                display_status = status_text_map.get(status, "CHƯA RÕ")
-                status_emoji = status_emoji_map.get(status, "⚪")
-
-                display_text = f"{status_emoji} {display_status}"
-                tooltip_text = f"{ingredient}: {display_status}\n"
-                tooltip_text += f"Tồn kho: {current_amount:.1f} kg\n"
-                tooltip_text += f"Sử dụng/ngày: {daily_usage:.2f} kg\n"
-                tooltip_text += f"Còn lại: {self.remaining_usage_calculator.format_remaining_days(remaining_days)}"
-
-                status_item = QTableWidgetItem(display_text)
-                status_item.setFont(QFont("Arial", 11, QFont.Bold))
-                status_item.setTextAlignment(Qt.AlignCenter)
-                status_item.setToolTip(tooltip_text)
-
-                # Apply enhanced color coding based on status
-                bg_color, text_color = self.remaining_usage_calculator.get_ingredient_status_color(status)
-                status_item.setBackground(QColor(bg_color))
-                status_item.setForeground(QColor(text_color))
-
-                self.feed_inventory_table.setItem(i, 5, status_item)
-
-                # Edit button (column 6)
-                edit_button = self.create_action_button(
-                    "✏️", "#2196F3",
-                    lambda checked, name=ingredient: self.open_edit_item_dialog(name, "feed")
-                )
-                self.feed_inventory_table.setCellWidget(i, 6, edit_button)
-
-                # Delete button (column 7)
-                delete_button = self.create_action_button(
-                    "🗑️", "#F44336",
-                    lambda checked, name=ingredient: self.open_delete_item_dialog(name, "feed")
-                )
-                self.feed_inventory_table.setCellWidget(i, 7, delete_button)
-
-            except Exception as e:
-                print(f"⚠️ [Feed Inventory] Error processing ingredient {ingredient}: {e}")
-                # Create basic row with error indication
-                error_item = QTableWidgetItem(f"❌ {ingredient}")
-                self.feed_inventory_table.setItem(i, 0, error_item)
-                for col in range(1, 8):
-                    error_cell = QTableWidgetItem("Error")
-                    error_cell.setBackground(QColor("#FFEBEE"))
-                    self.feed_inventory_table.setItem(i, col, error_cell)
-
-        # Set row heights for better visibility
-        for row in range(self.feed_inventory_table.rowCount()):
-            self.feed_inventory_table.setRowHeight(row, 45)  # Increased for buttons
-
-        print(f"✅ [Feed Inventory] Updated feed inventory table with {len(feed_ingredients)} ingredients")
+        self.update_inventory_table("feed")
 
     def update_mix_inventory_table(self):
         """Update the mix inventory table with enhanced remaining usage analysis"""
-        try:
-            print("🔄 [Mix Inventory] Starting enhanced inventory table update...")
+        self.update_inventory_table("mix")
 
-            # Get comprehensive usage analysis from the new calculator
-            usage_analysis = self.remaining_usage_calculator.get_comprehensive_usage_analysis(7)
-            mix_analysis = usage_analysis.get("mix", {})
+    def update_inventory_table(self, warehouse_type):
+        """Rebuild the rows of one inventory table model from the shared usage analysis"""
+        label = "Feed Inventory" if warehouse_type == "feed" else "Mix Inventory"
+        formula = self.feed_formula if warehouse_type == "feed" else self.mix_formula
+        try:
+            print(f"🔄 [{label}] Starting enhanced inventory table update...")
 
-            # Get mix warehouse inventory specifically
-            mix_warehouse_inventory = self.inventory_manager.get_warehouse_inventory("mix")
-            mix_formula_ingredients = set(self.mix_formula.keys())
+            # Shared usage analysis, recomputed only after inventory/report/threshold writes
+            usage_analysis = self.remaining_usage_calculator.get_analysis_snapshot(7)
+            warehouse_analysis = usage_analysis.get(warehouse_type, {})
+            self._rendered_analysis_versions[warehouse_type] = usage_analysis.get("version")
 
-            # Get consistently sorted mix ingredients
+            # Get consistently sorted ingredients
             # This ensures the same order every time the app is loaded
-            mix_ingredients = self.inventory_manager.get_sorted_warehouse_ingredients(
-                "mix", mix_formula_ingredients
+            ingredients = self.inventory_manager.get_sorted_warehouse_ingredients(
+                warehouse_type, set(formula.keys())
             )
 
-            print(f"📋 [Mix Inventory] Using consistent sort order for {len(mix_ingredients)} ingredients")
-
-            self.mix_inventory_table.setRowCount(len(mix_ingredients))
+            print(f"📋 [{label}] Using consistent sort order for {len(ingredients)} ingredients")
 
             # Update inventory from manager
             self.inventory = self.inventory_manager.get_inventory()
 
-            print(f"📦 [Mix Inventory] Processing {len(mix_ingredients)} mix ingredients")
+            print(f"📦 [{label}] Processing {len(ingredients)} {warehouse_type} ingredients")
 
         except Exception as e:
-            print(f"❌ [Mix Inventory] Error in initialization: {e}")
+            print(f"❌ [{label}] Error in initialization: {e}")
             # Fallback to basic inventory display with consistent sorting
             try:
-                mix_formula_ingredients = set(self.mix_formula.keys()) if hasattr(self, 'mix_formula') else set()
-                mix_ingredients = self.inventory_manager.get_sorted_warehouse_ingredients(
-                    "mix", mix_formula_ingredients
+                ingredients = self.inventory_manager.get_sorted_warehouse_ingredients(
+                    warehouse_type, set(formula.keys())
                 )
             except:
                 # Ultimate fallback
-                mix_warehouse_inventory = self.inventory_manager.get_warehouse_inventory("mix")
-                mix_ingredients = sorted(mix_warehouse_inventory.keys())
+                ingredients = sorted(self.inventory_manager.get_warehouse_inventory(warehouse_type).keys())
 
-            self.mix_inventory_table.setRowCount(len(mix_ingredients))
             self.inventory = self.inventory_manager.get_inventory()
-            mix_analysis = {}
+            warehouse_analysis = {}
 
-        for i, ingredient in enumerate(mix_ingredients):
+        rows = []
+        for ingredient in ingredients:
             try:
-                # Get analysis data for this ingredient
-                ingredient_data = mix_analysis.get(ingredient, {})
-                current_amount = ingredient_data.get("current_amount", self.inventory.get(ingredient, 0))
-                daily_usage = ingredient_data.get("daily_usage", 0.0)
-                remaining_days = ingredient_data.get("remaining_days", 999.0)
-                status = ingredient_data.get("status", "good")
-
-                # Ingredient name with icon and status indicator
-                status_icon = {
-                    "critical": "🔴",
-                    "low": "🟡",
-                    "warning": "🟠",
-                    "good": "🟢"
-                }.get(status, "⚪")
-
-                ingredient_item = QTableWidgetItem(f"{status_icon} 🧪 {ingredient}")
-                ingredient_item.setFont(QFont("Arial", 11, QFont.Medium))
-
-                # Enhanced tooltip with usage information
-                tooltip = f"Nguyên liệu mix: {ingredient}\n"
-                tooltip += f"Tồn kho: {current_amount:.1f} kg\n"
-                tooltip += f"Sử dụng hàng ngày: {daily_usage:.2f} kg\n"
-                tooltip += f"Còn lại: {self.remaining_usage_calculator.format_remaining_days(remaining_days)}\n"
-                tooltip += f"Trạng thái: {status.upper()}"
-                ingredient_item.setToolTip(tooltip)
-
-                self.mix_inventory_table.setItem(i, 0, ingredient_item)
-
-                # Current inventory with color coding based on status
-                inventory_item = QTableWidgetItem(format_number(current_amount))
-                inventory_item.setFont(TABLE_CELL_FONT)
-
-                # Apply status color to inventory amount
-                bg_color, text_color = self.remaining_usage_calculator.get_ingredient_status_color(status)
-                inventory_item.setBackground(QColor(bg_color))
-                inventory_item.setForeground(QColor(text_color))
-
-                self.mix_inventory_table.setItem(i, 1, inventory_item)
-
-                # Bag size
-                bag_size = self.inventory_manager.get_bag_size(ingredient)
-                bag_size_item = QTableWidgetItem(format_number(bag_size))
-                bag_size_item.setFont(TABLE_CELL_FONT)
-                self.mix_inventory_table.setItem(i, 2, bag_size_item)
-
-                # Number of bags
-                bags = self.inventory_manager.calculate_bags(ingredient, current_amount)
-                bags_item = QTableWidgetItem(format_number(bags))
-                bags_item.setFont(TABLE_CELL_FONT)
-                self.mix_inventory_table.setItem(i, 3, bags_item)
-
-                # Days until empty (column 4) - Enhanced with new calculator data
-                if remaining_days == float('inf') or remaining_days >= 999:
-                    days_text = "∞"
-                    days_item = QTableWidgetItem(days_text)
-                    days_item.setBackground(QColor("#f5f5f5"))  # Light gray for infinite
-                    days_item.setForeground(QColor("#666666"))
-                else:
-                    days_text = self.remaining_usage_calculator.format_remaining_days(remaining_days)
-                    days_item = QTableWidgetItem(days_text)
-
-                    # Enhanced color coding based on status
-                    if status == "critical":
-                        days_item.setBackground(QColor("#FFEBEE"))  # Light red
-                        days_item.setForeground(QColor("#C62828"))  # Dark red
-                    elif status == "low":
-                        days_item.setBackground(QColor("#FFF3E0"))  # Light orange
-                        days_item.setForeground(QColor("#F57C00"))  # Dark orange
-                    elif status == "warning":
-                        days_item.setBackground(QColor("#FFFDE7"))  # Light yellow
-                        days_item.setForeground(QColor("#F9A825"))  # Dark yellow
-                    else:  # good
-                        days_item.setBackground(QColor("#E8F5E9"))  # Light green
-                        days_item.setForeground(QColor("#2E7D32"))  # Dark green
-
-                days_item.setFont(TABLE_CELL_FONT)
-                days_item.setTextAlignment(Qt.AlignCenter)
-                self.mix_inventory_table.setItem(i, 4, days_item)
-
-                # Status column (column 5) with enhanced formatting using new status system
-                status_text_map = {
-                    "critical": "KHẨN CẤP",
-                    "low": "SẮP HẾT",
-                    "warning": "CẢNH BÁO",
-                    "good": "ỔN ĐỊNH"
-                }
-
-                status_emoji_map = {
-                    "critical": "🔴",
-                    "low": "🟡",
-                    "warning": "🟠",
-                    "good": "🟢"
-                }
-
-                display_status = status_text_map.get(status, "CHƯA RÕ")
-                status_emoji = status_emoji_map.get(status, "⚪")
-
-                display_text = f"{status_emoji} {display_status}"
-                tooltip_text = f"{ingredient}: {display_status}\n"
-                tooltip_text += f"Tồn kho: {current_amount:.1f} kg\n"
-                tooltip_text += f"Sử dụng/ngày: {daily_usage:.2f} kg\n"
-                tooltip_text += f"Còn lại: {self.remaining_usage_calculator.format_remaining_days(remaining_days)}"
-
-                status_item = QTableWidgetItem(display_text)
-                status_item.setFont(QFont("Arial", 11, QFont.Bold))
-                status_item.setTextAlignment(Qt.AlignCenter)
-                status_item.setToolTip(tooltip_text)
-
-                # Apply enhanced color coding based on status
-                bg_color, text_color = self.remaining_usage_calculator.get_ingredient_status_color(status)
-                status_item.setBackground(QColor(bg_color))
-                status_item.setForeground(QColor(text_color))
+                rows.append(self.build_inventory_row(ingredient, warehouse_analysis.get(ingredient, {})))
+            except Exception as e:
+                print(f"⚠️ [{label}] Error processing ingredient {ingredient}: {e}")
+                # Basic row with error indication
+                rows.append(InventoryTableModel.error_row(ingredient))
+
+        self.inventory_models[warehouse_type].set_rows(rows)
+        print(f"✅ [{label}] Updated {warehouse_type} inventory table with {len(ingredients)} ingredients")
+
+    def build_inventory_row(self, ingredient, ingredient_data):
+        """Compact inventory table row for one ingredient (formatting happens in the model)"""
+        current_amount = ingredient_data.get("current_amount", self.inventory.get(ingredient, 0))
+        remaining_days = ingredient_data.get("remaining_days", 999.0)
+        status = ingredient_data.get("status", "good")
+
+        # Monte Carlo stock-out probabilities within 1/3/7 days
+        probability = ingredient_data.get("stockout_7d")
+        stockout = None if probability is None else tuple(
+            ingredient_data.get(f"stockout_{horizon}d") or 0.0 for horizon in (1, 3, 7)
+        )
+        _, color_info = self.threshold_manager.get_status_by_stockout(probability, ingredient)
+
+        return (
+            ingredient,
+            current_amount,
+            self.inventory_manager.get_bag_size(ingredient),
+            self.inventory_manager.calculate_bags(ingredient, current_amount),
+            ingredient_data.get("daily_usage", 0.0),
+            remaining_days,
+            self.remaining_usage_calculator.format_remaining_days(remaining_days),
+            status,
+            self.remaining_usage_calculator.get_ingredient_status_color(status),
+            stockout,
+            self.threshold_manager.get_color_for_status(color_info)
+        )
 
-                self.mix_inventory_table.setItem(i, 5, status_item)
+    def setup_inventory_action_delegates(self, table, warehouse_type):
+        """Paint the edit/delete columns as buttons and open the matching dialogs on click"""
+        proxy = self.inventory_proxies[warehouse_type]
 
-                # Edit button (column 6)
-                edit_button = self.create_action_button(
-                    "✏️", "#2196F3",
-                    lambda checked, name=ingredient: self.open_edit_item_dialog(name, "mix")
-                )
-                self.mix_inventory_table.setCellWidget(i, 6, edit_button)
+        def ingredient_at(index):
+            return proxy.row_at(index.row())[InventoryTableModel.INGREDIENT]
 
-                # Delete button (column 7)
-                delete_button = self.create_action_button(
-                    "🗑️", "#F44336",
-                    lambda checked, name=ingredient: self.open_delete_item_dialog(name, "mix")
-                )
-                self.mix_inventory_table.setCellWidget(i, 7, delete_button)
+        edit_delegate = ButtonDelegate("#2196F3", table)
+        edit_delegate.clicked.connect(
+            lambda index: self.open_edit_item_dialog(ingredient_at(index), warehouse_type))
+        table.setItemDelegateForColumn(7, edit_delegate)
 
-            except Exception as e:
-                print(f"⚠️ [Mix Inventory] Error processing ingredient {ingredient}: {e}")
-                # Create basic row with error indication
-                error_item = QTableWidgetItem(f"❌ {ingredient}")
-                self.mix_inventory_table.setItem(i, 0, error_item)
-                for col in range(1, 8):
-                    error_cell = QTableWidgetItem("Error")
-                    error_cell.setBackground(QColor("#FFEBEE"))
-                    self.mix_inventory_table.setItem(i, col, error_cell)
-
-        # Set row heights for better visibility
-        for row in range(self.mix_inventory_table.rowCount()):
-            self.mix_inventory_table.setRowHeight(row, 45)  # Increased for buttons
-
-        print(f"✅ [Mix Inventory] Updated mix inventory table with {len(mix_ingredients)} ingredients")
+        delete_delegate = ButtonDelegate("#F44336", table)
+        delete_delegate.clicked.connect(
+            lambda index: self.open_delete_item_dialog(ingredient_at(index), warehouse_type))
+        table.setItemDelegateForColumn(8, delete_delegate)
 
     def calculate_feed_usage(self):
         """Calculate feed usage based on input values"""
         # Reset dữ liệu tích lũy từ lần tính toán trước để tránh cộng dồn
         self.cell_formula_data = {}
 
-        # Collect data from table
-        formula_batches = {}  # Dictionary to store formula name and total batches
-        farm_formula_batches = {}  # Dictionary to store formula name and batches for each farm
-
-        # Dictionary để lưu thông tin công thức mix cho từng cell
-        cell_mix_data = {}
-
-        # Dictionary để lưu tổng số mẻ theo khu
-        total_batches_by_area = {}  # Khu -> số mẻ
-        total_batches = 0  # Tổng số mẻ
+        # Các ô có số mẻ và công thức cám, đầu vào cho engine tính toán
+        cells = []
 
         # Dictionary để lưu thông tin công thức và thành phần
         self.formula_ingredients = {}
 
         # Duyệt qua từng cột (farm)
-        for col in range(self.feed_table.columnCount()):
+        model = self.feed_entry_model
+        for col in range(model.columnCount()):
             # Lấy tên khu và trại
-            khu_item = self.feed_table.item(0, col)
-            farm_item = self.feed_table.item(1, col)
-
-            if not khu_item or not farm_item:
-                continue
-
-            khu_name = khu_item.text()
-            farm_name = farm_item.text()
-            farm_key = f"{khu_name} - {farm_name}"
+            khu_name, farm_name = model.column_key(col)
 
             # Duyệt qua các ca (sáng/chiều)
             for shift_idx, shift in enumerate(SHIFTS):
-                # Lấy container từ cell
-                container = self.feed_table.cellWidget(shift_idx + 2, col)
-
-                if not container:
-                    continue
-
-                # Lấy giá trị từ spin_box và formula_combo
-                spin_box = container.spin_box
-                formula_combo = container.formula_combo
-
-                if not spin_box or not formula_combo:
-                    continue
-
-                batch_value = spin_box.value()
-                formula_name = formula_combo.currentText()
+                batch_value = model.value(col, shift_idx)
+                formula_name = model.formula(col, shift_idx)
 
                 # Nếu không có giá trị hoặc không chọn công thức, bỏ qua
                 if batch_value <= 0 or not formula_name:
                     continue
 
-                # Chuyển đổi batch_value: 0.5 = 1 mẻ, 1 = 2 mẻ, 1.5 = 3 mẻ, v.v.
-                actual_batches = batch_value
-                formula_batch_value = batch_value  # Giữ giá trị gốc để tính toán công thức
-
-                # Chuyển đổi số mẻ theo quy tắc: 0.5 = 1 mẻ, 1 = 2 mẻ
-                if batch_value > 0:
-                    actual_batches = batch_value * 2  # Số mẻ thực tế = giá trị hiển thị * 2
-
-                # Cập nhật tổng số mẻ theo khu
-                if khu_name not in total_batches_by_area:
-                    total_batches_by_area[khu_name] = 0
-                total_batches_by_area[khu_name] += actual_batches
-                total_batches += actual_batches
-
-                # Cộng dồn số mẻ cho công thức này
-                if formula_name in formula_batches:
-                    formula_batches[formula_name] += formula_batch_value
-                else:
-                    formula_batches[formula_name] = formula_batch_value
-
-                # Lưu thông tin cho từng farm
-                if farm_key not in farm_formula_batches:
-                    farm_formula_batches[farm_key] = {}
-
-                if formula_name in farm_formula_batches[farm_key]:
-                    farm_formula_batches[farm_key][formula_name] += formula_batch_value
-                else:
-                    farm_formula_batches[farm_key][formula_name] = formula_batch_value
-
-                # Lưu thông tin chi tiết về mỗi ô để có thể áp dụng công thức mix riêng
+                # Xác định công thức mix cho cell này: riêng của ô, theo cột, rồi theo khu
                 cell_key = f"{khu_name}_{farm_name}_{shift}"
-                if not hasattr(self, 'cell_formula_data'):
-                    self.cell_formula_data = {}
-
-                # Xác định công thức mix cho cell này
-                mix_formula_name = None
-
-                # 1. Kiểm tra xem ô này có công thức mix riêng không
-                if hasattr(self, 'cell_mix_formulas') and self.cell_mix_formulas and cell_key in self.cell_mix_formulas:
-                    mix_formula_name = self.cell_mix_formulas[cell_key]
-
-                # 2. Nếu không, kiểm tra xem cột này có công thức mix không
-                if not mix_formula_name and hasattr(self, 'column_mix_formulas') and self.column_mix_formulas:
-                    col_str = f"{col}"
-                    if col_str in self.column_mix_formulas:
-                        mix_formula_name = self.column_mix_formulas[col_str]
-
-                # 3. Nếu không, kiểm tra xem khu này có công thức mix không
-                if not mix_formula_name and hasattr(self, 'area_mix_formulas') and self.area_mix_formulas and khu_name in self.area_mix_formulas:
-                    mix_formula_name = self.area_mix_formulas[khu_name]
+                mix_formula_name = self.feed_usage_engine.resolve_mix_formula(
+                    cell_key, col, khu_name,
+                    getattr(self, 'cell_mix_formulas', None),
+                    getattr(self, 'column_mix_formulas', None),
+                    getattr(self, 'area_mix_formulas', None)
+                )
 
+                # Chuyển đổi số mẻ theo quy tắc: 0.5 = 1 mẻ, 1 = 2 mẻ
                 self.cell_formula_data[cell_key] = {
                     "feed_formula": formula_name,
                     "batch_value": batch_value,
-                    "actual_batches": actual_batches,
+                    "actual_batches": batch_value * 2,
                     "khu": khu_name,
                     "farm": farm_name,
                     "shift": shift,
                     "mix_formula": mix_formula_name
                 }
-
-                # Lưu thông tin mix formula cho cell này
-                if mix_formula_name:
-                    cell_mix_data[cell_key] = mix_formula_name
+                cells.append(self.cell_formula_data[cell_key])
 
         # Nếu không có dữ liệu, hiển thị thông báo và thoát
-        if not formula_batches:
+        if not cells:
             QMessageBox.warning(self, "Cảnh báo", "Không có dữ liệu để báo cáo!")
             return
 
-        # Dictionary để lưu tổng thành phần cám
-        feed_ingredients = {}
-
-        # Dictionary để lưu tổng thành phần mix
-        mix_ingredients = {}
-
-        # Dictionary để lưu thông tin về công thức mix được sử dụng
-        mix_formulas_used = {}
-
-        # Không sử dụng nguyên liệu tổ hợp nữa
-
         # Kiểm tra xem có báo cáo đang được tải lại không
         is_loading_report = hasattr(self, 'loading_report') and self.loading_report
 
@@ -4968,121 +4917,27 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
         # Không tự động hiển thị dialog chọn công thức mix - để người dùng chọn thủ công
 
-        # Trước tiên, tính toán tổng thành phần cám (không bao gồm mix)
-        for formula_name, batch_count in formula_batches.items():
-            if not formula_name:
-                continue
-
-            # Lấy công thức cám
-            feed_formula = self.formula_manager.load_feed_preset(formula_name)
-            if not feed_formula:
-                continue
-
-            # Tính toán thành phần cám
-            for ingredient, amount_per_batch in feed_formula.items():
-                    # Áp dụng quy tắc 0.5 = 1 mẻ, 1 = 2 mẻ
-                    # batch_count là số hiển thị trên giao diện, cần nhân 2 để tính đúng số mẻ thực tế
-                    feed_amount = amount_per_batch * batch_count * 2
+        # Tính tổng thành phần cám và mix bằng ma trận preset (không phụ thuộc bảng)
+        result = self.feed_usage_engine.calculate(cells)
+        feed_ingredients = result["feed_ingredients"]
+        mix_ingredients = result["mix_ingredients"]
+        total_mix = result["total_mix"]
+        total_feed = result["total_feed"]
 
-                    # Cộng dồn vào tổng thành phần cám
-                    if ingredient in feed_ingredients:
-                        feed_ingredients[ingredient] += feed_amount
-                    else:
-                        feed_ingredients[ingredient] = feed_amount
-
-            # Lưu thông tin công thức và thành phần cho hiển thị chi tiết nếu cần
+        # Lưu thông tin công thức và thành phần cho hiển thị chi tiết nếu cần
+        for formula_name, batch_count in result["formula_batches"].items():
             self.formula_ingredients[formula_name] = {
                 "batches": batch_count
             }
 
-        # Tính toán thành phần mix dựa trên số mẻ thực tế
-        print(f"Tính toán mix từ các công thức đã chọn cho từng ô")
-
-        # Duyệt qua từng ô đã có dữ liệu
-        for cell_key, cell_data in self.cell_formula_data.items():
-            batch_value = cell_data["batch_value"]
-            actual_batches = cell_data["actual_batches"]
-            mix_formula_name = cell_data.get("mix_formula")
-
-            if not mix_formula_name:
-                continue
-
-            # Lấy công thức mix
-            mix_formula = self.formula_manager.load_mix_preset(mix_formula_name)
-            if not mix_formula:
-                continue
-
-            # Lưu thông tin công thức mix được sử dụng
-            if mix_formula_name not in mix_formulas_used:
-                mix_formulas_used[mix_formula_name] = {
-                    "formula": mix_formula,
-                    "batch_value": 0
-                }
-
-            # Cộng dồn số mẻ
-            mix_formulas_used[mix_formula_name]["batch_value"] += batch_value
-
-        # Tính toán thành phần mix từ các công thức mix đã sử dụng
-        print(f"Tính toán từ {len(mix_formulas_used)} công thức mix")
-
-        for mix_name, mix_data in mix_formulas_used.items():
-            mix_formula = mix_data["formula"]
-            batch_value = mix_data["batch_value"]
-
-            # Áp dụng quy tắc 0.5 = 1 mẻ, 1 = 2 mẻ
-            actual_batches = batch_value * 2
-
-            print(f"Công thức mix '{mix_name}': {batch_value} mẻ (thực tế {actual_batches} mẻ)")
-
-            # Tính lượng từng thành phần mix
-            for ingredient, amount_per_batch in mix_formula.items():
-                # Lấy giá trị từ cột '1 mẻ (kg)' thay vì cột '10 mẻ (kg)'
-                # amount_per_batch là giá trị cho 10 mẻ, chia 10 để có giá trị cho 1 mẻ
-                one_batch_amount = amount_per_batch / 10
-
-                # Tính lượng thành phần theo số mẻ thực tế
-                mix_amount = one_batch_amount * actual_batches
-
-                print(f"  {ingredient}: {one_batch_amount} x {actual_batches} = {mix_amount:.2f} kg")
-
-                # Cộng dồn vào kết quả
-                if ingredient in mix_ingredients:
-                    mix_ingredients[ingredient] += mix_amount
-                    print(f"    Cộng dồn: {ingredient} = {mix_ingredients[ingredient]:.2f} kg")
-                else:
-                    mix_ingredients[ingredient] = mix_amount
-                    print(f"    Thêm mới: {ingredient} = {mix_amount:.2f} kg")
-
-        # Tính tổng lượng mix trước
-        total_mix = sum(mix_ingredients.values()) if mix_ingredients else 0
-
-        # Đảm bảo thành phần "Nguyên liệu tổ hợp" trong cám trùng với tổng mix
-        if "Nguyên liệu tổ hợp" in feed_ingredients:
-            # Nếu có thành phần "Nguyên liệu tổ hợp" thì cập nhật giá trị bằng tổng mix
-            if total_mix > 0:
-                feed_ingredients["Nguyên liệu tổ hợp"] = total_mix
-
-        # Tính tổng lượng cám (BAO GỒM cả "Nguyên liệu tổ hợp")
-        total_feed = sum(feed_ingredients.values()) if feed_ingredients else 0
-
-        # Validation: total_feed phải bằng (individual feed ingredients) + total_mix
-        individual_feed_total = 0
-        for ingredient, amount in feed_ingredients.items():
-            if ingredient != "Nguyên liệu tổ hợp":  # Chỉ tính các nguyên liệu cám thuần
-                individual_feed_total += amount
-
-        expected_total_feed = individual_feed_total + total_mix
-        if abs(total_feed - expected_total_feed) > 0.1:  # Tolerance 0.1 kg
-            print(f"CẢNH BÁO: Sai lệch tính toán! total_feed={total_feed:.2f}, expected={expected_total_feed:.2f}")
-
-        print(f"Tính toán hoàn tất - Total feed: {format_total(total_feed)} kg (bao gồm {individual_feed_total:.2f} kg cám + {format_total(total_mix)} kg mix)")
+        print(f"Tính toán hoàn tất - Total feed: {format_total(total_feed)} kg (bao gồm {total_feed - feed_ingredients.get('Nguyên liệu tổ hợp', 0):.2f} kg cám + {format_total(total_mix)} kg mix), {len(result['mix_formulas_used'])} công thức mix")
 
         # Lưu kết quả tính toán vào biến thành viên để sử dụng khi lưu báo cáo
         self.feed_ingredients = feed_ingredients
         self.mix_ingredients = mix_ingredients
-        self.mix_formulas_used = mix_formulas_used
-        self.total_batches = total_batches
-        self.total_batches_by_area = total_batches_by_area
+        self.mix_formulas_used = result["mix_formulas_used"]
+        self.total_batches = result["total_batches"]
+        self.total_batches_by_area = result["total_batches_by_area"]
         self.total_tong_hop = total_mix  # Lưu tổng mix để sử dụng sau này
 
         # Cập nhật bảng kết quả
@@ -5278,11 +5133,8 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             for col, formula in self.column_mix_formulas.items():
                 col_index = int(col)
                 # Lấy thông tin khu và farm
-                khu_item = self.feed_table.item(0, col_index)
-                farm_item = self.feed_table.item(1, col_index)
-                if khu_item and farm_item:
-                    khu_name = khu_item.text()
-                    farm_name = farm_item.text()
+                if 0 <= col_index < self.feed_entry_model.columnCount():
+                    khu_name, farm_name = self.feed_entry_model.column_key(col_index)
                     mix_info += f"- {khu_name}, {farm_name}: {formula}\n"
                     count += 1
                     if count >= 10:
@@ -5308,7 +5160,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
                 self.column_mix_formulas = {}
 
             # Lưu công thức cho mỗi cột
-            col_count = self.feed_table.columnCount()
+            col_count = self.feed_entry_model.columnCount()
             for col in range(col_count):
                 col_key = f"{col}"
                 self.column_mix_formulas[col_key] = mix_formula
@@ -5330,16 +5182,11 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
     def update_inventory(self, inventory_type):
         """Update inventory amounts"""
-        table = self.feed_inventory_table if inventory_type == "feed" else self.mix_inventory_table
-        updates = {}
-
-        for row in range(table.rowCount()):
-            ingredient = table.item(row, 0).text()
-            try:
-                new_amount = float(table.item(row, 1).text())
-                updates[ingredient] = new_amount
-            except (ValueError, AttributeError):
-                pass
+        model = self.inventory_models[inventory_type]
+        updates = {
+            row[InventoryTableModel.INGREDIENT]: row[InventoryTableModel.AMOUNT]
+            for row in model.rows() if row[InventoryTableModel.STATUS] != InventoryTableModel.ERROR
+        }
 
         # Update inventory using manager
         self.inventory_manager.update_multiple(updates)
@@ -5539,31 +5386,8 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
             report_file = str(persistent_path_manager.reports_path / f"report_{date_str}.json")
 
-            # Thu thập dữ liệu lượng cám
-            feed_usage = {}
-            formula_usage = {}
-
-            col_index = 0  # Bắt đầu từ cột 0 vì đã bỏ cột nhãn
-            for khu_idx, farms in FARMS.items():
-                khu_name = f"Khu {khu_idx + 1}"
-                feed_usage[khu_name] = {}
-                formula_usage[khu_name] = {}
-
-                for farm in farms:
-                    feed_usage[khu_name][farm] = {}
-                    formula_usage[khu_name][farm] = {}
-
-                    for shift_idx, shift in enumerate(SHIFTS):
-                        cell_widget = self.feed_table.cellWidget(shift_idx + 2, col_index)
-                        if cell_widget:
-                            spin_box = cell_widget.spin_box
-                            formula_combo = cell_widget.formula_combo
-
-                            # Lưu giá trị và công thức
-                            feed_usage[khu_name][farm][shift] = spin_box.value()
-                            formula_usage[khu_name][farm][shift] = formula_combo.currentText()
-
-                    col_index += 1
+            # Thu thập dữ liệu lượng cám và công thức theo khu/trại/ca
+            feed_usage, formula_usage = self.feed_entry_model.usage()
 
             # Lấy ngày hiển thị từ UI để lưu vào báo cáo
             display_date = ""
@@ -5618,6 +5442,9 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             with open(report_file, 'w', encoding='utf-8') as f:
                 json.dump(report_data, f, ensure_ascii=False, indent=4)
 
+            # Cập nhật chỉ mục báo cáo để tab lịch sử không phải đọc lại file
+            report_index.record_report(report_file, report_data)
+
             QMessageBox.information(self, "Thành công", f"Đã lưu báo cáo vào {report_file} và đã cập nhật tồn kho")
 
             # Cập nhật danh sách báo cáo trong tab lịch sử
@@ -5673,22 +5500,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
                 # Calculate total for each shift in this khu
                 for shift_idx, shift in enumerate(SHIFTS):
-                    total = 0
-                    farms = FARMS.get(khu_idx, [])
-
-                    # If this khu has farms, sum up their values
-                    if farms:
-                        col_start = 0 # Bắt đầu từ cột 0 vì đã bỏ cột nhãn
-                        for prev_khu_idx in range(khu_idx):
-                            col_start += len(FARMS.get(prev_khu_idx, []))
-
-                        for farm_idx in range(len(farms)):
-                            col = col_start + farm_idx
-                            spin_box = self.feed_table.cellWidget(shift_idx + 2, col)
-                            if spin_box:
-                                total += spin_box.value()
-
-                    row_data[shift] = total
+                    row_data[shift] = self.feed_entry_model.area_total(khu_idx, shift_idx)
 
                 khu_data.append(row_data)
 
@@ -5704,9 +5516,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
                     row_data = {"Khu": khu_name, "Trại": farm}
 
                     for shift_idx, shift in enumerate(SHIFTS):
-                        spin_box = self.feed_table.cellWidget(shift_idx + 2, col_index)
-                        if spin_box:
-                            row_data[shift] = spin_box.value()
+                        row_data[shift] = self.feed_entry_model.value(col_index, shift_idx)
 
                     farm_data.append(row_data)
                     col_index += 1
@@ -6366,22 +6176,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
                 # Calculate total for each shift in this khu
                 for shift_idx, shift in enumerate(SHIFTS):
-                    total = 0
-                    farms = FARMS.get(khu_idx, [])
-
-                    # If this khu has farms, sum up their values
-                    if farms:
-                        col_start = 0 # Bắt đầu từ cột 0 vì đã bỏ cột nhãn
-                        for prev_khu_idx in range(khu_idx):
-                            col_start += len(FARMS.get(prev_khu_idx, []))
-
-                        for farm_idx in range(len(farms)):
-                            col = col_start + farm_idx
-                            spin_box = self.feed_table.cellWidget(shift_idx + 2, col)
-                            if spin_box:
-                                total += spin_box.value()
-
-                    row_data[shift] = total
+                    row_data[shift] = self.feed_entry_model.area_total(khu_idx, shift_idx)
 
                 khu_data.append(row_data)
 
@@ -6397,9 +6192,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
                     row_data = {"Khu": khu_name, "Trại": farm}
 
                     for shift_idx, shift in enumerate(SHIFTS):
-                        spin_box = self.feed_table.cellWidget(shift_idx + 2, col_index)
-                        if spin_box:
-                            row_data[shift] = spin_box.value()
+                        row_data[shift] = self.feed_entry_model.value(col_index, shift_idx)
 
                     farm_data.append(row_data)
                     col_index += 1
@@ -6633,97 +6426,29 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             # Chỉ cập nhật default formula khi user chọn báo cáo, không phải khi auto-load
             if update_default_formula and "default_formula" in report_data and report_data["default_formula"]:
                 default_formula = report_data["default_formula"]
-                print(f"[DEBUG] Updating default formula from report: '{default_formula}' (update_default_formula={update_default_formula})")
-                # Cập nhật UI và lưu vào cấu hình
-                self.default_formula_combo.setCurrentText(default_formula)
-                self.formula_manager.save_default_feed_formula(default_formula)
-                print(f"[SUCCESS] Default formula updated and saved: '{default_formula}'")
-            elif "default_formula" in report_data and report_data["default_formula"]:
-                print(f"[DEBUG] Skipping default formula update from report: '{report_data['default_formula']}' (update_default_formula={update_default_formula})")
-
-            # Xóa dữ liệu hiện tại trong bảng
-            for col in range(self.feed_table.columnCount()):
-                for row in range(2, 2 + len(SHIFTS)):
-                    cell_widget = self.feed_table.cellWidget(row, col)
-                    if cell_widget and hasattr(cell_widget, 'spin_box'):
-                        cell_widget.spin_box.setValue(0)
-                    if cell_widget and hasattr(cell_widget, 'formula_combo'):
-                        cell_widget.formula_combo.setCurrentText("")
-
-            # Xóa dữ liệu công thức mix cho từng ô
-            if hasattr(self, 'cell_mix_formulas'):
-                self.cell_mix_formulas = {}
-
-            # Tải thông tin công thức mix cho từng ô từ báo cáo
-            if "cell_mix_formulas" in report_data:
-                self.cell_mix_formulas = report_data["cell_mix_formulas"]
-
-            # Điền dữ liệu từ báo cáo vào bảng
-            col_index = 0
-            for khu_idx, farms in FARMS.items():
-                khu_name = f"Khu {khu_idx + 1}"
-
-                for farm in farms:
-                    # Kiểm tra xem có dữ liệu cho khu và trại này không
-                    if khu_name in feed_usage and farm in feed_usage[khu_name]:
-                        farm_data = feed_usage[khu_name][farm]
-
-                        # Kiểm tra xem có dữ liệu công thức không
-                        has_formula_data = (formula_usage and
-                                          khu_name in formula_usage and
-                                          farm in formula_usage[khu_name])
-
-                        for shift_idx, shift in enumerate(SHIFTS):
-                            if shift in farm_data:
-                                # Lấy giá trị và công thức
-                                value = farm_data[shift]
-                                formula = ""
+                print(f"[DEBUG] Updating default formula from report: '{default_formula}' (update_default_formula={update_default_formula})")
+                # Cập nhật UI và lưu vào cấu hình
+                self.default_formula_combo.setCurrentText(default_formula)
+                self.formula_manager.save_default_feed_formula(default_formula)
+                print(f"[SUCCESS] Default formula updated and saved: '{default_formula}'")
+            elif "default_formula" in report_data and report_data["default_formula"]:
+                print(f"[DEBUG] Skipping default formula update from report: '{report_data['default_formula']}' (update_default_formula={update_default_formula})")
 
-                                if has_formula_data and shift in formula_usage[khu_name][farm]:
-                                    formula = formula_usage[khu_name][farm][shift]
-                                    print(f"Đã tìm thấy công thức {formula} cho {khu_name}, {farm}, {shift}")
-
-                                # Cập nhật giá trị vào bảng
-                                cell_widget = self.feed_table.cellWidget(shift_idx + 2, col_index)
-                                if cell_widget:
-                                    if hasattr(cell_widget, 'spin_box'):
-                                        cell_widget.spin_box.setValue(value)
-                                    if hasattr(cell_widget, 'formula_combo') and formula:
-                                        cell_widget.formula_combo.setCurrentText(formula)
-                                        # Cập nhật hiển thị công thức với logic chính xác
-                                        if hasattr(cell_widget, 'formula_label'):
-                                            # Lấy default formula từ formula manager để đảm bảo chính xác
-                                            default_formula_from_combo = self.default_formula_combo.currentText()
-                                            default_formula_from_manager = self.formula_manager.get_default_feed_formula()
-
-                                            # Ưu tiên sử dụng từ manager nếu combo chưa được update
-                                            default_formula = default_formula_from_combo if default_formula_from_combo else default_formula_from_manager
-
-                                            # Chỉ hiển thị label nếu công thức KHÁC với công thức mặc định
-                                            if formula and formula != default_formula:
-                                                cell_widget.formula_label.setText(formula)
-                                                cell_widget.formula_label.setVisible(True)
-                                                cell_widget.layout().setStretch(0, 60)
-                                                cell_widget.layout().setStretch(1, 40)
-                                            else:
-                                                # Ẩn label cho công thức mặc định hoặc công thức trống
-                                                cell_widget.formula_label.setText("")
-                                                cell_widget.formula_label.setVisible(False)
-                                                cell_widget.layout().setStretch(0, 100)
-                                                cell_widget.layout().setStretch(1, 0)
-                    col_index += 1
+            # Xóa dữ liệu công thức mix cho từng ô
+            if hasattr(self, 'cell_mix_formulas'):
+                self.cell_mix_formulas = {}
 
-            # Cập nhật hiển thị toàn bộ bảng sau khi điền dữ liệu
-            # Sử dụng delay để đảm bảo tất cả formula labels đã được thiết lập đúng trong quá trình loading
-            print("[DEBUG] Data loading completed, scheduling display update...")
+            # Tải thông tin công thức mix cho từng ô từ báo cáo
+            if "cell_mix_formulas" in report_data:
+                self.cell_mix_formulas = report_data["cell_mix_formulas"]
 
-            # Kết thúc quá trình loading và schedule update
-            def finish_loading():
-                self.data_loading_in_progress = False
-                print("[DEBUG] Data loading finished, updating display...")
-                self.update_feed_table_display()
+            # Điền dữ liệu từ báo cáo vào bảng trong một lần cập nhật mô hình
+            self.load_feed_entry_data(feed_usage, formula_usage)
 
-            QTimer.singleShot(200, finish_loading)
+            # Cập nhật hiển thị toàn bộ bảng sau khi điền dữ liệu
+            self.data_loading_in_progress = False
+            print("[DEBUG] Data loading finished, updating display...")
+            self.update_feed_table_display()
 
             QMessageBox.information(self, "Thành công", f"Đã điền bảng cám theo dữ liệu ngày {date_text}")
 
@@ -6736,15 +6461,29 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             self.data_loading_in_progress = False
             print("[DEBUG] Data loading flag reset")
 
+    def load_feed_entry_data(self, feed_usage, formula_usage):
+        """Nạp số mẻ và công thức của báo cáo vào bảng cám
+
+        Công thức không còn trong danh sách công thức cám (hoặc không được ghi) được thay bằng
+        công thức mặc định cho các ô có số mẻ.
+        """
+        feed_presets = set(self.formula_manager.get_feed_presets())
+        known_formulas = {
+            khu_name: {
+                farm: {shift: formula for shift, formula in shifts.items() if formula in feed_presets}
+                for farm, shifts in farms.items()
+            }
+            for khu_name, farms in (formula_usage or {}).items()
+        }
+        self.feed_entry_model.load(feed_usage, known_formulas, self.default_formula_combo.currentText())
+
     def fill_table_from_custom_date(self, date_text):
         """Điền bảng cám với ngày tự chọn"""
         try:
             # Kiểm tra xem đã có báo cáo cho ngày này chưa
-            report_exists = False
-            for i in range(self.history_date_combo.count()):
-                if self.history_date_combo.itemText(i) == date_text:
-                    report_exists = True
-                    break
+            available_dates = report_index.get_available_dates()
+            day, month, year = date_text.split('/')
+            report_exists = f"{year}{month.zfill(2)}{day.zfill(2)}" in available_dates
 
             if report_exists:
                 reply = QMessageBox.question(
@@ -6762,21 +6501,15 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
                     return
 
             # Xóa dữ liệu hiện tại trong bảng
-            for col in range(self.feed_table.columnCount()):
-                for row in range(2, 2 + len(SHIFTS)):
-                    cell_widget = self.feed_table.cellWidget(row, col)
-                    if cell_widget and hasattr(cell_widget, 'spin_box'):
-                        cell_widget.spin_box.setValue(0)
-                    if cell_widget and hasattr(cell_widget, 'formula_combo'):
-                        cell_widget.formula_combo.setCurrentText("")
+            self.feed_entry_model.clear()
 
             # Thử tìm báo cáo gần nhất để lấy công thức mặc định
             default_formula = ""
             try:
                 # Lấy báo cáo mới nhất nếu có
-                if self.history_date_combo.count() > 0 and self.history_date_combo.currentText() != "Không có dữ liệu":
-                    latest_date = self.history_date_combo.itemText(0)
-                    latest_report = self.load_report_data(latest_date)
+                if available_dates:
+                    latest = available_dates[0]
+                    latest_report = self.load_report_data(f"{latest[6:8]}/{latest[4:6]}/{latest[0:4]}")
 
                     if latest_report and "formula_usage" in latest_report:
                         # Tìm công thức được sử dụng nhiều nhất
@@ -6831,26 +6564,19 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             today = QDate.currentDate().toString("dd/MM/yyyy")
             print(f"Đang tìm báo cáo cho ngày hiện tại: {today}")
 
-            # Cập nhật danh sách các ngày có báo cáo
-            self.update_history_dates()
-
             # Tìm xem có báo cáo cho ngày hiện tại không
-            today_report_exists = False
-            today_index = -1
-
-            for i in range(self.history_date_combo.count()):
-                if self.history_date_combo.itemText(i) == today:
-                    today_report_exists = True
-                    today_index = i
-                    break
+            today_report_exists = report_index.get_entry(QDate.currentDate().toString("yyyyMMdd")) is not None
 
             if today_report_exists:
-                # Nếu có báo cáo cho ngày hiện tại, tải nó
-                self.history_date_combo.setCurrentIndex(today_index)
-
                 try:
-                    # Tải dữ liệu báo cáo cho tab lịch sử
-                    self.load_history_data(show_warnings=False)
+                    # Tải dữ liệu báo cáo cho tab lịch sử nếu tab đã được dựng
+                    # (khi dựng, tab lịch sử tự chọn ngày mới nhất)
+                    if self.tab_registry.is_built(self.history_tab):
+                        self.update_history_dates()
+                        today_index = self.history_date_combo.findText(today)
+                        if today_index >= 0:
+                            self.history_date_combo.setCurrentIndex(today_index)
+                        self.load_history_data(show_warnings=False)
                     print(f"Đã tìm thấy và tải báo cáo cho ngày hiện tại: {today}")
 
                     # Tự động điền vào bảng cám (không cập nhật default formula)
@@ -8249,7 +7975,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
                 background-color: #0f6674;
             }
         """)
-        refresh_btn.clicked.connect(self.refresh_inventory_analysis)
+        refresh_btn.clicked.connect(self.reload_inventory_analysis)
         control_layout.addWidget(refresh_btn)
 
         # Bulk operations button
@@ -8274,6 +8000,28 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         bulk_ops_btn.clicked.connect(self.open_bulk_operations_dialog)
         control_layout.addWidget(bulk_ops_btn)
 
+        # Purchase order plan export button
+        order_plan_btn = QPushButton("🛒 Kế Hoạch Đặt Hàng")
+        order_plan_btn.setFont(QFont("Arial", 11, QFont.Bold))
+        order_plan_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #673AB7;
+                color: white;
+                border: none;
+                padding: 10px 20px;
+                border-radius: 6px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #5E35B1;
+            }
+            QPushButton:pressed {
+                background-color: #4527A0;
+            }
+        """)
+        order_plan_btn.clicked.connect(self.export_purchase_order_plan)
+        control_layout.addWidget(order_plan_btn)
+
         # Last updated label
         self.last_updated_label = QLabel("Cập nhật lần cuối: Đang tải...")
         self.last_updated_label.setFont(QFont("Arial", 10))
@@ -8333,49 +8081,6 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Lỗi", f"Không thể mở dialog xóa: {str(e)}")
 
-    def create_action_button(self, text, color, callback):
-        """Create a styled action button for inventory table"""
-        button = QPushButton(text)
-        button.setFont(QFont("Arial", 10, QFont.Bold))
-        button.setMinimumHeight(30)
-        button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {color};
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 5px 10px;
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {self.darken_color(color)};
-            }}
-            QPushButton:pressed {{
-                background-color: {self.darken_color(color, 0.8)};
-            }}
-        """)
-        button.clicked.connect(callback)
-        return button
-
-    def darken_color(self, color, factor=0.9):
-        """Darken a hex color by a factor"""
-        # Simple color darkening - remove # and convert to RGB
-        if color.startswith('#'):
-            color = color[1:]
-
-        # Convert hex to RGB
-        r = int(color[0:2], 16)
-        g = int(color[2:4], 16)
-        b = int(color[4:6], 16)
-
-        # Darken by factor
-        r = int(r * factor)
-        g = int(g * factor)
-        b = int(b * factor)
-
-        # Convert back to hex
-        return f"#{r:02x}{g:02x}{b:02x}"
-
     def show_notification(self, message, notification_type="info"):
         """Show a notification message to the user"""
         try:
@@ -8402,15 +8107,8 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             # Refresh inventory reference from manager
             self.inventory = self.inventory_manager.get_inventory()
 
-            # Clear remaining usage calculator cache
-            if hasattr(self, 'remaining_usage_calculator'):
-                self.remaining_usage_calculator.clear_cache()
-
-            # Update inventory tables with fresh data
-            if hasattr(self, 'update_feed_inventory_table'):
-                self.update_feed_inventory_table()
-            if hasattr(self, 'update_mix_inventory_table'):
-                self.update_mix_inventory_table()
+            # Usage analysis is not cleared here: inventory, report and threshold writes
+            # already invalidate the shared snapshot used by the tables below
 
             # Update import history tables
             if hasattr(self, 'update_feed_import_history'):
@@ -8418,7 +8116,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             if hasattr(self, 'update_mix_import_history'):
                 self.update_mix_import_history()
 
-            # Refresh analysis if available
+            # Refresh analysis and inventory tables with fresh data
             if hasattr(self, 'refresh_inventory_analysis'):
                 self.refresh_inventory_analysis()
 
@@ -8430,7 +8128,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             traceback.print_exc()
 
     def on_tab_changed(self, index):
-        """Handle tab changes to refresh data when switching between tabs"""
+        """Handle tab changes: build the tab on first use, refresh it only if its data changed"""
         try:
             # Get the current tab widget
             current_tab = self.tabs.widget(index)
@@ -8438,33 +8136,11 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             if not current_tab:
                 return
 
-            # Refresh data based on which tab is active
-            if current_tab == getattr(self, 'inventory_tab', None):
-                # Inventory tab - refresh inventory displays
-                self.refresh_all_inventory_displays()
-                print("🔄 Refreshed inventory tab data")
+            # Build the tab on first activation (its setup loads the initial data)
+            self.tab_registry.ensure_built(current_tab)
 
-            elif current_tab == getattr(self, 'import_tab', None):
-                # Import tab - refresh import history
-                if hasattr(self, 'update_feed_import_history'):
-                    self.update_feed_import_history()
-                if hasattr(self, 'update_mix_import_history'):
-                    self.update_mix_import_history()
-                print("🔄 Refreshed import tab data")
-
-            elif current_tab == getattr(self, 'formula_tab', None):
-                # Formula tab - refresh formula displays
-                if hasattr(self, 'update_feed_formula_table'):
-                    self.update_feed_formula_table()
-                if hasattr(self, 'update_mix_formula_table'):
-                    self.update_mix_formula_table()
-                print("🔄 Refreshed formula tab data")
-
-            elif current_tab == getattr(self, 'history_tab', None):
-                # History tab - refresh history data
-                if hasattr(self, 'load_history_data'):
-                    self.load_history_data(show_warnings=False)
-                print("🔄 Refreshed history tab data")
+            # Refresh (debounced) only when the tab was marked dirty by a data change
+            self.tab_refresh.activate(current_tab)
 
             # Always refresh inventory reference to ensure consistency
             self.inventory = self.inventory_manager.get_inventory()
@@ -8473,6 +8149,23 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             print(f"Error handling tab change: {e}")
             # Don't show error to user as this is background refresh
 
+    def on_tab_built(self, page):
+        """A lazily built tab has loaded its data in setup, except history which loads a report on first view"""
+        if page is self.history_tab:
+            self.tab_refresh.mark_page_dirty(page)
+        else:
+            self.tab_refresh.mark_clean(page)
+
+    def refresh_import_tab(self):
+        """Refresh the feed and mix import history tables"""
+        self.update_feed_import_history()
+        self.update_mix_import_history()
+
+    def refresh_formula_tab(self):
+        """Refresh the feed and mix formula tables"""
+        self.update_feed_formula_table()
+        self.update_mix_formula_table()
+
     def open_bulk_operations_dialog(self):
         """Open bulk operations dialog"""
         try:
@@ -8500,46 +8193,28 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         search_text = self.inventory_search.text().lower()
         filter_status = self.inventory_filter.currentText()
 
-        # Filter feed inventory table
-        self.filter_table(self.feed_inventory_table, search_text, filter_status)
-
-        # Filter mix inventory table
-        self.filter_table(self.mix_inventory_table, search_text, filter_status)
+        # Filter feed and mix inventory tables through their proxy models
+        for proxy in self.inventory_proxies.values():
+            self.filter_table(proxy, search_text, filter_status)
 
-    def filter_table(self, table, search_text, filter_status):
+    def filter_table(self, proxy, search_text, filter_status):
         """Filter a specific table based on search and status criteria"""
-        for row in range(table.rowCount()):
-            show_row = True
-
-            # Check search text (ingredient name in column 0)
-            if search_text:
-                ingredient_item = table.item(row, 0)
-                if ingredient_item:
-                    ingredient_name = ingredient_item.text().lower()
-                    # Remove emoji from ingredient name for search
-                    ingredient_clean = ingredient_name.replace("🌾 ", "").replace("🧪 ", "")
-                    if search_text not in ingredient_clean:
-                        show_row = False
-
-            # Check status filter (status in column 5)
-            if show_row and filter_status != "Tất cả":
-                status_item = table.item(row, 5)
-                if status_item:
-                    status_text = status_item.text()
-
-                    # Map filter options to status text
-                    status_mapping = {
-                        "🔴 Khẩn cấp": "Khẩn cấp",
-                        "🟡 Sắp hết": "Sắp hết",
-                        "🟢 Đủ hàng": "Đủ hàng",
-                        "⚪ Chưa rõ": "Không có dữ liệu"
-                    }
+        statuses = INVENTORY_STATUS_FILTERS.get(filter_status)
+
+        def accepts(row):
+            # Check search text (ingredient name)
+            if search_text and search_text not in row[InventoryTableModel.INGREDIENT].lower():
+                return False
 
-                    expected_status = status_mapping.get(filter_status, "")
-                    if expected_status and expected_status not in status_text:
-                        show_row = False
+            # Check status filter ("⚪ Chưa rõ" matches rows without a known status)
+            status = row[InventoryTableModel.STATUS]
+            if filter_status == "Tất cả":
+                return True
+            if statuses is None:
+                return status not in INVENTORY_STATUS_ORDER
+            return status in statuses
 
-            table.setRowHidden(row, not show_row)
+        proxy.set_row_filter(accepts if search_text or filter_status != "Tất cả" else None)
 
     def refresh_inventory_analysis(self):
         """Refresh inventory analysis and update all components"""
@@ -8547,7 +8222,8 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             # Update timestamp
             from datetime import datetime
             current_time = datetime.now().strftime("%d/%m/%Y %H:%M")
-            self.last_updated_label.setText(f"Cập nhật lần cuối: {current_time}")
+            if hasattr(self, 'last_updated_label'):
+                self.last_updated_label.setText(f"Cập nhật lần cuối: {current_time}")
 
             # Refresh inventory tables
             self.update_feed_inventory_table()
@@ -8558,6 +8234,91 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         except Exception as e:
             print(f"[ERROR] Failed to refresh inventory analysis: {e}")
 
+    def check_inventory_alerts(self, on_startup=False):
+        """Show the low-stock popup from the shared usage analysis, following the popup settings"""
+        try:
+            settings = self.threshold_manager.get_popup_settings()
+            if not settings["popup_enabled"] or (on_startup and not settings["popup_on_startup"]):
+                return
+
+            # Same snapshot (and threshold classification) as the inventory tables
+            snapshot = self.remaining_usage_calculator.get_analysis_snapshot(7)
+            critical_items, warning_items = self.threshold_manager.get_alert_items_from_snapshot(snapshot)
+
+            alert_items = []
+            if settings["popup_on_critical"]:
+                alert_items += [("🔴", item) for item in critical_items]
+            if settings["popup_on_warning"]:
+                alert_items += [("🟡", item) for item in warning_items]
+
+            # After a data change only alert when an ingredient newly crosses a threshold
+            alerted = frozenset(item['name'] for _, item in alert_items)
+            previously_alerted = getattr(self, '_alerted_ingredients', frozenset())
+            self._alerted_ingredients = alerted
+            if not alert_items or (not on_startup and alerted <= previously_alerted):
+                return
+
+            lines = []
+            for icon, item in alert_items[:15]:
+                line = (f"{icon} {item['name']}: {item['stock']:,.1f} kg - "
+                        f"{self.remaining_usage_calculator.format_remaining_days(item['days'])}")
+                if item['stockout_7d'] is not None:
+                    line += f" - hết hàng trong 7 ngày: {item['stockout_7d']:.0%}"
+                lines.append(line)
+            if len(alert_items) > 15:
+                lines.append(f"... và {len(alert_items) - 15} thành phần khác")
+
+            print(f"⚠️ [Inventory Alerts] {len(critical_items)} critical, {len(warning_items)} warning ingredients")
+            QMessageBox.warning(self, "Cảnh báo tồn kho", "Các thành phần sắp hết:\n\n" + "\n".join(lines))
+
+        except Exception as e:
+            print(f"[ERROR] Failed to check inventory alerts: {e}")
+
+    def export_purchase_order_plan(self):
+        """Export the bag-rounded purchase order plan for the next days to Excel"""
+        try:
+            horizon_days, ok = QInputDialog.getInt(
+                self, "Kế hoạch đặt hàng", "Số ngày kế hoạch:", 14, 1, 90
+            )
+            if not ok:
+                return
+
+            plan = self.purchase_order_planner.plan(horizon_days)
+            if not plan["orders"]:
+                QMessageBox.information(self, "Kế hoạch đặt hàng",
+                                        f"Tồn kho đủ cho {horizon_days} ngày tới, không cần đặt hàng.")
+                return
+
+            file_path, _ = QFileDialog.getSaveFileName(
+                self,
+                "Lưu kế hoạch đặt hàng",
+                f"KeHoach_DatHang_{QDate.currentDate().toString('yyyyMMdd')}.xlsx",
+                "Excel Files (*.xlsx)"
+            )
+            if not file_path:
+                return
+
+            try:
+                from src.services.excel_export_service import ExcelExportService
+            except ImportError:
+                from services.excel_export_service import ExcelExportService
+
+            success, message = ExcelExportService().export_purchase_order_plan(
+                plan, os.path.basename(file_path), os.path.dirname(file_path)
+            )
+            if success:
+                QMessageBox.information(self, "Thành công", message)
+            else:
+                QMessageBox.critical(self, "Lỗi", message)
+
+        except Exception as e:
+            QMessageBox.critical(self, "Lỗi", f"Không thể xuất kế hoạch đặt hàng: {str(e)}")
+
+    def reload_inventory_analysis(self):
+        """Refresh button: re-read report files changed outside the app, then refresh the analysis"""
+        self.remaining_usage_calculator.clear_cache()
+        self.refresh_inventory_analysis()
+
     def refresh_formula_combo(self):
         """Refresh combo box công thức mặc định với các preset mới nhất"""
         try:
@@ -8595,76 +8356,33 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             except:
                 pass
 
-    def on_feed_table_cell_clicked(self, row, column):
+    def on_feed_table_cell_clicked(self, index):
         """Xử lý sự kiện khi người dùng click vào một ô trong bảng"""
         # Chỉ xử lý các ô chứa dữ liệu cám (bỏ qua hàng khu và trại)
-        if row < 2:
+        row, column = index.row(), index.column()
+        if self.feed_entry_model.shift_index(row) is None:
             return
 
-        # Lấy widget container trong ô
-        cell_widget = self.feed_table.cellWidget(row, column)
-        if not cell_widget:
-            return
-
-        # Lưu lại ô đang được chọn
+        # Lưu lại ô đang được chọn (ô được tô màu qua vùng chọn của bảng)
         self.selected_cell = (row, column)
 
-        # Đổi màu nền để hiển thị ô đang được chọn
-        for r in range(2, self.feed_table.rowCount()):
-            for c in range(self.feed_table.columnCount()):
-                widget = self.feed_table.cellWidget(r, c)
-                if widget:
-                    # Lấy màu nền gốc từ khu tương ứng
-                    original_c = c  # Lưu lại giá trị c ban đầu
-                    khu_idx = -1
-                    for idx, farms in FARMS.items():
-                        if original_c < len(farms):
-                            khu_idx = idx
-                            break
-                        original_c -= len(farms)
-
-                    khu_colors = [
-                        QColor(240, 248, 255),  # Khu 1: Alice Blue
-                        QColor(245, 245, 220),  # Khu 2: Beige
-                        QColor(240, 255, 240),  # Khu 3: Honeydew
-                        QColor(255, 240, 245),  # Khu 4: Lavender Blush
-                        QColor(255, 250, 240),  # Khu 5: Floral White
-                    ]
-
-                    if r == row and c == column:
-                        # Đổi màu nền cho ô được chọn - xanh nhạt đậm hơn
-                        widget.setStyleSheet(f"background-color: #b3e5fc;")
-                    else:
-                        # Khôi phục màu nền gốc cho các ô khác dựa trên khu
-                        if 0 <= khu_idx < len(khu_colors):
-                            widget.setStyleSheet(f"background-color: {khu_colors[khu_idx].name()};")
-                        else:
-                            widget.setStyleSheet("")
-
         # Hiển thị menu ngữ cảnh khi click vào ô
         self.show_cell_context_menu(row, column)
 
     def show_cell_context_menu(self, row, column):
         """Hiển thị menu ngữ cảnh khi click vào ô trong bảng cám"""
-        # Lấy widget container trong ô
-        cell_widget = self.feed_table.cellWidget(row, column)
-        if not cell_widget or not hasattr(cell_widget, 'spin_box') or not hasattr(cell_widget, 'formula_combo'):
+        model = self.feed_entry_model
+        shift_idx = model.shift_index(row)
+        if shift_idx is None:
             return
 
         # Chỉ hiển thị menu nếu đã nhập số lượng mẻ > 0
-        if cell_widget.spin_box.value() <= 0:
+        if model.value(column, shift_idx) <= 0:
             return
 
         # Lấy thông tin khu và trại
-        khu_item = self.feed_table.item(0, column)
-        farm_item = self.feed_table.item(1, column)
-
-        if not khu_item or not farm_item:
-            return
-
-        khu_name = khu_item.text()
-        farm_name = farm_item.text()
-        shift = SHIFTS[row - 2]  # Trừ 2 vì 2 hàng đầu là khu và trại
+        khu_name, farm_name = model.column_key(column)
+        shift = SHIFTS[shift_idx]
 
         # Tạo menu ngữ cảnh
         context_menu = QMenu(self)
@@ -8683,7 +8401,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
         # Lấy danh sách công thức cám
         feed_presets = self.formula_manager.get_feed_presets()
-        current_feed_formula = cell_widget.formula_combo.currentText()
+        current_feed_formula = model.formula(column, shift_idx)
 
         # Thêm các công thức cám vào menu
         for preset in sorted(feed_presets):
@@ -8787,57 +8505,17 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
     def update_feed_table_display(self):
         """Cập nhật hiển thị bảng cám dựa trên giá trị và công thức đã chọn"""
-        for col in range(self.feed_table.columnCount()):
-            for row in range(2, 2 + len(SHIFTS)):
-                cell_widget = self.feed_table.cellWidget(row, col)
-                if not cell_widget or not hasattr(cell_widget, 'spin_box') or not hasattr(cell_widget, 'formula_combo'):
-                    continue
+        if not hasattr(self, 'feed_entry_model'):
+            return
 
-                # Lấy giá trị và công thức
-                value = cell_widget.spin_box.value()
-                formula_text = cell_widget.formula_combo.currentText()
-
-                # Lấy default formula từ cả combo và manager để đảm bảo chính xác
-                default_formula_from_combo = self.default_formula_combo.currentText()
-                default_formula_from_manager = self.formula_manager.get_default_feed_formula()
-                default_formula = default_formula_from_combo if default_formula_from_combo else default_formula_from_manager
-
-                # Cập nhật hiển thị
-                if value == 0:
-                    # Ẩn label công thức
-                    cell_widget.formula_label.setVisible(False)
-                    # Mở rộng spinbox để chiếm toàn bộ không gian
-                    cell_widget.layout().setStretch(0, 100)
-                    cell_widget.layout().setStretch(1, 0)
-                else:
-                    # Lấy thông tin khu và trại
-                    khu_item = self.feed_table.item(0, col)
-                    farm_item = self.feed_table.item(1, col)
-
-                    if khu_item and farm_item:
-                        khu_name = khu_item.text()
-                        farm_name = farm_item.text()
-                        shift = SHIFTS[row - 2]  # Trừ 2 vì 2 hàng đầu là khu và trại
-
-                        cell_key = f"{khu_name}_{farm_name}_{shift}"
-                        has_custom_mix = hasattr(self, 'cell_mix_formulas') and cell_key in self.cell_mix_formulas
-
-                        # Kiểm tra xem có phải công thức mặc định không
-                        if formula_text and formula_text != default_formula:
-                            # Nếu không phải công thức mặc định, hiển thị tên
-                            display_text = formula_text
-                            cell_widget.formula_label.setText(display_text)
-                            cell_widget.formula_label.setVisible(True)
-                            # Khôi phục tỷ lệ ban đầu
-                            cell_widget.layout().setStretch(0, 60)
-                            cell_widget.layout().setStretch(1, 40)
-                        else:
-                            # Nếu là công thức mặc định hoặc không có công thức, ẩn label
-                            cell_widget.formula_label.setText("")
-                            cell_widget.formula_label.setVisible(False)
-                            # Mở rộng spinbox để chiếm toàn bộ không gian
-                            cell_widget.layout().setStretch(0, 100)
-                            cell_widget.layout().setStretch(1, 0)
+        # Lấy default formula từ cả combo và manager để đảm bảo chính xác
+        default_formula_from_combo = self.default_formula_combo.currentText()
+        default_formula_from_manager = self.formula_manager.get_default_feed_formula()
+        default_formula = default_formula_from_combo if default_formula_from_combo else default_formula_from_manager
+
+        # Nhãn công thức chỉ hiện ở ô có số mẻ và công thức khác công thức mặc định (do delegate vẽ)
+        self.feed_entry_model.set_default_formula(default_formula)
+        self.feed_table.viewport().update()
 
     def apply_formula_to_selected_cell(self, formula):
         """Áp dụng công thức cám cho ô đang được chọn"""
@@ -8845,59 +8523,21 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             return
 
         row, column = self.selected_cell
-        cell_widget = self.feed_table.cellWidget(row, column)
-
-        if not cell_widget or not hasattr(cell_widget, 'spin_box') or not hasattr(cell_widget, 'formula_combo'):
+        shift_idx = self.feed_entry_model.shift_index(row)
+        if shift_idx is None:
             return
 
         # Chỉ áp dụng công thức nếu đã nhập số lượng mẻ > 0
-        if cell_widget.spin_box.value() > 0:
+        if self.feed_entry_model.value(column, shift_idx) > 0:
             try:
                 # Thiết lập công thức
-                cell_widget.formula_combo.setCurrentText(formula)
+                self.feed_entry_model.set_formula(column, shift_idx, formula)
 
                 # Cập nhật hiển thị toàn bộ bảng
                 self.update_feed_table_display()
             except Exception as e:
                 print(f"Lỗi khi áp dụng công thức: {str(e)}")
 
-    def auto_select_default_formula(self, value, combo):
-        """Tự động áp dụng công thức mặc định khi người dùng nhập số lượng mẻ"""
-        # Lấy công thức mặc định hiện tại
-        default_formula = self.default_formula_combo.currentText()
-
-        # Nếu người dùng nhập giá trị > 0 và có công thức mặc định
-        if value > 0 and default_formula:
-            # Luôn áp dụng công thức mặc định khi có giá trị được nhập
-            current_formula = combo.currentText()
-
-            # Chỉ cập nhật nếu công thức hiện tại khác với công thức mặc định
-            if current_formula != default_formula:
-                # Tạm ngắt kết nối sự kiện để tránh gọi lại nhiều lần
-                try:
-                    combo.currentTextChanged.disconnect()
-                except:
-                    pass  # Ignore if no connections exist
-
-                # Thiết lập công thức mặc định
-                combo.setCurrentText(default_formula)
-
-                # Kết nối lại sự kiện
-                try:
-                    combo.currentTextChanged.connect(lambda: self.update_feed_table_display())
-                except:
-                    pass  # Ignore if connection fails
-
-                print(f"[DEBUG] Auto-applied default formula '{default_formula}' for value {value}")
-
-                # Cập nhật hiển thị bảng ngay lập tức để đảm bảo formula label được hiển thị đúng
-                QTimer.singleShot(10, self.update_feed_table_display)
-
-        elif value == 0:
-            # Khi giá trị về 0, có thể giữ nguyên công thức hoặc xóa tùy theo yêu cầu
-            # Hiện tại giữ nguyên công thức để người dùng có thể nhập lại mà không mất công thức
-            pass
-
     def apply_default_formula(self):
         """Áp dụng công thức cám mặc định cho tất cả các ô có giá trị trong bảng khi thay đổi công thức mặc định"""
         default_formula = self.default_formula_combo.currentText()
@@ -8910,29 +8550,19 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         else:
             print(f"[ERROR] Không thể lưu công thức mặc định: '{default_formula}'")
 
-        # Kiểm tra xem feed_table đã được tạo chưa
-        if not hasattr(self, 'feed_table'):
+        # Kiểm tra xem bảng cám đã được tạo chưa
+        if not hasattr(self, 'feed_entry_model'):
             return
 
         # Nếu có công thức mặc định, áp dụng cho tất cả các ô có giá trị > 0
         if default_formula:
-            cells_updated = 0
-            for col in range(self.feed_table.columnCount()):
-                for row in range(2, 2 + len(SHIFTS)):
-                    cell_widget = self.feed_table.cellWidget(row, col)
-                    if cell_widget and hasattr(cell_widget, 'formula_combo') and hasattr(cell_widget, 'spin_box'):
-                        # Chỉ áp dụng cho các ô có giá trị > 0
-                        if cell_widget.spin_box.value() > 0:
-                            cell_widget.formula_combo.setCurrentText(default_formula)
-                            cells_updated += 1
-
+            cells_updated = self.feed_entry_model.apply_formula_to_filled(default_formula)
             print(f"[INFO] Đã áp dụng công thức mặc định '{default_formula}' cho {cells_updated} ô có giá trị")
         else:
             print("[INFO] Không có công thức mặc định để áp dụng")
 
         # Cập nhật hiển thị bảng
-        if hasattr(self, 'update_feed_table_display'):
-            self.update_feed_table_display()
+        self.update_feed_table_display()
 
 
 
@@ -8970,209 +8600,44 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
 
     def load_feed_usage_history(self, show_message=True, filter_from_date=None, filter_to_date=None):
-        """Tải lịch sử sử dụng cám từ các báo cáo đã lưu"""
+        """Tải lịch sử sử dụng cám từ các báo cáo đã lưu (đọc chỉ mục trong luồng nền)"""
 
         # Xóa dữ liệu cũ trong bảng
-        if hasattr(self, 'feed_usage_history_table'):
-            self.feed_usage_history_table.setRowCount(0)
+        if hasattr(self, 'feed_usage_history_model'):
+            self.feed_usage_history_model.clear()
         else:
             print("LOAD: feed_usage_history_table not found")
             return
 
-        # Reports directory
-        reports_dir = str(persistent_path_manager.reports_path)
+        from_str = filter_from_date.toString("yyyyMMdd") if filter_from_date and filter_to_date else None
+        to_str = filter_to_date.toString("yyyyMMdd") if filter_from_date and filter_to_date else None
 
-        # Check if reports directory exists
-        if not os.path.exists(reports_dir):
-            # Thử đường dẫn cũ
-            reports_dir = "reports"
-            if not os.path.exists(reports_dir):
-                if show_message:
-                    QMessageBox.information(self, "Thông báo", "Không tìm thấy thư mục báo cáo!")
-                return
+        def load_rows(is_cancelled):
+            # Lấy danh sách báo cáo từ chỉ mục (tự đồng bộ với thư mục báo cáo, không đọc lại từng file)
+            for entry in report_index.query_range(from_str, to_str):
+                yield (entry["date"], entry["total_feed"], entry["total_mix"],
+                       entry["batch_count"], entry["path"])
 
-        # Find all report files in the reports directory
-        report_files = []
-        for f in os.listdir(reports_dir):
-            if f.startswith('report_') and f.endswith('.json'):
-                report_files.append(os.path.join(reports_dir, f))
+        # Lần tải mới hủy lần tải trước (ví dụ khi người dùng đổi khoảng ngày)
+        self._feed_history_show_message = show_message
+        self.feed_history_loader.start(load_rows)
 
-        # Nếu không có file báo cáo
-        if not report_files:
-            if show_message:
-                QMessageBox.information(self, "Thông báo", "Không tìm thấy báo cáo nào!")
+    def on_feed_usage_history_loaded(self, total):
+        """Hoàn tất tải lịch sử cám"""
+        if not self._feed_history_show_message:
             return
 
-        # Sort by date (newest first)
-        report_files.sort(reverse=True)
-
-        # Danh sách lưu thông tin báo cáo
-        history_data = []
-
-        files_included = 0
-        files_excluded = 0
-
-        # Đọc dữ liệu từ các file báo cáo
-        for report_file in report_files:
-            try:
-                # Extract date from filename (format: reports/report_YYYYMMDD.json)
-                file_name = os.path.basename(report_file)
-                if file_name.startswith('report_') and file_name.endswith('.json'):
-                    date_str = file_name[7:-5]  # Remove 'report_' and '.json'
-
-                    # Format date as DD/MM/YYYY for display
-                    # Hỗ trợ cả hai định dạng: YYYYMMDD và YYYY-MM-DD
-                    if len(date_str) == 8 and date_str.isdigit():  # YYYYMMDD
-                        year = date_str[0:4]
-                        month = date_str[4:6]
-                        day = date_str[6:8]
-                        formatted_date = f"{day}/{month}/{year}"
-                    elif len(date_str) == 10 and date_str.count('-') == 2:  # YYYY-MM-DD
-                        parts = date_str.split('-')
-                        if len(parts) == 3:
-                            year, month, day = parts
-                            formatted_date = f"{day}/{month}/{year}"
-                        else:
-                            continue
-                    else:
-                        continue
-
-                    # Kiểm tra lọc theo khoảng thời gian nếu có
-                    if filter_from_date and filter_to_date:
-                        # Chuyển đổi ngày từ file thành QDate để so sánh
-                        file_date = QDate.fromString(formatted_date, "dd/MM/yyyy")
-
-                        if file_date.isValid():
-                            # Kiểm tra xem ngày có nằm trong khoảng lọc không
-                            if file_date < filter_from_date or file_date > filter_to_date:
-                                files_excluded += 1
-                                continue  # Bỏ qua file này nếu không nằm trong khoảng
-                            else:
-                                files_included += 1
-                        else:
-                            files_excluded += 1
-                            continue
-                    else:
-                        files_included += 1
-
-                    # Đọc dữ liệu báo cáo
-                    with open(report_file, 'r', encoding='utf-8') as f:
-                        report_data = json.load(f)
-
-                    # Lấy tổng lượng cám và tổng số mẻ từ báo cáo
-                    total_feed = 0
-                    total_mix = 0
-                    batch_count = 0
-
-                    # Ưu tiên sử dụng dữ liệu đã tính toán sẵn trong báo cáo
-                    if "total_feed" in report_data and "total_mix" in report_data and "batch_count" in report_data:
-                        total_feed = report_data["total_feed"]
-                        total_mix = report_data["total_mix"]
-                        batch_count = report_data["batch_count"]
-                        print(f"Sử dụng dữ liệu tính sẵn cho {formatted_date}: {format_total(total_feed)} kg cám, {format_total(total_mix)} kg mix, {batch_count} mẻ")
-                    else:
-                        print(f"Không tìm thấy dữ liệu tính sẵn, tính lại từ dữ liệu gốc cho {formatted_date}")
-                        # Nếu không có dữ liệu đã tính toán, tính từ dữ liệu sử dụng
-                        if "mix_ingredients" in report_data:
-                            mix_ingredients = report_data["mix_ingredients"]
-                            # Kiểm tra xem mix_ingredients có phải là dict không
-                            if isinstance(mix_ingredients, dict):
-                                # Tính tổng lượng mix từ thành phần
-                                for ingredient, amount in mix_ingredients.items():
-                                    if isinstance(amount, (int, float)):
-                                        total_mix += amount
-                            else:
-                                print(f"Warning: mix_ingredients is not a dict in {report_file}")
-
-                        if "feed_ingredients" in report_data:
-                            feed_ingredients = report_data["feed_ingredients"]
-                            # Kiểm tra xem feed_ingredients có phải là dict không
-                            if isinstance(feed_ingredients, dict):
-                                # Tính tổng lượng cám (BAO GỒM cả "Nguyên liệu tổ hợp")
-                                for ingredient, amount in feed_ingredients.items():
-                                    if isinstance(amount, (int, float)):
-                                        total_feed += amount
-                            else:
-                                print(f"Warning: feed_ingredients is not a dict in {report_file}")
-
-                        # Tính tổng số mẻ từ dữ liệu sử dụng
-                        if "feed_usage" in report_data:
-                            for khu, farms in report_data["feed_usage"].items():
-                                for farm, shifts in farms.items():
-                                    for shift, value in shifts.items():
-                                        batch_count += value
-
-                    # Thêm vào danh sách
-                    history_data.append({
-                        "date": formatted_date,
-                        "total_feed": total_feed,
-                        "total_mix": total_mix,
-                        "batch_count": batch_count,
-                        "report_file": report_file
-                    })
-
-            except Exception as e:
-                print(f"Lỗi khi đọc file báo cáo {report_file}: {str(e)}")
-
-                # Hiển thị dữ liệu lịch sử
-        self.feed_usage_history_table.setRowCount(len(history_data))
-
-        # Tạo font đậm cho ngày
-        bold_font = QFont()
-        bold_font.setBold(True)
-
-        for row, data in enumerate(history_data):
-            # Ngày báo cáo
-            date_item = QTableWidgetItem(data["date"])
-            date_item.setTextAlignment(Qt.AlignCenter)
-            date_item.setFont(bold_font)
-
-            # Thêm tooltip giải thích
-            date_item.setToolTip(f"Nhấp đúp để tải báo cáo ngày {data['date']}")
-
-            self.feed_usage_history_table.setItem(row, 0, date_item)
-
-            # Tổng lượng cám
-            total_feed = data["total_feed"]
-            total_feed_item = QTableWidgetItem(f"{format_total(total_feed)} kg")
-            total_feed_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-
-            # Đặt màu chữ dựa trên giá trị
-            if total_feed > 5000:
-                total_feed_item.setForeground(QBrush(QColor("#2E7D32")))  # Màu xanh lá đậm
-
-            self.feed_usage_history_table.setItem(row, 1, total_feed_item)
-
-            # Tổng lượng mix
-            total_mix = data["total_mix"]
-            total_mix_item = QTableWidgetItem(f"{format_total(total_mix)} kg")
-            total_mix_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-
-            # Đặt màu chữ dựa trên giá trị
-            if total_mix > 100:
-                total_mix_item.setForeground(QBrush(QColor("#1565C0")))  # Màu xanh dương đậm
-
-            self.feed_usage_history_table.setItem(row, 2, total_mix_item)
-
-            # Tổng số mẻ
-            batch_count = data["batch_count"]
-            batch_count_item = QTableWidgetItem(format_number(batch_count))
-            batch_count_item.setTextAlignment(Qt.AlignCenter)
-
-            # Đặt màu chữ dựa trên giá trị
-            if batch_count > 3:
-                batch_count_item.setForeground(QBrush(QColor("#C62828")))  # Màu đỏ đậm
-
-            self.feed_usage_history_table.setItem(row, 3, batch_count_item)
-
-            # Lưu đường dẫn file báo cáo vào data của item
-            date_item.setData(Qt.UserRole, data["report_file"])
-
-
-
         # Hiển thị thông báo
-        if show_message:
-            QMessageBox.information(self, "Thông báo", f"Tìm thấy {len(history_data)} báo cáo!")
+        if total == 0:
+            QMessageBox.information(self, "Thông báo", "Không tìm thấy báo cáo nào!")
+        else:
+            QMessageBox.information(self, "Thông báo", f"Tìm thấy {total} báo cáo!")
+
+    def on_feed_usage_history_failed(self, message):
+        """Lỗi khi tải lịch sử cám"""
+        print(f"❌ [Feed History] Error loading history: {message}")
+        if self._feed_history_show_message:
+            QMessageBox.warning(self, "Lỗi", f"Không thể tải lịch sử báo cáo: {message}")
 
 
     def on_history_row_clicked(self, index):
@@ -9183,16 +8648,12 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
     def on_history_row_double_clicked(self, index):
         """Xử lý sự kiện khi double click vào hàng trong bảng lịch sử"""
-        row = index.row()
-
-        # Lấy đường dẫn file báo cáo từ item đầu tiên của hàng
-        report_file = self.feed_usage_history_table.item(row, 0).data(Qt.UserRole)
-
-        # Lấy ngày từ item đầu tiên của hàng
-        date_text = self.feed_usage_history_table.item(row, 0).text()
+        # Hàng dữ liệu (ngày, tổng cám, tổng mix, số mẻ, file báo cáo) của hàng đang hiển thị
+        data = self.feed_usage_history_proxy.row_at(index.row())
 
         # Tải dữ liệu vào bảng cám
-        self.load_feed_table_from_history(report_file, date_text)
+        self.load_feed_table_from_history(data[FeedUsageHistoryModel.REPORT_FILE],
+                                          FeedUsageHistoryModel.display_date(data))
 
     def load_feed_table_from_history(self, report_file, date_text, show_message=False):
         """Tải dữ liệu từ báo cáo lịch sử vào bảng cám"""
@@ -9212,38 +8673,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
             # Điền dữ liệu vào bảng cám
             if "feed_usage" in report_data:
-                feed_usage = report_data["feed_usage"]
-
-                # Duyệt qua từng khu và trại
-                col_index = 0
-                for khu_idx, farms in FARMS.items():
-                    khu_name = f"Khu {khu_idx + 1}"
-
-                    for farm_idx, farm in enumerate(farms):
-                        # Nếu có dữ liệu cho khu và trại này
-                        if khu_name in feed_usage and farm in feed_usage[khu_name]:
-                            farm_data = feed_usage[khu_name][farm]
-
-                            # Điền dữ liệu cho từng ca
-                            for shift_idx, shift in enumerate(SHIFTS):
-                                if shift in farm_data:
-                                    value = farm_data[shift]
-
-                                    # Lấy cell widget
-                                    cell_widget = self.feed_table.cellWidget(shift_idx + 2, col_index)
-                                    if cell_widget and hasattr(cell_widget, 'spin_box'):
-                                        cell_widget.spin_box.setValue(value)
-
-                                        # Nếu có dữ liệu công thức, cập nhật công thức
-                                        if "formula_usage" in report_data and khu_name in report_data["formula_usage"] and farm in report_data["formula_usage"][khu_name] and shift in report_data["formula_usage"][khu_name][farm]:
-                                            formula = report_data["formula_usage"][khu_name][farm][shift]
-                                            if formula and hasattr(cell_widget, 'formula_combo'):
-                                                # Tìm index của công thức trong combo box
-                                                index = cell_widget.formula_combo.findText(formula)
-                                                if index >= 0:
-                                                    cell_widget.formula_combo.setCurrentIndex(index)
-
-                        col_index += 1
+                self.load_feed_entry_data(report_data["feed_usage"], report_data.get("formula_usage", {}))
 
             # Nếu có dữ liệu công thức mix cho cột, cập nhật
             if "column_mix_formulas" in report_data:
@@ -9269,13 +8699,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
     def reset_feed_table_silent(self):
         """Reset bảng cám mà không hiển thị thông báo"""
         # Xóa dữ liệu hiện tại trong bảng
-        for col in range(self.feed_table.columnCount()):
-            for row in range(2, 2 + len(SHIFTS)):
-                cell_widget = self.feed_table.cellWidget(row, col)
-                if cell_widget and hasattr(cell_widget, 'spin_box'):
-                    cell_widget.spin_box.setValue(0)
-                if cell_widget and hasattr(cell_widget, 'formula_combo'):
-                    cell_widget.formula_combo.setCurrentText("")
+        self.feed_entry_model.clear()
 
         # Xóa dữ liệu công thức mix cho từng ô
         if hasattr(self, 'cell_mix_formulas'):
@@ -10008,13 +9432,17 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         layout.addWidget(filter_group)
 
         # Enhanced import tracking table with larger fonts
-        self.import_tracking_table = QTableWidget()
+        self.import_tracking_table = QTableView()
+        self.import_tracking_table.setModel(self.import_tracking_proxy)
         self.import_tracking_table.setFont(QFont("Arial", 15, QFont.Medium))
-        self.import_tracking_table.setColumnCount(6)
-        self.import_tracking_table.setHorizontalHeaderLabels([
-            "📅 Ngày", "🏷️ Loại nguyên liệu", "⚖️ Số lượng (kg)",
-            "👥 Nhân viên tham gia", "📝 Ghi chú", "⚙️ Thao tác"
-        ])
+        self.import_tracking_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.import_tracking_table.setMouseTracking(True)
+
+        # Date with faded time part and per-row action button are painted by delegates
+        self.import_tracking_table.setItemDelegateForColumn(0, TimestampDelegate(self.import_tracking_table))
+        manage_delegate = ButtonDelegate("#4CAF50", self.import_tracking_table)
+        manage_delegate.clicked.connect(self.on_import_tracking_manage_clicked)
+        self.import_tracking_table.setItemDelegateForColumn(5, manage_delegate)
 
         # Enhanced row height and styling
         self.import_tracking_table.verticalHeader().setDefaultSectionSize(55)  # Increased height
@@ -10036,7 +9464,7 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
         # Enhanced table styling with larger fonts
         self.import_tracking_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #e0e0e0;
                 background-color: white;
                 alternate-background-color: #f8f9fa;
@@ -10046,19 +9474,19 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
                 font-weight: 500;
                 selection-background-color: #e3f2fd;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 16px 14px;
                 border-bottom: 1px solid #e8e8e8;
                 border-right: 1px solid #f0f0f0;
                 color: #2c2c2c;
                 font-weight: 500;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e3f2fd;
                 color: #1976d2;
                 font-weight: 600;
             }
-            QTableWidget::item:hover {
+            QTableView::item:hover {
                 background-color: #f5f5f5;
             }
             QHeaderView::section {
@@ -10079,6 +9507,8 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         self.import_tracking_table.setAlternatingRowColors(True)
         self.import_tracking_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.import_tracking_table.setShowGrid(True)
+        self.import_tracking_table.setSortingEnabled(True)
+        self.import_tracking_table.sortByColumn(0, Qt.DescendingOrder)
 
         layout.addWidget(self.import_tracking_table)
 
@@ -10591,6 +10021,10 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
     def load_employees(self):
         """Load employees from JSON file"""
+        # Tab quản lý tổ cám chưa được dựng: danh sách sẽ được tải khi tab được mở lần đầu
+        if not self.tab_registry.is_built(self.team_management_tab):
+            return
+
         try:
             employees_file = str(get_data_file_path("business/employees.json"))
             if os.path.exists(employees_file):
@@ -11224,11 +10658,12 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
             except Exception as e:
                 QMessageBox.critical(self, "Lỗi", f"Không thể xóa dữ liệu nghỉ phép: {str(e)}")
 
-    def load_import_tracking_data(self):
-        """Load import tracking data from existing import files"""
-        try:
-            self.import_tracking_table.setRowCount(0)
+    def load_import_tracking_data(self, show_message=False):
+        """Load import tracking data from existing import files (read in a background thread)"""
+        self.import_tracking_model.clear()
+        self._import_tracking_show_message = show_message
 
+        def load_rows(is_cancelled):
             # Load participation data
             participation_file = str(get_data_file_path("business/import_participation.json"))
             if os.path.exists(participation_file):
@@ -11239,69 +10674,48 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
             all_imports = []
 
-            # Process import files from imports directory
-            imports_dir = str(persistent_path_manager.data_path / "imports")
-            if os.path.exists(imports_dir):
-                for filename in os.listdir(imports_dir):
-                    if filename.startswith('import_') and filename.endswith('.json'):
-                        file_path = str(persistent_path_manager.data_path / "imports" / filename)
+            # Process all import records (date is YYYY-MM-DD)
+            for entry in import_store.load_all():
+                if is_cancelled():
+                    return []
 
-                        # Extract date from filename (import_YYYY-MM-DD.json)
-                        try:
-                            date_part = filename.replace('import_', '').replace('.json', '')
-                            import_date = date_part  # Keep as YYYY-MM-DD format
-                        except:
-                            continue
+                import_date = entry['date']
+                ingredient = entry.get('ingredient', '')
+                amount = entry.get('amount', 0)
+                import_type = entry.get('type', '')
+                timestamp = entry.get('timestamp', '')
+                note = entry.get('note', '')
 
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                import_entries = json.load(f)
-
-                            for entry in import_entries:
-                                ingredient = entry.get('ingredient', '')
-                                amount = entry.get('amount', 0)
-                                import_type = entry.get('type', '')
-                                timestamp = entry.get('timestamp', '')
-                                note = entry.get('note', '')
-
-                                if amount > 0 and ingredient:
-                                    # Determine material type
-                                    material_type = self.categorize_material(ingredient)
-
-                                    # Create unique import key
-                                    import_key = f"{import_date}_{timestamp}_{ingredient}_{amount}"
-
-                                    # Get participation info
-                                    participants = participation_data.get(import_key, {}).get('participants', [])
-                                    participant_names = [p.get('name', '') for p in participants]
-
-                                    all_imports.append({
-                                        'date': import_date,
-                                        'timestamp': timestamp,
-                                        'material_type': material_type,
-                                        'ingredient': ingredient,
-                                        'amount': amount,
-                                        'type': import_type,
-                                        'participants': participant_names,
-                                        'import_key': import_key,
-                                        'note': note
-                                    })
-                        except Exception as e:
-                            print(f"Lỗi khi đọc file {filename}: {str(e)}")
-                            continue
+                if amount > 0 and ingredient:
+                    # Determine material type
+                    material_type = self.categorize_material(ingredient)
+
+                    # Create unique import key
+                    import_key = f"{import_date}_{timestamp}_{ingredient}_{amount}"
+
+                    # Get participation info
+                    participants = participation_data.get(import_key, {}).get('participants', [])
+                    participant_names = tuple(p.get('name', '') for p in participants)
+
+                    all_imports.append((import_date, timestamp, material_type, ingredient, amount,
+                                        import_type, participant_names, import_key, note))
 
             # Sort by timestamp (newest first) - timestamp already contains full date and time
-            all_imports.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+            all_imports.sort(key=lambda row: row[ImportTrackingModel.TIMESTAMP], reverse=True)
+            return all_imports
 
-            # Populate table
-            for import_data in all_imports:
-                self.add_import_tracking_row(import_data)
+        self.import_tracking_loader.start(load_rows)
 
-            print(f"Đã tải {len(all_imports)} bản ghi nhập kho")
+    def on_import_tracking_loaded(self, total):
+        """Import tracking data fully loaded"""
+        print(f"Đã tải {total} bản ghi nhập kho")
+        if self._import_tracking_show_message:
+            QMessageBox.information(self, "Thành công", "Đã làm mới dữ liệu nhập kho!")
 
-        except Exception as e:
-            QMessageBox.warning(self, "Lỗi", f"Không thể tải dữ liệu nhập kho: {str(e)}")
-            print(f"Chi tiết lỗi: {str(e)}")
+    def on_import_tracking_failed(self, message):
+        """Import tracking data could not be loaded"""
+        QMessageBox.warning(self, "Lỗi", f"Không thể tải dữ liệu nhập kho: {message}")
+        print(f"Chi tiết lỗi: {message}")
 
     def categorize_material(self, ingredient_name):
         """Categorize ingredient into material types"""
@@ -11327,126 +10741,14 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
         else:
             return 'Khác'
 
-    def add_import_tracking_row(self, import_data):
-        """Add a row to import tracking table"""
-        row = self.import_tracking_table.rowCount()
-        self.import_tracking_table.insertRow(row)
-
-        # Date with timestamp - create styled display with faded time part
-        date_display = ""
-        if 'timestamp' in import_data and import_data['timestamp']:
-            timestamp = import_data['timestamp']
-            if ' ' in timestamp:
-                # Split date and time parts
-                date_part, time_part = timestamp.split(' ', 1)
-                # Create HTML formatted text with faded time
-                date_display = f'<span style="color: #2c2c2c; font-weight: 600;">{date_part}</span> <span style="color: #888888; font-weight: 400;">{time_part}</span>'
-            else:
-                date_display = timestamp
-        else:
-            # Fallback to date if timestamp is not available
-            date_display = import_data.get('date', '')
-
-        date_item = QTableWidgetItem()
-        date_item.setFlags(date_item.flags() & ~Qt.ItemIsEditable)
-
-        # Create a custom widget for rich text display with optimized font size
-        date_widget = QLabel()
-        date_widget.setFont(QFont("Arial", 14, QFont.Medium))  # Increased to 14px for better readability
-        date_widget.setText(date_display)
-        date_widget.setAlignment(Qt.AlignCenter)
-        date_widget.setStyleSheet("""
-            QLabel {
-                background: transparent;
-                padding: 4px 6px;
-                border: none;
-                font-size: 14px;
-            }
-        """)
-
-        # Set the widget in the table
-        self.import_tracking_table.setItem(row, 0, date_item)
-        self.import_tracking_table.setCellWidget(row, 0, date_widget)
-
-        # Material type with ingredient name
-        material_display = f"{import_data['material_type']}"
-        if import_data['ingredient'] != import_data['material_type']:
-            material_display += f" ({import_data['ingredient']})"
-
-        material_item = QTableWidgetItem(material_display)
-        material_item.setFlags(material_item.flags() & ~Qt.ItemIsEditable)
-
-        # Color code by material type
-        if import_data['material_type'] == 'Bắp':
-            material_item.setBackground(QColor(255, 235, 59, 50))  # Yellow
-        elif import_data['material_type'] == 'Nành':
-            material_item.setBackground(QColor(139, 195, 74, 50))  # Light Green
-        elif import_data['material_type'] == 'Cám gạo':
-            material_item.setBackground(QColor(255, 152, 0, 50))   # Orange
-        elif import_data['material_type'] == 'Đá hạt':
-            material_item.setBackground(QColor(158, 158, 158, 50))  # Gray
-        else:  # Khác
-            material_item.setBackground(QColor(156, 39, 176, 50))   # Purple
-
-        self.import_tracking_table.setItem(row, 1, material_item)
-
-        # Amount
-        amount_item = QTableWidgetItem(f"{import_data['amount']:,.1f} kg")
-        amount_item.setFlags(amount_item.flags() & ~Qt.ItemIsEditable)
-        self.import_tracking_table.setItem(row, 2, amount_item)
-
-        # Participants
-        participants_text = ", ".join(import_data['participants']) if import_data['participants'] else "Chưa ghi nhận"
-        participants_item = QTableWidgetItem(participants_text)
-        participants_item.setFlags(participants_item.flags() & ~Qt.ItemIsEditable)
-
-        # Color code participants
-        if import_data['participants']:
-            participants_item.setBackground(QColor(200, 255, 200, 100))  # Light green
-        else:
-            participants_item.setBackground(QColor(255, 200, 200, 100))  # Light red
-
-        self.import_tracking_table.setItem(row, 3, participants_item)
-
-        # Note
-        note_text = import_data.get('note', '')
-        if import_data.get('type'):
-            note_text = f"[{import_data['type'].upper()}] {note_text}".strip()
-
-        note_item = QTableWidgetItem(note_text)
-        note_item.setFlags(note_item.flags() & ~Qt.ItemIsEditable)
-        self.import_tracking_table.setItem(row, 4, note_item)
-
-        # Action button
-        action_widget = QWidget()
-        action_layout = QHBoxLayout()
-        action_layout.setContentsMargins(5, 2, 5, 2)
-
-        manage_btn = QPushButton("Quản lý NV")
-        manage_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                padding: 4px 8px;
-                border-radius: 3px;
-                font-size: 11px;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-        """)
-        manage_btn.clicked.connect(lambda: self.manage_import_participants(import_data))
-
-        action_layout.addWidget(manage_btn)
-        action_widget.setLayout(action_layout)
-
-        self.import_tracking_table.setCellWidget(row, 5, action_widget)
+    def on_import_tracking_manage_clicked(self, index):
+        """Open the participant manager for the clicked import tracking row"""
+        row = self.import_tracking_proxy.row_at(index.row())
+        self.manage_import_participants(ImportTrackingModel.record(row))
 
     def refresh_import_tracking_data(self):
         """Refresh import tracking data"""
-        self.load_import_tracking_data()
-        QMessageBox.information(self, "Thành công", "Đã làm mới dữ liệu nhập kho!")
+        self.load_import_tracking_data(show_message=True)
 
     def refresh_team_management_tab(self):
         """Refresh team management tab to show updated bonus data"""
@@ -11490,43 +10792,22 @@ class Quan_Ly_Kho_Cam_Mix_App(QMainWindow):
 
     def filter_import_tracking_data(self):
         """Filter import tracking data based on date range and material type"""
-        from_date = self.import_tracking_from_date.date()
-        to_date = self.import_tracking_to_date.date()
+        from_date = self.import_tracking_from_date.date().toString("yyyy-MM-dd")
+        to_date = self.import_tracking_to_date.date().toString("yyyy-MM-dd")
         material_filter = self.import_material_filter.currentText()
 
-        # Hide/show rows based on filter
-        for row in range(self.import_tracking_table.rowCount()):
-            show_row = True
-
-            # Check date range
-            date_widget = self.import_tracking_table.cellWidget(row, 0)
-            if date_widget:
-                try:
-                    # Extract date from the widget's text (which may contain HTML)
-                    timestamp_text = date_widget.text()
-                    # Remove HTML tags if present
-                    import re
-                    clean_text = re.sub(r'<[^>]+>', '', timestamp_text)
-
-                    if ' ' in clean_text:
-                        date_part = clean_text.split(' ')[0]  # Get date part only
-                    else:
-                        date_part = clean_text
-
-                    row_date = QDate.fromString(date_part, "yyyy-MM-dd")
-                    if row_date.isValid():
-                        if row_date < from_date or row_date > to_date:
-                            show_row = False
-                except:
-                    pass
+        def accepts(row):
+            # Check date range (timestamp starts with YYYY-MM-DD, falls back to the import date)
+            row_date = (row[ImportTrackingModel.TIMESTAMP] or row[ImportTrackingModel.DATE]).split(' ')[0]
+            if QDate.fromString(row_date, "yyyy-MM-dd").isValid() and not (from_date <= row_date <= to_date):
+                return False
 
             # Check material type
-            if material_filter != "Tất cả":
-                material_item = self.import_tracking_table.item(row, 1)
-                if material_item and material_filter not in material_item.text():
-                    show_row = False
+            if material_filter != "Tất cả" and material_filter not in self.import_tracking_model.display(row, 1):
+                return False
+            return True
 
-            self.import_tracking_table.setRowHidden(row, not show_row)
+        self.import_tracking_proxy.set_row_filter(accepts)
 
     def manage_import_participants(self, import_data):
         """Manage employees participating in import activity"""
@@ -16813,12 +16094,9 @@ class EnhancedWarehouseImportDialog(QDialog):
                 formula_additions = self.auto_add_to_formula(import_data['ingredient'])
 
             # Update threshold monitoring if applicable (consistent with AddInventoryItemDialog approach)
-            if hasattr(self.parent_app, 'threshold_manager'):
-                try:
-                    # Check if this import affects any threshold warnings
-                    self.parent_app.threshold_manager.check_thresholds()
-                except Exception as e:
-                    print(f"Warning: Could not update threshold monitoring: {e}")
+            if hasattr(self.parent_app, 'check_inventory_alerts'):
+                # Check if this import affects any threshold warnings
+                self.parent_app.check_inventory_alerts()
 
             # Show formula addition notification if ingredients were added
             if formula_additions:
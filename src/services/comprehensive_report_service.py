@@ -5,13 +5,21 @@ Tạo các báo cáo chi tiết từ tất cả dữ liệu có sẵn trong hệ
 """
 
 import os
-import json
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
 from collections import defaultdict
 
+try:
+    from src.core.inventory_ledger import load_warehouse_inventory
+    from src.services.import_store import import_store
+    from src.utils.json_document_cache import load_json_document
+except ImportError:
+    from core.inventory_ledger import load_warehouse_inventory
+    from services.import_store import import_store
+    from utils.json_document_cache import load_json_document
+
 class ComprehensiveReportService:
     """Dịch vụ tạo báo cáo toàn diện từ tất cả dữ liệu hệ thống"""
 
@@ -39,24 +47,13 @@ class ComprehensiveReportService:
 
     def _load_json_file(self, file_path: Path) -> Dict:
         """Tải file JSON với xử lý lỗi"""
-        try:
-            if file_path.exists() and file_path.stat().st_size > 0:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError, UnicodeDecodeError) as e:
-            print(f"Lỗi đọc file {file_path}: {e}")
-        return {}
+        data = load_json_document(file_path, {})
+        return data if isinstance(data, dict) else {}
 
     def _load_json_list(self, file_path: Path) -> List:
         """Tải file JSON dạng list với xử lý lỗi"""
-        try:
-            if file_path.exists() and file_path.stat().st_size > 0:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data if isinstance(data, list) else []
-        except (json.JSONDecodeError, FileNotFoundError, UnicodeDecodeError) as e:
-            print(f"Lỗi đọc file {file_path}: {e}")
-        return []
+        data = load_json_document(file_path, [])
+        return data if isinstance(data, list) else []
 
     def get_inventory_summary(self) -> Dict[str, Any]:
         """Lấy tổng quan tồn kho"""
@@ -70,11 +67,11 @@ class ComprehensiveReportService:
         }
 
         # Tải dữ liệu tồn kho cám
-        feed_inventory = self._load_json_file(self.config_dir / "feed_inventory.json")
+        feed_inventory = load_warehouse_inventory("feed")
         summary['feed_inventory'] = feed_inventory
 
         # Tải dữ liệu tồn kho mix
-        mix_inventory = self._load_json_file(self.config_dir / "mix_inventory.json")
+        mix_inventory = load_warehouse_inventory("mix")
         summary['mix_inventory'] = mix_inventory
 
         # Tải dữ liệu tồn kho chung
@@ -299,30 +296,24 @@ class ComprehensiveReportService:
             'date_range': {'start': start_date, 'end': end_date}
         }
 
-        # Lấy tất cả file nhập kho
-        import_files = list(self.imports_dir.glob("import_*.json"))
+        # Truy vấn chỉ mục nhập kho theo khoảng ngày (YYYYMMDD -> YYYY-MM-DD)
+        from_date = f"{start_date[:4]}-{start_date[4:6]}-{start_date[6:8]}" if start_date else None
+        to_date = f"{end_date[:4]}-{end_date[4:6]}-{end_date[6:8]}" if end_date else None
 
-        # Lọc theo ngày nếu có
-        filtered_files = []
-        for file in import_files:
-            # Trích xuất ngày từ tên file (import_YYYY-MM-DD.json)
-            try:
-                date_part = file.stem.replace('import_', '').replace('-', '')
-                if self._is_date_in_range(date_part, start_date, end_date):
-                    filtered_files.append(file)
-            except:
-                filtered_files.append(file)  # Bao gồm file không có định dạng ngày chuẩn
-
-        summary['total_imports'] = len(filtered_files)
-
-        # Xử lý từng file nhập kho
-        for import_file in filtered_files:
-            import_data = self._load_json_file(import_file)
-            if import_data:
-                summary['import_files'].append({
-                    'file_name': import_file.name,
-                    'data': import_data
-                })
+        records_by_date = defaultdict(list)
+        for record in import_store.load_range(from_date, to_date):
+            import_date = record.pop('date')
+            records_by_date[import_date].append(record)
+
+        summary['total_imports'] = len(records_by_date)
+
+        # Mỗi ngày nhập kho là một mục, giữ định dạng của file theo ngày trước đây
+        for import_date, records in sorted(records_by_date.items()):
+            summary['import_files'].append({
+                'file_name': f"import_{import_date}.json",
+                'date': import_date,
+                'data': records
+            })
 
         return summary
 
@@ -16,8 +16,10 @@ from collections import defaultdict
 # Import cache manager
 try:
     from src.services.report_cache_manager import report_cache_manager
+    from src.services.report_index import report_index
 except ImportError:
     from services.report_cache_manager import report_cache_manager
+    from services.report_index import report_index
 
 class DailyReportCalculator:
     """Tính toán báo cáo tiêu thụ hàng ngày với cache"""
@@ -166,6 +168,7 @@ class DailyReportCalculator:
             # Kiểm tra file đã được lưu
             if report_file.exists() and report_file.stat().st_size > 0:
                 print(f"✅ Report saved successfully: {report_file} ({report_file.stat().st_size} bytes)")
+                report_index.record_report(report_file, report_data)
                 return True
             else:
                 print(f"❌ Report file not created or empty: {report_file}")
@@ -469,6 +472,7 @@ class DailyReportCalculator:
 
                 if saved_data.get('date') == report_date:
                     print(f"✅ Data integrity verified for {report_date}")
+                    report_index.record_report(report_file, saved_data)
                     return True
                 else:
                     print(f"❌ Data integrity check failed for {report_date}")
@@ -351,6 +351,84 @@ class ExcelExportService:
 
         return ws
 
+    def create_purchase_order_worksheet(self, wb: Workbook, plan_data: Dict[str, Any]) -> Worksheet:
+        """Tạo worksheet kế hoạch đặt hàng (PurchaseOrderPlanner.plan)"""
+        ws = wb.create_sheet(title="Kế Hoạch Đặt Hàng")
+
+        current_row = self.format_worksheet_header(
+            ws, f"KẾ HOẠCH ĐẶT HÀNG {plan_data.get('horizon_days', 0)} NGÀY TỚI"
+        )
+
+        warehouse_names = {'feed': 'Kho cám', 'mix': 'Kho mix'}
+        orders = plan_data.get('orders', [])
+        if not orders:
+            ws.cell(row=current_row, column=1, value="Không cần đặt hàng trong kỳ kế hoạch")
+            ws.cell(row=current_row, column=1).font = self.normal_font
+            return ws
+
+        orders_df = pd.DataFrame([
+            {
+                'Đặt trước ngày': order['order_by'],
+                'Kho': warehouse_names.get(order['warehouse'], order['warehouse']),
+                'Tên nguyên liệu': order['ingredient'],
+                'Tồn kho (kg)': order['current_stock'],
+                'Dùng dự kiến (kg)': order['horizon_usage'],
+                'Tồn an toàn (kg)': order['safety_stock'],
+                'Thiếu (kg)': order['shortfall'],
+                'Kích thước bao (kg)': order['bag_size'],
+                'Số bao': order['bags'] if order['bags'] is not None else '',
+                'Lượng đặt (kg)': order['order_quantity'],
+                'Nguồn lượng dùng': 'Dự báo' if order['usage_source'] == 'forecast' else 'Trung bình 7 ngày'
+            }
+            for order in orders
+        ])
+        current_row = self.format_data_table(ws, orders_df, current_row) + 1
+
+        # Tổng theo kho
+        ws.cell(row=current_row, column=1, value="TỔNG THEO KHO")
+        ws.cell(row=current_row, column=1).font = self.subheader_font
+        current_row += 1
+
+        totals_df = pd.DataFrame([
+            {
+                'Kho': warehouse_names.get(warehouse_type, warehouse_type),
+                'Số nguyên liệu': totals['items'],
+                'Số bao': totals['bags'],
+                'Lượng đặt (kg)': totals['order_quantity']
+            }
+            for warehouse_type, totals in plan_data.get('totals', {}).items()
+        ])
+        self.format_data_table(ws, totals_df, current_row)
+
+        return ws
+
+    def export_purchase_order_plan(self, plan_data: Dict[str, Any], filename: str = None,
+                                   custom_export_dir: str = None) -> Tuple[bool, str]:
+        """Xuất kế hoạch đặt hàng ra Excel"""
+        try:
+            if not filename:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                filename = f"KeHoach_DatHang_{timestamp}.xlsx"
+
+            if not filename.endswith('.xlsx'):
+                filename += '.xlsx'
+
+            if custom_export_dir and Path(custom_export_dir).exists():
+                export_directory = Path(custom_export_dir)
+            else:
+                export_directory = self.exports_dir
+
+            file_path = export_directory / filename
+
+            wb = self.create_workbook("Kế Hoạch Đặt Hàng")
+            self.create_purchase_order_worksheet(wb, plan_data)
+            wb.save(file_path)
+
+            return True, f"Kế hoạch đặt hàng đã được xuất thành công: {file_path}"
+
+        except Exception as e:
+            return False, f"Lỗi khi xuất kế hoạch đặt hàng: {str(e)}"
+
     def export_comprehensive_report(self, report_data: Dict[str, Any], filename: str = None, custom_export_dir: str = None) -> Tuple[bool, str]:
         """Xuất báo cáo toàn diện ra Excel"""
         try:
@@ -391,6 +469,9 @@ class ExcelExportService:
             if 'formulas' in sections:
                 self.create_formula_worksheet(wb, sections['formulas'])
 
+            if 'purchase_orders' in sections:
+                self.create_purchase_order_worksheet(wb, sections['purchase_orders'])
+
             # Tạo worksheet tổng quan
             self.create_summary_worksheet(wb, report_data)
 
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Import Store - Lưu trữ và truy vấn lịch sử nhập kho
+Dùng file JSON theo tháng (imports_YYYY-MM.json) kèm chỉ mục ngày trong bộ nhớ,
+hoặc bảng imports khi bật DB_BACKEND
+"""
+
+import os
+import json
+import shutil
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+try:
+    from src.utils.persistent_paths import persistent_path_manager
+    from src.utils.report_files import parse_import_filename, parse_import_month_filename
+    from src.utils.database_store import get_database_store
+    from src.utils.data_versions import bump_data_version, IMPORTS
+except ImportError:
+    from utils.persistent_paths import persistent_path_manager
+    from utils.report_files import parse_import_filename, parse_import_month_filename
+    from utils.database_store import get_database_store
+    from utils.data_versions import bump_data_version, IMPORTS
+
+# Thư mục chứa các file nhập kho theo ngày đã được chuyển sang file theo tháng
+MIGRATED_DAILY_DIR = "migrated_daily"
+
+
+class ImportStore:
+    """Lưu trữ bản ghi nhập kho theo tháng với chỉ mục (ngày, loại, nguyên liệu)"""
+
+    def __init__(self, imports_dir: Path = None):
+        """Khởi tạo kho lưu trữ nhập kho (chỉ mục được xây dựng ở lần truy vấn đầu tiên)"""
+        self.imports_dir = Path(imports_dir) if imports_dir else persistent_path_manager.data_path / "imports"
+        self.db_store = get_database_store()
+        # False khi bảng imports thiếu bản ghi (ghi database lỗi): truy vấn đọc từ file JSON
+        self._db_in_sync = True
+        self._lock = threading.RLock()
+
+        # Chỉ mục: ngày YYYY-MM-DD -> [(loại, nguyên liệu, bản ghi)], và danh sách ngày đã sắp xếp
+        self._by_date: Dict[str, List[Tuple[str, str, Dict[str, Any]]]] = None
+        self._dates: List[str] = []
+
+    def get_month_file(self, import_date: str) -> Path:
+        """Đường dẫn file nhập kho của tháng chứa ngày YYYY-MM-DD"""
+        return self.imports_dir / f"imports_{import_date[:7]}.json"
+
+    # === Đọc/ghi file ===
+
+    def _read_json_file(self, file_path: Path, default):
+        """Đọc một file JSON, trả về default nếu lỗi"""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, UnicodeDecodeError, OSError) as e:
+            print(f"⚠️ [Import Store] Could not read import file {file_path}: {e}")
+            return default
+
+    def _write_month_file(self, month: str):
+        """Ghi lại file của một tháng từ chỉ mục (ghi tạm rồi đổi tên)"""
+        month_data = {
+            import_date: [record for _, _, record in self._by_date[import_date]]
+            for import_date in self._dates if import_date.startswith(month)
+        }
+
+        file_path = self.imports_dir / f"imports_{month}.json"
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = file_path.with_suffix('.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(month_data, f, ensure_ascii=False, indent=2)
+        temp_file.replace(file_path)
+
+    # === Chỉ mục ===
+
+    def _add_to_index(self, import_date: str, record: Dict[str, Any]):
+        """Thêm một bản ghi vào chỉ mục"""
+        if import_date not in self._by_date:
+            self._by_date[import_date] = []
+            insort(self._dates, import_date)
+
+        import_type = (record.get('type') or '').lower()
+        self._by_date[import_date].append((import_type, record.get('ingredient', ''), record))
+
+    def _ensure_index(self):
+        """Xây dựng chỉ mục một lần từ các file tháng (chuyển đổi file theo ngày nếu còn)"""
+        if self._by_date is not None:
+            return
+
+        with self._lock:
+            if self._by_date is not None:
+                return
+
+            self._by_date = {}
+            self._dates = []
+            if not self.imports_dir.exists():
+                return
+
+            self.migrate_daily_files()
+
+            month_files = 0
+            with os.scandir(self.imports_dir) as it:
+                for dir_entry in it:
+                    if not parse_import_month_filename(dir_entry.name) or not dir_entry.is_file():
+                        continue
+
+                    month_files += 1
+                    month_data = self._read_json_file(Path(dir_entry.path), {})
+                    for import_date, records in month_data.items():
+                        for record in records:
+                            if isinstance(record, dict):
+                                self._add_to_index(import_date, record)
+
+            print(f"📇 [Import Store] Indexed {sum(len(v) for v in self._by_date.values())} imports "
+                  f"over {len(self._dates)} days from {month_files} month files")
+
+    def migrate_daily_files(self) -> int:
+        """
+        Chuyển các file import_YYYY-MM-DD.json cũ sang file theo tháng
+
+        File gốc được chuyển vào thư mục migrated_daily/ sau khi ghi xong file tháng.
+        Bản ghi đã có trong file tháng sẽ không bị thêm lại nếu lần chuyển trước bị gián đoạn.
+
+        Returns:
+            Số bản ghi đã chuyển
+        """
+        with self._lock:
+            if not self.imports_dir.exists():
+                return 0
+
+            daily_files = {}
+            with os.scandir(self.imports_dir) as it:
+                for dir_entry in it:
+                    import_date = parse_import_filename(dir_entry.name)
+                    if import_date and dir_entry.is_file():
+                        daily_files.setdefault(import_date[:7], []).append((import_date, Path(dir_entry.path)))
+
+            migrated = 0
+            for month, files in sorted(daily_files.items()):
+                month_file = self.imports_dir / f"imports_{month}.json"
+                month_data = self._read_json_file(month_file, {}) if month_file.exists() else {}
+
+                for import_date, file_path in sorted(files):
+                    records = self._read_json_file(file_path, None)
+                    if not isinstance(records, list):
+                        continue
+
+                    existing = month_data.setdefault(import_date, [])
+                    for record in records:
+                        if isinstance(record, dict) and record not in existing:
+                            existing.append(record)
+                            migrated += 1
+
+                month_data = dict(sorted(month_data.items()))
+                temp_file = month_file.with_suffix('.tmp')
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(month_data, f, ensure_ascii=False, indent=2)
+                temp_file.replace(month_file)
+
+                # Chỉ chuyển file gốc sau khi file tháng đã được ghi an toàn
+                migrated_dir = self.imports_dir / MIGRATED_DAILY_DIR
+                migrated_dir.mkdir(parents=True, exist_ok=True)
+                for _, file_path in files:
+                    shutil.move(str(file_path), str(migrated_dir / file_path.name))
+
+            if daily_files:
+                print(f"📦 [Import Store] Migrated {migrated} imports from "
+                      f"{sum(len(f) for f in daily_files.values())} daily files into {len(daily_files)} month files")
+            return migrated
+
+    # === API ===
+
+    def save_import(self, import_date: str, record: Dict[str, Any]) -> bool:
+        """
+        Thêm một bản ghi nhập kho cho ngày YYYY-MM-DD
+
+        File JSON luôn được ghi vì báo cáo tổng hợp và bản sao lưu dùng thư mục imports; lỗi ghi
+        database chỉ được ghi log (bản ghi đã lưu) và các truy vấn sau đó đọc từ file JSON
+        """
+        with self._lock:
+            self._ensure_index()
+            self._add_to_index(import_date, record)
+            self._write_month_file(import_date[:7])
+            bump_data_version(IMPORTS)
+
+            if self.db_store:
+                try:
+                    self.db_store.add_imports(import_date, [record])
+                except Exception as e:
+                    self._db_in_sync = False
+                    print(f"⚠️ [Import Store] Import saved to JSON but not to database, reading JSON files: {e}")
+
+        return True
+
+    def load_range(self, from_date: str = None, to_date: str = None, import_type: str = None,
+                   ingredient: str = None) -> List[Dict[str, Any]]:
+        """
+        Lấy các bản ghi nhập kho trong khoảng ngày (YYYY-MM-DD, bao gồm hai đầu)
+
+        Mỗi bản ghi trả về là bản sao có thêm trường 'date' (YYYY-MM-DD), sắp theo ngày tăng dần.
+        Lọc theo import_type sẽ bỏ qua các bản ghi cũ không có trường type.
+        """
+        if self.db_store and self._db_in_sync and ingredient is None:
+            try:
+                return self.db_store.query_imports(from_date, to_date, import_type)
+            except Exception as e:
+                print(f"⚠️ [Import Store] Database query failed, reading JSON files: {e}")
+
+        self._ensure_index()
+
+        with self._lock:
+            start = bisect_left(self._dates, from_date) if from_date else 0
+            end = bisect_right(self._dates, to_date) if to_date else len(self._dates)
+
+            records = []
+            for import_date in self._dates[start:end]:
+                for record_type, record_ingredient, record in self._by_date[import_date]:
+                    if import_type is not None and record_type != import_type:
+                        continue
+                    if ingredient is not None and record_ingredient != ingredient:
+                        continue
+                    record_copy = dict(record)
+                    record_copy['date'] = import_date
+                    records.append(record_copy)
+
+        return records
+
+    def load_recent(self, days: int) -> List[Dict[str, Any]]:
+        """Lấy các bản ghi nhập kho của N ngày gần nhất (tính cả hôm nay)"""
+        today = datetime.now()
+        return self.load_range((today - timedelta(days=days - 1)).strftime("%Y-%m-%d"),
+                               today.strftime("%Y-%m-%d"))
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """Lấy toàn bộ lịch sử nhập kho"""
+        return self.load_range()
+
+    def get_available_dates(self) -> List[str]:
+        """Danh sách các ngày có nhập kho (YYYY-MM-DD), cũ nhất trước"""
+        self._ensure_index()
+        with self._lock:
+            return list(self._dates)
+
+    def reload(self):
+        """Bỏ chỉ mục hiện tại để đọc lại từ file ở lần truy vấn tiếp theo"""
+        with self._lock:
+            self._by_date = None
+            self._dates = []
+        bump_data_version(IMPORTS)
+
+
+# Global instance
+import_store = ImportStore()
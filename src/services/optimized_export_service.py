@@ -12,7 +12,6 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
 from concurrent.futures import ThreadPoolExecutor
-import threading
 
 # Excel formatting imports
 from openpyxl import Workbook
@@ -21,6 +20,15 @@ from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.chart import BarChart, LineChart, Reference
 from openpyxl.drawing.image import Image
 
+try:
+    from src.core.inventory_ledger import load_warehouse_inventory
+    from src.utils.json_document_cache import json_document_cache, save_json_document
+    from src.core.capacity_solver import CapacitySolver
+except ImportError:
+    from core.inventory_ledger import load_warehouse_inventory
+    from utils.json_document_cache import json_document_cache, save_json_document
+    from core.capacity_solver import CapacitySolver
+
 
 class ExcelStyleManager:
     """Quản lý styles cho Excel với hiệu suất cao"""
@@ -89,10 +97,9 @@ class OptimizedExportService:
         print(f"   📁 Exports dir: {self.exports_dir}")
         print(f"   📁 Reports dir: {self.reports_dir}")
 
-        # Performance optimizations
-        self._data_cache = {}
-        self._cache_lock = threading.Lock()
-        self._cache_timeout = 300  # 5 minutes
+        # Performance optimizations: file JSON đọc qua cache dùng chung (kiểm tra mtime/kích thước)
+        self._document_cache = json_document_cache
+        self._loaded_files = set()
 
         # Style manager
         self.style_manager = ExcelStyleManager()
@@ -106,6 +113,7 @@ class OptimizedExportService:
         self.formula_manager = formula_manager
         self.threshold_manager = threshold_manager
         self.remaining_usage_calculator = remaining_usage_calculator
+        self.capacity_solver = CapacitySolver(formula_manager)
 
         # Initialize data managers if not provided (fallback to sample data)
         if not self.inventory_manager or not self.formula_manager:
@@ -148,33 +156,37 @@ class OptimizedExportService:
             return {}
 
     def get_real_time_production_capacity(self) -> Dict:
-        """Lấy khả năng sản xuất real-time từ formula và inventory managers"""
+        """Lấy khả năng sản xuất real-time (số mẻ tối đa của mọi preset cám + mix liên kết)"""
         try:
             if not self.formula_manager or not self.inventory_manager:
                 return {}
 
-            capacity = {
-                'feed_capacity': {},
-                'mix_capacity': {},
-                'bottleneck_ingredients': []
-            }
-
-            # Analyze feed production capacity
-            feed_formula = self._get_real_formula_data("feed")
-            feed_inventory = self._get_real_inventory_data("feed")
-            capacity['feed_capacity'] = self._calculate_production_capacity(feed_formula, feed_inventory)
+            # Một lần giải ma trận (preset × nguyên liệu) cho toàn bộ công thức
+            catalog = self.capacity_solver.solve()
+            presets = catalog['presets']
 
-            # Analyze mix production capacity
-            mix_formula = self._get_real_formula_data("mix")
-            mix_inventory = self._get_real_inventory_data("mix")
-            capacity['mix_capacity'] = self._calculate_production_capacity(mix_formula, mix_inventory)
-
-            # Identify bottleneck ingredients
-            capacity['bottleneck_ingredients'] = self._identify_bottlenecks(
-                [capacity['feed_capacity'], capacity['mix_capacity']]
-            )
+            # Nguyên liệu cổ chai: giới hạn ít nhất một preset còn dưới 10 mẻ
+            bottlenecks = []
+            for entry in catalog['bottlenecks']:
+                batches = [presets[name]['max_batches'] for name in entry['presets']
+                           if presets[name]['max_batches'] is not None]
+                possible_batches = min(batches) if batches else 0
+                if possible_batches < 10:
+                    bottlenecks.append({
+                        'ingredient': entry['ingredient'],
+                        'warehouse': entry['warehouse'],
+                        'current_stock': entry['stock'],
+                        'possible_batches': possible_batches,
+                        'presets': entry['presets'],
+                        'urgency': 'high' if possible_batches < 5 else 'medium'
+                    })
+            bottlenecks.sort(key=lambda x: (x['urgency'] != 'high', x['possible_batches']))
 
-            return capacity
+            return {
+                'preset_capacity': presets,
+                'preset_bottlenecks': catalog['bottlenecks'],
+                'bottleneck_ingredients': bottlenecks
+            }
 
         except Exception as e:
             print(f"Error getting real-time production capacity: {e}")
@@ -248,89 +260,12 @@ class OptimizedExportService:
             print(f"Error analyzing warehouse data: {e}")
             return {}
 
-    def _calculate_production_capacity(self, formula_data: Dict, inventory_data: Dict) -> Dict:
-        """Tính toán khả năng sản xuất"""
-        try:
-            capacity = {
-                'max_batches': 0,
-                'limiting_ingredients': [],
-                'ingredient_usage': {}
-            }
-
-            if not formula_data or not inventory_data:
-                return capacity
-
-            min_batches = float('inf')
-
-            # Process formula data
-            if isinstance(formula_data, dict):
-                if 'ingredients' in formula_data:
-                    ingredients = formula_data['ingredients']
-                elif 'formula' in formula_data:
-                    ingredients = [{'name': k, 'percentage': v} for k, v in formula_data['formula'].items()]
-                else:
-                    ingredients = [{'name': k, 'percentage': v} for k, v in formula_data.items()]
-
-                for ingredient in ingredients:
-                    if isinstance(ingredient, dict):
-                        name = ingredient.get('name', '')
-                        percentage = float(ingredient.get('percentage', 0))
-
-                        if percentage > 0:
-                            current_stock = self._get_ingredient_stock(name, inventory_data)
-                            usage_per_batch = (percentage / 100) * 1000  # For 1000kg batch
-                            possible_batches = int(current_stock / usage_per_batch) if usage_per_batch > 0 else 0
-
-                            capacity['ingredient_usage'][name] = {
-                                'stock': current_stock,
-                                'usage_per_batch': usage_per_batch,
-                                'possible_batches': possible_batches
-                            }
-
-                            if possible_batches < min_batches:
-                                min_batches = possible_batches
-                                capacity['limiting_ingredients'] = [name]
-                            elif possible_batches == min_batches:
-                                capacity['limiting_ingredients'].append(name)
-
-            capacity['max_batches'] = min_batches if min_batches != float('inf') else 0
-            return capacity
-
-        except Exception as e:
-            print(f"Error calculating production capacity: {e}")
-            return {}
-
-    def _identify_bottlenecks(self, capacity_data: List[Dict]) -> List[Dict]:
-        """Xác định các nguyên liệu cổ chai"""
-        try:
-            bottlenecks = []
-
-            for capacity in capacity_data:
-                for ingredient, usage_data in capacity.get('ingredient_usage', {}).items():
-                    possible_batches = usage_data.get('possible_batches', 0)
-                    if possible_batches < 10:  # Less than 10 batches possible
-                        bottlenecks.append({
-                            'ingredient': ingredient,
-                            'current_stock': usage_data.get('stock', 0),
-                            'possible_batches': possible_batches,
-                            'urgency': 'high' if possible_batches < 5 else 'medium'
-                        })
-
-            # Sort by urgency and possible batches
-            bottlenecks.sort(key=lambda x: (x['urgency'] == 'high', -x['possible_batches']))
-
-            return bottlenecks
-
-        except Exception as e:
-            print(f"Error identifying bottlenecks: {e}")
-            return []
-
     def _get_real_inventory_data(self, warehouse_type: str = None) -> Dict:
         """Lấy dữ liệu tồn kho thực từ inventory_manager"""
         try:
             if not self.inventory_manager:
                 print("⚠️ No inventory_manager available, using sample data")
-                return self._load_json_cached(self.config_dir / f"{warehouse_type}_inventory.json" if warehouse_type else self.config_dir / "feed_inventory.json")
+                return load_warehouse_inventory(warehouse_type or "feed")
 
             if warehouse_type:
                 # Get specific warehouse inventory
@@ -341,8 +276,8 @@ class OptimizedExportService:
 
         except Exception as e:
             print(f"Error getting real inventory data: {e}")
-            # Fallback to sample data
-            return self._load_json_cached(self.config_dir / f"{warehouse_type}_inventory.json" if warehouse_type else self.config_dir / "feed_inventory.json")
+            # Fallback to snapshot + ledger
+            return load_warehouse_inventory(warehouse_type or "feed")
 
     def _get_real_formula_data(self, formula_type: str) -> Dict:
         """Lấy dữ liệu công thức thực từ formula_manager"""
@@ -573,34 +508,16 @@ class OptimizedExportService:
             print(f"Error categorizing ingredient: {e}")
             return 'Nguyên liệu phụ'
 
-    def _load_json_cached(self, file_path: Path) -> Dict:
-        """Tải JSON với caching để tăng hiệu suất"""
-        cache_key = str(file_path)
-        current_time = time.time()
-
-        with self._cache_lock:
-            # Check cache
-            if cache_key in self._data_cache:
-                cached_data, cache_time = self._data_cache[cache_key]
-                if current_time - cache_time < self._cache_timeout:
-                    return cached_data
-
-            # Load from file
-            try:
-                if file_path.exists():
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        self._data_cache[cache_key] = (data, current_time)
-                        return data
-            except Exception as e:
-                print(f"Error loading {file_path}: {e}")
-
-            return {}
+    def _load_json_cached(self, file_path: Path, copy: bool = True) -> Dict:
+        """Tải JSON qua cache dùng chung (tự đọc lại khi file thay đổi)"""
+        self._loaded_files.add(file_path)
+        return self._document_cache.load(file_path, {}, copy)
 
     def _clear_cache(self):
         """Xóa cache khi cần"""
-        with self._cache_lock:
-            self._data_cache.clear()
+        for file_path in self._loaded_files:
+            self._document_cache.invalidate(file_path)
+        self._loaded_files.clear()
 
     def _ensure_sample_data(self):
         """Tạo dữ liệu mẫu với nhiều items hơn để test performance"""
@@ -662,9 +579,7 @@ class OptimizedExportService:
     def _save_json(self, file_path: Path, data: Dict):
         """Lưu dữ liệu JSON"""
         try:
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            save_json_document(file_path, data)
         except Exception as e:
             print(f"Error saving {file_path}: {e}")
 
@@ -1028,8 +943,8 @@ class OptimizedExportService:
             # Load all data concurrently
             with ThreadPoolExecutor(max_workers=4) as executor:
                 futures = {
-                    'feed_inventory': executor.submit(self._load_json_cached, self.config_dir / "feed_inventory.json"),
-                    'mix_inventory': executor.submit(self._load_json_cached, self.config_dir / "mix_inventory.json"),
+                    'feed_inventory': executor.submit(load_warehouse_inventory, "feed"),
+                    'mix_inventory': executor.submit(load_warehouse_inventory, "mix"),
                     'feed_formula': executor.submit(self._load_json_cached, self.config_dir / "feed_formula.json"),
                     'mix_formula': executor.submit(self._load_json_cached, self.config_dir / "mix_formula.json")
                 }
@@ -1182,7 +1097,7 @@ class OptimizedExportService:
 
             if file_path.exists():
                 try:
-                    month_data = self._load_json_cached(file_path)
+                    month_data = self._load_json_cached(file_path, copy=False)
 
                     # Lọc dữ liệu theo khoảng thời gian
                     for date_str, day_data in month_data.items():
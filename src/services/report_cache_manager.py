@@ -4,13 +4,43 @@ Report Cache Manager - Quản lý cache báo cáo tiêu thụ hàng ngày
 """
 
 import os
+import copy
 import json
 import time
+import atexit
 import hashlib
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, Optional, List
-from collections import defaultdict
+from typing import Dict, Any, Optional, List, Tuple, Iterable, Callable
+from collections import defaultdict, OrderedDict
+
+try:
+    from src.utils.report_files import parse_report_filename
+except ImportError:
+    from utils.report_files import parse_report_filename
+
+# Số báo cáo đã giải mã tối đa giữ trong bộ nhớ (tầng LRU trước cache trên đĩa)
+DEFAULT_MEMORY_CACHE_SIZE = 32
+
+# Ghi metadata sau khoảng thời gian này (giây) hoặc khi đủ số thay đổi
+METADATA_FLUSH_INTERVAL = 5.0
+METADATA_FLUSH_THRESHOLD = 50
+
+# Ngân sách mặc định cho cache trên đĩa
+DEFAULT_MAX_CACHE_BYTES = 50 * 1024 * 1024
+DEFAULT_MAX_CACHE_ENTRIES = 500
+EVICTION_POLICIES = ("lru", "lfu")
+
+# Chu kỳ kiểm tra (ms) khi không dùng được QFileSystemWatcher nhưng có vòng lặp sự kiện Qt
+INVALIDATION_POLL_INTERVAL_MS = 30000
+
+# File cấu hình mà báo cáo tiêu thụ hàng ngày được tính từ đó: đổi file nào thì cache loại báo cáo đó hết hiệu lực
+REPORT_CONFIG_DEPENDENCIES = {
+    "feed_formula.json": ("daily_consumption",),
+    "mix_formula.json": ("daily_consumption",),
+    "inventory.json": ("daily_consumption",),
+}
 
 class ReportCacheManager:
     """Quản lý cache báo cáo tiêu thụ hàng ngày"""
@@ -39,6 +69,47 @@ class ReportCacheManager:
         self.cache_metadata_file = self.cache_dir / "cache_metadata.json"
         self.cache_metadata = self._load_cache_metadata()
 
+        # Tầng LRU trong bộ nhớ: cache_key -> (fingerprint file nguồn, báo cáo đã giải mã)
+        self.memory_cache_size = DEFAULT_MEMORY_CACHE_SIZE
+        self._memory_cache: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+        # Hash nội dung theo fingerprint: đường dẫn -> (fingerprint, md5 nội dung)
+        self._content_hashes: Dict[str, Tuple[str, str]] = {}
+
+        # Bộ đếm hit/miss
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'content_hashes': 0, 'evictions': 0}
+
+        # Ghi metadata trì hoãn: gộp các thay đổi và ghi theo hẹn giờ, số thay đổi hoặc khi thoát
+        self.metadata_flush_interval = METADATA_FLUSH_INTERVAL
+        self.metadata_flush_threshold = METADATA_FLUSH_THRESHOLD
+        self._metadata_dirty = 0
+        self._flush_timer: Optional[threading.Timer] = None
+        self._flush_timer_delay = 0.0
+        # Số thứ tự thay đổi metadata và số thứ tự đã ghi ra đĩa (bỏ qua lần ghi không còn gì mới)
+        self._metadata_seq = 0
+        self._flushed_seq = 0
+        # Chụp và ghi metadata trong cùng một khóa để các lần ghi không chồng lên nhau sai thứ tự
+        self._flush_lock = threading.Lock()
+        atexit.register(self.flush_metadata)
+
+        # Ngân sách cache (lưu trong metadata để giữ qua các lần chạy)
+        budget = self.cache_metadata.get('budget', {})
+        self.max_cache_bytes = int(budget.get('max_bytes', DEFAULT_MAX_CACHE_BYTES))
+        self.max_cache_entries = int(budget.get('max_entries', DEFAULT_MAX_CACHE_ENTRIES))
+        self.eviction_policy = budget.get('policy', 'lru') if budget.get('policy') in EVICTION_POLICIES else 'lru'
+
+        # Thống kê dọn dẹp tích lũy (lưu trong metadata)
+        self.eviction_stats = self.cache_metadata.setdefault('eviction_stats', {
+            'budget_evictions': 0,
+            'expired_evictions': 0,
+            'bytes_reclaimed': 0,
+            'last_eviction': None
+        })
+
+        # Gọi khi một báo cáo được cache (dịch vụ theo dõi file dùng để thêm file nguồn)
+        self.source_cached_callback: Optional[Callable[[Path], None]] = None
+
     def _load_cache_metadata(self) -> Dict[str, Any]:
         """Tải metadata cache"""
         try:
@@ -55,13 +126,72 @@ class ReportCacheManager:
         }
 
     def _save_cache_metadata(self):
-        """Lưu metadata cache"""
+        """Lưu metadata cache ngay (ghi file tạm rồi đổi tên để không làm hỏng file)
+
+        Không gọi khi đang giữ self._lock: thứ tự khóa là _flush_lock rồi _lock.
+        """
         try:
-            with open(self.cache_metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache_metadata, f, ensure_ascii=False, indent=2)
+            with self._flush_lock:
+                with self._lock:
+                    if self._flush_timer is not None:
+                        self._flush_timer.cancel()
+                        self._flush_timer = None
+                    seq = self._metadata_seq
+                    if seq == self._flushed_seq:
+                        # Một lần ghi khác đã lưu thay đổi mới nhất
+                        self._metadata_dirty = 0
+                        return
+                    content = json.dumps(self.cache_metadata, ensure_ascii=False, separators=(',', ':'))
+                    self._metadata_dirty = 0
+
+                # Ghi đĩa ngoài khóa chính để các thao tác đọc cache không phải chờ
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                temp_file = self.cache_metadata_file.with_suffix('.tmp')
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                temp_file.replace(self.cache_metadata_file)
+                self._flushed_seq = seq
         except Exception as e:
+            with self._lock:
+                # Giữ thay đổi để lần hẹn giờ sau ghi lại
+                self._metadata_dirty = max(self._metadata_dirty, 1)
             print(f"Lỗi lưu metadata cache: {e}")
 
+    def _schedule_flush(self, delay: float):
+        """Hẹn ghi metadata trên luồng hẹn giờ (gọi khi đang giữ self._lock)"""
+        if self._flush_timer is not None:
+            if self._flush_timer_delay <= delay:
+                return
+            # Đủ số thay đổi: thay hẹn giờ dài bằng lần ghi ngay trên luồng hẹn giờ
+            self._flush_timer.cancel()
+        self._flush_timer = threading.Timer(delay, self.flush_metadata)
+        self._flush_timer.daemon = True
+        self._flush_timer_delay = delay
+        self._flush_timer.start()
+
+    def _mark_metadata_dirty(self, changes: int = 1):
+        """Ghi nhận thay đổi metadata; ghi file khi đủ số thay đổi hoặc hết thời gian chờ
+
+        Việc ghi luôn chạy trên luồng hẹn giờ nên hàm này an toàn khi người gọi đang giữ
+        self._lock và không bắt luồng đọc cache phải chờ I/O.
+        """
+        with self._lock:
+            self._metadata_dirty += changes
+            self._metadata_seq += 1
+            if self._metadata_dirty >= self.metadata_flush_threshold:
+                self._schedule_flush(0)
+            else:
+                self._schedule_flush(self.metadata_flush_interval)
+
+    def flush_metadata(self):
+        """Ghi metadata nếu còn thay đổi chưa lưu (gọi bởi hẹn giờ và khi thoát ứng dụng)"""
+        with self._lock:
+            if self._flush_timer is threading.current_thread():
+                self._flush_timer = None
+            if self._metadata_seq == self._flushed_seq:
+                return
+        self._save_cache_metadata()
+
     def _generate_cache_key(self, report_date: str, report_type: str = "daily_consumption",
                           additional_params: Dict = None) -> str:
         """Tạo key cache duy nhất"""
@@ -76,53 +206,108 @@ class ReportCacheManager:
         key_string = json.dumps(key_data, sort_keys=True)
         return hashlib.md5(key_string.encode('utf-8')).hexdigest()
 
-    def _get_source_file_hash(self, report_date: str) -> Optional[str]:
-        """Lấy hash của file báo cáo gốc với path validation"""
+    def _resolve_source_file(self, report_date: str) -> Path:
+        """Tìm file báo cáo gốc (chỉ dò đường dẫn cũ khi file chính không tồn tại)"""
+        primary_path = self.reports_dir / f"report_{report_date}.json"
+        if primary_path.exists():
+            return primary_path
+
         try:
-            # Use the same path validation as calculator
-            from src.services.daily_report_calculator import DailyReportCalculator
-            temp_calculator = DailyReportCalculator()
-            report_file = temp_calculator._validate_report_file_path(report_date)
+            from src.services.daily_report_calculator import daily_report_calculator
+        except ImportError:
+            from services.daily_report_calculator import daily_report_calculator
+        return daily_report_calculator._validate_report_file_path(report_date)
 
-            print(f"🔍 Checking report file: {report_file}")
+    def _get_source_fingerprint(self, report_date: str) -> Optional[Tuple[Path, str]]:
+        """Fingerprint rẻ (inode, kích thước, mtime_ns) của file báo cáo gốc"""
+        try:
+            report_file = self._resolve_source_file(report_date)
+            return report_file, self._stat_fingerprint(report_file.stat())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"❌ Error getting source fingerprint for {report_date}: {e}")
+            return None
 
-            if not report_file.exists():
-                print(f"⚠️ Report file not found: {report_file}")
-                return None
+    @staticmethod
+    def _stat_fingerprint(stat_result: os.stat_result) -> str:
+        """Fingerprint (inode, kích thước, mtime_ns) từ kết quả stat"""
+        return f"{stat_result.st_ino}:{stat_result.st_size}:{stat_result.st_mtime_ns}"
 
-            # Create hash from file content and modification time
-            with open(report_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+    def _get_content_hash(self, report_file: Path, fingerprint: str) -> str:
+        """MD5 nội dung file, chỉ tính lại khi fingerprint thay đổi"""
+        with self._lock:
+            cached = self._content_hashes.get(str(report_file))
+            if cached and cached[0] == fingerprint:
+                return cached[1]
 
-            # Include file modification time in hash for change detection
-            mtime = report_file.stat().st_mtime
-            hash_content = f"{content}_{mtime}"
+        with open(report_file, 'rb') as f:
+            content_hash = hashlib.md5(f.read()).hexdigest()
 
-            file_hash = hashlib.md5(hash_content.encode('utf-8')).hexdigest()
-            print(f"✅ Generated hash for {report_date}: {file_hash[:8]}...")
+        with self._lock:
+            self._content_hashes[str(report_file)] = (fingerprint, content_hash)
+            self._stats['content_hashes'] += 1
+        return content_hash
 
-            return file_hash
+    def _get_source_file_hash(self, report_date: str) -> Optional[str]:
+        """Lấy hash nội dung của file báo cáo gốc"""
+        source = self._get_source_fingerprint(report_date)
+        if not source:
+            return None
 
+        try:
+            report_file, fingerprint = source
+            return self._get_content_hash(report_file, fingerprint)
         except Exception as e:
             print(f"❌ Error getting source file hash for {report_date}: {e}")
             return None
 
-    def _is_cache_valid(self, cache_key: str, source_hash: str) -> bool:
-        """Kiểm tra cache có hợp lệ không"""
+    def _is_expired(self, cache_entry: Dict[str, Any]) -> bool:
+        """Kiểm tra entry cache đã quá thời gian hợp lệ chưa"""
+        cached_time = datetime.fromisoformat(cache_entry['created_at'])
+        return (datetime.now() - cached_time).total_seconds() > self.cache_validity_hours * 3600
+
+    def _is_source_unchanged(self, cache_entry: Dict[str, Any], report_file: Path, fingerprint: str) -> bool:
+        """So sánh file nguồn với entry cache: fingerprint trước, hash nội dung khi fingerprint khác"""
+        if cache_entry.get('source_fingerprint') == fingerprint:
+            return True
+
+        # File bị ghi lại/sao chép nhưng nội dung có thể không đổi
+        if cache_entry.get('source_hash') != self._get_content_hash(report_file, fingerprint):
+            return False
+
+        with self._lock:
+            cache_entry['source_fingerprint'] = fingerprint
+        self._mark_metadata_dirty()
+        return True
+
+    def _remember(self, cache_key: str, fingerprint: str, report_data: Dict[str, Any]):
+        """Đưa báo cáo vào tầng LRU trong bộ nhớ"""
+        with self._lock:
+            self._memory_cache[cache_key] = (fingerprint, report_data)
+            self._memory_cache.move_to_end(cache_key)
+            while len(self._memory_cache) > self.memory_cache_size:
+                self._memory_cache.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _forget(self, cache_key: str):
+        """Xóa báo cáo khỏi tầng LRU trong bộ nhớ"""
+        with self._lock:
+            self._memory_cache.pop(cache_key, None)
+
+    def _is_cache_valid(self, cache_key: str, report_file: Path, fingerprint: str) -> bool:
+        """Kiểm tra cache trên đĩa có hợp lệ không"""
         if cache_key not in self.cache_metadata['cache_entries']:
             return False
 
         cache_entry = self.cache_metadata['cache_entries'][cache_key]
 
         # Kiểm tra thời gian
-        cached_time = datetime.fromisoformat(cache_entry['created_at'])
-        now = datetime.now()
-
-        if (now - cached_time).total_seconds() > self.cache_validity_hours * 3600:
+        if self._is_expired(cache_entry):
             return False
 
-        # Kiểm tra hash file nguồn
-        if cache_entry.get('source_hash') != source_hash:
+        # Kiểm tra file nguồn
+        if not self._is_source_unchanged(cache_entry, report_file, fingerprint):
             return False
 
         # Kiểm tra file cache có tồn tại không
@@ -134,31 +319,54 @@ class ReportCacheManager:
 
     def get_cached_report(self, report_date: str, report_type: str = "daily_consumption",
                          additional_params: Dict = None) -> Optional[Dict[str, Any]]:
-        """Lấy báo cáo từ cache"""
+        """Lấy báo cáo từ cache (bộ nhớ trước, sau đó đến đĩa)"""
         try:
             # Tạo cache key
             cache_key = self._generate_cache_key(report_date, report_type, additional_params)
 
-            # Lấy hash file nguồn
-            source_hash = self._get_source_file_hash(report_date)
-            if not source_hash:
+            # Lấy fingerprint file nguồn
+            source = self._get_source_fingerprint(report_date)
+            if not source:
+                self._stats['misses'] += 1
                 return None
-
-            # Kiểm tra cache có hợp lệ không
-            if not self._is_cache_valid(cache_key, source_hash):
+            report_file, fingerprint = source
+
+            cache_entry = self.cache_metadata['cache_entries'].get(cache_key)
+
+            # Tầng 1: báo cáo đã giải mã trong bộ nhớ
+            with self._lock:
+                remembered = self._memory_cache.get(cache_key)
+                if remembered and cache_entry and remembered[0] == fingerprint \
+                        and not self._is_expired(cache_entry):
+                    self._memory_cache.move_to_end(cache_key)
+                    self._stats['memory_hits'] += 1
+                    cache_entry['last_accessed'] = datetime.now().isoformat()
+                    cache_entry['access_count'] = cache_entry.get('access_count', 0) + 1
+                    self._mark_metadata_dirty()
+                    return copy.deepcopy(remembered[1])
+
+            # Tầng 2: file cache trên đĩa
+            if not self._is_cache_valid(cache_key, report_file, fingerprint):
+                self._forget(cache_key)
+                self._stats['misses'] += 1
                 return None
 
-            # Tải dữ liệu cache
             cache_file = self.cache_dir / f"{cache_key}.json"
             with open(cache_file, 'r', encoding='utf-8') as f:
                 cached_data = json.load(f)
 
-            # Cập nhật thời gian truy cập
-            self.cache_metadata['cache_entries'][cache_key]['last_accessed'] = datetime.now().isoformat()
-            self._save_cache_metadata()
+            self._remember(cache_key, fingerprint, cached_data)
+            self._stats['disk_hits'] += 1
+
+            # Cập nhật thời gian truy cập (ghi file sau, gộp với các thay đổi khác)
+            with self._lock:
+                cache_entry = self.cache_metadata['cache_entries'][cache_key]
+                cache_entry['last_accessed'] = datetime.now().isoformat()
+                cache_entry['access_count'] = cache_entry.get('access_count', 0) + 1
+            self._mark_metadata_dirty()
 
             print(f"📋 [Cache] Loaded cached report for {report_date} ({report_type})")
-            return cached_data
+            return copy.deepcopy(cached_data)
 
         except Exception as e:
             print(f"Lỗi tải cache báo cáo {report_date}: {e}")
@@ -174,8 +382,10 @@ class ReportCacheManager:
             cache_key = self._generate_cache_key(report_date, report_type, additional_params)
             print(f"🔑 Cache key: {cache_key}")
 
-            # Lấy hash file nguồn
-            source_hash = self._get_source_file_hash(report_date)
+            # Lấy fingerprint và hash file nguồn
+            source = self._get_source_fingerprint(report_date)
+            fingerprint = source[1] if source else None
+            source_hash = self._get_content_hash(*source) if source else None
             if not source_hash:
                 print(f"⚠️ Cannot generate hash for source file {report_date}")
                 # Tạo hash từ dữ liệu báo cáo thay vì file nguồn
@@ -198,24 +408,41 @@ class ReportCacheManager:
             file_size = cache_file.stat().st_size
 
             # Cập nhật metadata
-            self.cache_metadata['cache_entries'][cache_key] = {
-                'report_date': report_date,
-                'report_type': report_type,
-                'source_hash': source_hash,
-                'created_at': datetime.now().isoformat(),
-                'last_accessed': datetime.now().isoformat(),
-                'file_size': file_size,
-                'cache_file': f"{cache_key}.json",
-                'additional_params': additional_params or {}
-            }
-
-            # Cập nhật tổng kích thước cache
-            self.cache_metadata['total_cache_size'] = sum(
-                entry.get('file_size', 0) for entry in self.cache_metadata['cache_entries'].values()
-            )
+            with self._lock:
+                self.cache_metadata['cache_entries'][cache_key] = {
+                    'report_date': report_date,
+                    'report_type': report_type,
+                    'source_hash': source_hash,
+                    'source_fingerprint': fingerprint,
+                    'source_file': str(source[0]) if source else None,
+                    'created_at': datetime.now().isoformat(),
+                    'last_accessed': datetime.now().isoformat(),
+                    'file_size': file_size,
+                    'access_count': 0,
+                    'cache_file': f"{cache_key}.json",
+                    'additional_params': additional_params or {}
+                }
+
+                # Cập nhật tổng kích thước cache
+                self.cache_metadata['total_cache_size'] = sum(
+                    entry.get('file_size', 0) for entry in self.cache_metadata['cache_entries'].values()
+                )
 
             # Lưu metadata
-            self._save_cache_metadata()
+            self._mark_metadata_dirty()
+
+            # Giữ cache trong ngân sách (không xóa báo cáo vừa lưu)
+            if self._is_over_budget():
+                self.enforce_cache_budget(keep_keys={cache_key})
+
+            # Giữ bản sao trong bộ nhớ cho lần đọc tiếp theo
+            if fingerprint:
+                self._remember(cache_key, fingerprint, copy.deepcopy(report_data))
+            else:
+                self._forget(cache_key)
+
+            if source and self.source_cached_callback:
+                self.source_cached_callback(source[0])
 
             print(f"✅ Report cached successfully: {cache_file.name} ({file_size} bytes)")
             return True
@@ -229,95 +456,293 @@ class ReportCacheManager:
     def invalidate_cache(self, report_date: str = None, report_type: str = None) -> int:
         """Vô hiệu hóa cache"""
         try:
-            removed_count = 0
-            keys_to_remove = []
+            with self._lock:
+                removed_count = 0
+                keys_to_remove = []
 
-            for cache_key, cache_entry in self.cache_metadata['cache_entries'].items():
-                should_remove = False
+                for cache_key, cache_entry in self.cache_metadata['cache_entries'].items():
+                    should_remove = False
 
-                # Nếu chỉ định ngày cụ thể
-                if report_date and cache_entry.get('report_date') == report_date:
-                    should_remove = True
+                    # Nếu chỉ định ngày cụ thể
+                    if report_date and cache_entry.get('report_date') == report_date:
+                        should_remove = True
 
-                # Nếu chỉ định loại báo cáo cụ thể
-                if report_type and cache_entry.get('report_type') == report_type:
-                    should_remove = True
+                    # Nếu chỉ định loại báo cáo cụ thể
+                    if report_type and cache_entry.get('report_type') == report_type:
+                        should_remove = True
 
-                # Nếu không chỉ định gì, xóa tất cả
-                if not report_date and not report_type:
-                    should_remove = True
+                    # Nếu không chỉ định gì, xóa tất cả
+                    if not report_date and not report_type:
+                        should_remove = True
 
-                if should_remove:
-                    # Xóa file cache
-                    cache_filename = cache_entry.get('cache_file', f"{cache_key}.json")
-                    cache_file = self.cache_dir / cache_filename
-                    if cache_file.exists():
-                        cache_file.unlink()
-                        print(f"🗑️ Deleted cache file: {cache_filename}")
+                    if should_remove:
+                        # Xóa file cache
+                        cache_filename = cache_entry.get('cache_file', f"{cache_key}.json")
+                        cache_file = self.cache_dir / cache_filename
+                        if cache_file.exists():
+                            cache_file.unlink()
+                            print(f"🗑️ Deleted cache file: {cache_filename}")
 
-                    keys_to_remove.append(cache_key)
-                    removed_count += 1
+                        keys_to_remove.append(cache_key)
+                        removed_count += 1
 
-            # Xóa entries khỏi metadata
-            for key in keys_to_remove:
-                del self.cache_metadata['cache_entries'][key]
+                # Xóa entries khỏi metadata
+                for key in keys_to_remove:
+                    del self.cache_metadata['cache_entries'][key]
+                    self._forget(key)
 
-            # Cập nhật tổng kích thước
-            self.cache_metadata['total_cache_size'] = sum(
-                entry.get('file_size', 0) for entry in self.cache_metadata['cache_entries'].values()
-            )
+                # Cập nhật tổng kích thước
+                self.cache_metadata['total_cache_size'] = sum(
+                    entry.get('file_size', 0) for entry in self.cache_metadata['cache_entries'].values()
+                )
 
-            self._save_cache_metadata()
+                if removed_count:
+                    self._mark_metadata_dirty(removed_count)
 
-            print(f"🗑️ [Cache] Invalidated {removed_count} cache entries")
-            return removed_count
+                print(f"🗑️ [Cache] Invalidated {removed_count} cache entries")
+                return removed_count
 
         except Exception as e:
             print(f"Lỗi vô hiệu hóa cache: {e}")
             return 0
 
-    def cleanup_expired_cache(self) -> int:
-        """Dọn dẹp cache hết hạn"""
+    def invalidate_reports(self, report_dates) -> int:
+        """Vô hiệu hóa cache của nhiều ngày báo cáo trong một lần duyệt"""
+        report_dates = set(report_dates)
+        if not report_dates:
+            return 0
+
         try:
-            removed_count = 0
-            keys_to_remove = []
-            now = datetime.now()
+            with self._lock:
+                keys_to_remove = [
+                    cache_key for cache_key, cache_entry in self.cache_metadata['cache_entries'].items()
+                    if cache_entry.get('report_date') in report_dates
+                ]
+                for cache_key in keys_to_remove:
+                    self._remove_cache_entry(cache_key)
+
+                if keys_to_remove:
+                    self.cache_metadata['total_cache_size'] = sum(
+                        entry.get('file_size', 0) for entry in self.cache_metadata['cache_entries'].values()
+                    )
+                    self._mark_metadata_dirty(len(keys_to_remove))
+
+                print(f"🗑️ [Cache] Invalidated {len(keys_to_remove)} cache entries for {len(report_dates)} reports")
+                return len(keys_to_remove)
 
-            for cache_key, cache_entry in self.cache_metadata['cache_entries'].items():
-                cached_time = datetime.fromisoformat(cache_entry['created_at'])
+        except Exception as e:
+            print(f"Lỗi vô hiệu hóa cache: {e}")
+            return 0
 
-                # Kiểm tra thời gian hết hạn
-                if (now - cached_time).total_seconds() > self.cache_validity_hours * 3600:
-                    # Xóa file cache
-                    cache_filename = cache_entry.get('cache_file', f"{cache_key}.json")
-                    cache_file = self.cache_dir / cache_filename
-                    if cache_file.exists():
-                        cache_file.unlink()
-                        print(f"🧹 Cleaned expired cache: {cache_filename}")
+    def get_cached_source_files(self) -> Dict[str, Path]:
+        """File báo cáo gốc của các báo cáo đang được cache: report_date -> đường dẫn"""
+        with self._lock:
+            return {
+                entry['report_date']: Path(entry.get('source_file') or
+                                           self.reports_dir / f"report_{entry['report_date']}.json")
+                for entry in self.cache_metadata['cache_entries'].values()
+            }
 
-                    keys_to_remove.append(cache_key)
-                    removed_count += 1
+    def invalidate_changed_sources(self, report_dates: Iterable[str] = None) -> List[str]:
+        """
+        Vô hiệu hóa cache của các báo cáo có file nguồn thay đổi kể từ lúc cache
+
+        Chỉ stat file nguồn của các báo cáo đang được cache (không quét thư mục báo cáo).
+
+        Args:
+            report_dates: Chỉ kiểm tra các ngày này (None = tất cả báo cáo đang cache)
+
+        Returns:
+            Danh sách ngày báo cáo đã bị vô hiệu hóa
+        """
+        wanted = set(report_dates) if report_dates is not None else None
+        with self._lock:
+            entries = [
+                (entry['report_date'], entry.get('source_file'), entry.get('source_fingerprint'))
+                for entry in self.cache_metadata['cache_entries'].values()
+                if wanted is None or entry['report_date'] in wanted
+            ]
+
+        changed_dates = set()
+        for report_date, source_file, cached_fingerprint in entries:
+            source_path = Path(source_file) if source_file else self.reports_dir / f"report_{report_date}.json"
+            try:
+                fingerprint = self._stat_fingerprint(source_path.stat())
+            except OSError:
+                fingerprint = None
+            if fingerprint != cached_fingerprint:
+                changed_dates.add(report_date)
+
+        for report_date in sorted(changed_dates):
+            self.invalidate_cache(report_date)
+        return sorted(changed_dates)
 
-            # Xóa entries khỏi metadata
-            for key in keys_to_remove:
-                del self.cache_metadata['cache_entries'][key]
+    def cleanup_expired_cache(self) -> int:
+        """Dọn dẹp cache hết hạn"""
+        try:
+            with self._lock:
+                removed_count = 0
+                keys_to_remove = []
+                now = datetime.now()
+
+                for cache_key, cache_entry in self.cache_metadata['cache_entries'].items():
+                    # Kiểm tra thời gian hết hạn
+                    if self._is_expired(cache_entry):
+                        # Xóa file cache
+                        cache_filename = cache_entry.get('cache_file', f"{cache_key}.json")
+                        cache_file = self.cache_dir / cache_filename
+                        if cache_file.exists():
+                            cache_file.unlink()
+                            print(f"🧹 Cleaned expired cache: {cache_filename}")
+
+                        keys_to_remove.append(cache_key)
+                        removed_count += 1
+
+                # Xóa entries khỏi metadata
+                for key in keys_to_remove:
+                    del self.cache_metadata['cache_entries'][key]
+                    self._forget(key)
+
+                # Cập nhật metadata
+                self.cache_metadata['last_cleanup'] = now.isoformat()
+                self.cache_metadata['total_cache_size'] = sum(
+                    entry.get('file_size', 0) for entry in self.cache_metadata['cache_entries'].values()
+                )
+
+                self._mark_metadata_dirty(removed_count + 1)
+
+                if removed_count > 0:
+                    print(f"🧹 [Cache] Cleaned up {removed_count} expired cache entries")
+
+                return removed_count
 
-            # Cập nhật metadata
-            self.cache_metadata['last_cleanup'] = now.isoformat()
-            self.cache_metadata['total_cache_size'] = sum(
-                entry.get('file_size', 0) for entry in self.cache_metadata['cache_entries'].values()
-            )
+        except Exception as e:
+            print(f"Lỗi dọn dẹp cache: {e}")
+            return 0
 
-            self._save_cache_metadata()
+    def set_cache_budget(self, max_bytes: int = None, max_entries: int = None, policy: str = None):
+        """
+        Cấu hình ngân sách cache trên đĩa
+
+        Args:
+            max_bytes: Tổng dung lượng tối đa của các file cache
+            max_entries: Số báo cáo cache tối đa
+            policy: 'lru' (ít dùng gần đây nhất) hoặc 'lfu' (ít lượt dùng nhất)
+        """
+        if policy is not None and policy not in EVICTION_POLICIES:
+            raise ValueError(f"Invalid eviction policy: {policy}")
+
+        with self._lock:
+            if max_bytes is not None:
+                self.max_cache_bytes = int(max_bytes)
+            if max_entries is not None:
+                self.max_cache_entries = int(max_entries)
+            if policy is not None:
+                self.eviction_policy = policy
+
+            self.cache_metadata['budget'] = {
+                'max_bytes': self.max_cache_bytes,
+                'max_entries': self.max_cache_entries,
+                'policy': self.eviction_policy
+            }
 
-            if removed_count > 0:
-                print(f"🧹 [Cache] Cleaned up {removed_count} expired cache entries")
+        self._mark_metadata_dirty()
+        if self._is_over_budget():
+            self.enforce_cache_budget()
+
+    def _is_over_budget(self) -> bool:
+        """Kiểm tra cache có vượt ngân sách không"""
+        with self._lock:
+            return (self.cache_metadata.get('total_cache_size', 0) > self.max_cache_bytes or
+                    len(self.cache_metadata['cache_entries']) > self.max_cache_entries)
+
+    def _eviction_order_key(self, cache_entry: Dict[str, Any]):
+        """Khóa sắp xếp: entry đứng trước bị xóa trước"""
+        last_accessed = cache_entry.get('last_accessed') or cache_entry.get('created_at', '')
+        if self.eviction_policy == 'lfu':
+            return (cache_entry.get('access_count', 0), last_accessed)
+        return (last_accessed,)
+
+    def _remove_cache_entry(self, cache_key: str) -> int:
+        """Xóa file cache và entry metadata, trả về số byte thu hồi"""
+        cache_entry = self.cache_metadata['cache_entries'].pop(cache_key)
+        cache_file = self.cache_dir / cache_entry.get('cache_file', f"{cache_key}.json")
+        try:
+            cache_file.unlink()
+        except FileNotFoundError:
+            pass
+        self._forget(cache_key)
+        return cache_entry.get('file_size', 0)
+
+    def enforce_cache_budget(self, keep_keys: set = None) -> Dict[str, int]:
+        """
+        Xóa cache hết hạn, sau đó xóa theo chính sách LRU/LFU cho đến khi nằm trong ngân sách
+
+        Returns:
+            Số entry đã xóa (hết hạn / vượt ngân sách) và số byte thu hồi
+        """
+        keep_keys = keep_keys or set()
+        result = {'expired': 0, 'evicted': 0, 'bytes_reclaimed': 0}
 
-            return removed_count
+        try:
+            with self._lock:
+                entries = self.cache_metadata['cache_entries']
+
+                # Giới hạn theo tuổi: entry hết hạn không bao giờ được dùng lại
+                for cache_key in [k for k, e in entries.items() if k not in keep_keys and self._is_expired(e)]:
+                    result['bytes_reclaimed'] += self._remove_cache_entry(cache_key)
+                    result['expired'] += 1
+
+                total_size = sum(entry.get('file_size', 0) for entry in entries.values())
+
+                # Giới hạn theo dung lượng và số lượng
+                if total_size > self.max_cache_bytes or len(entries) > self.max_cache_entries:
+                    candidates = sorted(
+                        (k for k in entries if k not in keep_keys),
+                        key=lambda k: self._eviction_order_key(entries[k])
+                    )
+                    for cache_key in candidates:
+                        if total_size <= self.max_cache_bytes and len(entries) <= self.max_cache_entries:
+                            break
+                        reclaimed = self._remove_cache_entry(cache_key)
+                        total_size -= reclaimed
+                        result['bytes_reclaimed'] += reclaimed
+                        result['evicted'] += 1
+
+                self.cache_metadata['total_cache_size'] = total_size
+
+                if result['expired'] or result['evicted']:
+                    self.eviction_stats['expired_evictions'] += result['expired']
+                    self.eviction_stats['budget_evictions'] += result['evicted']
+                    self.eviction_stats['bytes_reclaimed'] += result['bytes_reclaimed']
+                    self.eviction_stats['last_eviction'] = datetime.now().isoformat()
+                    self._mark_metadata_dirty(result['expired'] + result['evicted'])
+
+                    print(f"🧹 [Cache] Evicted {result['evicted']} ({self.eviction_policy}) and "
+                          f"{result['expired']} expired entries, reclaimed "
+                          f"{round(result['bytes_reclaimed'] / 1024, 1)} KB")
 
         except Exception as e:
-            print(f"Lỗi dọn dẹp cache: {e}")
-            return 0
+            print(f"Lỗi áp dụng ngân sách cache: {e}")
+
+        return result
+
+    def get_hit_statistics(self) -> Dict[str, Any]:
+        """Thống kê hit/miss của cache trong phiên làm việc hiện tại"""
+        with self._lock:
+            hits = self._stats['memory_hits'] + self._stats['disk_hits']
+            lookups = hits + self._stats['misses']
+            return {
+                'hits': hits,
+                'memory_hits': self._stats['memory_hits'],
+                'disk_hits': self._stats['disk_hits'],
+                'misses': self._stats['misses'],
+                'hit_rate': round(hits / lookups * 100, 1) if lookups else 0.0,
+                'content_hashes_computed': self._stats['content_hashes'],
+                'memory_entries': len(self._memory_cache),
+                'memory_capacity': self.memory_cache_size,
+                'memory_evictions': self._stats['evictions']
+            }
 
     def get_cache_statistics(self) -> Dict[str, Any]:
         """Lấy thống kê cache"""
@@ -346,7 +771,16 @@ class ReportCacheManager:
                 'cache_validity_hours': self.cache_validity_hours,
                 'type_breakdown': dict(type_stats),
                 'last_cleanup': self.cache_metadata.get('last_cleanup'),
-                'cache_directory': str(self.cache_dir)
+                'cache_directory': str(self.cache_dir),
+                'max_cache_bytes': self.max_cache_bytes,
+                'max_cache_mb': round(self.max_cache_bytes / (1024 * 1024), 2),
+                'max_cache_entries': self.max_cache_entries,
+                'eviction_policy': self.eviction_policy,
+                'budget_evictions': self.eviction_stats.get('budget_evictions', 0),
+                'expired_evictions': self.eviction_stats.get('expired_evictions', 0),
+                'bytes_reclaimed': self.eviction_stats.get('bytes_reclaimed', 0),
+                'last_eviction': self.eviction_stats.get('last_eviction'),
+                **self.get_hit_statistics()
             }
 
         except Exception as e:
@@ -378,83 +812,256 @@ def get_cache_stats() -> Dict[str, Any]:
     return report_cache_manager.get_cache_statistics()
 
 class CacheInvalidationService:
-    """Dịch vụ tự động vô hiệu hóa cache khi dữ liệu thay đổi"""
+    """
+    Dịch vụ tự động vô hiệu hóa cache khi dữ liệu thay đổi
 
-    def __init__(self):
-        """Khởi tạo dịch vụ"""
-        self.cache_manager = report_cache_manager
+    Dùng QFileSystemWatcher theo dõi thư mục báo cáo, thư mục cấu hình và file nguồn của
+    các báo cáo đang được cache. Khi không có Qt (hoặc không theo dõi được), chuyển sang
+    kiểm tra định kỳ fingerprint của các file đang cache.
+    """
+
+    def __init__(self, cache_manager: ReportCacheManager = None):
+        """Khởi tạo dịch vụ (không quét thư mục; việc theo dõi bắt đầu khi gọi start())"""
+        self.cache_manager = cache_manager or report_cache_manager
 
         # Use persistent path manager for consistent paths
         from src.utils.persistent_paths import persistent_path_manager
         self.reports_dir = persistent_path_manager.reports_path
-
-        print(f"🔧 CacheInvalidationService initialized:")
-        print(f"   📁 Reports dir: {self.reports_dir}")
-
-        self.file_timestamps = {}
-        self._load_file_timestamps()
-
-    def _load_file_timestamps(self):
-        """Tải timestamps của các file báo cáo"""
-        try:
-            if self.reports_dir.exists():
-                for report_file in self.reports_dir.glob("report_*.json"):
-                    if report_file.is_file():
-                        self.file_timestamps[str(report_file)] = report_file.stat().st_mtime
-                        print(f"📊 Loaded timestamp for: {report_file.name}")
-        except Exception as e:
-            print(f"❌ Lỗi tải timestamps: {e}")
+        self.config_dir = persistent_path_manager.config_path
+
+        self.mode = "idle"  # idle | watching | polling
+        self.poll_interval_ms = INVALIDATION_POLL_INTERVAL_MS
+        self._watcher = None
+        self._poll_timer = None
+        self._lock = threading.RLock()
+
+        # Fingerprint các file cấu hình (tạo ở lần kiểm tra đầu tiên)
+        self._config_fingerprints: Optional[Dict[str, str]] = None
+
+        # Báo cáo bị vô hiệu hóa từ sự kiện, trả về ở lần gọi check_and_invalidate_changed_files tiếp theo
+        self._recent_invalidations: List[str] = []
+        self._listeners: List[Callable[[str, List[str]], None]] = []
+        self.stats = {'events': 0, 'polls': 0, 'invalidated': 0, 'config_changes': 0}
+
+    # === Đăng ký lắng nghe ===
+
+    def add_listener(self, callback: Callable[[str, List[str]], None]):
+        """
+        Đăng ký callback(kind, paths) khi dữ liệu thay đổi
+
+        kind là 'reports' (paths = ngày báo cáo bị vô hiệu hóa) hoặc 'config' (paths = file cấu hình đã đổi)
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str, List[str]], None]):
+        """Hủy đăng ký callback"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, kind: str, paths: List[str]):
+        """Gọi các callback đã đăng ký"""
+        for callback in list(self._listeners):
+            try:
+                callback(kind, paths)
+            except Exception as e:
+                print(f"⚠️ [Cache Invalidation] Listener error: {e}")
+
+    # === Theo dõi ===
+
+    def start(self) -> str:
+        """
+        Bắt đầu theo dõi thay đổi (gọi lại nhiều lần không sao)
+
+        Returns:
+            Chế độ đang dùng: 'watching' hoặc 'polling'
+        """
+        with self._lock:
+            if self.mode != "idle":
+                return self.mode
+
+            try:
+                from PyQt5.QtCore import QCoreApplication, QFileSystemWatcher, QTimer
+            except ImportError:
+                return self._start_polling(None)
+
+            # QFileSystemWatcher cần QCoreApplication; thử lại ở lần gọi sau
+            if QCoreApplication.instance() is None:
+                return "polling"
+
+            watcher = QFileSystemWatcher()
+            directories = [str(d) for d in (self.reports_dir, self.config_dir) if d.exists()]
+            if directories and watcher.addPaths(directories):
+                return self._start_polling(QTimer)
+
+            self._watcher = watcher
+            self._watcher.directoryChanged.connect(self._on_directory_changed)
+            self._watcher.fileChanged.connect(self._on_file_changed)
+            self.cache_manager.source_cached_callback = self._watch_file
+
+            for source_file in self.cache_manager.get_cached_source_files().values():
+                self._watch_file(source_file)
+
+            self.mode = "watching"
+            # Ghi nhận trạng thái ban đầu để sự kiện đầu tiên có cái để so sánh
+            self._check_config_files()
+            print(f"👀 [Cache Invalidation] Watching {len(directories)} directories and "
+                  f"{len(self._watcher.files())} cached report files")
+            return self.mode
+
+    def _start_polling(self, timer_class) -> str:
+        """Chuyển sang kiểm tra định kỳ (dùng QTimer nếu có vòng lặp sự kiện Qt)"""
+        self.mode = "polling"
+        if timer_class is not None:
+            self._poll_timer = timer_class()
+            self._poll_timer.timeout.connect(self.check_and_invalidate_changed_files)
+            self._poll_timer.start(self.poll_interval_ms)
+        print(f"🔁 [Cache Invalidation] File watcher unavailable, polling cached report files")
+        return self.mode
+
+    def stop(self):
+        """Dừng theo dõi"""
+        with self._lock:
+            if self._watcher is not None:
+                self.cache_manager.source_cached_callback = None
+                self._watcher.deleteLater()
+                self._watcher = None
+            if self._poll_timer is not None:
+                self._poll_timer.stop()
+                self._poll_timer = None
+            self.mode = "idle"
+
+    def _watch_file(self, file_path: Path):
+        """Theo dõi một file nguồn của báo cáo đã cache"""
+        if self._watcher is not None and file_path.exists() and str(file_path) not in self._watcher.files():
+            self._watcher.addPath(str(file_path))
+
+    def _on_file_changed(self, path: str):
+        """File đang theo dõi bị sửa, thay thế hoặc xóa"""
+        self.stats['events'] += 1
+        file_path = Path(path)
+
+        # Ghi kiểu file tạm + đổi tên làm watcher bỏ theo dõi file cũ
+        if file_path.exists():
+            self._watch_file(file_path)
+
+        if file_path.parent == self.config_dir:
+            self._check_config_files()
+            return
+
+        report_date = parse_report_filename(file_path.name)
+        if report_date:
+            self._invalidate_dates([report_date])
+
+    def _on_directory_changed(self, path: str):
+        """File được thêm, xóa hoặc đổi tên trong thư mục đang theo dõi"""
+        self.stats['events'] += 1
+        if Path(path) == self.config_dir:
+            self._check_config_files()
+            return
+
+        # Chỉ file nguồn của báo cáo đang cache mới cần kiểm tra
+        self._invalidate_dates(None)
+        for source_file in self.cache_manager.get_cached_source_files().values():
+            self._watch_file(source_file)
+
+    # === Kiểm tra thay đổi ===
+
+    def _invalidate_dates(self, report_dates: Optional[List[str]]) -> List[str]:
+        """Vô hiệu hóa cache của các báo cáo có file nguồn đã đổi"""
+        invalidated = self.cache_manager.invalidate_changed_sources(report_dates)
+        if invalidated:
+            with self._lock:
+                self._recent_invalidations.extend(d for d in invalidated if d not in self._recent_invalidations)
+            self.stats['invalidated'] += len(invalidated)
+            print(f"🔄 [Cache Invalidation] Invalidated cache for {', '.join(invalidated)} (file changed)")
+            self._notify('reports', invalidated)
+        return invalidated
+
+    def _scan_config_files(self) -> Dict[str, str]:
+        """Fingerprint các file JSON trong thư mục cấu hình"""
+        fingerprints = {}
+        if not self.config_dir.exists():
+            return fingerprints
+        with os.scandir(self.config_dir) as it:
+            for dir_entry in it:
+                if dir_entry.name.endswith('.json') and dir_entry.is_file():
+                    fingerprints[dir_entry.path] = ReportCacheManager._stat_fingerprint(dir_entry.stat())
+        return fingerprints
+
+    def _check_config_files(self) -> List[str]:
+        """So sánh thư mục cấu hình với lần kiểm tra trước và báo các file đã đổi"""
+        current = self._scan_config_files()
+        with self._lock:
+            previous = self._config_fingerprints
+            self._config_fingerprints = current
+
+        if previous is None:
+            return []
+
+        changed = sorted(path for path in set(previous) | set(current) if previous.get(path) != current.get(path))
+        if changed:
+            self.stats['config_changes'] += len(changed)
+            self._invalidate_config_dependents(changed)
+            self._notify('config', changed)
+        return changed
+
+    def _invalidate_config_dependents(self, changed: List[str]) -> int:
+        """Vô hiệu hóa các loại báo cáo được tính từ file cấu hình vừa đổi"""
+        report_types = sorted({report_type
+                               for path in changed
+                               for report_type in REPORT_CONFIG_DEPENDENCIES.get(Path(path).name, ())})
+        removed = 0
+        for report_type in report_types:
+            removed += self.cache_manager.invalidate_cache(report_type=report_type)
+        if removed:
+            self.stats['invalidated'] += removed
+            names = ', '.join(Path(path).name for path in changed)
+            print(f"🔄 [Cache Invalidation] Invalidated {removed} cached {'/'.join(report_types)} reports ({names} changed)")
+        return removed
 
     def check_and_invalidate_changed_files(self) -> List[str]:
-        """Kiểm tra và vô hiệu hóa cache cho các file đã thay đổi"""
-        invalidated_reports = []
+        """
+        Kiểm tra và vô hiệu hóa cache cho các file đã thay đổi
 
+        Khi đang theo dõi bằng watcher chỉ trả về các báo cáo đã bị vô hiệu hóa từ lần gọi trước;
+        ở chế độ kiểm tra định kỳ sẽ stat file nguồn của các báo cáo đang cache.
+        """
         try:
-            if not self.reports_dir.exists():
-                print(f"⚠️ Reports directory does not exist: {self.reports_dir}")
-                return invalidated_reports
-
-            for report_file in self.reports_dir.glob("report_*.json"):
-                if not report_file.is_file():
-                    continue
-
-                file_path = str(report_file)
-                current_mtime = report_file.stat().st_mtime
-
-                # Kiểm tra file mới hoặc đã thay đổi
-                if (file_path not in self.file_timestamps or
-                    self.file_timestamps[file_path] != current_mtime):
-
-                    # Trích xuất ngày từ tên file
-                    report_date = report_file.stem.replace('report_', '')
+            if self.start() != "watching":
+                self.stats['polls'] += 1
+                self._invalidate_dates(None)
+                self._check_config_files()
 
-                    # Vô hiệu hóa cache
-                    removed_count = self.cache_manager.invalidate_cache(report_date, "daily_consumption")
-
-                    if removed_count > 0:
-                        invalidated_reports.append(report_date)
-                        print(f"🔄 [Cache Invalidation] Invalidated cache for {report_date} (file changed)")
-
-                    # Cập nhật timestamp
-                    self.file_timestamps[file_path] = current_mtime
+            with self._lock:
+                invalidated_reports = self._recent_invalidations
+                self._recent_invalidations = []
+            return invalidated_reports
 
         except Exception as e:
             print(f"❌ Lỗi kiểm tra thay đổi file: {e}")
-
-        return invalidated_reports
+            return []
 
     def monitor_file_changes(self) -> Dict[str, Any]:
         """Giám sát thay đổi file và trả về thống kê"""
         invalidated = self.check_and_invalidate_changed_files()
 
+        if self._watcher is not None:
+            monitored_files = len(self._watcher.files())
+        else:
+            monitored_files = len(self.cache_manager.get_cached_source_files())
+
         return {
             'invalidated_reports': invalidated,
             'total_invalidated': len(invalidated),
-            'monitored_files': len(self.file_timestamps),
+            'monitored_files': monitored_files,
+            'mode': self.mode,
+            'events': self.stats['events'],
+            'polls': self.stats['polls'],
             'last_check': datetime.now().isoformat()
         }
 
-# Global cache invalidation service
+# Global cache invalidation service (chưa theo dõi cho đến khi gọi start())
 cache_invalidation_service = CacheInvalidationService()
 
 def monitor_and_invalidate_cache() -> Dict[str, Any]:
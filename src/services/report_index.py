@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Report Index - Chỉ mục bền vững cho các file báo cáo hàng ngày
+Cho phép truy vấn lịch sử theo khoảng ngày mà không cần đọc lại từng file báo cáo
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+
+try:
+    from src.utils.persistent_paths import persistent_path_manager
+    from src.utils.report_files import parse_report_filename, summarize_report
+    from src.utils.database_store import get_database_store
+    from src.core.usage_aggregator import usage_aggregator
+    from src.core.demand_forecaster import demand_forecaster
+    from src.utils.data_versions import bump_data_version, REPORTS
+except ImportError:
+    from utils.persistent_paths import persistent_path_manager
+    from utils.report_files import parse_report_filename, summarize_report
+    from utils.database_store import get_database_store
+    from core.usage_aggregator import usage_aggregator
+    from core.demand_forecaster import demand_forecaster
+    from utils.data_versions import bump_data_version, REPORTS
+
+# Phiên bản cấu trúc file chỉ mục - tăng khi thay đổi định dạng entry
+INDEX_VERSION = 1
+
+
+class ReportIndex:
+    """Chỉ mục ngày -> (đường dẫn, mtime, kích thước, tổng cám, tổng mix, số mẻ) cho báo cáo"""
+
+    def __init__(self, reports_dir: Path = None, index_file: Path = None):
+        """Khởi tạo chỉ mục báo cáo"""
+        self.reports_dir = Path(reports_dir) if reports_dir else persistent_path_manager.reports_path
+        self.index_file = Path(index_file) if index_file else \
+            persistent_path_manager.data_path / "cache" / "report_index.json"
+
+        self._lock = threading.RLock()
+        self._dirty = False
+
+        # Khi bật DB_BACKEND, chỉ mục được lưu trong bảng reports thay vì file JSON
+        self.db_store = get_database_store()
+        self._changed_names = set()
+        self._removed_names = set()
+        self._pending_contents = {}
+
+        # entries: tên file -> thông tin báo cáo
+        self.entries = self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Tải chỉ mục từ cơ sở dữ liệu hoặc từ file"""
+        if self.db_store:
+            try:
+                return self.db_store.load_report_entries()
+            except Exception as e:
+                print(f"⚠️ [Report Index] Error loading index from database, rebuilding: {e}")
+                return {}
+
+        try:
+            if self.index_file.exists():
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+
+                if data.get('version') == INDEX_VERSION and isinstance(data.get('entries'), dict):
+                    return data['entries']
+
+                print(f"⚠️ [Report Index] Index version mismatch, rebuilding: {self.index_file}")
+        except Exception as e:
+            print(f"⚠️ [Report Index] Error loading index, rebuilding: {e}")
+
+        return {}
+
+    def _save_index(self):
+        """Lưu chỉ mục ra file (ghi tạm rồi đổi tên để tránh hỏng file)"""
+        if self.db_store:
+            self._save_index_to_database()
+            return
+
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.index_file.with_suffix('.tmp')
+
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': INDEX_VERSION,
+                    'updated_at': datetime.now().isoformat(),
+                    'entries': self.entries
+                }, f, ensure_ascii=False)
+
+            temp_file.replace(self.index_file)
+            self._changed_names.clear()
+            self._removed_names.clear()
+            self._dirty = False
+        except Exception as e:
+            print(f"❌ [Report Index] Error saving index: {e}")
+
+    def _save_index_to_database(self):
+        """Ghi các entry đã thay đổi vào bảng reports trong một giao dịch"""
+        try:
+            changed = {name: self.entries[name] for name in self._changed_names if name in self.entries}
+            removed = self._removed_names - set(changed)
+            if removed:
+                self.db_store.delete_reports(removed)
+            if changed:
+                self.db_store.upsert_reports(changed, self._pending_contents)
+
+            self._changed_names.clear()
+            self._removed_names.clear()
+            self._pending_contents.clear()
+            self._dirty = False
+        except Exception as e:
+            print(f"❌ [Report Index] Error saving index to database: {e}")
+
+    def _build_entry(self, file_name: str, date_str: str, stat_result: os.stat_result,
+                     report_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Tạo entry chỉ mục từ dữ liệu báo cáo đã đọc"""
+        entry = {
+            'date': date_str,
+            'path': str(self.reports_dir / file_name),
+            'mtime_ns': stat_result.st_mtime_ns,
+            'size': stat_result.st_size
+        }
+        entry.update(summarize_report(report_data))
+        return entry
+
+    def _index_file_entry(self, file_name: str, date_str: str, stat_result: os.stat_result) -> bool:
+        """Đọc một file báo cáo và cập nhật entry tương ứng"""
+        file_path = self.reports_dir / file_name
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                report_data = json.load(f)
+
+            if not isinstance(report_data, dict):
+                raise ValueError("report content is not an object")
+
+            self.entries[file_name] = self._build_entry(file_name, date_str, stat_result, report_data)
+            self._changed_names.add(file_name)
+            if self.db_store:
+                self._pending_contents[file_name] = report_data
+            usage_aggregator.record_report(date_str, report_data, stat_result)
+            demand_forecaster.notify_report_changed(date_str)
+            return True
+
+        except Exception as e:
+            print(f"⚠️ [Report Index] Error indexing {file_path}: {e}")
+            # Không đưa file lỗi vào chỉ mục để lần sau thử lại
+            self.entries.pop(file_name, None)
+            return False
+
+    def refresh(self) -> Dict[str, int]:
+        """Đồng bộ chỉ mục với thư mục báo cáo (chỉ đọc lại các file mới hoặc đã thay đổi)"""
+        stats = {'added': 0, 'updated': 0, 'removed': 0}
+
+        with self._lock:
+            seen = set()
+
+            try:
+                if self.reports_dir.exists():
+                    with os.scandir(self.reports_dir) as it:
+                        for dir_entry in it:
+                            date_str = parse_report_filename(dir_entry.name)
+                            if not date_str or not dir_entry.is_file():
+                                continue
+
+                            seen.add(dir_entry.name)
+                            stat_result = dir_entry.stat()
+                            existing = self.entries.get(dir_entry.name)
+
+                            if existing and existing.get('mtime_ns') == stat_result.st_mtime_ns \
+                                    and existing.get('size') == stat_result.st_size:
+                                continue
+
+                            if self._index_file_entry(dir_entry.name, date_str, stat_result):
+                                stats['updated' if existing else 'added'] += 1
+                                self._dirty = True
+            except Exception as e:
+                print(f"❌ [Report Index] Error scanning {self.reports_dir}: {e}")
+                return stats
+
+            # Xóa các entry của file đã bị xóa bên ngoài ứng dụng
+            for file_name in list(self.entries.keys()):
+                if file_name not in seen:
+                    removed_date = self.entries.pop(file_name)['date']
+                    usage_aggregator.remove_report(removed_date)
+                    demand_forecaster.notify_report_changed(removed_date)
+                    self._removed_names.add(file_name)
+                    stats['removed'] += 1
+                    self._dirty = True
+
+            if self._dirty:
+                self._save_index()
+                bump_data_version(REPORTS)
+                print(f"🔄 [Report Index] Synced: +{stats['added']} ~{stats['updated']} -{stats['removed']}")
+
+        return stats
+
+    def record_report(self, report_file, report_data: Dict[str, Any]) -> bool:
+        """Cập nhật chỉ mục ngay sau khi ứng dụng ghi một file báo cáo"""
+        try:
+            report_file = Path(report_file)
+            date_str = parse_report_filename(report_file.name)
+            if not date_str:
+                return False
+
+            # Chỉ mục chỉ theo dõi thư mục báo cáo chính
+            if report_file.parent.resolve() != self.reports_dir.resolve():
+                return False
+
+            stat_result = report_file.stat()
+
+            with self._lock:
+                self.entries[report_file.name] = self._build_entry(
+                    report_file.name, date_str, stat_result, report_data
+                )
+                self._changed_names.add(report_file.name)
+                if self.db_store:
+                    self._pending_contents[report_file.name] = report_data
+                self._save_index()
+                bump_data_version(REPORTS)
+
+            usage_aggregator.record_report(date_str, report_data, stat_result)
+            demand_forecaster.notify_report_changed(date_str)
+            return True
+
+        except Exception as e:
+            print(f"❌ [Report Index] Error recording {report_file}: {e}")
+            return False
+
+    def record_reports(self, reports: List[Tuple[Any, Dict[str, Any]]]) -> int:
+        """Cập nhật chỉ mục cho nhiều báo cáo vừa được ghi lại, chỉ lưu chỉ mục một lần"""
+        recorded = []
+        with self._lock:
+            for report_file, report_data in reports:
+                try:
+                    report_file = Path(report_file)
+                    date_str = parse_report_filename(report_file.name)
+                    if not date_str or report_file.parent.resolve() != self.reports_dir.resolve():
+                        continue
+
+                    stat_result = report_file.stat()
+                    self.entries[report_file.name] = self._build_entry(
+                        report_file.name, date_str, stat_result, report_data
+                    )
+                    self._changed_names.add(report_file.name)
+                    if self.db_store:
+                        self._pending_contents[report_file.name] = report_data
+                    recorded.append((date_str, report_data, stat_result))
+                except Exception as e:
+                    print(f"❌ [Report Index] Error recording {report_file}: {e}")
+
+            if recorded:
+                self._save_index()
+                bump_data_version(REPORTS)
+
+        for date_str, report_data, stat_result in recorded:
+            usage_aggregator.record_report(date_str, report_data, stat_result)
+            demand_forecaster.notify_report_changed(date_str)
+        return len(recorded)
+
+    def remove_report(self, report_file) -> bool:
+        """Xóa một báo cáo khỏi chỉ mục"""
+        with self._lock:
+            file_name = Path(report_file).name
+            entry = self.entries.pop(file_name, None)
+            if entry is not None:
+                self._removed_names.add(file_name)
+                self._save_index()
+                bump_data_version(REPORTS)
+                usage_aggregator.remove_report(entry['date'])
+                demand_forecaster.notify_report_changed(entry['date'])
+                return True
+        return False
+
+    def query_range(self, from_date: str = None, to_date: str = None,
+                    validate: bool = True) -> List[Dict[str, Any]]:
+        """
+        Lấy danh sách báo cáo trong khoảng ngày (YYYYMMDD, bao gồm hai đầu), mới nhất trước
+
+        Args:
+            from_date: Ngày bắt đầu, None để không giới hạn
+            to_date: Ngày kết thúc, None để không giới hạn
+            validate: Đồng bộ với thư mục báo cáo trước khi truy vấn
+        """
+        if validate:
+            self.refresh()
+
+        with self._lock:
+            results = [
+                dict(entry) for entry in self.entries.values()
+                if (not from_date or entry['date'] >= from_date) and
+                   (not to_date or entry['date'] <= to_date)
+            ]
+
+        results.sort(key=lambda entry: (entry['date'], entry['path']), reverse=True)
+        return results
+
+    def get_entry(self, report_date: str, validate: bool = True) -> Optional[Dict[str, Any]]:
+        """Lấy entry chỉ mục cho một ngày YYYYMMDD"""
+        matches = self.query_range(report_date, report_date, validate=validate)
+        return matches[0] if matches else None
+
+    def get_available_dates(self, validate: bool = True) -> List[str]:
+        """Lấy danh sách các ngày có báo cáo, mới nhất trước"""
+        dates = []
+        for entry in self.query_range(validate=validate):
+            if entry['date'] not in dates:
+                dates.append(entry['date'])
+        return dates
+
+    def rebuild(self) -> int:
+        """Xóa và xây dựng lại toàn bộ chỉ mục"""
+        with self._lock:
+            self._removed_names.update(self.entries.keys())
+            self.entries = {}
+            self._dirty = True
+        self.refresh()
+        return len(self.entries)
+
+
+# Global instance
+report_index = ReportIndex()
+
+# Convenience functions
+def record_report_in_index(report_file, report_data: Dict[str, Any]) -> bool:
+    """Cập nhật chỉ mục sau khi lưu báo cáo"""
+    return report_index.record_report(report_file, report_data)
+
+def query_reports(from_date: str = None, to_date: str = None) -> List[Dict[str, Any]]:
+    """Lấy danh sách báo cáo trong khoảng ngày"""
+    return report_index.query_range(from_date, to_date)
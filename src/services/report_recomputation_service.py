@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Report Recomputation Service - Tính lại hàng loạt báo cáo ngày sau khi sửa công thức
+
+Từ số mẻ (feed_usage), công thức cám (formula_usage) và công thức mix theo ô/cột/khu đã lưu
+trong mỗi report_*.json, tính lại feed_ingredients, mix_ingredients và các tổng bằng
+FeedUsageEngine với preset hiện tại. Các báo cáo được xử lý song song trong process pool;
+chế độ dry-run chỉ trả về chênh lệch mà không ghi file. Sau khi ghi, chỉ mục báo cáo và cache
+báo cáo được cập nhật trong một lần.
+"""
+
+import os
+import json
+import types
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable
+
+# Chỉ import engine ở cấp module: process con không cần tạo chỉ mục/cache báo cáo
+try:
+    from src.core.feed_usage_engine import FeedUsageEngine
+except ImportError:
+    from core.feed_usage_engine import FeedUsageEngine
+
+# Các trường được tính lại trong báo cáo
+RECOMPUTED_FIELDS = ("feed_ingredients", "mix_ingredients", "total_feed", "total_mix",
+                     "total_batches", "total_batches_by_area", "batch_count")
+
+# Chênh lệch nhỏ hơn mức này (kg/mẻ) được coi là không đổi
+DIFF_TOLERANCE = 1e-6
+
+# Dưới số báo cáo này chạy tuần tự (chi phí khởi tạo process lớn hơn lợi ích)
+MIN_PARALLEL_REPORTS = 8
+
+# Engine của từng process con, tạo một lần trong initializer
+_worker_engine: Optional[FeedUsageEngine] = None
+
+
+def _init_worker(feed_presets: Dict[str, Dict[str, float]], mix_presets: Dict[str, Dict[str, float]]):
+    """Khởi tạo engine với bản chụp preset cho process hiện tại"""
+    global _worker_engine
+    _worker_engine = FeedUsageEngine(types.SimpleNamespace(
+        feed_presets=feed_presets, mix_presets=mix_presets, presets_version=0
+    ))
+
+
+def _diff_values(old_value, new_value) -> bool:
+    """True nếu hai giá trị số khác nhau vượt ngưỡng"""
+    try:
+        return abs(float(old_value or 0) - float(new_value or 0)) > DIFF_TOLERANCE
+    except (TypeError, ValueError):
+        return old_value != new_value
+
+
+def _diff_report(old_report: Dict[str, Any], new_report: Dict[str, Any]) -> Dict[str, Any]:
+    """Chênh lệch giữa báo cáo cũ và báo cáo tính lại: trường -> (cũ, mới) hoặc {khóa: (cũ, mới)}"""
+    diff = {}
+    for field in RECOMPUTED_FIELDS:
+        old_value, new_value = old_report.get(field), new_report.get(field)
+        if isinstance(new_value, dict):
+            old_value = old_value if isinstance(old_value, dict) else {}
+            changes = {
+                key: (old_value.get(key), new_value.get(key))
+                for key in list(old_value) + [k for k in new_value if k not in old_value]
+                if _diff_values(old_value.get(key), new_value.get(key))
+            }
+            if changes:
+                diff[field] = changes
+        elif _diff_values(old_value, new_value):
+            diff[field] = (old_value, new_value)
+    return diff
+
+
+def _recompute_report_file(report_path: str, dry_run: bool) -> Dict[str, Any]:
+    """Tính lại một file báo cáo (chạy trong process con hoặc tuần tự)"""
+    result = {'path': report_path, 'status': 'unchanged', 'diff': {}}
+    try:
+        with open(report_path, 'r', encoding='utf-8') as f:
+            report_data = json.load(f)
+
+        if not isinstance(report_data, dict) or not report_data.get('feed_usage') \
+                or not report_data.get('formula_usage'):
+            result['status'] = 'skipped'
+            return result
+
+        usage = _worker_engine.calculate_report(report_data)
+        new_report = dict(report_data)
+        new_report.update({
+            'feed_ingredients': usage['feed_ingredients'],
+            'mix_ingredients': usage['mix_ingredients'],
+            'total_feed': usage['total_feed'],
+            'total_mix': usage['total_mix'],
+            'total_batches': usage['total_batches'],
+            'total_batches_by_area': usage['total_batches_by_area'],
+            'batch_count': usage['total_batches']
+        })
+
+        result['diff'] = _diff_report(report_data, new_report)
+        if not result['diff']:
+            return result
+
+        result['status'] = 'changed'
+        if not dry_run:
+            new_report['recomputed_at'] = datetime.now().isoformat(timespec='seconds')
+            temp_path = report_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(new_report, f, ensure_ascii=False, indent=4)
+            os.replace(temp_path, report_path)
+            result['status'] = 'updated'
+            result['report_data'] = new_report
+
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    return result
+
+
+class ReportRecomputationService:
+    """Tính lại feed_ingredients/mix_ingredients của các báo cáo đã lưu theo preset hiện tại"""
+
+    def __init__(self, formula_manager=None):
+        """Khởi tạo (FormulaManager được tạo ở lần chạy đầu nếu không truyền vào)"""
+        self._formula_manager = formula_manager
+
+    @property
+    def formula_manager(self):
+        """FormulaManager cung cấp preset hiện tại"""
+        if self._formula_manager is None:
+            try:
+                from src.core.formula_manager import FormulaManager
+            except ImportError:
+                from core.formula_manager import FormulaManager
+            self._formula_manager = FormulaManager()
+        return self._formula_manager
+
+    def _run(self, report_paths: List[str], dry_run: bool, max_workers: Optional[int],
+             progress_callback: Optional[Callable[[int, int, Dict[str, Any]], None]]) -> List[Dict[str, Any]]:
+        """Chạy tính lại song song (hoặc tuần tự với ít báo cáo), gọi progress_callback sau mỗi báo cáo"""
+        presets = (dict(self.formula_manager.feed_presets), dict(self.formula_manager.mix_presets))
+        total = len(report_paths)
+        results = []
+
+        def report_progress(result):
+            results.append(result)
+            if progress_callback:
+                try:
+                    progress_callback(len(results), total, result)
+                except Exception as e:
+                    print(f"⚠️ [Report Recompute] Progress callback error: {e}")
+
+        if total >= MIN_PARALLEL_REPORTS and max_workers != 1:
+            try:
+                with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                         initargs=presets) as executor:
+                    futures = [executor.submit(_recompute_report_file, path, dry_run) for path in report_paths]
+                    for future in as_completed(futures):
+                        report_progress(future.result())
+                return results
+            except Exception as e:
+                # Ví dụ môi trường không cho tạo process: tiếp tục tuần tự với các báo cáo còn lại
+                print(f"⚠️ [Report Recompute] Process pool unavailable, running sequentially: {e}")
+
+        _init_worker(*presets)
+        done = {result['path'] for result in results}
+        for path in report_paths:
+            if path not in done:
+                report_progress(_recompute_report_file(path, dry_run))
+        return results
+
+    def _publish(self, results: List[Dict[str, Any]]):
+        """Cập nhật chỉ mục báo cáo và vô hiệu hóa cache cho các báo cáo đã ghi lại"""
+        updated = [result for result in results if result['status'] == 'updated']
+        if not updated:
+            return
+
+        try:
+            from src.services.report_index import report_index
+            from src.services.report_cache_manager import report_cache_manager
+            from src.utils.json_document_cache import invalidate_json_document
+        except ImportError:
+            from services.report_index import report_index
+            from services.report_cache_manager import report_cache_manager
+            from utils.json_document_cache import invalidate_json_document
+
+        for result in updated:
+            invalidate_json_document(result['path'])
+        report_index.record_reports([(result['path'], result['report_data']) for result in updated])
+        report_cache_manager.invalidate_reports(result['date'] for result in updated)
+
+    def recompute_reports(self, from_date: str = None, to_date: str = None, dry_run: bool = False,
+                          max_workers: int = None,
+                          progress_callback: Callable[[int, int, Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        """
+        Tính lại các báo cáo trong khoảng ngày theo preset cám/mix hiện tại
+
+        Args:
+            from_date: Ngày bắt đầu YYYYMMDD (None = không giới hạn)
+            to_date: Ngày kết thúc YYYYMMDD (None = không giới hạn)
+            dry_run: Chỉ tính chênh lệch, không ghi file
+            max_workers: Số process (None = theo số CPU, 1 = tuần tự)
+            progress_callback: Hàm (đã xong, tổng số, kết quả của một báo cáo)
+
+        Returns:
+            Thống kê theo trạng thái và chênh lệch theo ngày ('date' -> diff) của các báo cáo thay đổi
+        """
+        try:
+            from src.services.report_index import report_index
+        except ImportError:
+            from services.report_index import report_index
+
+        entries = report_index.query_range(from_date, to_date)
+        date_by_path = {entry['path']: entry['date'] for entry in entries}
+        report_paths = sorted(date_by_path)
+
+        mode = "dry-run" if dry_run else "write"
+        print(f"🔄 [Report Recompute] Recomputing {len(report_paths)} reports "
+              f"({from_date or '...'} - {to_date or '...'}, {mode})")
+
+        results = self._run(report_paths, dry_run, max_workers, progress_callback)
+        for result in results:
+            result['date'] = date_by_path.get(result['path'])
+
+        if not dry_run:
+            self._publish(results)
+
+        summary = {'total': len(results), 'dry_run': dry_run,
+                   'updated': 0, 'changed': 0, 'unchanged': 0, 'skipped': 0, 'error': 0,
+                   'diffs': {}, 'errors': {}}
+        for result in sorted(results, key=lambda r: r['date'] or ''):
+            summary[result['status']] += 1
+            if result['diff']:
+                summary['diffs'][result['date']] = result['diff']
+            if result['status'] == 'error':
+                summary['errors'][result['date']] = result.get('error')
+                print(f"❌ [Report Recompute] {result['path']}: {result.get('error')}")
+
+        print(f"✅ [Report Recompute] {summary['updated']} updated, {summary['changed']} would change, "
+              f"{summary['unchanged']} unchanged, {summary['skipped']} skipped, {summary['error']} errors")
+        return summary
+
+
+# Global instance
+report_recomputation_service = ReportRecomputationService()
+
+# Convenience functions
+def recompute_reports(from_date: str = None, to_date: str = None, dry_run: bool = False,
+                      max_workers: int = None, progress_callback=None) -> Dict[str, Any]:
+    """Tính lại các báo cáo trong khoảng ngày theo preset hiện tại"""
+    return report_recomputation_service.recompute_reports(from_date, to_date, dry_run,
+                                                          max_workers, progress_callback)
+
+
+def main():
+    """Dòng lệnh: report_recomputation_service [từ YYYYMMDD] [đến YYYYMMDD] [--dry-run]"""
+    import sys
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    summary = recompute_reports(
+        from_date=args[0] if len(args) > 0 else None,
+        to_date=args[1] if len(args) > 1 else None,
+        dry_run="--dry-run" in sys.argv,
+        progress_callback=lambda done, total, result: print(f"   [{done}/{total}] {result['status']}: "
+                                                           f"{Path(result['path']).name}")
+    )
+    for date_str, diff in summary['diffs'].items():
+        print(f"📅 {date_str}:")
+        for field, change in diff.items():
+            print(f"   {field}: {change}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,13 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
+try:
+    from src.utils.json_document_cache import load_json_document, save_json_document
+    from src.core.inventory_ledger import load_warehouse_inventory
+except ImportError:
+    from utils.json_document_cache import load_json_document, save_json_document
+    from core.inventory_ledger import load_warehouse_inventory
+
 class WarehouseExportService:
     """Dịch vụ xuất báo cáo kho hàng"""
     
@@ -89,21 +96,13 @@ class WarehouseExportService:
     def _save_json(self, file_path: Path, data: Dict):
         """Lưu dữ liệu JSON"""
         try:
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            save_json_document(file_path, data)
         except Exception as e:
             print(f"Lỗi lưu file {file_path}: {e}")
     
     def _load_json(self, file_path: Path) -> Dict:
         """Tải dữ liệu JSON"""
-        try:
-            if file_path.exists():
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Lỗi đọc file {file_path}: {e}")
-        return {}
+        return load_json_document(file_path, {})
     
     def _get_stock_status(self, quantity: float) -> str:
         """Xác định trạng thái tồn kho"""
@@ -131,7 +130,7 @@ class WarehouseExportService:
             
             # Xuất dữ liệu kho cám
             if include_feed:
-                feed_data = self._load_json(self.config_dir / "feed_inventory.json")
+                feed_data = load_warehouse_inventory("feed")
                 for item_name, quantity in feed_data.items():
                     export_data.append({
                         'Loại Kho': 'Kho Cám',
@@ -143,7 +142,7 @@ class WarehouseExportService:
             
             # Xuất dữ liệu kho mix
             if include_mix:
-                mix_data = self._load_json(self.config_dir / "mix_inventory.json")
+                mix_data = load_warehouse_inventory("mix")
                 for item_name, quantity in mix_data.items():
                     export_data.append({
                         'Loại Kho': 'Kho Mix',
@@ -258,9 +257,9 @@ class WarehouseExportService:
     def export_summary_report(self) -> Tuple[bool, str]:
         """Xuất báo cáo tổng hợp"""
         try:
-            # Tải dữ liệu
-            feed_inventory = self._load_json(self.config_dir / "feed_inventory.json")
-            mix_inventory = self._load_json(self.config_dir / "mix_inventory.json")
+            # Tải dữ liệu (tồn kho = snapshot + các biến động trong ledger)
+            feed_inventory = load_warehouse_inventory("feed")
+            mix_inventory = load_warehouse_inventory("mix")
             feed_formula = self._load_json(self.config_dir / "feed_formula.json")
             mix_formula = self._load_json(self.config_dir / "mix_formula.json")
             
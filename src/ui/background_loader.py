@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Background Loader - Tải dữ liệu cho bảng trong QThreadPool và điền bảng theo từng khối
+
+Hàm tải (đọc file, phân tích JSON, lọc, sắp xếp) chạy ngoài luồng giao diện và trả về các hàng
+đã sẵn sàng hiển thị. Các hàng được gửi về luồng giao diện theo từng khối qua signal nên bảng
+được điền dần và giao diện không bị đứng khi khoảng ngày lớn. Mỗi lần start() hủy lần tải trước
+đó: khối của lần tải cũ bị bỏ qua, còn hàm tải cũ dừng ở lần kiểm tra hủy kế tiếp.
+"""
+
+import traceback
+from typing import Any, Callable, Iterable
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# Số hàng mỗi khối gửi về luồng giao diện
+DEFAULT_CHUNK_SIZE = 200
+
+
+class _LoadTask(QRunnable):
+    """Một lần tải chạy trong QThreadPool"""
+
+    def __init__(self, loader: "BackgroundLoader", generation: int,
+                 load_rows: Callable[[Callable[[], bool]], Iterable[Any]]):
+        super().__init__()
+        self.setAutoDelete(True)
+        self.loader = loader
+        self.generation = generation
+        self.load_rows = load_rows
+
+    def run(self):
+        """Chạy hàm tải và gửi kết quả theo từng khối"""
+        loader, generation = self.loader, self.generation
+
+        def is_cancelled() -> bool:
+            return loader.generation != generation
+
+        total = 0
+        try:
+            chunk = []
+            for row in self.load_rows(is_cancelled):
+                if is_cancelled():
+                    return
+                chunk.append(row)
+                if len(chunk) >= loader.chunk_size:
+                    loader._chunk_loaded.emit(generation, chunk)
+                    total += len(chunk)
+                    chunk = []
+
+            if is_cancelled():
+                return
+            if chunk:
+                loader._chunk_loaded.emit(generation, chunk)
+                total += len(chunk)
+            loader._load_done.emit(generation, total)
+
+        except Exception as e:
+            if is_cancelled():
+                return
+            print(f"❌ [Background Loader] {loader.name} failed: {e}")
+            traceback.print_exc()
+            try:
+                loader._load_failed.emit(generation, str(e))
+            except RuntimeError:
+                # Đối tượng loader đã bị hủy cùng cửa sổ
+                pass
+
+
+class BackgroundLoader(QObject):
+    """Chạy hàm tải trong QThreadPool, phát các hàng về luồng giao diện theo từng khối"""
+
+    # Signal công khai (luôn phát trên luồng giao diện, chỉ cho lần tải hiện tại)
+    rows_ready = pyqtSignal(list)
+    load_finished = pyqtSignal(int)
+    load_failed = pyqtSignal(str)
+
+    # Signal nội bộ phát từ luồng nền, kèm số thứ tự lần tải để bỏ qua kết quả cũ
+    _chunk_loaded = pyqtSignal(int, list)
+    _load_done = pyqtSignal(int, int)
+    _load_failed = pyqtSignal(int, str)
+
+    def __init__(self, name: str, parent: QObject = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 thread_pool: QThreadPool = None):
+        """
+        Args:
+            name: Tên dùng trong log
+            parent: QObject cha (thường là cửa sổ chứa bảng)
+            chunk_size: Số hàng mỗi khối
+            thread_pool: QThreadPool dùng để chạy (None = QThreadPool.globalInstance())
+        """
+        super().__init__(parent)
+        self.name = name
+        self.chunk_size = max(1, int(chunk_size))
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        self.generation = 0
+        self._running = False
+
+        self._chunk_loaded.connect(self._on_chunk_loaded)
+        self._load_done.connect(self._on_load_done)
+        self._load_failed.connect(self._on_load_failed)
+
+    def start(self, load_rows: Callable[[Callable[[], bool]], Iterable[Any]]) -> int:
+        """
+        Bắt đầu một lần tải mới (hủy lần tải đang chạy nếu có)
+
+        Args:
+            load_rows: Hàm chạy trong luồng nền, nhận hàm is_cancelled() và trả về (hoặc yield)
+                các hàng. Hàm không được truy cập widget; nên kiểm tra is_cancelled() giữa các
+                bước tốn thời gian.
+
+        Returns:
+            Số thứ tự của lần tải
+        """
+        self.cancel()
+        self._running = True
+        self.thread_pool.start(_LoadTask(self, self.generation, load_rows))
+        return self.generation
+
+    def cancel(self):
+        """Hủy lần tải đang chạy; các khối còn lại của nó sẽ không được phát"""
+        if self._running:
+            print(f"⏹️ [Background Loader] {self.name}: previous load cancelled")
+        self.generation += 1
+        self._running = False
+
+    def is_running(self) -> bool:
+        """Có lần tải nào đang chạy không"""
+        return self._running
+
+    def _on_chunk_loaded(self, generation: int, rows: list):
+        if generation == self.generation:
+            self.rows_ready.emit(rows)
+
+    def _on_load_done(self, generation: int, total: int):
+        if generation == self.generation:
+            self._running = False
+            self.load_finished.emit(total)
+
+    def _on_load_failed(self, generation: int, message: str):
+        if generation == self.generation:
+            self._running = False
+            self.load_failed.emit(message)
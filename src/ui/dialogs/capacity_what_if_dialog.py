@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Capacity What-If Dialog - Giả định khả năng sản xuất
+Cho phép nhập thay đổi tồn kho (ví dụ nhận thêm 10 tấn Bắp) và đổi công thức của một khu,
+rồi so sánh số ngày đủ nguyên liệu và số mẻ tối đa của các preset với hiện tại
+"""
+
+from typing import Dict, List
+
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox,
+                            QGroupBox, QTextEdit, QTableWidget, QTableWidgetItem, QDoubleSpinBox,
+                            QHeaderView, QMessageBox, QApplication, QAbstractItemView)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+
+try:
+    from src.core.capacity_solver import CapacitySolver
+    from src.core.inventory_ledger import load_warehouse_inventory
+except ImportError:
+    from core.capacity_solver import CapacitySolver
+    from core.inventory_ledger import load_warehouse_inventory
+
+WAREHOUSE_LABELS = {"feed": "Kho cám", "mix": "Kho mix"}
+
+# Lựa chọn "giữ công thức hiện tại của khu" trong danh sách preset
+KEEP_FORMULA = "(Giữ công thức hiện tại)"
+
+
+class CapacityWhatIfDialog(QDialog):
+    """Dialog nhập giả định và so sánh khả năng sản xuất với hiện tại"""
+
+    def __init__(self, formula_manager, area_names: List[str], parent=None):
+        """
+        Args:
+            formula_manager: FormulaManager (danh sách preset và liên kết mix)
+            area_names: Tên các khu theo thứ tự ("Khu 1", "Khu 2", ...)
+        """
+        super().__init__(parent)
+        self.formula_manager = formula_manager
+        self.area_names = list(area_names)
+        self.solver = CapacitySolver(formula_manager)
+        self.init_ui()
+
+    def init_ui(self):
+        """Khởi tạo giao diện"""
+        self.setWindowTitle("🏭 Giả Định Khả Năng Sản Xuất")
+        self.setMinimumSize(900, 700)
+
+        layout = QVBoxLayout(self)
+
+        header = QLabel("🏭 Giả Định Khả Năng Sản Xuất")
+        header.setFont(QFont("Arial", 16, QFont.Bold))
+        header.setAlignment(Qt.AlignCenter)
+        layout.addWidget(header)
+
+        layout.addWidget(self.create_stock_group())
+        layout.addWidget(self.create_area_group())
+
+        button_layout = QHBoxLayout()
+        calculate_button = QPushButton("▶️ Tính toán")
+        calculate_button.clicked.connect(self.calculate)
+        close_button = QPushButton("Đóng")
+        close_button.clicked.connect(self.reject)
+        button_layout.addStretch()
+        button_layout.addWidget(calculate_button)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.result_text = QTextEdit()
+        self.result_text.setReadOnly(True)
+        layout.addWidget(self.result_text, 1)
+
+    def _create_table(self, headers: List[str]) -> QTableWidget:
+        """Bảng danh sách giả định"""
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setMaximumHeight(140)
+        return table
+
+    def create_stock_group(self) -> QGroupBox:
+        """Nhóm nhập thay đổi tồn kho"""
+        group = QGroupBox("📦 Thay đổi tồn kho")
+        layout = QVBoxLayout(group)
+
+        input_layout = QHBoxLayout()
+        self.warehouse_combo = QComboBox()
+        for warehouse_type, label in WAREHOUSE_LABELS.items():
+            self.warehouse_combo.addItem(label, warehouse_type)
+        self.warehouse_combo.currentIndexChanged.connect(self.load_ingredients)
+
+        self.ingredient_combo = QComboBox()
+        self.ingredient_combo.setEditable(True)
+        self.ingredient_combo.setMinimumWidth(220)
+
+        self.stock_change_spin = QDoubleSpinBox()
+        self.stock_change_spin.setRange(-1000000, 1000000)
+        self.stock_change_spin.setDecimals(1)
+        self.stock_change_spin.setSuffix(" kg")
+        self.stock_change_spin.setValue(10000)
+
+        add_button = QPushButton("➕ Thêm")
+        add_button.clicked.connect(self.add_stock_change)
+        remove_button = QPushButton("🗑️ Xóa dòng")
+        remove_button.clicked.connect(lambda: self.remove_selected_row(self.stock_table))
+
+        for widget in (self.warehouse_combo, self.ingredient_combo, self.stock_change_spin, add_button, remove_button):
+            input_layout.addWidget(widget)
+        layout.addLayout(input_layout)
+
+        self.stock_table = self._create_table(["Kho", "Nguyên liệu", "Thay đổi (kg)"])
+        layout.addWidget(self.stock_table)
+
+        self.load_ingredients()
+        return group
+
+    def create_area_group(self) -> QGroupBox:
+        """Nhóm đổi công thức / số mẻ của khu"""
+        group = QGroupBox("🔄 Đổi công thức khu")
+        layout = QVBoxLayout(group)
+
+        input_layout = QHBoxLayout()
+        self.area_combo = QComboBox()
+        self.area_combo.addItems(self.area_names)
+
+        self.formula_combo = QComboBox()
+        self.formula_combo.addItem(KEEP_FORMULA)
+        self.formula_combo.addItems(self.formula_manager.get_feed_presets())
+        self.formula_combo.setMinimumWidth(220)
+
+        self.batches_spin = QDoubleSpinBox()
+        self.batches_spin.setRange(0, 1000)
+        self.batches_spin.setDecimals(1)
+        self.batches_spin.setSpecialValueText("Giữ số mẻ hiện tại")
+        self.batches_spin.setSuffix(" mẻ/ngày")
+
+        add_button = QPushButton("➕ Thêm")
+        add_button.clicked.connect(self.add_area_formula)
+        remove_button = QPushButton("🗑️ Xóa dòng")
+        remove_button.clicked.connect(lambda: self.remove_selected_row(self.area_table))
+
+        for widget in (self.area_combo, self.formula_combo, self.batches_spin, add_button, remove_button):
+            input_layout.addWidget(widget)
+        layout.addLayout(input_layout)
+
+        note = QLabel("Khu chưa có sản xuất trong 7 ngày gần nhất cần chọn công thức và nhập số mẻ/ngày")
+        note.setStyleSheet("color: #666666;")
+        layout.addWidget(note)
+
+        self.area_table = self._create_table(["Khu", "Công thức cám", "Số mẻ/ngày"])
+        layout.addWidget(self.area_table)
+        return group
+
+    def load_ingredients(self):
+        """Điền danh sách nguyên liệu của kho đang chọn"""
+        warehouse_type = self.warehouse_combo.currentData()
+        self.ingredient_combo.clear()
+        self.ingredient_combo.addItems(sorted(load_warehouse_inventory(warehouse_type).keys()))
+
+    def _append_row(self, table: QTableWidget, values: List[str], data=None):
+        """Thêm một dòng vào bảng, lưu dữ liệu gốc ở ô đầu tiên"""
+        row = table.rowCount()
+        table.insertRow(row)
+        for column, value in enumerate(values):
+            item = QTableWidgetItem(value)
+            if column == 0:
+                item.setData(Qt.UserRole, data)
+            table.setItem(row, column, item)
+
+    def remove_selected_row(self, table: QTableWidget):
+        """Xóa dòng đang chọn"""
+        row = table.currentRow()
+        if row >= 0:
+            table.removeRow(row)
+
+    def add_stock_change(self):
+        """Thêm thay đổi tồn kho vào danh sách"""
+        ingredient = self.ingredient_combo.currentText().strip()
+        amount = self.stock_change_spin.value()
+        if not ingredient or amount == 0:
+            return
+        warehouse_type = self.warehouse_combo.currentData()
+        self._append_row(self.stock_table,
+                         [WAREHOUSE_LABELS[warehouse_type], ingredient, f"{amount:+,.1f}"],
+                         (warehouse_type, ingredient, amount))
+
+    def add_area_formula(self):
+        """Thêm thay đổi công thức của một khu vào danh sách"""
+        area = self.area_combo.currentText()
+        formula = self.formula_combo.currentText()
+        batches = self.batches_spin.value()
+        if formula == KEEP_FORMULA and batches == 0:
+            return
+        change = {}
+        if formula != KEEP_FORMULA:
+            change['feed_formula'] = formula
+        if batches > 0:
+            change['batches_per_day'] = batches
+
+        # Mỗi khu chỉ một giả định: thay dòng cũ nếu có
+        for row in range(self.area_table.rowCount()):
+            if self.area_table.item(row, 0).text() == area:
+                self.area_table.removeRow(row)
+                break
+        self._append_row(self.area_table,
+                         [area, change.get('feed_formula', KEEP_FORMULA),
+                          f"{batches:.1f}" if batches > 0 else "Giữ nguyên"],
+                         (area, change))
+
+    def collect_scenario(self):
+        """Giả định đang nhập: (stock_changes, area_formulas)"""
+        stock_changes: Dict[str, Dict[str, float]] = {}
+        for row in range(self.stock_table.rowCount()):
+            warehouse_type, ingredient, amount = self.stock_table.item(row, 0).data(Qt.UserRole)
+            changes = stock_changes.setdefault(warehouse_type, {})
+            changes[ingredient] = changes.get(ingredient, 0.0) + amount
+
+        area_formulas = {}
+        for row in range(self.area_table.rowCount()):
+            area, change = self.area_table.item(row, 0).data(Qt.UserRole)
+            area_formulas[area] = change
+        return stock_changes, area_formulas
+
+    def calculate(self):
+        """Chạy giả định và hiển thị kết quả so sánh"""
+        stock_changes, area_formulas = self.collect_scenario()
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            result = self.solver.what_if(stock_changes, area_formulas)
+        except ValueError as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.warning(self, "Giả định không hợp lệ", str(e))
+            return
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            print(f"❌ [Capacity What-If] Error: {e}")
+            QMessageBox.critical(self, "Lỗi", f"Không thể tính giả định: {str(e)}")
+            return
+        QApplication.restoreOverrideCursor()
+
+        self.result_text.setPlainText(self.format_result(result))
+
+    @staticmethod
+    def _format_days(days) -> str:
+        return "∞" if days is None else f"{days:.1f} ngày"
+
+    def format_result(self, result: Dict) -> str:
+        """Nội dung so sánh hiện tại / giả định"""
+        baseline, scenario = result['baseline'], result['scenario']
+        lines = ["KẾ HOẠCH SẢN XUẤT (trung bình 7 ngày gần nhất)"]
+        lines.append(f"  Số mẻ/ngày: {baseline['plan']['batches_per_day']:.1f} → "
+                     f"{scenario['plan']['batches_per_day']:.1f}")
+        lines.append(f"  Đủ nguyên liệu: {self._format_days(baseline['plan']['days_of_supply'])} → "
+                     f"{self._format_days(scenario['plan']['days_of_supply'])}")
+
+        limiting = scenario['plan']['limiting_ingredients']
+        if limiting:
+            lines.append("  Nguyên liệu giới hạn (giả định):")
+            for item in limiting:
+                lines.append(f"    - {item['ingredient']} ({WAREHOUSE_LABELS[item['warehouse']]}): "
+                             f"tồn {item['stock']:,.1f} kg, dùng {item['daily_usage']:,.1f} kg/ngày")
+
+        lines.append("")
+        lines.append("SỐ MẺ TỐI ĐA THEO PRESET")
+        baseline_presets = baseline['catalog']['presets']
+        for name, preset in scenario['catalog']['presets'].items():
+            before = baseline_presets.get(name, {}).get('max_batches')
+            after = preset['max_batches']
+            marker = "  " if before == after else "* "
+            limits = ", ".join(item['ingredient'] for item in preset['limiting_ingredients'])
+            lines.append(f"{marker}{name}: {'∞' if before is None else before} → "
+                         f"{'∞' if after is None else after} mẻ"
+                         + (f" (giới hạn: {limits})" if limits else ""))
+        return "\n".join(lines)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Lazy Tabs - Dựng nội dung tab khi tab được mở lần đầu
+
+Mỗi trang của QTabWidget được thêm vào dưới dạng widget rỗng và đăng ký kèm hàm dựng giao
+diện (hàm setup_*_tab). Hàm dựng chỉ chạy khi tab được chọn lần đầu, hoặc được dựng trước
+từng tab một khi ứng dụng rảnh. Widget Qt chỉ được tạo trên luồng giao diện nên việc dựng
+trước dùng QTimer (mỗi lượt một tab) thay vì luồng nền.
+"""
+
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QTabWidget, QWidget
+
+# Thời gian chờ trước khi dựng trước các tab còn lại (ms)
+DEFAULT_PREBUILD_DELAY_MS = 3000
+
+# Khoảng nghỉ giữa hai lần dựng trước để giao diện vẫn phản hồi (ms)
+DEFAULT_PREBUILD_INTERVAL_MS = 400
+
+
+class LazyTabRegistry(QObject):
+    """Danh sách các tab dựng khi cần, theo trang (QWidget) của QTabWidget"""
+
+    # Phát sau khi một trang được dựng xong
+    tab_built = pyqtSignal(QWidget)
+
+    def __init__(self, tabs: QTabWidget, parent: QObject = None):
+        """
+        Args:
+            tabs: QTabWidget chứa các trang
+            parent: QObject cha (thường là cửa sổ chính)
+        """
+        super().__init__(parent)
+        self.tabs = tabs
+        self._builders: Dict[int, Callable[[], None]] = {}
+        self._built: Dict[int, bool] = {}
+        self._prebuild_queue: List[QWidget] = []
+        self._prebuild_interval_ms = DEFAULT_PREBUILD_INTERVAL_MS
+
+    def register(self, page: QWidget, builder: Callable[[], None], built: bool = False):
+        """
+        Đăng ký một trang
+
+        Args:
+            page: Trang đã được thêm vào QTabWidget
+            builder: Hàm dựng giao diện và tải dữ liệu của trang
+            built: True nếu trang đã được dựng sẵn
+        """
+        self._builders[id(page)] = builder
+        self._built[id(page)] = built
+
+    def is_built(self, page: Optional[QWidget]) -> bool:
+        """Trang đã được dựng chưa (trang không đăng ký được coi là đã dựng)"""
+        if page is None:
+            return False
+        return self._built.get(id(page), True)
+
+    def ensure_built(self, page: Optional[QWidget]) -> bool:
+        """
+        Dựng trang nếu chưa dựng
+
+        Returns:
+            True nếu trang vừa được dựng trong lần gọi này
+        """
+        if page is None or self.is_built(page):
+            return False
+
+        # Đánh dấu trước để hàm dựng gọi lại ensure_built không bị đệ quy
+        self._built[id(page)] = True
+        name = self.tabs.tabText(self.tabs.indexOf(page)) or page.objectName()
+        started = time.perf_counter()
+        try:
+            self._builders[id(page)]()
+        except Exception as e:
+            print(f"❌ [Lazy Tabs] Failed to build '{name}': {e}")
+            traceback.print_exc()
+            return False
+
+        print(f"🧱 [Lazy Tabs] Built '{name}' in {(time.perf_counter() - started) * 1000:.0f} ms")
+        self.tab_built.emit(page)
+        return True
+
+    def pending_pages(self) -> List[QWidget]:
+        """Các trang chưa dựng, theo thứ tự trên thanh tab"""
+        pages = [self.tabs.widget(index) for index in range(self.tabs.count())]
+        return [page for page in pages if page is not None and not self.is_built(page)]
+
+    def prebuild_when_idle(self, delay_ms: int = DEFAULT_PREBUILD_DELAY_MS,
+                           interval_ms: int = DEFAULT_PREBUILD_INTERVAL_MS):
+        """
+        Dựng trước các trang còn lại khi ứng dụng rảnh, mỗi lượt một trang
+
+        Args:
+            delay_ms: Thời gian chờ trước trang đầu tiên
+            interval_ms: Khoảng nghỉ giữa hai trang
+        """
+        self._prebuild_queue = self.pending_pages()
+        self._prebuild_interval_ms = interval_ms
+        if self._prebuild_queue:
+            QTimer.singleShot(delay_ms, self._prebuild_next)
+
+    def _prebuild_next(self):
+        # Bỏ qua các trang người dùng đã tự mở trong lúc chờ
+        while self._prebuild_queue and self.is_built(self._prebuild_queue[0]):
+            self._prebuild_queue.pop(0)
+        if not self._prebuild_queue:
+            return
+
+        self.ensure_built(self._prebuild_queue.pop(0))
+        if self._prebuild_queue:
+            QTimer.singleShot(self._prebuild_interval_ms, self._prebuild_next)
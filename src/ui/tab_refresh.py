@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tab Refresh - Làm mới tab theo cờ "bẩn" thay vì tải lại mỗi lần chuyển tab
+
+Mỗi tab khai báo các loại dữ liệu nó hiển thị (tồn kho, báo cáo, công thức, nhập kho...).
+Khi data_versions thông báo một loại dữ liệu thay đổi, các tab dùng loại đó được đánh dấu
+cần làm mới. Khi người dùng chuyển tới một tab, tab chỉ được làm mới nếu đang bị đánh dấu,
+và việc làm mới được hoãn một khoảng ngắn để chuyển tab liên tục không gây tải lại nhiều lần.
+"""
+
+import traceback
+from typing import Callable, Dict, Iterable, Optional
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QTabWidget, QWidget
+
+try:
+    from src.utils.data_versions import data_versions
+except ImportError:
+    from utils.data_versions import data_versions
+
+# Thời gian chờ sau lần chuyển tab cuối cùng trước khi làm mới (ms)
+DEFAULT_DEBOUNCE_MS = 150
+
+
+class _TabEntry:
+    """Thông tin làm mới của một tab"""
+
+    def __init__(self, name: str, kinds: Iterable[str], refresh: Callable[[], None]):
+        self.name = name
+        self.kinds = frozenset(kinds)
+        self.refresh = refresh
+        self.dirty = False
+
+
+class TabRefreshScheduler(QObject):
+    """Giữ cờ cần làm mới của từng tab và làm mới tab khi được mở (có hoãn)"""
+
+    # Thông báo thay đổi dữ liệu, chuyển về luồng giao diện (bump có thể chạy ở luồng nền)
+    _data_changed = pyqtSignal(str)
+
+    def __init__(self, tabs: QTabWidget, parent: QObject = None, debounce_ms: int = DEFAULT_DEBOUNCE_MS):
+        """
+        Args:
+            tabs: QTabWidget chứa các tab
+            parent: QObject cha (thường là cửa sổ chính)
+            debounce_ms: Thời gian hoãn làm mới sau lần chuyển tab cuối cùng
+        """
+        super().__init__(parent)
+        self.tabs = tabs
+        self._entries: Dict[int, _TabEntry] = {}
+        self._pending_page: Optional[QWidget] = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._refresh_pending)
+
+        self._data_changed.connect(self.mark_dirty)
+        data_versions.subscribe(self._on_data_version_bumped)
+
+    def register(self, page: QWidget, kinds: Iterable[str], refresh: Callable[[], None]):
+        """
+        Đăng ký một tab
+
+        Args:
+            page: Trang trong QTabWidget
+            kinds: Các loại dữ liệu (hằng trong data_versions) mà tab hiển thị
+            refresh: Hàm làm mới dữ liệu của tab
+        """
+        name = self.tabs.tabText(self.tabs.indexOf(page)) or page.objectName()
+        self._entries[id(page)] = _TabEntry(name, kinds, refresh)
+
+    def _on_data_version_bumped(self, kind: str, version: int):
+        try:
+            self._data_changed.emit(kind)
+        except RuntimeError:
+            # Cửa sổ đã đóng, đối tượng Qt đã bị hủy
+            data_versions.unsubscribe(self._on_data_version_bumped)
+
+    def mark_dirty(self, kind: str):
+        """Đánh dấu các tab hiển thị loại dữ liệu kind cần làm mới"""
+        for entry in self._entries.values():
+            if kind in entry.kinds:
+                entry.dirty = True
+
+    def mark_page_dirty(self, page: QWidget):
+        """Đánh dấu một tab cần làm mới ở lần mở tới"""
+        entry = self._entries.get(id(page))
+        if entry is not None:
+            entry.dirty = True
+
+    def mark_clean(self, page: QWidget):
+        """Đánh dấu tab vừa được làm mới bằng cách khác (ví dụ vừa dựng xong)"""
+        entry = self._entries.get(id(page))
+        if entry is not None:
+            entry.dirty = False
+
+    def is_dirty(self, page: QWidget) -> bool:
+        entry = self._entries.get(id(page))
+        return entry is not None and entry.dirty
+
+    def activate(self, page: QWidget):
+        """Tab page vừa được mở: hẹn làm mới nếu tab đang bị đánh dấu"""
+        self._pending_page = page
+        # Khởi động lại bộ hẹn giờ: chỉ tab cuối cùng trong loạt chuyển tab liên tục được làm mới
+        self._timer.start()
+
+    def _refresh_pending(self):
+        page, self._pending_page = self._pending_page, None
+        if page is None or page is not self.tabs.currentWidget():
+            return
+
+        entry = self._entries.get(id(page))
+        if entry is None or not entry.dirty:
+            return
+
+        # Bỏ cờ trước khi làm mới: thay đổi xảy ra trong lúc làm mới sẽ đánh dấu lại
+        entry.dirty = False
+        try:
+            entry.refresh()
+            print(f"🔄 [Tab Refresh] Refreshed '{entry.name}'")
+        except Exception as e:
+            entry.dirty = True
+            print(f"❌ [Tab Refresh] Failed to refresh '{entry.name}': {e}")
+            traceback.print_exc()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Table Models - Mô hình bảng ảo hóa (model/view) cho các bảng dữ liệu lớn
+
+Thay cho QTableWidget (mỗi ô một QTableWidgetItem với font, màu, tooltip riêng): dữ liệu được
+giữ dưới dạng danh sách tuple gọn, định dạng hiển thị chỉ được tính trong data() khi view vẽ
+các ô đang hiển thị. Sắp xếp và lọc đi qua RowFilterProxyModel nên không phải dựng lại bảng.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from PyQt5.QtCore import (Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel,
+                          QEvent, QRect, pyqtSignal)
+from PyQt5.QtGui import QColor, QBrush, QFont, QPainter
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle, QApplication
+
+# Vai trò dữ liệu dùng để sắp xếp (giá trị số/chuỗi thô thay vì chữ hiển thị)
+SORT_ROLE = Qt.UserRole + 1
+
+_brush_cache: Dict[str, QBrush] = {}
+
+
+def cached_brush(color: Optional[str]) -> Optional[QBrush]:
+    """QBrush dùng chung cho một mã màu (tránh tạo đối tượng mới cho mỗi ô)"""
+    if not color:
+        return None
+    brush = _brush_cache.get(color)
+    if brush is None:
+        brush = _brush_cache[color] = QBrush(QColor(color))
+    return brush
+
+
+class RowTableModel(QAbstractTableModel):
+    """
+    Mô hình bảng chỉ đọc trên danh sách hàng (tuple)
+
+    Lớp con khai báo HEADERS, ALIGNMENTS (cột -> căn lề) và cài đặt display(); các hàm
+    sort_key, foreground, background, font, tooltip là tùy chọn.
+    """
+
+    HEADERS: Sequence[str] = ()
+    ALIGNMENTS: Dict[int, int] = {}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: List[tuple] = []
+
+    # === Dữ liệu ===
+
+    def set_rows(self, rows: Iterable[tuple]):
+        """Thay toàn bộ dữ liệu"""
+        self.beginResetModel()
+        self._rows = list(rows)
+        self.endResetModel()
+
+    def append_rows(self, rows: Sequence[tuple]):
+        """Thêm một khối hàng vào cuối (dùng khi tải dần)"""
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def clear(self):
+        """Xóa toàn bộ dữ liệu"""
+        self.set_rows([])
+
+    def row_at(self, row: int) -> tuple:
+        """Hàng dữ liệu thô tại vị trí row (theo mô hình nguồn)"""
+        return self._rows[row]
+
+    def rows(self) -> List[tuple]:
+        """Tất cả hàng dữ liệu thô (không sửa trực tiếp)"""
+        return self._rows
+
+    # === Định dạng (lớp con cài đặt) ===
+
+    def display(self, row: tuple, column: int) -> str:
+        return str(row[column])
+
+    def sort_key(self, row: tuple, column: int) -> Any:
+        return self.display(row, column)
+
+    def foreground(self, row: tuple, column: int) -> Optional[str]:
+        return None
+
+    def background(self, row: tuple, column: int) -> Optional[str]:
+        return None
+
+    def font(self, row: tuple, column: int) -> Optional[QFont]:
+        return None
+
+    def tooltip(self, row: tuple, column: int) -> Optional[str]:
+        return None
+
+    # === QAbstractTableModel ===
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and section < len(self.HEADERS):
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            return self.display(row, column)
+        if role == SORT_ROLE:
+            return self.sort_key(row, column)
+        if role == Qt.TextAlignmentRole:
+            alignment = self.ALIGNMENTS.get(column)
+            return int(alignment) if alignment is not None else None
+        if role == Qt.ForegroundRole:
+            return cached_brush(self.foreground(row, column))
+        if role == Qt.BackgroundRole:
+            return cached_brush(self.background(row, column))
+        if role == Qt.FontRole:
+            return self.font(row, column)
+        if role == Qt.ToolTipRole:
+            return self.tooltip(row, column)
+        return None
+
+
+class RowFilterProxyModel(QSortFilterProxyModel):
+    """Proxy sắp xếp theo SORT_ROLE và lọc bằng hàm điều kiện trên hàng dữ liệu thô"""
+
+    def __init__(self, source_model: RowTableModel = None, parent=None):
+        super().__init__(parent)
+        self.setSortRole(SORT_ROLE)
+        self._row_filter: Optional[Callable[[tuple], bool]] = None
+        if source_model is not None:
+            self.setSourceModel(source_model)
+
+    def set_row_filter(self, predicate: Optional[Callable[[tuple], bool]]):
+        """Đặt điều kiện lọc (None = hiển thị tất cả)"""
+        self._row_filter = predicate
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._row_filter is None:
+            return True
+        return bool(self._row_filter(self.sourceModel().row_at(source_row)))
+
+    def row_at(self, proxy_row: int) -> tuple:
+        """Hàng dữ liệu thô tại vị trí đang hiển thị"""
+        source_index = self.mapToSource(self.index(proxy_row, 0))
+        return self.sourceModel().row_at(source_index.row())
+
+    def visible_rows(self) -> List[tuple]:
+        """Các hàng dữ liệu thô đang hiển thị, theo thứ tự hiển thị"""
+        return [self.row_at(proxy_row) for proxy_row in range(self.rowCount())]
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """Vẽ ô như một nút bấm (không tạo widget cho từng hàng) và phát clicked khi nhấn"""
+
+    clicked = pyqtSignal(QModelIndex)
+
+    def __init__(self, color: str, parent=None, text: str = None):
+        """
+        Args:
+            color: Màu nền nút
+            text: Chữ trên nút (None = dùng dữ liệu hiển thị của ô)
+        """
+        super().__init__(parent)
+        self.color = QColor(color)
+        self.text = text
+        self.button_font = QFont("Arial", 10, QFont.Bold)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = option.rect.adjusted(6, 6, -6, -6)
+        color = self.color.darker(112) if option.state & QStyle.State_MouseOver else self.color
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(color)
+        painter.drawRoundedRect(rect, 4, 4)
+        painter.setPen(QColor("white"))
+        painter.setFont(self.button_font)
+        painter.drawText(rect, Qt.AlignCenter, self.text if self.text is not None else str(index.data() or ""))
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton \
+                and option.rect.contains(event.pos()):
+            self.clicked.emit(index)
+            return True
+        return super().editorEvent(event, model, option, index)
+
+
+class TimestampDelegate(QStyledItemDelegate):
+    """Hiển thị 'ngày giờ' với phần ngày đậm và phần giờ mờ"""
+
+    DATE_COLOR = QColor("#2c2c2c")
+    TIME_COLOR = QColor("#888888")
+
+    def paint(self, painter, option, index):
+        self.initStyleOption(option, index)
+        text = option.text
+        option.text = ""
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ItemViewItem, option, painter, option.widget)
+
+        date_part, _, time_part = text.partition(" ")
+        date_font = QFont(option.font)
+        date_font.setWeight(QFont.DemiBold)
+        time_font = QFont(option.font)
+        time_font.setWeight(QFont.Normal)
+
+        painter.save()
+        painter.setFont(date_font)
+        date_width = painter.fontMetrics().horizontalAdvance(date_part)
+        painter.setFont(time_font)
+        time_width = painter.fontMetrics().horizontalAdvance(" " + time_part) if time_part else 0
+
+        # Căn giữa cả chuỗi trong ô
+        left = option.rect.left() + max(0, (option.rect.width() - date_width - time_width) // 2)
+        painter.setFont(date_font)
+        painter.setPen(self.DATE_COLOR)
+        painter.drawText(QRect(left, option.rect.top(), date_width, option.rect.height()),
+                         Qt.AlignVCenter | Qt.AlignLeft, date_part)
+        if time_part:
+            painter.setFont(time_font)
+            painter.setPen(self.TIME_COLOR)
+            painter.drawText(QRect(left + date_width, option.rect.top(), time_width, option.rect.height()),
+                             Qt.AlignVCenter | Qt.AlignLeft, " " + time_part)
+        painter.restore()
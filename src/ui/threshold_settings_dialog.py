@@ -1960,10 +1960,17 @@ class ThresholdSettingsDialog(QDialog):
 
             self.individual_table.setRowCount(len(individual_thresholds))
 
-            # Get current inventory status for display
-            avg_daily_usage = self.inventory_manager.analyze_consumption_patterns(7)
-            days_remaining = self.inventory_manager.calculate_days_until_empty(avg_daily_usage)
-            inventory = self.inventory_manager.get_inventory()
+            # Get current inventory status for display (shared usage analysis of the main window when available)
+            calculator = getattr(self.parent(), 'remaining_usage_calculator', None)
+            if calculator is not None:
+                snapshot = calculator.get_analysis_snapshot(7)
+                analysis = {**snapshot.get("feed", {}), **snapshot.get("mix", {})}
+                days_remaining = {name: data.get("remaining_days", float('inf')) for name, data in analysis.items()}
+                inventory = {name: data.get("current_amount", 0) for name, data in analysis.items()}
+            else:
+                avg_daily_usage = self.inventory_manager.analyze_consumption_patterns(7)
+                days_remaining = self.inventory_manager.calculate_days_until_empty(avg_daily_usage)
+                inventory = self.inventory_manager.get_inventory()
 
             row = 0
             for ingredient, thresholds in individual_thresholds.items():
@@ -0,0 +1,73 @@
+"""
+Data Versions - Bộ đếm phiên bản cho từng loại dữ liệu của ứng dụng
+
+Mỗi lần ghi tồn kho, báo cáo, ngưỡng cảnh báo, công thức hoặc nhập kho sẽ tăng phiên bản
+tương ứng. Các kết quả tính toán đắt (ví dụ phân tích số ngày còn lại) lưu kèm phiên bản của
+dữ liệu đầu vào và chỉ tính lại khi phiên bản thay đổi. Giao diện có thể đăng ký nhận thông
+báo mỗi khi một loại dữ liệu thay đổi (ví dụ để đánh dấu tab cần làm mới).
+"""
+
+import threading
+from typing import Callable, Dict, List, Tuple
+
+# Các loại dữ liệu được theo dõi
+INVENTORY = "inventory"
+REPORTS = "reports"
+THRESHOLDS = "thresholds"
+FORMULAS = "formulas"
+IMPORTS = "imports"
+
+
+class DataVersions:
+    """Phiên bản (số nguyên tăng dần) theo loại dữ liệu, kèm thông báo khi thay đổi"""
+
+    def __init__(self):
+        """Khởi tạo tất cả phiên bản bằng 0"""
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._listeners: List[Callable[[str, int], None]] = []
+
+    def bump(self, kind: str) -> int:
+        """Đánh dấu dữ liệu loại kind vừa thay đổi, trả về phiên bản mới"""
+        with self._lock:
+            version = self._versions.get(kind, 0) + 1
+            self._versions[kind] = version
+            listeners = list(self._listeners)
+
+        # Gọi ngoài khóa: listener có thể đọc lại phiên bản hoặc chạy trên luồng khác luồng giao diện
+        for listener in listeners:
+            try:
+                listener(kind, version)
+            except Exception as e:
+                print(f"⚠️ [Data Versions] Change listener failed for '{kind}': {e}")
+        return version
+
+    def get(self, *kinds: str) -> Tuple[int, ...]:
+        """Phiên bản hiện tại của các loại dữ liệu (theo thứ tự truyền vào)"""
+        with self._lock:
+            return tuple(self._versions.get(kind, 0) for kind in kinds)
+
+    def subscribe(self, listener: Callable[[str, int], None]):
+        """Đăng ký hàm listener(kind, version) được gọi sau mỗi lần bump (trên luồng gọi bump)"""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[str, int], None]):
+        """Hủy đăng ký listener"""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+
+# Global instance
+data_versions = DataVersions()
+
+# Convenience functions
+def bump_data_version(kind: str) -> int:
+    """Đánh dấu dữ liệu vừa thay đổi"""
+    return data_versions.bump(kind)
+
+def subscribe_data_changes(listener: Callable[[str, int], None]):
+    """Nhận thông báo mỗi khi một loại dữ liệu thay đổi"""
+    data_versions.subscribe(listener)
@@ -0,0 +1,194 @@
+"""One-shot importer that copies the JSON data tree into the configured database."""
+
+import json
+from pathlib import Path
+
+try:
+    from src.utils.persistent_paths import persistent_path_manager
+    from src.utils.report_files import (
+        parse_report_filename, parse_import_filename, parse_import_month_filename, summarize_report
+    )
+except ImportError:
+    from utils.persistent_paths import persistent_path_manager
+    from utils.report_files import (
+        parse_report_filename, parse_import_filename, parse_import_month_filename, summarize_report
+    )
+
+WAREHOUSE_TYPES = ("feed", "mix")
+
+
+def _read_json(file_path: Path, default=None):
+    """Read a JSON file, returning default when missing or unreadable."""
+    try:
+        if file_path.exists():
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"⚠️ [Database Import] Skipping unreadable file {file_path}: {e}")
+    return default
+
+
+def _import_inventory(db_store, config_path: Path) -> int:
+    """Import feed/mix inventory quantities together with bag sizes."""
+    total = 0
+    for warehouse_type in WAREHOUSE_TYPES:
+        inventory = _read_json(config_path / f"{warehouse_type}_inventory.json", {}) or {}
+        packaging = _read_json(config_path / f"{warehouse_type}_packaging_info.json", {}) or {}
+        if inventory:
+            db_store.save_warehouse(warehouse_type, inventory, packaging)
+            total += len(inventory)
+    return total
+
+
+def _import_formulas(db_store, config_path: Path, presets_path: Path) -> int:
+    """Import the active formulas and saved presets as 'type:current' / 'type_preset:name' rows."""
+    formulas = []
+    for warehouse_type in WAREHOUSE_TYPES:
+        formula = _read_json(config_path / f"{warehouse_type}_formula.json")
+        if formula:
+            formulas.append((f"{warehouse_type}:current", formula))
+
+        preset_dir = presets_path / warehouse_type
+        if preset_dir.exists():
+            for preset_file in sorted(preset_dir.glob("*.json")):
+                preset = _read_json(preset_file)
+                if preset:
+                    formulas.append((f"{warehouse_type}_preset:{preset_file.stem}", preset))
+
+    with db_store.db.get_cursor() as cur:
+        for name, components in formulas:
+            cur.execute(db_store._sql("DELETE FROM formulas WHERE name = ?"), (name,))
+            cur.execute(db_store._sql("INSERT INTO formulas (name, components) VALUES (?, ?)"),
+                        (name, json.dumps(components, ensure_ascii=False)))
+    return len(formulas)
+
+
+def _import_thresholds(db_store, data_path: Path) -> int:
+    """Import per-ingredient thresholds (critical_stock -> min, sufficient_stock -> max)."""
+    individual = _read_json(data_path / "individual_thresholds.json", {}) or {}
+
+    with db_store.db.get_cursor() as cur:
+        for ingredient, settings in individual.items():
+            if not isinstance(settings, dict):
+                continue
+            cur.execute(db_store._sql("""
+                INSERT INTO thresholds (product_name, min_threshold, max_threshold)
+                VALUES (?, ?, ?)
+                ON CONFLICT (product_name) DO UPDATE SET
+                    min_threshold = excluded.min_threshold,
+                    max_threshold = excluded.max_threshold,
+                    last_updated = CURRENT_TIMESTAMP
+            """), (ingredient,
+                   float(settings.get('critical_stock', 0) or 0),
+                   float(settings.get('sufficient_stock', 0) or 0)))
+    return len(individual)
+
+
+def _import_reports(db_store, reports_path: Path) -> int:
+    """Import daily report files with their summary columns and full content."""
+    if not reports_path.exists():
+        return 0
+
+    entries, contents = {}, {}
+    for report_file in sorted(reports_path.glob("report_*.json")):
+        date_str = parse_report_filename(report_file.name)
+        if not date_str:
+            continue
+
+        report_data = _read_json(report_file)
+        if not isinstance(report_data, dict):
+            continue
+
+        stat_result = report_file.stat()
+        entry = {
+            'date': date_str,
+            'path': str(report_file),
+            'mtime_ns': stat_result.st_mtime_ns,
+            'size': stat_result.st_size
+        }
+        entry.update(summarize_report(report_data))
+        entries[report_file.name] = entry
+        contents[report_file.name] = report_data
+
+    if entries:
+        db_store.upsert_reports(entries, contents)
+    return len(entries)
+
+
+def _import_import_history(db_store, imports_path: Path) -> int:
+    """Import import history from monthly files (imports_YYYY-MM.json) and legacy daily files."""
+    if not imports_path.exists():
+        return 0
+
+    with db_store.db.get_cursor() as cur:
+        cur.execute("DELETE FROM imports")
+
+    records_by_date = {}
+    for month_file in sorted(imports_path.glob("imports_*.json")):
+        if not parse_import_month_filename(month_file.name):
+            continue
+        month_data = _read_json(month_file, {}) or {}
+        for import_date, records in month_data.items():
+            if isinstance(records, list):
+                records_by_date.setdefault(import_date, []).extend(records)
+
+    for import_file in sorted(imports_path.glob("import_*.json")):
+        import_date = parse_import_filename(import_file.name)
+        if not import_date:
+            continue
+        records = _read_json(import_file, [])
+        if isinstance(records, list):
+            existing = records_by_date.setdefault(import_date, [])
+            existing.extend(r for r in records if r not in existing)
+
+    total = 0
+    for import_date, records in sorted(records_by_date.items()):
+        total += db_store.add_imports(import_date, [r for r in records if isinstance(r, dict)])
+    return total
+
+
+def import_json_tree(db_store=None, overwrite: bool = False) -> dict:
+    """
+    Copy inventory, formulas, thresholds, reports and import history from JSON into the database.
+
+    Args:
+        db_store: Target DatabaseStore, defaults to the configured store
+        overwrite: Import even when the database already holds inventory rows
+    """
+    if db_store is None:
+        try:
+            from src.utils.database_store import get_database_store
+        except ImportError:
+            from utils.database_store import get_database_store
+        db_store = get_database_store()
+
+    if db_store is None:
+        print("⚠️ [Database Import] No database backend configured (set DB_BACKEND=sqlite or postgres)")
+        return {}
+
+    if not overwrite and db_store.has_inventory():
+        print("ℹ️ [Database Import] Database already contains inventory, skipping import")
+        return {}
+
+    data_path = persistent_path_manager.data_path
+    summary = {
+        'inventory': _import_inventory(db_store, persistent_path_manager.config_path),
+        'formulas': _import_formulas(db_store, persistent_path_manager.config_path, data_path / "presets"),
+        'thresholds': _import_thresholds(db_store, data_path),
+        'reports': _import_reports(db_store, persistent_path_manager.reports_path),
+        'imports': _import_import_history(db_store, data_path / "imports")
+    }
+
+    print(f"✅ [Database Import] Imported {summary['inventory']} inventory items, "
+          f"{summary['formulas']} formulas, {summary['thresholds']} thresholds, "
+          f"{summary['reports']} reports, {summary['imports']} import records")
+    return summary
+
+
+def main():
+    import sys
+    import_json_tree(overwrite="--overwrite" in sys.argv)
+
+
+if __name__ == "__main__":
+    main()
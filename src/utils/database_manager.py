@@ -12,6 +12,9 @@ load_dotenv()
 class DatabaseManager:
     _instance = None
 
+    # Parameter placeholder used in SQL statements for this backend
+    placeholder = "%s"
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(DatabaseManager, cls).__new__(cls)
@@ -63,13 +66,19 @@ class DatabaseManager:
             cur.execute("""
                 CREATE TABLE IF NOT EXISTS inventory (
                     id SERIAL PRIMARY KEY,
-                    product_name VARCHAR(100) NOT NULL UNIQUE,
+                    product_name VARCHAR(100) NOT NULL,
                     quantity DECIMAL(10,2) NOT NULL DEFAULT 0,
                     bag_size INTEGER NOT NULL DEFAULT 0,
                     warehouse_type VARCHAR(10) NOT NULL,
                     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 );
             """)
+            # Rows are keyed by warehouse + product (older tables had UNIQUE(product_name))
+            cur.execute("ALTER TABLE inventory DROP CONSTRAINT IF EXISTS inventory_product_name_key;")
+            cur.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_inventory_warehouse_product
+                ON inventory(warehouse_type, product_name);
+            """)
             cur.execute("""
                 CREATE INDEX IF NOT EXISTS idx_inventory_product_name
                 ON inventory(product_name);
@@ -124,6 +133,46 @@ class DatabaseManager:
                 ON inventory_history(created_at);
             """)
 
+            # Create reports table (one row per daily report file)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    file_name VARCHAR(100) PRIMARY KEY,
+                    report_date VARCHAR(8) NOT NULL,
+                    file_path TEXT NOT NULL,
+                    mtime_ns BIGINT NOT NULL DEFAULT 0,
+                    file_size BIGINT NOT NULL DEFAULT 0,
+                    total_feed DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    total_mix DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    batch_count DECIMAL(10,2) NOT NULL DEFAULT 0,
+                    content JSONB
+                );
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_reports_report_date
+                ON reports(report_date);
+            """)
+
+            # Create imports table (one row per import record)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS imports (
+                    id SERIAL PRIMARY KEY,
+                    import_date VARCHAR(10) NOT NULL,
+                    timestamp VARCHAR(19),
+                    import_type VARCHAR(10),
+                    ingredient VARCHAR(100) NOT NULL,
+                    amount DECIMAL(12,2) NOT NULL DEFAULT 0,
+                    payload JSONB NOT NULL
+                );
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_imports_date_type
+                ON imports(import_date, import_type);
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_imports_ingredient
+                ON imports(ingredient);
+            """)
+
     def close(self):
         """Close the database connection."""
         if self.connection:
@@ -0,0 +1,292 @@
+"""Typed data access on top of a DatabaseManager (SQLite or Postgres)."""
+
+import json
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+try:
+    from src.utils.sqlite_database_manager import get_database_manager, SQLiteDatabaseManager
+except ImportError:
+    from utils.sqlite_database_manager import get_database_manager, SQLiteDatabaseManager
+
+
+def _decode_json(value):
+    """Postgres returns JSONB as dict/list, SQLite returns TEXT."""
+    if value is None:
+        return None
+    if isinstance(value, (bytes, str)):
+        return json.loads(value)
+    return value
+
+
+class DatabaseStore:
+    """Inventory, report and import storage backed by a DatabaseManager."""
+
+    def __init__(self, db_manager):
+        """Wrap a manager exposing get_cursor(), initialize_tables() and placeholder."""
+        self.db = db_manager
+        self.placeholder = getattr(db_manager, 'placeholder', '%s')
+
+    def _sql(self, query: str) -> str:
+        """Convert '?' parameter markers to the backend placeholder."""
+        if self.placeholder == '?':
+            return query
+        return query.replace('?', self.placeholder)
+
+    # === Inventory ===
+
+    def load_inventory(self, warehouse_type: str) -> Dict[str, float]:
+        """Load quantities for one warehouse."""
+        with self.db.get_cursor() as cur:
+            cur.execute(self._sql(
+                "SELECT product_name, quantity FROM inventory WHERE warehouse_type = ? ORDER BY product_name"
+            ), (warehouse_type,))
+            return {row['product_name']: float(row['quantity']) for row in cur.fetchall()}
+
+    def load_packaging(self, warehouse_type: str) -> Dict[str, int]:
+        """Load bag sizes for one warehouse."""
+        with self.db.get_cursor() as cur:
+            cur.execute(self._sql(
+                "SELECT product_name, bag_size FROM inventory WHERE warehouse_type = ? ORDER BY product_name"
+            ), (warehouse_type,))
+            return {row['product_name']: int(row['bag_size']) for row in cur.fetchall()}
+
+    def save_warehouse(self, warehouse_type: str, inventory: Dict[str, float],
+                       packaging: Dict[str, int]) -> None:
+        """Replace one warehouse's rows in a single transaction (rows are keyed by warehouse + product)."""
+        with self.db.get_cursor() as cur:
+            cur.execute(self._sql(
+                "SELECT product_name FROM inventory WHERE warehouse_type = ?"
+            ), (warehouse_type,))
+            existing = {row['product_name'] for row in cur.fetchall()}
+
+            for product_name in existing - set(inventory.keys()):
+                cur.execute(self._sql("DELETE FROM inventory WHERE warehouse_type = ? AND product_name = ?"),
+                            (warehouse_type, product_name))
+
+            for product_name, quantity in inventory.items():
+                cur.execute(self._sql("""
+                    INSERT INTO inventory (product_name, quantity, bag_size, warehouse_type, last_updated)
+                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT (warehouse_type, product_name) DO UPDATE SET
+                        quantity = excluded.quantity,
+                        bag_size = excluded.bag_size,
+                        last_updated = CURRENT_TIMESTAMP
+                """), (product_name, float(quantity), int(packaging.get(product_name, 0) or 0), warehouse_type))
+
+    def record_quantity_changes(self, movements: List[Dict[str, Any]],
+                                bag_sizes: Dict[str, int] = None) -> None:
+        """Upsert changed quantities and append them to inventory_history in one transaction.
+
+        Each movement holds warehouse, item, quantity (after the change), change and op.
+        """
+        bag_sizes = bag_sizes or {}
+        with self.db.get_cursor() as cur:
+            for movement in movements:
+                cur.execute(self._sql("""
+                    INSERT INTO inventory (product_name, quantity, bag_size, warehouse_type, last_updated)
+                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT (warehouse_type, product_name) DO UPDATE SET
+                        quantity = excluded.quantity,
+                        last_updated = CURRENT_TIMESTAMP
+                """), (movement['item'], float(movement['quantity']),
+                       int(bag_sizes.get(movement['item'], 0) or 0), movement['warehouse']))
+                cur.execute(self._sql("""
+                    INSERT INTO inventory_history (product_name, quantity_change, operation_type, notes)
+                    VALUES (?, ?, ?, ?)
+                """), (movement['item'], float(movement.get('change', 0)),
+                       movement.get('op', 'set'), movement['warehouse']))
+
+    def record_inventory_movements(self, movements: Iterable[Tuple[str, float, str, str]]) -> None:
+        """Append (product_name, quantity_change, operation_type, notes) rows to inventory_history."""
+        movements = list(movements)
+        if not movements:
+            return
+        with self.db.get_cursor() as cur:
+            cur.executemany(self._sql("""
+                INSERT INTO inventory_history (product_name, quantity_change, operation_type, notes)
+                VALUES (?, ?, ?, ?)
+            """), movements)
+
+    def has_inventory(self) -> bool:
+        """Check whether any inventory rows exist."""
+        with self.db.get_cursor() as cur:
+            cur.execute("SELECT COUNT(*) AS total FROM inventory")
+            return int(cur.fetchone()['total']) > 0
+
+    # === Reports ===
+
+    def load_report_entries(self) -> Dict[str, Dict[str, Any]]:
+        """Load report index entries keyed by file name (without report content)."""
+        with self.db.get_cursor() as cur:
+            cur.execute("""
+                SELECT file_name, report_date, file_path, mtime_ns, file_size,
+                       total_feed, total_mix, batch_count
+                FROM reports
+            """)
+            return {
+                row['file_name']: {
+                    'date': row['report_date'],
+                    'path': row['file_path'],
+                    'mtime_ns': int(row['mtime_ns']),
+                    'size': int(row['file_size']),
+                    'total_feed': float(row['total_feed']),
+                    'total_mix': float(row['total_mix']),
+                    'batch_count': float(row['batch_count'])
+                }
+                for row in cur.fetchall()
+            }
+
+    def upsert_reports(self, entries: Dict[str, Dict[str, Any]],
+                       contents: Dict[str, Dict[str, Any]] = None) -> None:
+        """Insert or update report rows; content is only overwritten when provided."""
+        contents = contents or {}
+        with self.db.get_cursor() as cur:
+            for file_name, entry in entries.items():
+                content = contents.get(file_name)
+                cur.execute(self._sql("""
+                    INSERT INTO reports (file_name, report_date, file_path, mtime_ns, file_size,
+                                         total_feed, total_mix, batch_count, content)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (file_name) DO UPDATE SET
+                        report_date = excluded.report_date,
+                        file_path = excluded.file_path,
+                        mtime_ns = excluded.mtime_ns,
+                        file_size = excluded.file_size,
+                        total_feed = excluded.total_feed,
+                        total_mix = excluded.total_mix,
+                        batch_count = excluded.batch_count,
+                        content = COALESCE(excluded.content, reports.content)
+                """), (
+                    file_name, entry['date'], entry['path'], entry['mtime_ns'], entry['size'],
+                    entry['total_feed'], entry['total_mix'], entry['batch_count'],
+                    json.dumps(content, ensure_ascii=False) if content is not None else None
+                ))
+
+    def delete_reports(self, file_names: Iterable[str]) -> None:
+        """Delete report rows by file name."""
+        with self.db.get_cursor() as cur:
+            for file_name in file_names:
+                cur.execute(self._sql("DELETE FROM reports WHERE file_name = ?"), (file_name,))
+
+    def query_reports(self, from_date: str = None, to_date: str = None) -> List[Dict[str, Any]]:
+        """Indexed date-range query over reports (YYYYMMDD, inclusive), newest first."""
+        conditions, params = [], []
+        if from_date:
+            conditions.append("report_date >= ?")
+            params.append(from_date)
+        if to_date:
+            conditions.append("report_date <= ?")
+            params.append(to_date)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.db.get_cursor() as cur:
+            cur.execute(self._sql(f"""
+                SELECT report_date, file_path, total_feed, total_mix, batch_count
+                FROM reports {where}
+                ORDER BY report_date DESC
+            """), tuple(params))
+            return [
+                {
+                    'date': row['report_date'],
+                    'path': row['file_path'],
+                    'total_feed': float(row['total_feed']),
+                    'total_mix': float(row['total_mix']),
+                    'batch_count': float(row['batch_count'])
+                }
+                for row in cur.fetchall()
+            ]
+
+    def get_report_content(self, report_date: str) -> Optional[Dict[str, Any]]:
+        """Get stored report content for a YYYYMMDD date."""
+        with self.db.get_cursor() as cur:
+            cur.execute(self._sql(
+                "SELECT content FROM reports WHERE report_date = ? AND content IS NOT NULL ORDER BY file_name LIMIT 1"
+            ), (report_date,))
+            row = cur.fetchone()
+            return _decode_json(row['content']) if row else None
+
+    # === Imports ===
+
+    def add_imports(self, import_date: str, records: Iterable[Dict[str, Any]]) -> int:
+        """Insert import records for a YYYY-MM-DD date in one transaction."""
+        count = 0
+        with self.db.get_cursor() as cur:
+            for record in records:
+                cur.execute(self._sql("""
+                    INSERT INTO imports (import_date, timestamp, import_type, ingredient, amount, payload)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """), (
+                    import_date,
+                    record.get('timestamp', ''),
+                    (record.get('type') or '').lower(),
+                    record.get('ingredient', ''),
+                    float(record.get('amount', 0) or 0),
+                    json.dumps(record, ensure_ascii=False)
+                ))
+                count += 1
+        return count
+
+    def query_imports(self, from_date: str = None, to_date: str = None,
+                      import_type: str = None) -> List[Dict[str, Any]]:
+        """Indexed date-range query over imports (YYYY-MM-DD, inclusive) in insertion order."""
+        conditions, params = [], []
+        if from_date:
+            conditions.append("import_date >= ?")
+            params.append(from_date)
+        if to_date:
+            conditions.append("import_date <= ?")
+            params.append(to_date)
+        if import_type:
+            conditions.append("import_type = ?")
+            params.append(import_type)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.db.get_cursor() as cur:
+            cur.execute(self._sql(f"""
+                SELECT import_date, payload FROM imports {where}
+                ORDER BY import_date, id
+            """), tuple(params))
+
+            records = []
+            for row in cur.fetchall():
+                record = _decode_json(row['payload'])
+                record['date'] = row['import_date']
+                records.append(record)
+            return records
+
+
+_database_store = None
+_database_store_checked = False
+
+
+def get_database_store() -> Optional[DatabaseStore]:
+    """Return the shared DatabaseStore, or None when the JSON file backend is configured."""
+    global _database_store, _database_store_checked
+
+    if _database_store_checked:
+        return _database_store
+    _database_store_checked = True
+
+    try:
+        manager = get_database_manager()
+        if manager is None:
+            return None
+
+        is_new_database = getattr(manager, 'is_new_database', False)
+        manager.initialize_tables()
+        _database_store = DatabaseStore(manager)
+        print(f"🗄️ [Database Store] Using {type(manager).__name__}")
+
+        # A freshly created SQLite file starts from the existing JSON data
+        if isinstance(manager, SQLiteDatabaseManager) and is_new_database:
+            try:
+                from src.utils.database_importer import import_json_tree
+            except ImportError:
+                from utils.database_importer import import_json_tree
+            import_json_tree(_database_store)
+
+    except Exception as e:
+        print(f"❌ [Database Store] Database backend unavailable, using JSON files: {e}")
+        _database_store = None
+
+    return _database_store
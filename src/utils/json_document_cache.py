@@ -0,0 +1,154 @@
+"""
+JSON Document Cache - Bộ nhớ đệm dùng chung cho các file JSON đã giải mã
+
+Mỗi file được đọc và giải mã một lần, sau đó dùng lại cho tới khi (mtime_ns, kích thước)
+thay đổi. Các lần ghi của chính ứng dụng đi qua save() hoặc gọi invalidate() để không
+phụ thuộc vào độ phân giải mtime của hệ thống file.
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Union
+
+PathLike = Union[str, Path]
+
+# Đánh dấu file không tồn tại trong cache
+_MISSING = object()
+
+
+def _copy_json(value):
+    """Sao chép sâu dữ liệu JSON (dict/list/giá trị đơn), nhanh hơn copy.deepcopy"""
+    if isinstance(value, dict):
+        return {key: _copy_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(item) for item in value]
+    return value
+
+
+class JsonDocumentCache:
+    """Cache tài liệu JSON theo đường dẫn, kiểm tra hợp lệ bằng (mtime_ns, kích thước)"""
+
+    def __init__(self):
+        """Khởi tạo cache rỗng"""
+        self._lock = threading.RLock()
+        # Đường dẫn tuyệt đối -> ((mtime_ns, size), dữ liệu đã giải mã)
+        self._documents: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+        # Đường dẫn tuyệt đối -> {'hits', 'misses', 'invalidations'}
+        self._file_stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def _key(file_path: PathLike) -> str:
+        """Khóa cache: đường dẫn tuyệt đối đã chuẩn hóa"""
+        return os.path.abspath(os.fspath(file_path))
+
+    def _count(self, key: str, counter: str):
+        """Tăng bộ đếm của một file"""
+        stats = self._file_stats.get(key)
+        if stats is None:
+            stats = self._file_stats[key] = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        stats[counter] += 1
+
+    def load(self, file_path: PathLike, default: Any = None, copy: bool = True) -> Any:
+        """
+        Đọc file JSON qua cache
+
+        Args:
+            file_path: Đường dẫn file
+            default: Giá trị trả về khi file không tồn tại hoặc không đọc được
+            copy: Trả về bản sao (mặc định); dùng False khi chỉ đọc để tránh chi phí sao chép
+
+        Raises:
+            Không ném lỗi; lỗi đọc/giải mã được in ra và trả về default
+        """
+        key = self._key(file_path)
+        try:
+            stat_result = os.stat(key)
+        except OSError:
+            with self._lock:
+                self._documents.pop(key, None)
+            return default
+        signature = (stat_result.st_mtime_ns, stat_result.st_size)
+
+        with self._lock:
+            cached = self._documents.get(key)
+            if cached is not None and cached[0] == signature:
+                self._count(key, 'hits')
+                data = cached[1]
+                return _copy_json(data) if copy else data
+            self._count(key, 'misses')
+
+        try:
+            with open(key, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ [JSON Cache] Could not read {key}: {e}")
+            return default
+
+        with self._lock:
+            self._documents[key] = (signature, data)
+        return _copy_json(data) if copy else data
+
+    def save(self, file_path: PathLike, data: Any, indent: Optional[int] = 4) -> None:
+        """
+        Ghi file JSON (ghi tạm rồi đổi tên) và cập nhật cache với dữ liệu vừa ghi
+
+        Raises:
+            OSError, TypeError: Khi không ghi được file; người gọi tự xử lý như khi dùng json.dump
+        """
+        key = self._key(file_path)
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+
+        temp_path = key + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        os.replace(temp_path, key)
+
+        stat_result = os.stat(key)
+        with self._lock:
+            self._documents[key] = ((stat_result.st_mtime_ns, stat_result.st_size), _copy_json(data))
+
+    def invalidate(self, file_path: PathLike = None):
+        """Bỏ một file khỏi cache (None = toàn bộ), gọi sau khi ứng dụng tự ghi file"""
+        with self._lock:
+            if file_path is None:
+                for key in self._documents:
+                    self._count(key, 'invalidations')
+                self._documents.clear()
+                return
+
+            key = self._key(file_path)
+            if self._documents.pop(key, None) is not None:
+                self._count(key, 'invalidations')
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Thống kê hit/miss tổng và theo từng file"""
+        with self._lock:
+            hits = sum(stats['hits'] for stats in self._file_stats.values())
+            misses = sum(stats['misses'] for stats in self._file_stats.values())
+            lookups = hits + misses
+            return {
+                'cached_documents': len(self._documents),
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / lookups * 100, 1) if lookups else 0.0,
+                'files': {key: dict(stats) for key, stats in self._file_stats.items()}
+            }
+
+
+# Global instance
+json_document_cache = JsonDocumentCache()
+
+# Convenience functions
+def load_json_document(file_path: PathLike, default: Any = None, copy: bool = True) -> Any:
+    """Đọc file JSON qua cache dùng chung"""
+    return json_document_cache.load(file_path, default, copy)
+
+def save_json_document(file_path: PathLike, data: Any, indent: Optional[int] = 4) -> None:
+    """Ghi file JSON và cập nhật cache dùng chung"""
+    json_document_cache.save(file_path, data, indent)
+
+def invalidate_json_document(file_path: PathLike = None):
+    """Bỏ file khỏi cache dùng chung"""
+    json_document_cache.invalidate(file_path)
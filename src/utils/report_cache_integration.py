@@ -12,11 +12,15 @@ from typing import Dict, Any, Optional, List, Callable
 try:
     from src.services.daily_report_calculator import daily_report_calculator
     from src.services.cached_report_viewer import cached_report_viewer
-    from src.services.report_cache_manager import report_cache_manager, monitor_and_invalidate_cache
+    from src.services.report_cache_manager import (
+        report_cache_manager, cache_invalidation_service, monitor_and_invalidate_cache
+    )
 except ImportError:
     from services.daily_report_calculator import daily_report_calculator
     from services.cached_report_viewer import cached_report_viewer
-    from services.report_cache_manager import report_cache_manager, monitor_and_invalidate_cache
+    from services.report_cache_manager import (
+        report_cache_manager, cache_invalidation_service, monitor_and_invalidate_cache
+    )
 
 class ReportCacheIntegration:
     """Tích hợp cache báo cáo vào ứng dụng chính"""
@@ -26,6 +30,10 @@ class ReportCacheIntegration:
         self.calculator = daily_report_calculator
         self.viewer = cached_report_viewer
         self.cache_manager = report_cache_manager
+
+        # Theo dõi thay đổi file báo cáo/cấu hình (chỉ bắt đầu khi đã có QApplication)
+        self.invalidation_service = cache_invalidation_service
+        self.invalidation_service.start()
         
         # Callback functions for UI updates
         self.progress_callback = None
@@ -53,6 +61,7 @@ class ReportCacheIntegration:
     def load_daily_report_for_ui(self, report_date: str, show_progress: bool = True) -> Optional[Dict[str, Any]]:
         """Tải báo cáo hàng ngày cho UI với progress tracking"""
         try:
+            self.invalidation_service.start()
             if show_progress:
                 self._update_progress(10)
                 self._update_status("Đang kiểm tra cache...")
@@ -185,6 +194,14 @@ class ReportCacheIntegration:
                 'cache_size_mb': cache_stats.get('total_size_mb', 0),
                 'recent_reports': cache_stats.get('recent_entries_24h', 0),
                 'cache_validity_hours': cache_stats.get('cache_validity_hours', 24),
+                'max_cache_mb': cache_stats.get('max_cache_mb', 0),
+                'max_cache_entries': cache_stats.get('max_cache_entries', 0),
+                'eviction_policy': cache_stats.get('eviction_policy', 'lru'),
+                'evictions': cache_stats.get('budget_evictions', 0),
+                'expired_evictions': cache_stats.get('expired_evictions', 0),
+                'reclaimed_mb': round(cache_stats.get('bytes_reclaimed', 0) / (1024 * 1024), 2),
+                'last_eviction': cache_stats.get('last_eviction'),
+                'hit_rate': cache_stats.get('hit_rate', 0.0),
                 'specific_report': None
             }
             
@@ -0,0 +1,94 @@
+"""
+Report Files - Các hàm tiện ích cho tên file và nội dung báo cáo hàng ngày
+"""
+
+from typing import Dict, Any, Optional
+
+
+def parse_report_filename(file_name: str) -> Optional[str]:
+    """Trích xuất ngày YYYYMMDD từ tên file báo cáo, None nếu không phải file báo cáo ngày"""
+    if not (file_name.startswith('report_') and file_name.endswith('.json')):
+        return None
+
+    date_str = file_name[7:-5]  # Bỏ 'report_' và '.json'
+
+    # Hỗ trợ cả hai định dạng: YYYYMMDD và YYYY-MM-DD
+    if len(date_str) == 8 and date_str.isdigit():
+        return date_str
+    if len(date_str) == 10 and date_str.count('-') == 2:
+        parts = date_str.split('-')
+        if len(parts) == 3 and all(part.isdigit() for part in parts):
+            year, month, day = parts
+            return f"{year}{month}{day}"
+
+    # Bỏ qua file backup/temp (report_YYYYMMDD_backup_*.json, ...)
+    return None
+
+
+def parse_import_filename(file_name: str) -> Optional[str]:
+    """Trích xuất ngày YYYY-MM-DD từ tên file nhập kho (import_YYYY-MM-DD.json)"""
+    if not (file_name.startswith('import_') and file_name.endswith('.json')):
+        return None
+
+    date_str = file_name[7:-5]  # Bỏ 'import_' và '.json'
+    parts = date_str.split('-')
+    if len(parts) == 3 and len(date_str) == 10 and all(part.isdigit() for part in parts):
+        return date_str
+
+    return None
+
+
+def summarize_report(report_data: Dict[str, Any]) -> Dict[str, float]:
+    """Tính tổng cám, tổng mix và số mẻ của một báo cáo"""
+    # Ưu tiên sử dụng dữ liệu đã tính toán sẵn trong báo cáo
+    if "total_feed" in report_data and "total_mix" in report_data and "batch_count" in report_data:
+        return {
+            "total_feed": report_data["total_feed"],
+            "total_mix": report_data["total_mix"],
+            "batch_count": report_data["batch_count"]
+        }
+
+    total_feed = 0
+    total_mix = 0
+    batch_count = 0
+
+    mix_ingredients = report_data.get("mix_ingredients", {})
+    if isinstance(mix_ingredients, dict):
+        for amount in mix_ingredients.values():
+            if isinstance(amount, (int, float)):
+                total_mix += amount
+
+    # Tổng lượng cám BAO GỒM cả "Nguyên liệu tổ hợp"
+    feed_ingredients = report_data.get("feed_ingredients", {})
+    if isinstance(feed_ingredients, dict):
+        for amount in feed_ingredients.values():
+            if isinstance(amount, (int, float)):
+                total_feed += amount
+
+    # Tính tổng số mẻ từ dữ liệu sử dụng
+    feed_usage = report_data.get("feed_usage", {})
+    if isinstance(feed_usage, dict):
+        for farms in feed_usage.values():
+            for shifts in farms.values():
+                for value in shifts.values():
+                    if isinstance(value, (int, float)):
+                        batch_count += value
+
+    return {
+        "total_feed": total_feed,
+        "total_mix": total_mix,
+        "batch_count": batch_count
+    }
+
+
+def parse_import_month_filename(file_name: str) -> Optional[str]:
+    """Trích xuất tháng YYYY-MM từ tên file nhập kho theo tháng (imports_YYYY-MM.json)"""
+    if not (file_name.startswith('imports_') and file_name.endswith('.json')):
+        return None
+
+    month_str = file_name[8:-5]  # Bỏ 'imports_' và '.json'
+    parts = month_str.split('-')
+    if len(parts) == 2 and len(month_str) == 7 and all(part.isdigit() for part in parts):
+        return month_str
+
+    return None
@@ -0,0 +1,286 @@
+"""Embedded SQLite backend implementing the DatabaseManager interface."""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    # python-dotenv is optional for the embedded backend
+    pass
+
+try:
+    from src.utils.persistent_paths import persistent_path_manager
+except ImportError:
+    from utils.persistent_paths import persistent_path_manager
+
+# Storage backends selectable through the DB_BACKEND environment variable
+BACKEND_JSON = "json"
+BACKEND_SQLITE = "sqlite"
+BACKEND_POSTGRES = "postgres"
+
+DEFAULT_DATABASE_FILE = "wan_ly_kho_cam_mix.db"
+
+# Inventory rows are keyed by warehouse + product: the same ingredient may be stocked in both warehouses
+INVENTORY_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_name VARCHAR(100) NOT NULL,
+        quantity REAL NOT NULL DEFAULT 0,
+        bag_size INTEGER NOT NULL DEFAULT 0,
+        warehouse_type VARCHAR(10) NOT NULL,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (warehouse_type, product_name)
+    );
+"""
+
+
+class SQLiteDatabaseManager:
+    """Single-file SQLite database with the same API as the Postgres DatabaseManager."""
+
+    _instance = None
+
+    # Parameter placeholder used in SQL statements for this backend
+    placeholder = "?"
+
+    def __new__(cls, database_path=None):
+        if cls._instance is None:
+            cls._instance = super(SQLiteDatabaseManager, cls).__new__(cls)
+            cls._instance.connection = None
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, database_path=None):
+        """Initialize database file location."""
+        if self._initialized:
+            return
+
+        if database_path is None:
+            database_path = os.getenv(
+                'DB_SQLITE_PATH',
+                str(persistent_path_manager.data_path / DEFAULT_DATABASE_FILE)
+            )
+
+        self.database_path = Path(database_path)
+        self.is_new_database = not self.database_path.exists()
+        self._lock = threading.RLock()
+        self._initialized = True
+
+    def _connect(self):
+        """Open the SQLite connection with settings suited to a desktop app."""
+        self.database_path.parent.mkdir(parents=True, exist_ok=True)
+
+        connection = sqlite3.connect(
+            str(self.database_path),
+            timeout=30,
+            check_same_thread=False
+        )
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL;")
+        connection.execute("PRAGMA synchronous=NORMAL;")
+        connection.execute("PRAGMA foreign_keys=ON;")
+        return connection
+
+    @contextmanager
+    def get_connection(self):
+        """Get a database connection; commits on success and rolls back on error."""
+        with self._lock:
+            if self.connection is None:
+                try:
+                    self.connection = self._connect()
+                except Exception as e:
+                    print(f"Error connecting to SQLite database {self.database_path}: {e}")
+                    raise
+
+            try:
+                yield self.connection
+            except Exception:
+                self.connection.rollback()
+                raise
+            else:
+                self.connection.commit()
+
+    @contextmanager
+    def get_cursor(self):
+        """Get a database cursor; rows support both index and column-name access."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _migrate_inventory_key(cur):
+        """Rebuild an inventory table created with UNIQUE(product_name) so it is keyed by warehouse + product."""
+        cur.execute("PRAGMA index_list(inventory)")
+        for index in cur.fetchall():
+            if not index['unique']:
+                continue
+            cur.execute(f"PRAGMA index_info('{index['name']}')")
+            if [column['name'] for column in cur.fetchall()] == ['product_name']:
+                break
+        else:
+            return
+
+        print("🔄 [SQLite] Migrating inventory table to a (warehouse_type, product_name) key")
+        cur.execute(INVENTORY_TABLE_SQL.format(table="inventory_migrated"))
+        cur.execute("""
+            INSERT INTO inventory_migrated (id, product_name, quantity, bag_size, warehouse_type, last_updated)
+            SELECT id, product_name, quantity, bag_size, warehouse_type, last_updated FROM inventory
+        """)
+        cur.execute("DROP TABLE inventory")
+        cur.execute("ALTER TABLE inventory_migrated RENAME TO inventory")
+
+    def initialize_tables(self):
+        """Create necessary database tables if they don't exist."""
+        with self.get_cursor() as cur:
+            # Create inventory table (one row per product in each warehouse)
+            cur.execute(INVENTORY_TABLE_SQL.format(table="inventory"))
+            self._migrate_inventory_key(cur)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_inventory_product_name
+                ON inventory(product_name);
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_inventory_warehouse_type
+                ON inventory(warehouse_type);
+            """)
+
+            # Create formulas table
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS formulas (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name VARCHAR(100) NOT NULL,
+                    components TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_formulas_name
+                ON formulas(name);
+            """)
+
+            # Create thresholds table
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS thresholds (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    product_name VARCHAR(100) NOT NULL UNIQUE,
+                    min_threshold REAL NOT NULL,
+                    max_threshold REAL NOT NULL,
+                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_thresholds_product_name
+                ON thresholds(product_name);
+            """)
+
+            # Create inventory_history table
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS inventory_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    product_name VARCHAR(100) NOT NULL,
+                    quantity_change REAL NOT NULL,
+                    operation_type VARCHAR(20) NOT NULL,
+                    notes TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_inventory_history_product_name
+                ON inventory_history(product_name);
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_inventory_history_created_at
+                ON inventory_history(created_at);
+            """)
+
+            # Create reports table (one row per daily report file)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    file_name VARCHAR(100) PRIMARY KEY,
+                    report_date VARCHAR(8) NOT NULL,
+                    file_path TEXT NOT NULL,
+                    mtime_ns INTEGER NOT NULL DEFAULT 0,
+                    file_size INTEGER NOT NULL DEFAULT 0,
+                    total_feed REAL NOT NULL DEFAULT 0,
+                    total_mix REAL NOT NULL DEFAULT 0,
+                    batch_count REAL NOT NULL DEFAULT 0,
+                    content TEXT
+                );
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_reports_report_date
+                ON reports(report_date);
+            """)
+
+            # Create imports table (one row per import record)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS imports (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    import_date VARCHAR(10) NOT NULL,
+                    timestamp VARCHAR(19),
+                    import_type VARCHAR(10),
+                    ingredient VARCHAR(100) NOT NULL,
+                    amount REAL NOT NULL DEFAULT 0,
+                    payload TEXT NOT NULL
+                );
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_imports_date_type
+                ON imports(import_date, import_type);
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_imports_ingredient
+                ON imports(ingredient);
+            """)
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            if self.connection:
+                self.connection.close()
+                self.connection = None
+
+    def test_connection(self):
+        """Test the database connection."""
+        try:
+            with self.get_cursor() as cur:
+                cur.execute("SELECT sqlite_version() AS version;")
+                version = cur.fetchone()
+                print(f"Successfully opened SQLite database {self.database_path}. Version: {version['version']}")
+                return True
+        except Exception as e:
+            print(f"Error testing database connection: {e}")
+            return False
+
+
+def get_storage_backend():
+    """Return the configured storage backend name (json, sqlite or postgres)."""
+    backend = os.getenv('DB_BACKEND', BACKEND_JSON).strip().lower()
+    if backend not in (BACKEND_JSON, BACKEND_SQLITE, BACKEND_POSTGRES):
+        print(f"Unknown DB_BACKEND '{backend}', falling back to {BACKEND_JSON}")
+        return BACKEND_JSON
+    return backend
+
+
+def get_database_manager():
+    """Return the database manager for the configured backend, or None for plain JSON files."""
+    backend = get_storage_backend()
+
+    if backend == BACKEND_SQLITE:
+        return SQLiteDatabaseManager()
+
+    if backend == BACKEND_POSTGRES:
+        try:
+            from src.utils.database_manager import DatabaseManager
+        except ImportError:
+            from utils.database_manager import DatabaseManager
+        return DatabaseManager()
+
+    return None